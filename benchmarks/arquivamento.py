@@ -0,0 +1,166 @@
+"""Benchmark do arquivo mensal: banco principal e checkout antes e depois de arquivar.
+
+Sobre um banco do gerador (benchmarks/gerador.py), mede o tamanho das tabelas
+e índices de pedidos e caixa (pelo dbstat, se o SQLite tiver) e a latência do
+checkout e de um lançamento no caixa. Guarda os resultados que passam pela
+fachada do arquivo (pedidos de clientes, conciliação e saldo dos caixas,
+histórico dos clientes, resumos reconstruídos e, com pandas, os itens de
+extrair_itens), arquiva tudo que é anterior a --horizonte dias do último
+pedido, compacta o banco e repete as medidas, conferindo que cada resultado é
+igual ao de antes.
+
+Uso: python benchmarks/arquivamento.py [--banco dados.db] [--horizonte 30] [--checkouts 500]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from farmasil import arquivamento, manutencao, vendas
+from farmasil.banco import criar_engine, criar_fabrica_sessao, unidade_de_trabalho
+from farmasil.modelos import Caixa, Cliente, Pedido, VendaDiaria, VendaDiariaProduto
+
+from gerador import adicionar_argumentos, criar_banco, escala_dos_argumentos, nome_produto
+
+TABELAS = ('pedidos', 'itens_pedido', 'registros_caixa', 'checkpoints_caixa')
+
+
+def tamanhos(engine):
+    """{tabela: (páginas da tabela, páginas dos índices)} das TABELAS, ou None sem o dbstat."""
+    with engine.connect() as conexao:
+        try:
+            linhas = conexao.exec_driver_sql(
+                "SELECT m.tbl_name, m.type, count(*) FROM dbstat d JOIN sqlite_master m ON m.name = d.name "
+                "GROUP BY m.tbl_name, m.type").all()
+        except OperationalError:
+            return None
+    paginas = {}
+    for tabela, tipo, quantidade in linhas:
+        if tabela in TABELAS:
+            dados, indices = paginas.get(tabela, (0, 0))
+            paginas[tabela] = (dados + quantidade, indices) if tipo == 'table' else (dados, indices + quantidade)
+    return paginas
+
+
+def latencias(fabrica, escala, quantidade, semente):
+    """Milissegundos de `quantidade` checkouts e de outros tantos lançamentos no caixa."""
+    rng = random.Random(semente)
+    checkouts, lancamentos = [], []
+    with unidade_de_trabalho(fabrica) as sessao, contextlib.redirect_stdout(io.StringIO()):
+        caixa = sessao.get(Caixa, 1)
+        for _ in range(quantidade):
+            loja_id = 1 + rng.randrange(escala['lojas'])
+            itens = [{'nome': nome_produto(loja_id, rng.randrange(escala['produtos_por_loja'])), 'quantidade': 1}
+                     for _ in range(rng.randint(1, 4))]
+            inicio = time.perf_counter()
+            Pedido.finalizar_pedido(sessao, 1 + rng.randrange(escala['clientes']), loja_id, itens)
+            checkouts.append((time.perf_counter() - inicio) * 1000)
+            inicio = time.perf_counter()
+            caixa.registrar_entrada(sessao, 10)
+            lancamentos.append((time.perf_counter() - inicio) * 1000)
+    return checkouts, lancamentos
+
+
+def resultados(fabrica, escala):
+    """Tudo que lê pedidos ou movimentos, hoje pela fachada do arquivo."""
+    with unidade_de_trabalho(fabrica) as sessao:
+        r = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            r['pedidos dos clientes'] = [[tuple(linha) for linha in Pedido.consultar_pedidos_cliente(sessao, cliente)]
+                                         for cliente in range(1, min(escala['clientes'], 50) + 1)]
+        caixas = list(sessao.scalars(select(Caixa).order_by(Caixa.id)))
+        r['conciliação'] = [caixa.conciliar(sessao, datetime(2000, 1, 1), datetime(2100, 1, 1)) for caixa in caixas]
+        r['saldos'] = [caixa.saldo_centavos(sessao) for caixa in caixas]
+        Cliente.reconstruir_historico(sessao)
+        r['histórico dos clientes'] = sessao.execute(
+            select(Cliente.id, Cliente.historico_compras, Cliente.total_gasto_centavos, Cliente.ultima_compra)
+            .order_by(Cliente.id)).all()
+        vendas.reconstruir_resumos(sessao)
+        r['resumos reconstruídos'] = (
+            sessao.execute(select(VendaDiaria.__table__).order_by(*VendaDiaria.__table__.primary_key)).all(),
+            sessao.execute(select(VendaDiariaProduto.__table__)
+                           .order_by(*VendaDiariaProduto.__table__.primary_key)).all())
+        try:
+            itens = vendas.extrair_itens(sessao)
+        except RuntimeError:
+            pass
+        else:
+            r['extrair_itens'] = (len(itens), int((itens['quantidade'] * itens['preco_centavos']).sum()))
+    return r
+
+
+def mostrar(rotulo, engine, fabrica, escala, args):
+    paginas = tamanhos(engine)
+    with engine.connect() as conexao:
+        total = conexao.exec_driver_sql("PRAGMA page_count").scalar()
+    print(f"{rotulo}: {total} páginas no banco principal")
+    if paginas is not None:
+        for tabela in TABELAS:
+            dados, indices = paginas.get(tabela, (0, 0))
+            print(f"  {tabela:<18} {dados:>7} páginas de dados {indices:>7} de índices")
+    checkouts, lancamentos = latencias(fabrica, escala, args.checkouts, args.semente)
+    for nome, tempos in (('checkout', checkouts), ('caixa', lancamentos)):
+        tempos.sort()
+        print(f"  {nome:<18} mediana {statistics.median(tempos):.2f} ms, p95 {tempos[int(len(tempos) * 0.95)]:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--banco', help='banco já gerado, que é alterado (padrão: gera um temporário)')
+    parser.add_argument('--horizonte', type=int, default=30, help='dias mantidos no banco principal')
+    parser.add_argument('--checkouts', type=int, default=500, help='checkouts (e lançamentos) medidos por fase')
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+    escala = escala_dos_argumentos(args)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = args.banco
+        if caminho is None:
+            caminho = os.path.join(diretorio, 'arquivamento.db')
+            inicio = time.perf_counter()
+            criar_banco(caminho, escala, args.semente).dispose()
+            print(f"banco {args.escala} gerado em {time.perf_counter() - inicio:.1f} s")
+        engine = criar_engine(f"sqlite:///{caminho}", perfil='pdv')
+        fabrica = criar_fabrica_sessao(engine)
+        with unidade_de_trabalho(fabrica) as sessao:
+            # As datas do gerador não seguem o relógio: "hoje" é o dia seguinte ao último pedido
+            hoje = sessao.scalar(select(func.max(Pedido.data_hora))).date() + timedelta(days=1)
+            vendas.atualizar_resumos(sessao)
+
+        mostrar('antes', engine, fabrica, escala, args)
+        # Depois das medidas: os checkouts e lançamentos delas também entram na comparação
+        antes = resultados(fabrica, escala)
+
+        with unidade_de_trabalho(fabrica) as sessao:
+            resultado = arquivamento.arquivar(sessao, os.path.join(diretorio, 'arquivo'),
+                                              horizonte=args.horizonte, hoje=hoje)
+            meses = arquivamento.particoes(sessao)
+        print(f"arquivados até {resultado.corte:%d/%m/%Y}: {resultado.pedidos} pedidos, {resultado.itens} itens, "
+              f"{resultado.movimentos} movimentos e {resultado.checkpoints} checkpoints em {len(meses)} meses, "
+              f"{resultado.segundos:.2f} s")
+        inicio = time.perf_counter()
+        liberadas = manutencao.compactar(engine)
+        print(f"compactação: {liberadas} páginas devolvidas em {time.perf_counter() - inicio:.2f} s")
+
+        depois = resultados(fabrica, escala)
+        for nome in antes:
+            print(f"  {nome:<24} {'iguais' if antes[nome] == depois.get(nome) else 'DIFERENTES'}")
+        mostrar('depois', engine, fabrica, escala, args)
+        arquivamento.fechar()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark da busca de produtos do checkout (farmasil.busca) num catálogo grande.
+
+Cadastra --produtos nomes no estilo de farmácia (princípio ativo, forma,
+dosagem e apresentação, com acentos) passando pelos triggers do índice FTS5 e
+mede a latência de buscas digitadas de jeitos diferentes: nome exato, sem
+acento e em minúsculas, prefixos curtos e com erros de digitação. A primeira
+busca com correção monta o vocabulário em memória; esse tempo sai à parte.
+
+Uso: python benchmarks/busca.py [--produtos 100000] [--buscas 2000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmasil import busca
+from farmasil.banco import criar_engine, criar_fabrica_sessao
+from farmasil.migracoes import migrar
+from farmasil.modelos import Loja, Produto
+
+ATIVOS = ['Dipirona Sódica', 'Paracetamol', 'Ibuprofeno', 'Amoxicilina', 'Azitromicina', 'Losartana Potássica',
+          'Omeprazol', 'Sinvastatina', 'Metformina', 'Cetoconazol', 'Loratadina', 'Dexametasona', 'Nimesulida',
+          'Cefalexina', 'Clonazepam', 'Ácido Acetilsalicílico', 'Vitamina C', 'Polivitamínico', 'Hidroclorotiazida',
+          'Prednisolona', 'Escitalopram', 'Pantoprazol', 'Atenolol', 'Fluconazol', 'Ciprofloxacino']
+FORMAS = ['Comprimido', 'Cápsula', 'Solução Oral', 'Gotas', 'Xarope', 'Pomada', 'Creme', 'Suspensão',
+          'Comprimido Revestido', 'Injetável']
+DOSES = ['5mg', '10mg', '20mg', '25mg', '40mg', '50mg', '100mg', '250mg', '400mg', '500mg', '750mg', '1g']
+LABORATORIOS = ['EMS', 'Medley', 'Neo Química', 'Eurofarma', 'Germed', 'Prati-Donaduzzi', 'Cimed', 'Teuto',
+                'Sandoz', 'Biolab', 'Aché', 'Libbs']
+
+
+def nome(rng, indice):
+    return (f"{rng.choice(ATIVOS)} {rng.choice(DOSES)} {rng.choice(FORMAS)} {rng.choice(LABORATORIOS)} "
+            f"Cx {rng.randint(1, 60)} Un Lote{indice}")
+
+
+def errar(rng, palavra):
+    """Um erro de digitação: troca, falta, sobra ou inversão de uma letra."""
+    if len(palavra) < 4:
+        return palavra
+    i = rng.randrange(1, len(palavra) - 1)
+    tipo = rng.randrange(4)
+    if tipo == 0:
+        return palavra[:i] + rng.choice('aeioursnt') + palavra[i + 1:]
+    if tipo == 1:
+        return palavra[:i] + palavra[i + 1:]
+    if tipo == 2:
+        return palavra[:i] + rng.choice('aeioursnt') + palavra[i:]
+    return palavra[:i - 1] + palavra[i] + palavra[i - 1] + palavra[i + 1:]
+
+
+def consultas(rng, nomes, quantidade):
+    """{tipo: [texto digitado]} a partir de nomes sorteados do catálogo."""
+    tipos = {'exato': [], 'sem acento': [], 'prefixos': [], 'com erro': []}
+    for _ in range(quantidade):
+        palavras = rng.choice(nomes).split()[:3]
+        tipos['exato'].append(' '.join(palavras))
+        tipos['sem acento'].append(busca.normalizar_termo(' '.join(palavras)))
+        tipos['prefixos'].append(' '.join(palavra[:3] for palavra in palavras))
+        tipos['com erro'].append(' '.join(errar(rng, palavra) for palavra in palavras))
+    return tipos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--produtos', type=int, default=100_000)
+    parser.add_argument('--buscas', type=int, default=2000, help='buscas de cada tipo')
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.semente)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = criar_engine(f"sqlite:///{os.path.join(diretorio, 'busca.db')}", perfil='pdv')
+        migrar(engine)
+        nomes = [nome(rng, i) for i in range(args.produtos)]
+        inicio = time.perf_counter()
+        with engine.begin() as conexao:
+            conexao.execute(Loja.__table__.insert(), [{'nome': 'Loja', 'endereco': '-', 'horario_funcionamento': '-'}])
+            conexao.execute(Produto.__table__.insert(), [{'nome': nome_produto, 'preco_centavos': 1000, 'categoria': 'Bench',
+                                                          'estoque': 10, 'loja_id': 1} for nome_produto in nomes])
+        print(f"{args.produtos} produtos cadastrados (com o índice) em {time.perf_counter() - inicio:.1f} s")
+
+        sessao = criar_fabrica_sessao(engine)()
+        inicio = time.perf_counter()
+        busca.vocabulario(sessao)
+        print(f"vocabulário em memória: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        print(f"{'busca':<12} {'mediana':>9} {'p95':>9} {'máximo':>9}  com resultado")
+        for tipo, textos in consultas(rng, nomes, args.buscas).items():
+            tempos = []
+            encontrados = 0
+            for texto in textos:
+                inicio = time.perf_counter()
+                encontrados += bool(busca.buscar_produtos(sessao, texto))
+                tempos.append((time.perf_counter() - inicio) * 1000)
+            tempos.sort()
+            print(f"{tipo:<12} {statistics.median(tempos):>7.2f}ms {tempos[int(len(tempos) * 0.95)]:>7.2f}ms "
+                  f"{tempos[-1]:>7.2f}ms  {encontrados / len(textos):.0%}")
+        sessao.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
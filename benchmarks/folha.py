@@ -0,0 +1,102 @@
+"""Benchmark da folha de pagamento: cálculo vetorizado x laço por funcionário.
+
+Cria um banco SQLite com N funcionários e o ponto diário de alguns meses e
+mede a folha do último mês fechado com calcular_folha (duas consultas e numpy)
+e com o caminho de um funcionário por vez (uma consulta de horas por
+funcionário e as contas em Python).
+
+Uso: python benchmarks/folha.py --funcionarios 3000 --meses 6
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmasil.banco import criar_engine, criar_fabrica_sessao
+from farmasil.folha import ADICIONAL_HORA_EXTRA, ADICIONAL_NOTURNO, HORAS_MENSAIS, TURNOS_NOTURNOS, calcular_folha
+from farmasil.modelos import Funcionario, Loja, RegistroPonto, criar_esquema
+
+TURNOS = ['Manhã', 'Tarde', 'Noite']
+
+
+def preparar_banco(caminho, args, fim):
+    engine = criar_engine(f"sqlite:///{caminho}", perfil='importacao')
+    criar_esquema(engine)
+    rng = random.Random(args.semente)
+    with engine.begin() as conexao:
+        conexao.execute(Loja.__table__.insert(),
+                        [{'nome': f'Loja {i}', 'endereco': '-', 'horario_funcionamento': '-'} for i in range(args.lojas)])
+        conexao.execute(Funcionario.__table__.insert(),
+                        [{'nome': f'Funcionário {i}', 'cargo': 'Balconista',
+                          'salario_centavos': rng.choice((180_000, 240_000, 390_000)),
+                          'turno': TURNOS[i % len(TURNOS)], 'loja_id': 1 + i % args.lojas}
+                         for i in range(args.funcionarios)])
+    dia = fim - timedelta(days=30 * args.meses)
+    while dia < fim:
+        if dia.weekday() < 6:
+            with engine.begin() as conexao:
+                conexao.execute(RegistroPonto.__table__.insert(), [
+                    {'funcionario_id': funcionario_id, 'loja_id': 1 + (funcionario_id - 1) % args.lojas, 'data': dia,
+                     'horas': rng.choice((8.0, 8.0, 8.0, 9.0, 10.0))}
+                    for funcionario_id in range(1, args.funcionarios + 1)])
+        dia += timedelta(days=1)
+    return engine
+
+
+def por_funcionario(session, inicio, fim):
+    """Uma consulta de horas e as contas em Python para cada funcionário."""
+    totais = {}
+    for funcionario in session.query(Funcionario).order_by(Funcionario.id):
+        horas = funcionario.horas_no_periodo(session, inicio, fim)
+        extras = round(max(horas - HORAS_MENSAIS, 0.0) * funcionario.salario / HORAS_MENSAIS
+                       * (1 + ADICIONAL_HORA_EXTRA), 2)
+        adicional = (round((funcionario.salario + extras) * ADICIONAL_NOTURNO, 2)
+                     if funcionario.turno.lower() in TURNOS_NOTURNOS else 0.0)
+        loja = funcionario.loja_id or 0
+        totais[loja] = totais.get(loja, 0.0) + funcionario.salario + extras + adicional
+    return totais
+
+
+def cronometrar(rotulo, funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    print(f"{rotulo:<40} {time.perf_counter() - inicio:>8.2f} s")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--funcionarios', type=int, default=3000)
+    parser.add_argument('--lojas', type=int, default=50)
+    parser.add_argument('--meses', type=int, default=6, help='meses de ponto gravados antes da folha')
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    # Último mês fechado
+    fim = date.today().replace(day=1)
+    inicio = (fim - timedelta(days=1)).replace(day=1)
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = cronometrar(f"gerar ponto de {args.funcionarios} funcionários",
+                             lambda: preparar_banco(os.path.join(diretorio, 'folha.db'), args, fim))
+        fabrica = criar_fabrica_sessao(engine)
+
+        session = fabrica()
+        folha = cronometrar("calcular_folha (vetorizada)", lambda: calcular_folha(session, inicio.year, inicio.month))
+        session.close()
+        session = fabrica()
+        antigos = cronometrar("um funcionário por vez", lambda: por_funcionario(session, inicio, fim))
+        session.close()
+
+        total = sum(linha.bruto for linha in folha.lojas)
+        print(f"Folha de {inicio:%Y-%m}: {len(folha.funcionarios)} funcionários, {len(folha.lojas)} lojas, "
+              f"R${total:.2f} (laço: R${sum(antigos.values()):.2f})")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
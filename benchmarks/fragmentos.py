@@ -0,0 +1,107 @@
+"""Benchmark do modo fragmentado: checkouts simultâneos de várias lojas.
+
+Um terminal (thread) por loja faz checkouts sem parar, primeiro com todas as
+lojas no mesmo banco e depois com um banco por loja (farmasil.fragmentos).
+No banco único todos os commits passam pela mesma trava de escrita do SQLite;
+fragmentado, cada loja só disputa a própria. Os terminais são threads de um
+processo, então o GIL limita as duas rodadas igualmente; a diferença é a
+espera pela trava e pelo fsync (maior com --synchronous FULL). No fim mede o
+relatório de vendas da rede, com as lojas consultadas em paralelo.
+
+Uso: python benchmarks/fragmentos.py --lojas 150 --pedidos 200 [--synchronous FULL]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmasil.banco import criar_engine, criar_fabrica_sessao
+from farmasil.fragmentos import RoteadorLojas, vendas_da_rede
+from farmasil.migracoes import migrar
+from farmasil.modelos import Cliente, Funcionario, Loja, Pedido, Produto
+
+
+def cadastrar_loja(conexao, loja_id, args):
+    conexao.execute(Funcionario.__table__.insert(), [{'nome': f'Funcionário {loja_id}', 'cargo': 'Caixa',
+                                                      'salario_centavos': 100, 'turno': 'Manhã', 'loja_id': loja_id}])
+    conexao.execute(Produto.__table__.insert(), [
+        {'nome': f'Produto {loja_id}-{i}', 'preco_centavos': 1000, 'categoria': 'Bench', 'estoque': 10 ** 9, 'loja_id': loja_id}
+        for i in range(args.produtos)])
+
+
+def checkouts(fabrica, loja_id, funcionario_id, args):
+    """Os pedidos de um terminal; cada um com três produtos da loja."""
+    sessao = fabrica()
+    try:
+        for numero in range(args.pedidos):
+            itens = [{'nome': f'Produto {loja_id}-{(numero + i) % args.produtos}', 'quantidade': 1} for i in range(3)]
+            resultado = Pedido.finalizar_pedido(sessao, 1, funcionario_id, itens)
+            if not resultado.sucesso:
+                raise RuntimeError(resultado.erro)
+    finally:
+        sessao.close()
+
+
+def rodar(rotulo, terminais, args):
+    """terminais: [(fábrica de sessão, loja_id, funcionario_id)]."""
+    largada = threading.Barrier(len(terminais))
+
+    def terminal(parametros):
+        largada.wait()
+        checkouts(*parametros, args)
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(terminais)) as executor:
+        list(executor.map(terminal, terminais))
+    decorrido = time.perf_counter() - inicio
+    total = len(terminais) * args.pedidos
+    print(f"{rotulo:<22} {total / decorrido:>10.0f} pedidos/s  ({total} pedidos em {decorrido:.2f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lojas', type=int, default=150)
+    parser.add_argument('--pedidos', type=int, default=200, help='pedidos por loja')
+    parser.add_argument('--produtos', type=int, default=50, help='produtos por loja')
+    parser.add_argument('--synchronous', default='NORMAL', help='PRAGMA synchronous dos dois modos')
+    args = parser.parse_args()
+    opcoes = {'pragmas': {'synchronous': args.synchronous}, 'pool_size': args.lojas + 1, 'max_overflow': 0,
+              'pool_timeout': 300}
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = criar_engine(f"sqlite:///{os.path.join(diretorio, 'unico.db')}", perfil='pdv', **opcoes)
+        migrar(engine)
+        with engine.begin() as conexao:
+            conexao.execute(Cliente.__table__.insert(), [{'nome': 'Cliente', 'cpf': '0', 'telefone': '-', 'email': '-'}])
+            conexao.execute(Loja.__table__.insert(), [{'nome': f'Loja {i}', 'endereco': '-', 'horario_funcionamento': '-'}
+                                                      for i in range(args.lojas)])
+            for loja_id in range(1, args.lojas + 1):
+                cadastrar_loja(conexao, loja_id, args)
+        fabrica = criar_fabrica_sessao(engine)
+        rodar("banco único", [(fabrica, loja_id, loja_id) for loja_id in range(1, args.lojas + 1)], args)
+        engine.dispose()
+
+        roteador = RoteadorLojas(os.path.join(diretorio, 'rede'), perfil='pdv', **opcoes)
+        roteador.criar()
+        with roteador.catalogo.begin() as conexao:
+            conexao.execute(Cliente.__table__.insert(), [{'nome': 'Cliente', 'cpf': '0', 'telefone': '-', 'email': '-'}])
+        lojas = [roteador.adicionar_loja(f'Loja {i}', '-', '-') for i in range(args.lojas)]
+        for loja_id in lojas:
+            with roteador.engine(loja_id).begin() as conexao:
+                cadastrar_loja(conexao, loja_id, args)
+        rodar("um banco por loja", [(lambda loja_id=loja_id: roteador.sessao(loja_id), loja_id, 1) for loja_id in lojas],
+              args)
+
+        inicio = time.perf_counter()
+        linhas = vendas_da_rede(roteador, 'loja')
+        print(f"{'vendas da rede':<22} {time.perf_counter() - inicio:>10.2f} s  "
+              f"({len(linhas)} lojas, {sum(linha.pedidos for linha in linhas)} pedidos)")
+        roteador.fechar()
+
+
+if __name__ == '__main__':
+    main()
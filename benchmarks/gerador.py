@@ -0,0 +1,202 @@
+"""Gerador determinístico de dados sintéticos para os benchmarks.
+
+Preenche um banco novo com lojas, produtos por loja, clientes, fornecedores,
+funcionários, pedidos com itens, caixas com sessão aberta e movimentos do
+livro-caixa. A mesma escala e a mesma semente geram sempre os mesmos dados:
+os sorteios saem de um random.Random(semente) e as datas contam a partir de
+REFERENCIA, não do relógio. No fim os contadores de compras dos clientes são
+recalculados e cada caixa ganha checkpoints de saldo a cada
+INTERVALO_CHECKPOINT movimentos, como ficariam depois do uso normal do sistema.
+
+Uso: python benchmarks/gerador.py dados.db --escala media [--pedidos 2000000] [--semente 42]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, or_, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmasil.banco import criar_engine
+from farmasil.migracoes import migrar
+from farmasil.modelos import (INTERVALO_CHECKPOINT, Caixa, CheckpointCaixa, Cliente, Fornecedor, Funcionario,
+                              ItensPedido, Loja, Pedido, Produto, RegistroCaixa, SessaoCaixa)
+
+REFERENCIA = datetime(2025, 1, 1)
+LOTE = 50_000
+
+CATEGORIAS = ['Analgésicos', 'Antibióticos', 'Vitaminas', 'Higiene', 'Dermocosméticos', 'Infantil',
+              'Antialérgicos', 'Cardiológicos']
+PRECOS = (490, 850, 1250, 1990, 2730, 3700, 5990, 11240)  # centavos
+TURNOS = ['Manhã', 'Tarde', 'Noite']
+
+# Escalas prontas; qualquer valor pode ser trocado na linha de comando
+ESCALAS = {
+    'pequena': {'lojas': 5, 'produtos_por_loja': 200, 'clientes': 2_000, 'fornecedores': 20,
+                'funcionarios_por_loja': 5, 'pedidos': 20_000, 'itens_por_pedido': 3, 'movimentos_caixa': 20_000,
+                'dias': 90},
+    'media': {'lojas': 50, 'produtos_por_loja': 1_000, 'clientes': 50_000, 'fornecedores': 200,
+              'funcionarios_por_loja': 10, 'pedidos': 500_000, 'itens_por_pedido': 4, 'movimentos_caixa': 500_000,
+              'dias': 365},
+    'grande': {'lojas': 200, 'produtos_por_loja': 2_000, 'clientes': 500_000, 'fornecedores': 1_000,
+               'funcionarios_por_loja': 15, 'pedidos': 3_000_000, 'itens_por_pedido': 4,
+               'movimentos_caixa': 3_000_000, 'dias': 730},
+}
+
+
+def nome_produto(loja_id, indice):
+    """Nome do produto `indice` (a partir de 0) da loja, usado pelos benchmarks para montar carrinhos."""
+    return f"Produto {loja_id:04d}-{indice:05d}"
+
+
+def _em_lotes(engine, tabela, linhas):
+    """Insere as linhas (um gerador) em transações de LOTE linhas."""
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) == LOTE:
+            with engine.begin() as conexao:
+                conexao.execute(tabela.insert(), lote)
+            lote = []
+    if lote:
+        with engine.begin() as conexao:
+            conexao.execute(tabela.insert(), lote)
+
+
+def gerar(engine, escala, semente=42, progresso=None):
+    """Preenche o banco (já migrado e vazio) com a `escala` pedida (um dict como os de ESCALAS)."""
+    rng = random.Random(semente)
+    avisar = progresso or (lambda etapa: None)
+    lojas = escala['lojas']
+    produtos_por_loja = escala['produtos_por_loja']
+    funcionarios = lojas * escala['funcionarios_por_loja']
+    segundos = escala['dias'] * 86400
+
+    avisar('cadastros')
+    _em_lotes(engine, Loja.__table__, ({'nome': f'Loja {i}', 'endereco': f'Rua {i}, {rng.randint(1, 999)}',
+                                        'horario_funcionamento': '08:00-22:00'} for i in range(1, lojas + 1)))
+    _em_lotes(engine, Fornecedor.__table__, ({'nome': f'Fornecedor {i}', 'cnpj': f'{i:014d}', 'telefone': '-',
+                                              'endereco': '-'} for i in range(1, escala['fornecedores'] + 1)))
+    _em_lotes(engine, Cliente.__table__, ({'nome': f'Cliente {i}', 'cpf': f'{i:011d}', 'telefone': '-',
+                                           'email': f'cliente{i}@exemplo.com', 'historico_compras': 0}
+                                          for i in range(1, escala['clientes'] + 1)))
+    _em_lotes(engine, Funcionario.__table__, (
+        {'nome': f'Funcionário {i}', 'cargo': rng.choice(('Balconista', 'Farmacêutico', 'Caixa')),
+         'salario_centavos': rng.choice((180_000, 240_000, 390_000)), 'turno': TURNOS[i % len(TURNOS)],
+         'data_admissao': date(2020, 1, 1) + timedelta(days=rng.randrange(1500)), 'loja_id': 1 + i % lojas,
+         'horas_trab': 0.0} for i in range(funcionarios)))
+    # Produto (loja l, índice i) tem id (l - 1) * produtos_por_loja + i + 1
+    precos = {}
+    _em_lotes(engine, Produto.__table__, (
+        {'nome': nome_produto(loja_id, i),
+         'preco_centavos': precos.setdefault((loja_id - 1) * produtos_por_loja + i + 1, rng.choice(PRECOS)),
+         'categoria': CATEGORIAS[i % len(CATEGORIAS)], 'estoque': rng.randint(50_000, 100_000),
+         'loja_id': loja_id, 'fornecedor_id': 1 + rng.randrange(escala['fornecedores'])}
+        for loja_id in range(1, lojas + 1) for i in range(produtos_por_loja)))
+
+    avisar('pedidos')
+    # Em ordem de data, como seriam gravados; o funcionário define a loja e os produtos do pedido
+    instantes = sorted(rng.randrange(segundos) for _ in range(escala['pedidos']))
+    vendedores = [rng.randrange(funcionarios) for _ in range(escala['pedidos'])]
+    _em_lotes(engine, Pedido.__table__, (
+        {'cliente_id': 1 + rng.randrange(escala['clientes']), 'funcionario_id': vendedor + 1, 'status': 'Finalizado',
+         'data_hora': REFERENCIA + timedelta(seconds=instante)}
+        for instante, vendedor in zip(instantes, vendedores)))
+    del instantes
+    avisar('itens')
+
+    def itens():
+        for pedido_id, vendedor in enumerate(vendedores, 1):
+            primeiro = (vendedor % lojas) * produtos_por_loja + 1
+            for produto_id in rng.sample(range(primeiro, primeiro + produtos_por_loja),
+                                         min(escala['itens_por_pedido'], produtos_por_loja)):
+                yield {'pedido_id': pedido_id, 'produto_id': produto_id, 'quantidade': rng.randint(1, 3),
+                       'preco_centavos': precos[produto_id]}
+    _em_lotes(engine, ItensPedido.__table__, itens())
+
+    avisar('caixa')
+    _em_lotes(engine, Caixa.__table__, ({} for _ in range(lojas)))
+    _em_lotes(engine, SessaoCaixa.__table__, ({'caixa_id': caixa_id, 'saldo_abertura_centavos': 0,
+                                               'aberta_em': REFERENCIA} for caixa_id in range(1, lojas + 1)))
+    instantes = sorted(rng.randrange(segundos) for _ in range(escala['movimentos_caixa']))
+
+    def movimentos():
+        for instante in instantes:
+            caixa_id = 1 + rng.randrange(lojas)
+            # Quatro entradas para cada saída, e saídas menores: o saldo só cresce na média
+            if rng.random() < 0.2:
+                tipo, centavos = 'Saída', -rng.randint(100, 5_000)
+            else:
+                tipo, centavos = 'Entrada', rng.randint(500, 50_000)
+            yield {'tipo': tipo, 'valor_centavos': centavos, 'caixa_id': caixa_id, 'sessao_id': caixa_id,
+                   'data_hora': REFERENCIA + timedelta(seconds=instante)}
+    _em_lotes(engine, RegistroCaixa.__table__, movimentos())
+
+    avisar('contadores')
+    with engine.begin() as conexao:
+        conexao.execute(Cliente.recalculo_historico())
+        # Um checkpoint a cada INTERVALO_CHECKPOINT movimentos do caixa e outro no último, como no uso normal
+        do_caixa = {'partition_by': RegistroCaixa.caixa_id}
+        acumulado = select(
+            RegistroCaixa.caixa_id, RegistroCaixa.id, RegistroCaixa.data_hora,
+            func.sum(RegistroCaixa.valor_centavos).over(order_by=RegistroCaixa.id, **do_caixa).label('saldo'),
+            func.row_number().over(order_by=RegistroCaixa.id, **do_caixa).label('ordem'),
+            func.count().over(**do_caixa).label('total')
+        ).subquery()
+        saldos = conexao.execute(
+            select(acumulado.c.caixa_id, acumulado.c.id, acumulado.c.saldo, acumulado.c.data_hora)
+            .where(or_(acumulado.c.ordem % INTERVALO_CHECKPOINT == 0, acumulado.c.ordem == acumulado.c.total))
+        ).all()
+        if saldos:
+            conexao.execute(CheckpointCaixa.__table__.insert(), [
+                {'caixa_id': caixa_id, 'registro_id': registro_id, 'saldo_centavos': saldo, 'criado_em': data_hora}
+                for caixa_id, registro_id, saldo, data_hora in saldos])
+
+
+def escala_dos_argumentos(args):
+    """A escala escolhida com os valores trocados na linha de comando."""
+    escala = dict(ESCALAS[args.escala])
+    for chave in escala:
+        if getattr(args, chave, None) is not None:
+            escala[chave] = getattr(args, chave)
+    return escala
+
+
+def adicionar_argumentos(parser):
+    parser.add_argument('--escala', choices=sorted(ESCALAS), default='pequena')
+    for chave in ESCALAS['pequena']:
+        parser.add_argument('--' + chave.replace('_', '-'), type=int, dest=chave)
+    parser.add_argument('--semente', type=int, default=42)
+
+
+def criar_banco(caminho, escala, semente=42, progresso=None):
+    """Cria o banco em `caminho` pelas migrações e o preenche; retorna a engine (perfil de importação)."""
+    engine = criar_engine(f"sqlite:///{caminho}", perfil='importacao')
+    migrar(engine)
+    gerar(engine, escala, semente, progresso)
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('banco', help='arquivo SQLite a criar')
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+    if os.path.exists(args.banco):
+        parser.error(f"{args.banco} já existe; o gerador só preenche um banco novo.")
+
+    escala = escala_dos_argumentos(args)
+    inicio = time.perf_counter()
+    engine = criar_banco(args.banco, escala, args.semente,
+                         lambda etapa: print(f"[{time.perf_counter() - inicio:7.1f} s] {etapa}..."))
+    engine.dispose()
+    print(f"{args.banco}: {', '.join(f'{chave}={valor}' for chave, valor in escala.items())} "
+          f"em {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
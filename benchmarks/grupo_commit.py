@@ -0,0 +1,107 @@
+"""Benchmark do group commit: operações por segundo com commit por chamada x em lote.
+
+Vários terminais (threads) lançam entradas no caixa e ajustes de estoque em um
+banco SQLite novo. Na primeira rodada cada operação faz seu próprio commit; na
+segunda todas passam pelo GrupoCommit. No fim confere que o saldo do caixa e o
+estoque batem com as operações confirmadas.
+
+Uso: python benchmarks/grupo_commit.py --operacoes 5000 --terminais 32 --synchronous FULL
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmasil.banco import criar_engine, criar_fabrica_sessao
+from farmasil.lote import GrupoCommit, ajuste_estoque, entrada_caixa
+from farmasil.modelos import Caixa, Produto, SessaoCaixa, criar_esquema
+
+
+def preparar_banco(caminho, args):
+    engine = criar_engine(f"sqlite:///{caminho}", perfil='pdv', pool_size=args.terminais + 1, max_overflow=0,
+                          pragmas={'synchronous': args.synchronous})
+    criar_esquema(engine)
+    with engine.begin() as conexao:
+        conexao.execute(Caixa.__table__.insert(), [{}])
+        conexao.execute(SessaoCaixa.__table__.insert(), [{'caixa_id': 1, 'saldo_abertura_centavos': 0}])
+        conexao.execute(Produto.__table__.insert(),
+                        [{'nome': 'Produto Bench', 'preco_centavos': 1000, 'categoria': 'Bench', 'estoque': 0}])
+    return engine
+
+
+def operacoes(quantidade):
+    """Metade entradas de R$1,00 no caixa, metade entradas de 1 unidade no estoque."""
+    return [(entrada_caixa, 1, 1.0) if i % 2 else (ajuste_estoque, 1, 1) for i in range(quantidade)]
+
+
+def por_chamada(fabrica, lista, terminais):
+    def executar(operacao):
+        funcao, *args = operacao
+        session = fabrica()
+        try:
+            return funcao(session, *args)
+        finally:
+            session.close()
+    with ThreadPoolExecutor(max_workers=terminais) as executor:
+        return list(executor.map(executar, lista))
+
+
+def em_grupo(fabrica, lista, terminais, args):
+    with GrupoCommit(fabrica, tamanho_maximo=args.tamanho, janela=args.janela) as grupo:
+        with ThreadPoolExecutor(max_workers=terminais) as executor:
+            resultados = list(executor.map(lambda operacao: grupo.executar(*operacao), lista))
+    return resultados, grupo.commits
+
+
+def conferir(fabrica, quantidade):
+    session = fabrica()
+    try:
+        caixa = session.get(Caixa, 1)
+        produto = session.get(Produto, 1)
+        return caixa.saldo_centavos(session) == (quantidade // 2) * 100 and produto.estoque == quantidade - quantidade // 2
+    finally:
+        session.close()
+
+
+def rodada(modo, args):
+    lista = operacoes(args.operacoes)
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = preparar_banco(os.path.join(diretorio, 'bench.db'), args)
+        fabrica = criar_fabrica_sessao(engine)
+        commits = len(lista)
+        inicio = time.perf_counter()
+        # Os métodos dos modelos imprimem cada lançamento
+        with contextlib.redirect_stdout(io.StringIO()):
+            if modo == 'por chamada':
+                por_chamada(fabrica, lista, args.terminais)
+            else:
+                _, commits = em_grupo(fabrica, lista, args.terminais, args)
+        decorrido = time.perf_counter() - inicio
+        consistente = conferir(fabrica, len(lista))
+        engine.dispose()
+    return len(lista) / decorrido, commits, consistente
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--operacoes', type=int, default=5000)
+    parser.add_argument('--terminais', type=int, default=32)
+    parser.add_argument('--tamanho', type=int, default=256, help='tamanho máximo do lote')
+    parser.add_argument('--janela', type=float, default=0.002, help='janela do lote, em segundos')
+    parser.add_argument('--synchronous', default='FULL', help='PRAGMA synchronous (FULL faz fsync a cada commit)')
+    args = parser.parse_args()
+
+    print(f"{'modo':<12} {'operações/s':>12} {'commits':>8} {'consistente':>12}")
+    for modo in ('por chamada', 'em grupo'):
+        por_segundo, commits, consistente = rodada(modo, args)
+        print(f"{modo:<12} {por_segundo:>12.1f} {commits:>8} {'sim' if consistente else 'NÃO':>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark da importação em lote: linhas por segundo e memória máxima.
+
+Gera um CSV de produtos (com uma fração de linhas inválidas), importa em um
+banco SQLite novo com o perfil 'importacao' e informa a vazão e o pico de
+memória do processo. Com --meta, termina com erro se a vazão ficar abaixo dela.
+
+Uso: python benchmarks/importacao.py --linhas 1000000 --lote 5000 --meta 50000
+"""
+import argparse
+import csv
+import os
+import random
+import resource
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmasil.banco import criar_engine, criar_fabrica_sessao
+from farmasil.importacao import importar
+from farmasil.modelos import Fornecedor, Loja, criar_esquema
+
+
+def gerar_csv(caminho, linhas, lojas, fornecedores, semente, fracao_invalida=0.001):
+    rng = random.Random(semente)
+    with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(['nome', 'preco', 'categoria', 'estoque', 'loja_id', 'fornecedor_id'])
+        for i in range(linhas):
+            preco = f"{rng.uniform(1, 300):.2f}"
+            loja_id = rng.randint(1, lojas)
+            if rng.random() < fracao_invalida:
+                # Preço ilegível ou loja inexistente, para exercitar a rejeição
+                preco, loja_id = rng.choice([('abc', loja_id), (preco, lojas + 1)])
+            escritor.writerow([f'Produto {i}', preco, rng.choice(['Analgésico', 'Antibiótico', 'Vitamina']),
+                               rng.randint(0, 500), loja_id, rng.randint(1, fornecedores)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=200000)
+    parser.add_argument('--lote', type=int, default=5000)
+    parser.add_argument('--lojas', type=int, default=150)
+    parser.add_argument('--fornecedores', type=int, default=50)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--meta', type=float, help='vazão mínima aceitável, em linhas/s')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = criar_engine(f"sqlite:///{os.path.join(diretorio, 'bench.db')}", perfil='importacao')
+        criar_esquema(engine)
+        with engine.begin() as conexao:
+            conexao.execute(Loja.__table__.insert(),
+                            [{'nome': f'Loja {i}', 'endereco': '-', 'horario_funcionamento': '-'}
+                             for i in range(args.lojas)])
+            conexao.execute(Fornecedor.__table__.insert(),
+                            [{'nome': f'Fornecedor {i}', 'cnpj': str(i), 'telefone': '-', 'endereco': '-'}
+                             for i in range(args.fornecedores)])
+
+        caminho = os.path.join(diretorio, 'produtos.csv')
+        gerar_csv(caminho, args.linhas, args.lojas, args.fornecedores, args.semente)
+
+        session = criar_fabrica_sessao(engine)()
+        relatorio = importar(session, 'produtos', caminho, tamanho_lote=args.lote)
+        session.close()
+        engine.dispose()
+
+    # ru_maxrss é em KiB no Linux
+    pico_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{relatorio.lidas} linhas em {relatorio.segundos:.2f}s: {relatorio.linhas_por_segundo:.0f} linhas/s")
+    print(f"inseridas: {relatorio.inseridas}, rejeitadas: {relatorio.rejeitadas}, pico de memória: {pico_mb:.0f} MB")
+    if args.meta is not None and relatorio.linhas_por_segundo < args.meta:
+        print(f"Abaixo da meta de {args.meta:.0f} linhas/s.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Benchmark de inicialização: custo de importar o pacote a frio.
+
+Cada módulo é importado em um processo Python novo, várias vezes, e o tempo
+acumulado informado por `-X importtime` é resumido pela mediana. Também confere
+que importar os modelos não cria engine, não abre sessão e não carrega os menus.
+
+Uso: python benchmarks/inicializacao.py --repeticoes 10 [--limite-ms 400] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS = ['farmasil', 'farmasil.modelos', 'farmasil.reserva', 'farmasil.cli', 'farmasil.menus']
+
+VERIFICACAO_SEM_EFEITOS = (
+    "import sys, farmasil.modelos, farmasil.banco as banco;"
+    "assert banco._engine is None, 'engine criada na importação';"
+    "assert 'farmasil.menus' not in sys.modules, 'menus carregados na importação'"
+)
+
+
+def _ambiente():
+    ambiente = dict(os.environ)
+    ambiente['PYTHONPATH'] = RAIZ + os.pathsep + ambiente.get('PYTHONPATH', '')
+    return ambiente
+
+
+def tempo_importacao(modulo):
+    """Tempo acumulado (µs) de `import modulo` em um interpretador novo."""
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+                              capture_output=True, text=True, env=_ambiente(), check=True)
+    for linha in reversed(processo.stderr.splitlines()):
+        partes = [parte.strip() for parte in linha.split('|')]
+        if len(partes) == 3 and partes[2] == modulo:
+            return int(partes[1])
+    raise RuntimeError(f"Tempo de importação de {modulo} não encontrado na saída do -X importtime.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=10)
+    parser.add_argument('--limite-ms', type=float, help='falha se farmasil.modelos passar deste tempo')
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    args = parser.parse_args()
+
+    subprocess.run([sys.executable, '-c', VERIFICACAO_SEM_EFEITOS], env=_ambiente(), check=True)
+
+    resultado = {}
+    for modulo in MODULOS:
+        amostras = [tempo_importacao(modulo) for _ in range(args.repeticoes)]
+        resultado[modulo] = {'mediana_ms': statistics.median(amostras) / 1000, 'minimo_ms': min(amostras) / 1000}
+
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+    else:
+        print(f"{'módulo':<20} {'mediana (ms)':>13} {'mínimo (ms)':>12}")
+        for modulo, tempos in resultado.items():
+            print(f"{modulo:<20} {tempos['mediana_ms']:>13.1f} {tempos['minimo_ms']:>12.1f}")
+
+    if args.limite_ms is not None and resultado['farmasil.modelos']['mediana_ms'] > args.limite_ms:
+        print(f"farmasil.modelos levou mais que {args.limite_ms} ms para importar.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
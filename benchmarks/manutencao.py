@@ -0,0 +1,139 @@
+"""Benchmark da manutenção online: latência do checkout durante backup, instantâneo e ANALYZE.
+
+Sobre um banco do gerador (benchmarks/gerador.py), --terminais threads fazem
+checkouts sem parar pelo ServicoReserva enquanto o processo principal roda,
+uma fase por vez: nada (a base), backup_online com cada tamanho de passo de
+--paginas (0 = tudo de uma vez), o instantâneo com VACUUM INTO e otimizar com
+ANALYZE. Para cada fase mostra quantos checkouts terminaram e a latência deles
+(mediana, p95 e máxima). No fim restaura o último backup num diretório
+temporário e confere integridade, versão do esquema e pedidos.
+
+Uso: python benchmarks/manutencao.py [--banco dados.db] [--terminais 4] [--paginas 64,1024,0] [--segundos 3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy.orm import sessionmaker
+
+from farmasil import manutencao
+from farmasil.banco import criar_engine
+from farmasil.reserva import ServicoReserva
+
+from gerador import adicionar_argumentos, criar_banco, escala_dos_argumentos, nome_produto
+
+
+class Terminais:
+    """Threads que fazem checkouts até parar(); guarda (início, duração) de cada um."""
+
+    def __init__(self, engine, quantidade, escala, semente):
+        self.servico = ServicoReserva(sessionmaker(bind=engine))
+        self.escala = escala
+        self.semente = semente
+        self.checkouts = []
+        self._parar = threading.Event()
+        self._threads = [threading.Thread(target=self._vender, args=(numero,)) for numero in range(quantidade)]
+
+    def _vender(self, numero):
+        rng = random.Random(self.semente + numero)
+        escala = self.escala
+        while not self._parar.is_set():
+            loja_id = 1 + rng.randrange(escala['lojas'])
+            itens = [{'nome': nome_produto(loja_id, rng.randrange(escala['produtos_por_loja'])), 'quantidade': 1}
+                     for _ in range(rng.randint(1, 4))]
+            funcionario_id = loja_id + escala['lojas'] * rng.randrange(escala['funcionarios_por_loja'])
+            inicio = time.perf_counter()
+            self.servico.processar_pedido(1 + rng.randrange(escala['clientes']), funcionario_id, itens)
+            self.checkouts.append((inicio, time.perf_counter() - inicio))
+
+    def iniciar(self):
+        for thread in self._threads:
+            thread.start()
+
+    def parar(self):
+        self._parar.set()
+        for thread in self._threads:
+            thread.join()
+
+    def entre(self, inicio, fim):
+        return sorted(duracao for comeco, duracao in self.checkouts if inicio <= comeco < fim)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--banco', help='banco já gerado (padrão: gera um temporário)')
+    parser.add_argument('--terminais', type=int, default=4)
+    parser.add_argument('--paginas', default='64,1024,0', help='páginas por passo do backup (0 = de uma vez)')
+    parser.add_argument('--segundos', type=float, default=3.0, help='duração da fase sem manutenção')
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+    escala = escala_dos_argumentos(args)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = args.banco
+        if caminho is None:
+            caminho = os.path.join(diretorio, 'manutencao.db')
+            inicio = time.perf_counter()
+            criar_banco(caminho, escala, args.semente).dispose()
+            print(f"banco {args.escala} gerado em {time.perf_counter() - inicio:.1f} s")
+        engine = criar_engine(f"sqlite:///{caminho}", perfil='pdv', pool_size=args.terminais + 2, max_overflow=0)
+        print(f"{os.path.getsize(caminho) / 2 ** 20:.1f} MiB, {args.terminais} terminais, {os.cpu_count()} CPU(s)")
+
+        fases = [('sem manutenção', lambda: time.sleep(args.segundos))]
+        for paginas in (int(parte) for parte in args.paginas.split(',')):
+            destino = os.path.join(diretorio, f'backup-{paginas}.db')
+            fases.append((f'backup {paginas} páginas' if paginas > 0 else 'backup de uma vez',
+                          lambda paginas=paginas, destino=destino:
+                          manutencao.backup_online(destino, engine, paginas=paginas if paginas > 0 else -1)))
+        instantaneo = os.path.join(diretorio, 'instantaneo.db')
+        fases.append(('instantâneo', lambda: manutencao.instantaneo(instantaneo, engine)))
+        fases.append(('ANALYZE', lambda: manutencao.otimizar(engine, analisar=True)))
+
+        terminais = Terminais(engine, args.terminais, escala, args.semente)
+        janelas = []
+        # Os checkouts dos modelos imprimem avisos
+        with contextlib.redirect_stdout(io.StringIO()):
+            terminais.iniciar()
+            try:
+                time.sleep(0.5)
+                for nome, funcao in fases:
+                    inicio = time.perf_counter()
+                    resultado = funcao()
+                    janelas.append((nome, inicio, time.perf_counter(), resultado))
+            finally:
+                terminais.parar()
+
+        print(f"{'fase':<20} {'duração':>8} {'checkouts':>9} {'mediana':>9} {'p95':>9} {'máxima':>9}  detalhe")
+        for nome, inicio, fim, resultado in janelas:
+            tempos = terminais.entre(inicio, fim)
+            detalhe = ''
+            if isinstance(resultado, manutencao.ResultadoCopia):
+                detalhe = (f"{resultado.passos} passos, {resultado.reinicios} recomeços, "
+                           f"{resultado.bytes / 2 ** 20:.1f} MiB")
+            if tempos:
+                print(f"{nome:<20} {fim - inicio:>7.2f}s {len(tempos):>9} {statistics.median(tempos) * 1000:>7.1f}ms "
+                      f"{tempos[int(len(tempos) * 0.95)] * 1000:>7.1f}ms {tempos[-1] * 1000:>7.1f}ms  {detalhe}")
+            else:
+                print(f"{nome:<20} {fim - inicio:>7.2f}s {0:>9} {'-':>9} {'-':>9} {'-':>9}  {detalhe}")
+
+        ultimo = next(resultado for _, _, _, resultado in reversed(janelas)
+                      if isinstance(resultado, manutencao.ResultadoCopia) and 'backup' in resultado.caminho)
+        verificacao = manutencao.testar_restauracao(ultimo.caminho)
+        print(f"restauração de {os.path.basename(ultimo.caminho)}: "
+              f"{'íntegro' if verificacao.integro else 'FALHOU'}, versão {verificacao.versao}, "
+              f"{verificacao.linhas.get('pedidos')} pedidos, {verificacao.segundos:.2f} s")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
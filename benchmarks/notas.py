@@ -0,0 +1,92 @@
+"""Benchmark de notas fiscais: reemissão de fim de dia em diretório e em .zip.
+
+Cria um banco SQLite novo com N pedidos do dia, emite todas as notas com
+emitir_notas (uma consulta e um pool de threads) e compara com o caminho antigo
+de uma consulta de produto por item e um arquivo gravado por vez.
+
+Uso: python benchmarks/notas.py --pedidos 3000 --itens 4 --trabalhadores 1,4,8
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmasil.banco import criar_engine, criar_fabrica_sessao
+from farmasil.modelos import Cliente, ItensPedido, Pedido, Produto, criar_esquema
+from farmasil.notas import emitir_notas, nome_arquivo
+
+
+def preparar_banco(caminho, args):
+    engine = criar_engine(f"sqlite:///{caminho}", perfil='importacao')
+    criar_esquema(engine)
+    rng = random.Random(args.semente)
+    agora = datetime.now()
+    with engine.begin() as conexao:
+        conexao.execute(Cliente.__table__.insert(),
+                        [{'nome': f'Cliente {i}', 'cpf': str(i), 'telefone': '-', 'email': '-'} for i in range(100)])
+        conexao.execute(Produto.__table__.insert(),
+                        [{'nome': f'Produto {i}', 'preco_centavos': 100 * (1 + i % 50), 'categoria': 'Bench', 'estoque': 0}
+                         for i in range(args.produtos)])
+        conexao.execute(Pedido.__table__.insert(),
+                        [{'cliente_id': 1 + i % 100, 'funcionario_id': 1, 'status': 'Finalizado',
+                          'data_hora': agora - timedelta(seconds=i)} for i in range(args.pedidos)])
+        conexao.execute(ItensPedido.__table__.insert(),
+                        [{'pedido_id': pedido_id, 'produto_id': rng.randint(1, args.produtos),
+                          'quantidade': rng.randint(1, 3), 'preco_centavos': 1000}
+                         for pedido_id in range(1, args.pedidos + 1) for _ in range(args.itens)])
+    return engine
+
+
+def por_item(session, destino):
+    """O caminho antigo: pedido a pedido, uma consulta por item e concatenação."""
+    for pedido in session.query(Pedido).order_by(Pedido.id):
+        nota = f"Nota Fiscal - Pedido #{pedido.id}\nCliente: {pedido.cliente.nome}\nItens:\n"
+        for item in pedido.itens:
+            produto = session.get(Produto, item.produto_id)
+            nota += f"{produto.nome} - {item.quantidade} x R${item.preco:.2f}\n"
+        with open(os.path.join(destino, nome_arquivo(pedido.id)), 'w') as arquivo:
+            arquivo.write(nota)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pedidos', type=int, default=3000)
+    parser.add_argument('--itens', type=int, default=4, help='itens por pedido')
+    parser.add_argument('--produtos', type=int, default=2000)
+    parser.add_argument('--trabalhadores', default='1,4,8')
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    hoje = datetime.combine(datetime.now().date(), datetime.min.time())
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = preparar_banco(os.path.join(diretorio, 'bench.db'), args)
+        fabrica = criar_fabrica_sessao(engine)
+
+        session = fabrica()
+        destino = os.path.join(diretorio, 'antigo')
+        os.makedirs(destino)
+        inicio = time.perf_counter()
+        por_item(session, destino)
+        print(f"{'consulta por item':<24} {args.pedidos / (time.perf_counter() - inicio):>10.0f} notas/s")
+        session.close()
+
+        for trabalhadores in (int(valor) for valor in args.trabalhadores.split(',')):
+            for formato in ('diretório', 'zip'):
+                destino = os.path.join(diretorio, f'notas_{trabalhadores}' + ('.zip' if formato == 'zip' else ''))
+                session = fabrica()
+                inicio = time.perf_counter()
+                total = emitir_notas(session, destino, trabalhadores=trabalhadores, inicio=hoje - timedelta(days=1))
+                decorrido = time.perf_counter() - inicio
+                session.close()
+                rotulo = f"{trabalhadores} threads, {formato}"
+                print(f"{rotulo:<24} {total / decorrido:>10.0f} notas/s  ({total} notas em {decorrido:.2f} s)")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""Regressão de planos de consulta: nenhuma operação pode cair em varredura completa.
+
+Cria um banco SQLite novo pelas migrações, roda as operações que o sistema
+executa (checkout, consultas de produto, estoque, caixa, listagens e painel),
+captura todo o SQL que lê tabelas e passa cada comando por `EXPLAIN QUERY PLAN`. Um
+`SCAN <tabela>` só é aceito nas tabelas que a operação percorre de propósito
+(ex.: a listagem de todas as lojas); qualquer outro faz o script sair com erro.
+Nas tabelas com alias (pedidos AS p) o SCAN vem com o alias e é conferido
+contra a tabela dele. O projeto não tem suíte de testes: a verificação é este
+script, que a integração contínua ou quem muda consultas e índices roda antes
+de entregar (código de saída 1 na falha).
+
+Uso: python benchmarks/plano_consultas.py [--verbose]
+"""
+import argparse
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmasil import arquivamento, busca, folha, listagens, notas, painel, reposicao, servico, vendas
+from farmasil.banco import criar_engine, nova_sessao, session, usar_engine
+from farmasil.migracoes import migrar
+from farmasil.modelos import (Base, Caixa, Cliente, Fornecedor, Funcionario, Loja, Pedido, Produto, SessaoCaixa,
+                              cache_produtos)
+
+# "SCAN produtos" / "SCAN TABLE produtos" (SQLite < 3.36), com ou sem índice de cobertura
+VARREDURA = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+INSERT_SELECT = re.compile(r'\bSELECT\b', re.IGNORECASE)
+# "pedidos AS p": o plano mostra o alias (SCAN p), a verificação usa a tabela
+ALIAS = re.compile(r'\b(\w+) AS (\w+)\b', re.IGNORECASE)
+
+
+def preparar_banco(caminho):
+    engine = criar_engine(f"sqlite:///{caminho}")
+    migrar(engine)
+    with engine.begin() as conexao:
+        conexao.execute(Loja.__table__.insert(), [{'nome': 'Loja Plano', 'endereco': '-', 'horario_funcionamento': '-'}])
+        conexao.execute(Fornecedor.__table__.insert(),
+                        [{'nome': 'Fornecedor Plano', 'cnpj': '000', 'telefone': '-', 'endereco': '-'}])
+        conexao.execute(Cliente.__table__.insert(),
+                        [{'nome': 'Cliente Plano', 'cpf': '000', 'telefone': '-', 'email': '-'}])
+        conexao.execute(Funcionario.__table__.insert(), [{'nome': 'Funcionário Plano', 'cargo': '-', 'salario_centavos': 100,
+                                                          'turno': '-', 'loja_id': 1}])
+        conexao.execute(Produto.__table__.insert(),
+                        [{'nome': f'Produto {i}', 'preco_centavos': 1000, 'categoria': 'Plano', 'estoque': 100,
+                          'loja_id': 1, 'fornecedor_id': 1} for i in range(10)])
+        conexao.execute(Caixa.__table__.insert(), [{}])
+        conexao.execute(SessaoCaixa.__table__.insert(), [{'caixa_id': 1, 'saldo_abertura_centavos': 0}])
+    usar_engine(engine)
+    return engine
+
+
+def operacoes():
+    """(nome, função(sessão), tabelas que a operação pode percorrer inteiras)."""
+    hoje = datetime.now()
+    caixa = lambda sessao: sessao.get(Caixa, 1)
+    itens = [{'nome': 'Produto 1', 'quantidade': 1}, {'nome': 'Produto 2', 'quantidade': 2}]
+    return [
+        ('Pedido.finalizar_pedido', lambda s: Pedido.finalizar_pedido(s, 1, 1, itens), ()),
+        # Sem período, a fachada do arquivo lê o catálogo de meses inteiro (uma linha por mês)
+        ('Pedido.consultar_pedidos_cliente', lambda s: Pedido.consultar_pedidos_cliente(s, 1), ('particoes_arquivo',)),
+        ('Produto.por_id', lambda s: Produto.por_id(s, 3), ()),
+        ('Produto.por_nomes', lambda s: Produto.por_nomes(s, ['Produto 4', 'Produto 5']), ()),
+        ('Produto.por_ids', lambda s: Produto.por_ids(s, [6, 7]), ()),
+        ('servico.cliente(cpf)', lambda s: servico._cliente(s, cpf='000'), ()),
+        # O FTS5 aparece como SCAN da tabela virtual mesmo quando usa o índice (MATCH); o vocabulário é lido inteiro
+        ('busca.buscar_produtos', lambda s: busca.buscar_produtos(s, 'prod 4'),
+         ('busca_produtos', 'busca_produtos_termos')),
+        ('busca.buscar_produtos(correção)', lambda s: busca.buscar_produtos(s, 'prodto', loja_id=1),
+         ('busca_produtos',)),
+        ('Produto.reservar_estoque', lambda s: Produto.reservar_estoque(s, {1: 1, 2: 1}), ()),
+        ('Produto.liberar_estoque', lambda s: Produto.liberar_estoque(s, {1: 1, 2: 1}), ()),
+        ('Produto.ajustar_estoque', lambda s: s.get(Produto, 6).ajustar_estoque(s, 1), ()),
+        ('Produto.alterar_preco', lambda s: Produto.alterar_preco(s, 7, 12.0), ()),
+        ('Produto.buscar_produtos_por_categoria', lambda s: Produto.buscar_produtos_por_categoria(s, 'Plano'), ()),
+        ('Produto.listar_produtos_loja', lambda s: Produto.listar_produtos_loja(s, 1), ()),
+        ('Loja.verificar_estoque_loja', lambda s: Loja.verificar_estoque_loja(s, 1), ()),
+        ('Loja.consultar_funcionarios_loja', lambda s: Loja.consultar_funcionarios_loja(s, 1), ()),
+        ('Loja.listar_lojas', lambda s: Loja.listar_lojas(s), ('lojas',)),
+        ('Fornecedor.listar_fornecedores', lambda s: Fornecedor.listar_fornecedores(s), ('fornecedores',)),
+        ('Caixa.registrar_entrada', lambda s: caixa(s).registrar_entrada(s, 10), ()),
+        ('Caixa.registrar_saida', lambda s: caixa(s).registrar_saida(s, 5), ()),
+        ('Caixa.consultar_saldo', lambda s: caixa(s).consultar_saldo(s), ()),
+        ('Caixa.conciliar', lambda s: caixa(s).conciliar(s, hoje - timedelta(days=1), hoje + timedelta(days=1)), ()),
+        ('Caixa.fechar_caixa', lambda s: caixa(s).fechar_caixa(s), ()),
+        ('listagens.paginar(produtos, loja_id)', lambda s: listagens.paginar(s, 'produtos', apos_id=2, loja_id=1), ()),
+        ('listagens.paginar(produtos, categoria)',
+         lambda s: listagens.paginar(s, 'produtos', apos_id=2, categoria='Plano'), ()),
+        ('listagens.paginar(funcionarios, loja_id)', lambda s: listagens.paginar(s, 'funcionarios', loja_id=1), ()),
+        ('notas.carregar_notas(faixa)', lambda s: list(notas.carregar_notas(s, de_id=1, ate_id=5)),
+         ('particoes_arquivo',)),
+        ('notas.carregar_notas(período)',
+         lambda s: list(notas.carregar_notas(s, inicio=hoje - timedelta(days=1), fim=hoje + timedelta(days=1))), ()),
+        ('vendas.atualizar_resumos', lambda s: vendas.atualizar_resumos(s), ()),
+        ('vendas.relatorio(loja, período)',
+         lambda s: vendas.relatorio(s, 'loja', hoje.date() - timedelta(days=7), hoje.date()), ()),
+        ('vendas.relatorio(categoria, período)',
+         lambda s: vendas.relatorio(s, 'categoria', hoje.date() - timedelta(days=7), hoje.date()), ()),
+        ('Funcionario.registrar_horas', lambda s: s.get(Funcionario, 1).registrar_horas(s, 8), ()),
+        ('Funcionario.gerar_relatorio_funcionario', lambda s: s.get(Funcionario, 1).gerar_relatorio_funcionario(s), ()),
+        ('reposicao.atualizar_velocidade(janela inteira)',
+         lambda s: reposicao.atualizar_velocidade(s, hoje.date() - timedelta(days=1)), ()),
+        # Os produtos que zeraram saem da janela numa passada pela tabela (uma linha por produto vendido)
+        ('reposicao.atualizar_velocidade(incremental)',
+         lambda s: reposicao.atualizar_velocidade(s, hoje.date()), ('velocidade_vendas',)),
+        # A rede inteira passa por todos os produtos vendidos na janela
+        ('reposicao.sugestoes', lambda s: reposicao.sugestoes(s), ('velocidade_vendas',)),
+        ('reposicao.sugestoes(loja)', lambda s: reposicao.sugestoes(s, loja_id=1), ()),
+        ('reposicao.compras_por_fornecedor', lambda s: reposicao.compras_por_fornecedor(s, por_loja=True),
+         ('velocidade_vendas',)),
+        ('folha.calcular_folha', lambda s: folha.calcular_folha(s, hoje.year, hoje.month), ('funcionarios',)),
+        ('Cliente.reconstruir_historico', lambda s: Cliente.reconstruir_historico(s),
+         ('clientes', 'particoes_arquivo')),
+        ('painel.painel_estoque', lambda s: painel.painel_estoque(s), ('lojas',)),
+        # Depois de tudo: arquiva o que as operações acima gravaram, como se fosse daqui a dois anos. O
+        # limite de cada caixa passa pelos checkpoints (um a cada INTERVALO_CHECKPOINT movimentos)
+        ('arquivamento.arquivar', lambda s: arquivamento.arquivar(s, hoje=hoje.date() + timedelta(days=730)),
+         ('checkpoints_caixa',)),
+        ('Caixa.conciliar(arquivado)',
+         lambda s: caixa(s).conciliar(s, hoje - timedelta(days=1), hoje + timedelta(days=1)), ()),
+    ]
+
+
+def planos(engine):
+    """Roda as operações e retorna [(operação, sql, linhas do plano, tabelas varridas indevidamente)]."""
+    capturados = []
+    atual = {}
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _capturar(conexao, cursor, sql, parametros, contexto, executemany):
+        comando = sql.lstrip().split(None, 1)[0].upper()
+        # INSERT ... SELECT também lê tabelas (ex.: resumos de vendas)
+        if comando in ('SELECT', 'UPDATE', 'DELETE', 'WITH') or (comando == 'INSERT' and INSERT_SELECT.search(sql)):
+            capturados.append((atual['nome'], atual['permitidas'], sql, parametros[0] if executemany else parametros))
+
+    for nome, funcao, permitidas in operacoes():
+        atual.update(nome=nome, permitidas=permitidas)
+        # Sem cache, para a consulta ao banco aparecer mesmo em produtos já lidos
+        cache_produtos.limpar()
+        sessao = nova_sessao()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                funcao(sessao)
+            sessao.commit()
+            session.commit()
+        finally:
+            sessao.close()
+            session.remove()
+    event.remove(engine, 'before_cursor_execute', _capturar)
+
+    resultado = []
+    with engine.connect() as conexao:
+        cursor = conexao.connection.cursor()
+        for nome, permitidas, sql, parametros in capturados:
+            linhas = [linha[3] for linha in cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parametros)]
+            aliases = {alias: tabela for tabela, alias in ALIAS.findall(sql) if tabela in Base.metadata.tables}
+            varridas = [aliases.get(VARREDURA.match(linha).group(1), VARREDURA.match(linha).group(1))
+                        for linha in linhas if VARREDURA.match(linha)]
+            # Subconsultas também aparecem como SCAN, com o nome delas: só contam as tabelas
+            indevidas = [tabela for tabela in varridas if tabela in Base.metadata.tables and tabela not in permitidas]
+            resultado.append((nome, sql, linhas, indevidas))
+        cursor.close()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--verbose', action='store_true', help='mostra o plano de todas as consultas')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = preparar_banco(os.path.join(diretorio, 'plano.db'))
+        resultado = planos(engine)
+        engine.dispose()
+
+    falhas = 0
+    for nome, sql, linhas, indevidas in resultado:
+        if indevidas:
+            falhas += 1
+        if indevidas or args.verbose:
+            print(f"{'FALHA' if indevidas else 'ok':>5}  {nome}: {' '.join(sql.split())}")
+            for linha in linhas:
+                print(f"{'':>7}{linha}")
+    print(f"{len(resultado)} consultas verificadas, {falhas} com varredura completa.")
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Benchmark dos relatórios do fechamento: em série x em paralelo, um processo por relatório.
+
+Sobre um banco do gerador (benchmarks/gerador.py), atualiza os resumos de
+vendas e a velocidade de reposição (relatorios.preparar) e roda as tarefas de
+relatorios_padrao em série, num processo só, e com cada quantidade de
+processos de --processos. Mostra o tempo total, a soma dos tempos de cada
+relatório e confere que as linhas são as mesmas da execução em série.
+
+Com uma CPU só os processos não ganham nada (e pagam a criação do pool); o
+ganho aparece com tantas CPUs quanto relatórios pesados.
+
+Uso: python benchmarks/relatorios.py [--banco dados.db] [--escala media] [--processos 2,4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from sqlalchemy import func, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from farmasil.banco import criar_engine, criar_fabrica_sessao, unidade_de_trabalho
+from farmasil.modelos import Pedido
+from farmasil import relatorios
+
+from gerador import REFERENCIA, adicionar_argumentos, criar_banco, escala_dos_argumentos
+
+
+def rodar(url, tarefas, processos):
+    inicio = time.perf_counter()
+    resultados = relatorios.executar_relatorios(tarefas, url=url, processos=processos)
+    return resultados, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--banco', help='banco já gerado (padrão: gera um temporário)')
+    parser.add_argument('--processos', default='2,4', help='quantidades de processos, separadas por vírgula')
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = args.banco
+        if caminho is None:
+            caminho = os.path.join(diretorio, 'relatorios.db')
+            inicio = time.perf_counter()
+            criar_banco(caminho, escala_dos_argumentos(args), args.semente).dispose()
+            print(f"banco {args.escala} gerado em {time.perf_counter() - inicio:.1f} s")
+        url = f"sqlite:///{caminho}"
+        engine = criar_engine(url, perfil='pdv')
+        inicio = time.perf_counter()
+        with unidade_de_trabalho(criar_fabrica_sessao(engine)) as sessao:
+            # As datas do gerador não seguem o relógio: "hoje" é o dia seguinte ao último pedido
+            ultimo = sessao.scalar(select(func.max(Pedido.data_hora)))
+            relatorios.preparar(sessao, hoje=ultimo.date() + timedelta(days=1))
+        engine.dispose()
+        print(f"resumos e velocidade atualizados em {time.perf_counter() - inicio:.1f} s")
+
+        tarefas = relatorios.relatorios_padrao(mes=(REFERENCIA.year, REFERENCIA.month))
+        print(f"{len(tarefas)} relatórios, {os.cpu_count()} CPU(s)")
+        print(f"{'execução':<16} {'total':>9} {'soma':>9}  linhas")
+        base, decorrido = rodar(url, tarefas, 1)
+        print(f"{'em série':<16} {decorrido:>8.2f}s {sum(r.segundos for r in base):>8.2f}s  "
+              f"{sum(len(r.linhas) for r in base)}")
+        for processos in (int(parte) for parte in args.processos.split(',')):
+            resultados, decorrido = rodar(url, tarefas, processos)
+            iguais = all(a.linhas == b.linhas for a, b in zip(base, resultados))
+            print(f"{f'{processos} processos':<16} {decorrido:>8.2f}s {sum(r.segundos for r in resultados):>8.2f}s  "
+                  f"{sum(len(r.linhas) for r in resultados)} ({'iguais' if iguais else 'DIFERENTES'})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark da reposição: janela de velocidade e sugestões de compra da rede inteira.
+
+Monta um banco com --lojas x --produtos SKUs e --dias dias de resumos de
+vendas (vendas_diarias_produto) em que uma fração --vendidos dos SKUs vende a
+cada dia, e mede:
+
+- a primeira execução, que soma a janela inteira de JANELA_DIAS dias;
+- a execução diária incremental (entra um dia, sai outro);
+- as sugestões por produto e as compras consolidadas por fornecedor e loja;
+- para comparação, o ponto de pedido calculado produto a produto (com a
+  velocidade já pronta) numa amostra, estimado para o catálogo inteiro.
+
+Uso: python benchmarks/reposicao.py [--lojas 150] [--produtos 20000] [--vendidos 0.05]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmasil import reposicao
+from farmasil.banco import criar_engine, criar_fabrica_sessao
+from farmasil.migracoes import migrar
+from farmasil.modelos import Fornecedor, Loja, Produto, VelocidadeVendas, VendaDiariaProduto
+
+LOTE = 50_000
+HOJE = date(2025, 3, 1)
+
+
+def inserir(engine, tabela, linhas):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) == LOTE:
+            with engine.begin() as conexao:
+                conexao.execute(tabela.insert(), lote)
+            lote = []
+    if lote:
+        with engine.begin() as conexao:
+            conexao.execute(tabela.insert(), lote)
+
+
+def preparar(engine, args, rng):
+    total = args.lojas * args.produtos
+    inserir(engine, Loja.__table__, ({'nome': f'Loja {i}', 'endereco': '-', 'horario_funcionamento': '-'}
+                                     for i in range(args.lojas)))
+    inserir(engine, Fornecedor.__table__, ({'nome': f'Fornecedor {i}', 'cnpj': str(i), 'telefone': '-',
+                                            'endereco': '-', 'prazo_entrega': rng.randint(2, 15)}
+                                           for i in range(args.fornecedores)))
+    inserir(engine, Produto.__table__, ({'nome': f'Produto {i}', 'preco_centavos': 1000, 'categoria': 'Bench',
+                                         'estoque': rng.randint(0, 200), 'loja_id': 1 + i // args.produtos,
+                                         'fornecedor_id': 1 + i % args.fornecedores} for i in range(total)))
+    vendidos = int(total * args.vendidos)
+
+    def vendas(dia):
+        for produto_id in sorted(rng.sample(range(1, total + 1), vendidos)):
+            yield {'dia': dia, 'loja_id': 1 + (produto_id - 1) // args.produtos, 'produto_id': produto_id,
+                   'categoria': 'Bench', 'pedidos': 1, 'unidades': rng.randint(1, 6), 'receita_centavos': 1000}
+    for deslocamento in range(args.dias, 0, -1):
+        inserir(engine, VendaDiariaProduto.__table__, vendas(HOJE - timedelta(days=deslocamento)))
+    return vendas
+
+
+def medir(rotulo, funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    print(f"{rotulo:<34} {time.perf_counter() - inicio:>8.2f} s  {resultado}")
+    return resultado
+
+
+def por_produto(sessao, produto_ids):
+    """O ponto de pedido calculado produto a produto, mesmo com a velocidade já somada."""
+    sugeridos = 0
+    for produto_id in produto_ids:
+        produto = sessao.get(Produto, produto_id)
+        velocidade = sessao.get(VelocidadeVendas, produto_id)
+        prazo = sessao.get(Fornecedor, produto.fornecedor_id).prazo_entrega
+        ponto = velocidade.unidades * (prazo + reposicao.DIAS_SEGURANCA) if velocidade else 0
+        if ponto and ponto >= produto.estoque * reposicao.JANELA_DIAS:
+            sugeridos += 1
+    return sugeridos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lojas', type=int, default=150)
+    parser.add_argument('--produtos', type=int, default=20_000, help='SKUs por loja')
+    parser.add_argument('--fornecedores', type=int, default=300)
+    parser.add_argument('--vendidos', type=float, default=0.05, help='fração dos SKUs com venda em cada dia')
+    parser.add_argument('--dias', type=int, default=reposicao.JANELA_DIAS + 1, help='dias de vendas antes de HOJE')
+    parser.add_argument('--amostra', type=int, default=2000, help='produtos do cálculo produto a produto')
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.semente)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = criar_engine(f"sqlite:///{os.path.join(diretorio, 'reposicao.db')}", perfil='importacao')
+        migrar(engine)
+        inicio = time.perf_counter()
+        vendas = preparar(engine, args, rng)
+        print(f"{args.lojas * args.produtos} SKUs e {args.dias} dias de vendas gerados em "
+              f"{time.perf_counter() - inicio:.1f} s")
+        engine.dispose()
+
+        engine = criar_engine(f"sqlite:///{os.path.join(diretorio, 'reposicao.db')}", perfil='pdv')
+        sessao = criar_fabrica_sessao(engine)()
+        medir("janela inteira (primeira execução)",
+              lambda: reposicao.atualizar_velocidade(sessao, HOJE, atualizar=False))
+        inserir(engine, VendaDiariaProduto.__table__, vendas(HOJE))
+        medir("dia seguinte (incremental)",
+              lambda: reposicao.atualizar_velocidade(sessao, HOJE + timedelta(days=1), atualizar=False))
+        medir("sugestões por produto (rede)", lambda: f"{len(reposicao.sugestoes(sessao))} produtos")
+        medir("compras por fornecedor e loja",
+              lambda: f"{len(reposicao.compras_por_fornecedor(sessao, por_loja=True))} pedidos de compra")
+        amostra = rng.sample(range(1, args.lojas * args.produtos + 1), args.amostra)
+        inicio = time.perf_counter()
+        por_produto(sessao, amostra)
+        decorrido = time.perf_counter() - inicio
+        print(f"{'produto a produto (estimado)':<34} {decorrido * args.lojas * args.produtos / args.amostra:>8.0f} s  "
+              f"({args.amostra} produtos em {decorrido:.2f} s)")
+        sessao.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark de reservas concorrentes: pedidos por segundo x número de terminais.
+
+Cada rodada usa um banco SQLite novo, dispara os mesmos pedidos pelo
+ServicoReserva com N threads (um terminal por thread) e, no fim, confere que o
+estoque vendido bate com os itens gravados e que nenhum produto ficou negativo.
+
+Uso: python benchmarks/reserva.py --pedidos 2000 --terminais 1,2,4,8,16
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmasil.banco import criar_engine
+from farmasil.modelos import Base, Cliente, ItensPedido, Produto
+from farmasil.reserva import ServicoReserva
+
+
+def preparar_banco(caminho, produtos, estoque, terminais, perfil='pdv'):
+    engine = criar_engine(f"sqlite:///{caminho}", perfil=perfil, pool_size=terminais, max_overflow=0)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conexao:
+        conexao.execute(Cliente.__table__.insert(),
+                        [{'nome': 'Cliente Bench', 'cpf': '000', 'telefone': '-', 'email': '-'}])
+        conexao.execute(Produto.__table__.insert(),
+                        [{'nome': f'Produto {i}', 'preco_centavos': 1000, 'categoria': 'Bench', 'estoque': estoque}
+                         for i in range(produtos)])
+    return engine
+
+
+def gerar_pedidos(quantidade, produtos, itens_por_pedido, semente):
+    """Pedidos com escolha de produtos enviesada, para haver disputa nos itens mais vendidos."""
+    rng = random.Random(semente)
+    nomes = [f'Produto {i}' for i in range(produtos)]
+    pesos = [1 / (i + 1) for i in range(produtos)]
+    pedidos = []
+    for _ in range(quantidade):
+        escolhidos = set(rng.choices(nomes, weights=pesos, k=itens_por_pedido))
+        itens = [{'nome': nome, 'quantidade': rng.randint(1, 3)} for nome in escolhidos]
+        pedidos.append({'cliente_id': 1, 'funcionario_id': 1, 'itens': itens})
+    return pedidos
+
+
+def conferir(engine, produtos, estoque):
+    """Estoque inicial - final deve ser exatamente o que foi gravado em itens_pedido."""
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    try:
+        vendido = dict(session.query(ItensPedido.produto_id, func.sum(ItensPedido.quantidade))
+                       .group_by(ItensPedido.produto_id))
+        for produto_id, atual in session.query(Produto.id, Produto.estoque):
+            if atual < 0 or estoque - atual != vendido.get(produto_id, 0):
+                return False
+        return True
+    finally:
+        session.close()
+
+
+def rodada(terminais, pedidos, args):
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = preparar_banco(os.path.join(diretorio, 'bench.db'), args.produtos, args.estoque, terminais,
+                                args.perfil)
+        servico = ServicoReserva(sessionmaker(bind=engine))
+        inicio = time.perf_counter()
+        resultados = servico.processar_lote(pedidos, terminais=terminais)
+        decorrido = time.perf_counter() - inicio
+        aprovados = sum(1 for resultado in resultados if resultado.sucesso)
+        sem_estoque = sum(1 for resultado in resultados if resultado.sem_estoque)
+        consistente = conferir(engine, args.produtos, args.estoque)
+        engine.dispose()
+    return len(pedidos) / decorrido, aprovados, sem_estoque, consistente
+
+
+def disputa_ultima_caixa(terminais):
+    """N terminais vendendo a última caixa do mesmo remédio: só um pode conseguir."""
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = preparar_banco(os.path.join(diretorio, 'disputa.db'), 1, 1, terminais)
+        servico = ServicoReserva(sessionmaker(bind=engine))
+        pedidos = [{'cliente_id': 1, 'funcionario_id': 1, 'itens': [{'nome': 'Produto 0', 'quantidade': 1}]}
+                   for _ in range(terminais)]
+        resultados = servico.processar_lote(pedidos, terminais=terminais)
+        engine.dispose()
+    return sum(1 for resultado in resultados if resultado.sucesso)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pedidos', type=int, default=2000)
+    parser.add_argument('--produtos', type=int, default=200)
+    parser.add_argument('--itens', type=int, default=3, help='itens por pedido')
+    parser.add_argument('--estoque', type=int, default=200, help='estoque inicial de cada produto')
+    parser.add_argument('--terminais', default='1,2,4,8,16')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--perfil', default='pdv', help='perfil de banco (ver farmasil.banco.PERFIS)')
+    args = parser.parse_args()
+
+    pedidos = gerar_pedidos(args.pedidos, args.produtos, args.itens, args.semente)
+    print(f"{'terminais':>9} {'pedidos/s':>10} {'aprovados':>10} {'sem estoque':>12} {'consistente':>12}")
+    for terminais in (int(valor) for valor in args.terminais.split(',')):
+        por_segundo, aprovados, sem_estoque, consistente = rodada(terminais, pedidos, args)
+        print(f"{terminais:>9} {por_segundo:>10.1f} {aprovados:>10} {sem_estoque:>12} {'sim' if consistente else 'NÃO':>12}")
+
+    vencedores = disputa_ultima_caixa(max(int(valor) for valor in args.terminais.split(',')))
+    print(f"Disputa pela última caixa: {vencedores} venda(s) aprovada(s) (esperado: 1)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Teste de carga do serviço HTTP/JSON dos PDVs (farmasil.servico) contra um servidor local.
+
+Sobe o serviço num processo separado, com um banco SQLite temporário de uma
+loja grande (--produtos SKUs, --clientes clientes e um caixa aberto por
+terminal), e simula --terminais PDVs, cada um com a sua conexão keep-alive.
+Cada venda de um terminal faz a sequência de um atendimento:
+
+- busca do produto pelo nome digitado (GET /produtos?q=...);
+- consulta de estoque (GET /produtos/<id>/estoque);
+- identificação do cliente pelo CPF (GET /clientes?cpf=...);
+- checkout de 1 a 4 itens (POST /pedidos);
+- entrada do pagamento no caixa do terminal (POST /caixas/<id>/entradas).
+
+No fim mostra as requisições por segundo e a latência por rota, e confere que
+o estoque baixado bate com os itens gravados. Cliente e servidor dividem as
+CPUs da máquina.
+
+Uso: python benchmarks/servico.py [--terminais 30] [--vendas 100] [--produtos 20000]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from urllib.parse import quote
+
+from sqlalchemy import func, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmasil.banco import criar_engine, criar_engine_assincrona
+from farmasil.migracoes import migrar
+from farmasil.modelos import Caixa, Cliente, Funcionario, ItensPedido, Loja, Produto, SessaoCaixa
+from farmasil.servico import servir
+
+ESTOQUE = 10_000
+PALAVRAS = ['Dipirona', 'Paracetamol', 'Ibuprofeno', 'Amoxicilina', 'Losartana', 'Omeprazol', 'Sinvastatina',
+            'Loratadina', 'Nimesulida', 'Cefalexina', 'Vitamina', 'Dexametasona', 'Metformina', 'Atenolol']
+
+
+def nome_produto(indice):
+    return f"{PALAVRAS[indice % len(PALAVRAS)]} {50 * (1 + indice % 20)}mg Apresentação {indice}"
+
+
+def preparar(url, args):
+    engine = criar_engine(url, perfil='importacao')
+    migrar(engine)
+    with engine.begin() as conexao:
+        conexao.execute(Loja.__table__.insert(), [{'nome': 'Loja Bench', 'endereco': '-',
+                                                   'horario_funcionamento': '-'}])
+        conexao.execute(Funcionario.__table__.insert(), [{'nome': f'Caixa {i}', 'cargo': 'Caixa', 'salario_centavos': 100,
+                                                          'turno': 'Manhã', 'loja_id': 1}
+                                                         for i in range(args.terminais)])
+        conexao.execute(Produto.__table__.insert(), [{'nome': nome_produto(i), 'preco_centavos': 100 * (10 + i % 50),
+                                                      'categoria': 'Bench', 'estoque': ESTOQUE, 'loja_id': 1}
+                                                     for i in range(args.produtos)])
+        conexao.execute(Cliente.__table__.insert(), [{'nome': f'Cliente {i}', 'cpf': f'{i:011d}', 'telefone': '-',
+                                                      'email': '-'} for i in range(args.clientes)])
+        conexao.execute(Caixa.__table__.insert(), [{} for _ in range(args.terminais)])
+        conexao.execute(SessaoCaixa.__table__.insert(), [{'caixa_id': i + 1, 'saldo_abertura_centavos': 0}
+                                                         for i in range(args.terminais)])
+    engine.dispose()
+
+
+def rodar_servidor(url, porta, pronto):
+    servir(criar_engine_assincrona(url, perfil='pdv'), '127.0.0.1', porta, pronto=lambda host, porta: pronto.set())
+
+
+class Terminal:
+    """Um PDV com uma conexão keep-alive; guarda a latência de cada rota."""
+
+    def __init__(self, porta, latencias):
+        self.porta = porta
+        self.latencias = latencias
+        self.leitor = self.escritor = None
+
+    async def conectar(self):
+        self.leitor, self.escritor = await asyncio.open_connection('127.0.0.1', self.porta)
+
+    async def requisitar(self, rota, metodo, alvo, corpo=None):
+        dados = json.dumps(corpo).encode('utf-8') if corpo is not None else b''
+        inicio = time.perf_counter()
+        self.escritor.write(f"{metodo} {alvo} HTTP/1.1\r\nHost: pdv\r\nContent-Type: application/json\r\n"
+                            f"Content-Length: {len(dados)}\r\n\r\n".encode('latin-1') + dados)
+        await self.escritor.drain()
+        cabecalho = (await self.leitor.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        tamanho = next(int(linha.split(':', 1)[1]) for linha in cabecalho if linha.lower().startswith('content-length'))
+        resposta = json.loads(await self.leitor.readexactly(tamanho))
+        self.latencias[rota].append(time.perf_counter() - inicio)
+        return int(cabecalho[0].split()[1]), resposta
+
+    async def vender(self, rng, args, caixa_id):
+        indice = rng.randrange(args.produtos)
+        digitado = ' '.join(parte[:4] for parte in nome_produto(indice).split()[:2])
+        status, resposta = await self.requisitar('busca', 'GET', f'/produtos?q={quote(digitado)}&limite=5')
+        assert status == 200, resposta
+        await self.requisitar('estoque', 'GET', f'/produtos/{indice + 1}/estoque?quantidade=1')
+        await self.requisitar('cliente', 'GET', f'/clientes?cpf={rng.randrange(args.clientes):011d}')
+        itens = [{'produto_id': 1 + rng.randrange(args.produtos), 'quantidade': rng.randint(1, 3)}
+                 for _ in range(rng.randint(1, 4))]
+        status, pedido = await self.requisitar('checkout', 'POST', '/pedidos', {
+            'cliente_id': 1 + rng.randrange(args.clientes), 'funcionario_id': caixa_id, 'itens': itens})
+        assert status == 201, pedido
+        status, resposta = await self.requisitar('caixa', 'POST', f'/caixas/{caixa_id}/entradas',
+                                                 {'valor': pedido['total']})
+        assert status == 201, resposta
+
+
+async def carga(porta, args):
+    latencias = defaultdict(list)
+    terminais = [Terminal(porta, latencias) for _ in range(args.terminais)]
+    for terminal in terminais:
+        await terminal.conectar()
+
+    async def atender(numero, terminal):
+        rng = random.Random(args.semente + numero)
+        for _ in range(args.vendas):
+            await terminal.vender(rng, args, numero + 1)
+    inicio = time.perf_counter()
+    await asyncio.gather(*(atender(numero, terminal) for numero, terminal in enumerate(terminais)))
+    decorrido = time.perf_counter() - inicio
+    for terminal in terminais:
+        terminal.escritor.close()
+    return latencias, decorrido
+
+
+def conferir(url):
+    engine = criar_engine(url, perfil='pdv')
+    with engine.connect() as conexao:
+        vendido = conexao.execute(select(func.coalesce(func.sum(ItensPedido.quantidade), 0))).scalar()
+        baixado = conexao.execute(select(func.sum(ESTOQUE - Produto.estoque))).scalar()
+    engine.dispose()
+    return vendido, baixado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--terminais', type=int, default=30)
+    parser.add_argument('--vendas', type=int, default=100, help='vendas por terminal')
+    parser.add_argument('--produtos', type=int, default=20_000)
+    parser.add_argument('--clientes', type=int, default=5000)
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        url = f"sqlite:///{os.path.join(diretorio, 'servico.db')}"
+        preparar(url, args)
+        pronto = multiprocessing.Event()
+        servidor = multiprocessing.Process(target=rodar_servidor, args=(url, args.porta, pronto), daemon=True)
+        servidor.start()
+        try:
+            if not pronto.wait(30):
+                raise RuntimeError("O serviço não abriu a porta.")
+            latencias, decorrido = asyncio.run(carga(args.porta, args))
+        finally:
+            servidor.terminate()
+            servidor.join()
+
+        total = sum(len(tempos) for tempos in latencias.values())
+        vendas = args.terminais * args.vendas
+        print(f"{args.terminais} terminais, {vendas} vendas, {total} requisições em {decorrido:.1f} s: "
+              f"{total / decorrido:.0f} req/s, {vendas / decorrido:.0f} vendas/s")
+        print(f"{'rota':<10} {'mediana':>9} {'p95':>9} {'p99':>9}")
+        for rota, tempos in latencias.items():
+            tempos.sort()
+            p95, p99 = tempos[int(len(tempos) * 0.95)], tempos[int(len(tempos) * 0.99)]
+            print(f"{rota:<10} {statistics.median(tempos) * 1000:>7.1f}ms {p95 * 1000:>7.1f}ms {p99 * 1000:>7.1f}ms")
+        vendido, baixado = conferir(url)
+        print(f"estoque: {baixado} unidades baixadas, {vendido} em itens de pedido "
+              f"({'ok' if vendido == baixado else 'DIVERGENTE'})")
+
+
+if __name__ == '__main__':
+    main()
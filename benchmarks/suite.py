@@ -0,0 +1,212 @@
+"""Suíte de benchmarks dos caminhos quentes, com resultado em JSON e comparação com uma base.
+
+Roda, sobre um banco do gerador (benchmarks/gerador.py), o checkout, a
+verificação de estoque, a busca por categoria, o estoque total da loja, uma
+página da listagem de clientes, a emissão de notas e as entradas no caixa.
+Cada caso repete a operação com parâmetros sorteados (semente fixa) até
+--repeticoes vezes ou --tempo-max segundos e guarda mediana, p95, mínimo e
+média em milissegundos.
+
+Com --base, compara a mediana de cada caso com a do arquivo de base e sai com
+erro se algum ficou mais de --tolerancia (fração) mais lento. --salvar-base
+grava o resultado desta execução como a nova base. --metricas grava também os
+comandos SQL de cada operação chamada pelos casos (farmasil.metricas), com as
+suspeitas de N+1. A suíte escreve no banco (pedidos e movimentos de caixa): use
+um banco gerado para isso.
+
+Uso: python benchmarks/suite.py [--banco dados.db | --escala pequena] [--saida resultado.json]
+                                [--base base.json [--tolerancia 0.25] [--salvar-base]] [--metricas sql.prom]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import sqlalchemy
+from sqlalchemy import func
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmasil import listagens
+from farmasil.banco import PERFIS, criar_engine, nova_sessao, session, usar_engine
+from farmasil.metricas import Metricas, instrumentar
+from farmasil.modelos import Caixa, Cliente, Funcionario, Loja, Pedido, Produto
+from farmasil.notas import emitir_notas
+
+from gerador import CATEGORIAS, adicionar_argumentos, criar_banco, escala_dos_argumentos, nome_produto
+
+NOTAS_POR_LOTE = 50
+
+
+def dimensoes(sessao):
+    """Quantidades do banco que os casos usam para sortear parâmetros válidos."""
+    lojas = sessao.query(func.count(Loja.id)).scalar()
+    return {
+        'lojas': lojas,
+        'produtos_por_loja': sessao.query(func.count(Produto.id)).scalar() // max(lojas, 1),
+        'produtos': sessao.query(func.max(Produto.id)).scalar(),
+        'clientes': sessao.query(func.max(Cliente.id)).scalar(),
+        'funcionarios': sessao.query(func.max(Funcionario.id)).scalar(),
+        'pedidos': sessao.query(func.max(Pedido.id)).scalar(),
+        'caixas': sessao.query(func.max(Caixa.id)).scalar(),
+    }
+
+
+def casos(dim, diretorio):
+    """[(nome, função(sessão, rng))] na ordem em que rodam."""
+    def checkout(sessao, rng):
+        funcionario_id = rng.randint(1, dim['funcionarios'])
+        loja_id = 1 + (funcionario_id - 1) % dim['lojas']
+        itens = [{'nome': nome_produto(loja_id, indice), 'quantidade': rng.randint(1, 3)}
+                 for indice in rng.sample(range(dim['produtos_por_loja']), min(3, dim['produtos_por_loja']))]
+        resultado = Pedido.finalizar_pedido(sessao, rng.randint(1, dim['clientes']), funcionario_id, itens)
+        if not resultado.sucesso:
+            raise RuntimeError(f"checkout falhou: {resultado.erro}")
+
+    def notas(sessao, rng):
+        primeiro = rng.randint(1, max(dim['pedidos'] - NOTAS_POR_LOTE, 1))
+        emitir_notas(sessao, os.path.join(diretorio, f'notas_{primeiro}.zip'), de_id=primeiro,
+                     ate_id=primeiro + NOTAS_POR_LOTE - 1)
+
+    def caixa(sessao, rng):
+        if sessao.get(Caixa, rng.randint(1, dim['caixas'])).registrar_entrada(sessao, rng.randint(1, 500)) is None:
+            raise RuntimeError("entrada no caixa falhou (caixa fechado?)")
+
+    return [
+        ('checkout', checkout),
+        ('verificar_estoque', lambda s, rng: Produto.verificar_estoque(s, rng.randint(1, dim['produtos']), 1)),
+        ('busca_por_categoria', lambda s, rng: Produto.buscar_produtos_por_categoria(s, rng.choice(CATEGORIAS))),
+        ('estoque_da_loja', lambda s, rng: Loja.verificar_estoque_loja(s, rng.randint(1, dim['lojas']))),
+        ('listagem_de_clientes', lambda s, rng: listagens.paginar(s, 'clientes', apos_id=rng.randint(0, dim['clientes']))),
+        (f'notas_fiscais_{NOTAS_POR_LOTE}', notas),
+        ('entrada_no_caixa', caixa),
+    ]
+
+
+def medir(funcao, rng, repeticoes, tempo_max):
+    """Tempos (ms) de até `repeticoes` chamadas, parando depois de `tempo_max` segundos (mínimo de 5)."""
+    tempos = []
+    limite = time.perf_counter() + tempo_max
+    with open(os.devnull, 'w') as nulo, redirect_stdout(nulo):
+        while len(tempos) < repeticoes and (len(tempos) < 5 or time.perf_counter() < limite):
+            sessao = nova_sessao()
+            try:
+                inicio = time.perf_counter()
+                funcao(sessao, rng)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+            finally:
+                sessao.close()
+                session.remove()
+    return tempos
+
+
+def resumir(tempos):
+    ordenados = sorted(tempos)
+    return {
+        'repeticoes': len(tempos),
+        'mediana_ms': round(statistics.median(ordenados), 4),
+        'p95_ms': round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))], 4),
+        'minimo_ms': round(ordenados[0], 4),
+        'media_ms': round(statistics.fmean(ordenados), 4),
+    }
+
+
+def comparar(resultados, base, tolerancia):
+    """{caso: (mediana atual / mediana da base, regrediu)} para os casos presentes nas duas execuções."""
+    comparacao = {}
+    for nome, atual in resultados.items():
+        anterior = base['resultados'].get(nome)
+        if anterior and anterior['mediana_ms'] > 0:
+            razao = atual['mediana_ms'] / anterior['mediana_ms']
+            comparacao[nome] = (razao, razao > 1 + tolerancia)
+    return comparacao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--banco', help='banco já gerado (padrão: gera um temporário na --escala)')
+    adicionar_argumentos(parser)
+    parser.add_argument('--perfil', choices=sorted(PERFIS), default='pdv')
+    parser.add_argument('--repeticoes', type=int, default=200, help='máximo de repetições por caso')
+    parser.add_argument('--tempo-max', type=float, default=10.0, help='segundos por caso')
+    parser.add_argument('--casos', help='só estes casos (separados por vírgula)')
+    parser.add_argument('--saida', help='arquivo JSON do resultado')
+    parser.add_argument('--base', help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='piora aceita na mediana (fração)')
+    parser.add_argument('--salvar-base', action='store_true', help='grava este resultado em --base')
+    parser.add_argument('--metricas', help='grava os comandos SQL por operação (.prom ou JSON); mede com instrumentação')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = args.banco
+        escala = None
+        if caminho is None:
+            escala = escala_dos_argumentos(args)
+            caminho = os.path.join(diretorio, 'suite.db')
+            print(f"Gerando banco na escala {args.escala}...")
+            criar_banco(caminho, escala, args.semente).dispose()
+        engine = criar_engine(f"sqlite:///{caminho}", perfil=args.perfil)
+        usar_engine(engine)
+        sessao = nova_sessao()
+        dim = dimensoes(sessao)
+        sessao.close()
+
+        coletor = instrumentar(engine, Metricas()) if args.metricas else None
+        escolhidos = set(args.casos.split(',')) if args.casos else None
+        resultados = {}
+        for nome, funcao in casos(dim, diretorio):
+            if escolhidos and nome not in escolhidos:
+                continue
+            resultados[nome] = resumir(medir(funcao, random.Random(args.semente), args.repeticoes, args.tempo_max))
+        engine.dispose()
+        if coletor:
+            coletor.exportar(args.metricas)
+
+    saida = {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'banco': args.banco, 'escala': args.escala if escala else None, 'dimensoes': dim,
+            'semente': args.semente, 'perfil': args.perfil, 'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__, 'sqlite': sqlite3.sqlite_version, 'maquina': platform.platform(),
+        },
+        'resultados': resultados,
+    }
+
+    comparacao = {}
+    if args.base and os.path.exists(args.base) and not args.salvar_base:
+        with open(args.base, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        if base['meta'].get('dimensoes') != dim:
+            print("Aviso: a base foi medida em um banco de outro tamanho; a comparação não é direta.")
+        comparacao = comparar(resultados, base, args.tolerancia)
+
+    print(f"{'caso':<24} {'mediana':>10} {'p95':>10} {'mínimo':>10} {'repet.':>7}  base")
+    for nome, valores in resultados.items():
+        razao, regrediu = comparacao.get(nome, (None, False))
+        variacao = f"{(razao - 1) * 100:+.1f}%{'  REGRESSÃO' if regrediu else ''}" if razao else '-'
+        print(f"{nome:<24} {valores['mediana_ms']:>8.3f}ms {valores['p95_ms']:>8.3f}ms {valores['minimo_ms']:>8.3f}ms "
+              f"{valores['repeticoes']:>7}  {variacao}")
+
+    for destino in (args.saida, args.base if args.salvar_base else None):
+        if destino:
+            with open(destino, 'w', encoding='utf-8') as arquivo:
+                json.dump(saida, arquivo, ensure_ascii=False, indent=2)
+                arquivo.write('\n')
+
+    regressoes = [nome for nome, (_, regrediu) in comparacao.items() if regrediu]
+    if regressoes:
+        print(f"{len(regressoes)} caso(s) mais lentos que a base além de {args.tolerancia:.0%}: {', '.join(regressoes)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
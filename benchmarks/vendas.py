@@ -0,0 +1,118 @@
+"""Benchmark da análise de vendas: resumos diários x varredura dos itens.
+
+Cria um banco SQLite com N linhas de itens de pedido espalhadas por vários dias,
+lojas e funcionários e mede: a primeira agregação dos resumos, uma atualização
+incremental depois de mais um dia de pedidos, o relatório por loja lido dos
+resumos, o mesmo relatório somando os itens brutos e a extração colunar com
+pandas seguida de uma fatia por loja e categoria.
+
+Uso: python benchmarks/vendas.py --itens 10000000 [--banco vendas.db]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from farmasil.banco import criar_engine, criar_fabrica_sessao
+from farmasil.modelos import Funcionario, ItensPedido, Loja, Pedido, Produto, criar_esquema
+from farmasil import vendas
+
+CATEGORIAS = ['Analgésicos', 'Antibióticos', 'Vitaminas', 'Higiene', 'Dermocosméticos', 'Infantil']
+
+
+def inserir_pedidos(engine, rng, primeiro_id, pedidos, itens_por_pedido, dias, inicio, args):
+    lote = 50000
+    for comeco in range(0, pedidos, lote):
+        ids = range(primeiro_id + comeco, primeiro_id + min(pedidos, comeco + lote))
+        with engine.begin() as conexao:
+            conexao.execute(Pedido.__table__.insert(), [
+                {'id': pedido_id, 'cliente_id': None, 'funcionario_id': rng.randint(1, args.funcionarios),
+                 'status': 'Finalizado', 'data_hora': inicio + timedelta(days=rng.randrange(dias),
+                                                                        seconds=rng.randrange(86400))}
+                for pedido_id in ids])
+            conexao.execute(ItensPedido.__table__.insert(), [
+                {'pedido_id': pedido_id, 'produto_id': rng.randint(1, args.produtos),
+                 'quantidade': rng.randint(1, 3), 'preco_centavos': rng.choice((490, 1250, 1990, 3700))}
+                for pedido_id in ids for _ in range(itens_por_pedido)])
+
+
+def preparar_banco(caminho, args):
+    engine = criar_engine(f"sqlite:///{caminho}", perfil='importacao')
+    criar_esquema(engine)
+    rng = random.Random(args.semente)
+    with engine.begin() as conexao:
+        conexao.execute(Loja.__table__.insert(),
+                        [{'nome': f'Loja {i}', 'endereco': '-', 'horario_funcionamento': '-'} for i in range(args.lojas)])
+        conexao.execute(Funcionario.__table__.insert(),
+                        [{'nome': f'Funcionário {i}', 'cargo': 'Balconista', 'salario_centavos': 100, 'turno': '-',
+                          'loja_id': 1 + i % args.lojas} for i in range(args.funcionarios)])
+        conexao.execute(Produto.__table__.insert(),
+                        [{'nome': f'Produto {i}', 'preco_centavos': 1000, 'categoria': CATEGORIAS[i % len(CATEGORIAS)],
+                          'estoque': 0, 'loja_id': 1 + i % args.lojas} for i in range(args.produtos)])
+    pedidos = args.itens // args.itens_por_pedido
+    inserir_pedidos(engine, rng, 1, pedidos, args.itens_por_pedido, args.dias,
+                    datetime.now() - timedelta(days=args.dias + 1), args)
+    return engine, pedidos
+
+
+def cronometrar(rotulo, funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    print(f"{rotulo:<44} {time.perf_counter() - inicio:>8.2f} s")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--itens', type=int, default=10_000_000, help='linhas de itens_pedido')
+    parser.add_argument('--itens-por-pedido', type=int, default=4)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--lojas', type=int, default=50)
+    parser.add_argument('--funcionarios', type=int, default=500)
+    parser.add_argument('--produtos', type=int, default=5000)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--banco', help='arquivo do banco (padrão: temporário, apagado no fim)')
+    parser.add_argument('--sem-pandas', action='store_true', help='pula a extração colunar')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = args.banco or os.path.join(diretorio, 'vendas.db')
+        engine, pedidos = cronometrar(f"gerar {args.itens} itens", lambda: preparar_banco(caminho, args))
+        session = criar_fabrica_sessao(engine)()
+
+        cronometrar("resumos: primeira agregação", lambda: vendas.atualizar_resumos(session))
+        inserir_pedidos(engine, random.Random(args.semente + 1), pedidos + 1, pedidos // args.dias,
+                        args.itens_por_pedido, 1, datetime.now(), args)
+        novos = cronometrar("resumos: atualização incremental (1 dia)", lambda: vendas.atualizar_resumos(session))
+        print(f"{'':<44} ({novos} pedidos novos)")
+
+        por_loja = cronometrar("relatório por loja (resumos)", lambda: vendas.relatorio(session, 'loja'))
+        cronometrar("relatório por categoria (resumos)", lambda: vendas.relatorio(session, 'categoria'))
+        cronometrar("relatório por loja (itens brutos)", lambda: session.query(
+            func.coalesce(Funcionario.loja_id, 0), func.count(func.distinct(Pedido.id)),
+            func.sum(ItensPedido.quantidade), func.sum(ItensPedido.quantidade * ItensPedido.preco_centavos)
+        ).select_from(Pedido).join(ItensPedido, ItensPedido.pedido_id == Pedido.id)
+            .outerjoin(Funcionario, Funcionario.id == Pedido.funcionario_id)
+            .group_by(func.coalesce(Funcionario.loja_id, 0)).all())
+
+        if not args.sem_pandas:
+            itens = cronometrar("extração colunar dos itens (pandas)", lambda: vendas.extrair_itens(session))
+            fatia = cronometrar("fatia loja x categoria (pandas)", lambda: vendas.fatiar(itens, ['loja', 'categoria']))
+            # As duas somas são feitas em centavos inteiros: têm de bater no centavo
+            receita_resumos = sum(round(linha.receita * 100) for linha in por_loja)
+            receita_pandas = int((fatia['receita'] * 100).round().astype('int64').sum())
+            print(f"Receita total: resumos R${receita_resumos / 100:.2f}, pandas R${receita_pandas / 100:.2f} "
+                  f"({'iguais' if receita_resumos == receita_pandas else 'DIFERENTES'})")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Sistema Farmasil: gestão de lojas, estoque, pedidos e caixa de farmácias.
+
+Importar o pacote não conecta ao banco nem carrega os menus. Os nomes abaixo
+são resolvidos sob demanda, então `from farmasil import Produto` só importa
+farmasil.modelos.
+"""
+import importlib
+
+_EXPORTACOES = {
+    'Base': 'farmasil.modelos',
+    'Caixa': 'farmasil.modelos',
+    'CheckpointCaixa': 'farmasil.modelos',
+    'Cliente': 'farmasil.modelos',
+    'EstoqueInsuficiente': 'farmasil.modelos',
+    'Fornecedor': 'farmasil.modelos',
+    'Funcionario': 'farmasil.modelos',
+    'ItemResultado': 'farmasil.modelos',
+    'ItensPedido': 'farmasil.modelos',
+    'Loja': 'farmasil.modelos',
+    'Pedido': 'farmasil.modelos',
+    'Produto': 'farmasil.modelos',
+    'ProdutoEmCache': 'farmasil.modelos',
+    'RegistroCaixa': 'farmasil.modelos',
+    'ResultadoPedido': 'farmasil.modelos',
+    'ResumoEstoque': 'farmasil.modelos',
+    'SessaoCaixa': 'farmasil.modelos',
+    'cache_produtos': 'farmasil.modelos',
+    'criar_esquema': 'farmasil.modelos',
+    'para_centavos': 'farmasil.modelos',
+    'MIGRACOES': 'farmasil.migracoes',
+    'migrar': 'farmasil.migracoes',
+    'DadosNota': 'farmasil.notas',
+    'emitir_notas': 'farmasil.notas',
+    'RegistroPonto': 'farmasil.modelos',
+    'calcular_folha': 'farmasil.folha',
+    'ProcessamentoVendas': 'farmasil.modelos',
+    'VendaDiaria': 'farmasil.modelos',
+    'VendaDiariaProduto': 'farmasil.modelos',
+    'atualizar_resumos': 'farmasil.vendas',
+    'relatorio': 'farmasil.vendas',
+    'Metricas': 'farmasil.metricas',
+    'em_operacao': 'farmasil.metricas',
+    'instrumentar': 'farmasil.metricas',
+    'operacao': 'farmasil.metricas',
+    'atualizar_velocidade': 'farmasil.reposicao',
+    'compras_por_fornecedor': 'farmasil.reposicao',
+    'sugestoes': 'farmasil.reposicao',
+    'ProcessamentoReposicao': 'farmasil.modelos',
+    'VelocidadeVendas': 'farmasil.modelos',
+    'ResultadoBusca': 'farmasil.busca',
+    'buscar_produtos': 'farmasil.busca',
+    'RoteadorLojas': 'farmasil.fragmentos',
+    'estoque_da_rede': 'farmasil.fragmentos',
+    'vendas_da_rede': 'farmasil.fragmentos',
+    'ServicoReserva': 'farmasil.reserva',
+    'ServidorPDV': 'farmasil.servico',
+    'Tarefa': 'farmasil.relatorios',
+    'executar_relatorios': 'farmasil.relatorios',
+    'relatorios_padrao': 'farmasil.relatorios',
+    'Manutencao': 'farmasil.manutencao',
+    'backup_online': 'farmasil.manutencao',
+    'instantaneo': 'farmasil.manutencao',
+    'testar_restauracao': 'farmasil.manutencao',
+    'ParticaoArquivo': 'farmasil.modelos',
+    'arquivar': 'farmasil.arquivamento',
+    'GrupoCommit': 'farmasil.lote',
+    'PERFIS': 'farmasil.banco',
+    'Session': 'farmasil.banco',
+    'carregar_configuracao': 'farmasil.banco',
+    'confirmar': 'farmasil.banco',
+    'criar_engine': 'farmasil.banco',
+    'criar_engine_assincrona': 'farmasil.banco',
+    'criar_fabrica_sessao': 'farmasil.banco',
+    'desfazer': 'farmasil.banco',
+    'nova_sessao': 'farmasil.banco',
+    'obter_engine': 'farmasil.banco',
+    'session': 'farmasil.banco',
+    'unidade_de_trabalho': 'farmasil.banco',
+    'usar_engine': 'farmasil.banco',
+}
+
+__all__ = sorted(_EXPORTACOES)
+
+def __getattr__(nome):
+    modulo = _EXPORTACOES.get(nome)
+    if modulo is None:
+        raise AttributeError(f"module 'farmasil' has no attribute '{nome}'")
+    valor = getattr(importlib.import_module(modulo), nome)
+    globals()[nome] = valor
+    return valor
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTACOES))
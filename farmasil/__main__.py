@@ -0,0 +1,3 @@
+from farmasil.cli import main
+
+raise SystemExit(main())
@@ -0,0 +1,327 @@
+"""Arquivo dos pedidos e movimentos de caixa antigos, um banco SQLite por mês.
+
+pedidos, itens_pedido e registros_caixa só crescem, e com eles os índices que o
+checkout e o caixa atualizam a cada venda. arquivar move para bancos mensais
+(<banco>-arquivo/AAAA-MM.db, ao lado do banco principal) o que já não muda:
+
+- pedidos encerrados (status diferente de "Pendente") anteriores ao corte de
+  `horizonte` dias e já somados aos resumos de vendas, com os seus itens (os
+  pedidos sem data, de antes da coluna data_hora, ficam no banco principal);
+- movimentos de caixa anteriores ao último checkpoint de cada caixa feito antes
+  do corte, com os checkpoints anteriores a ele. O saldo (último checkpoint +
+  movimentos depois dele) não muda e nenhum checkpoint fica apontando para um
+  movimento arquivado.
+
+Cada mês arquivado tem uma linha em particoes_arquivo (ParticaoArquivo). Os
+bancos do arquivo têm as mesmas tabelas e índices, sem chaves estrangeiras, e
+cada conexão deles anexa o banco principal (ATTACH ... AS quente) e o que ele
+anexa (o catálogo, no modo fragmentado). Como o SQLite procura as tabelas sem
+esquema primeiro no banco do mês, uma consulta feita com os modelos roda sem
+mudança no arquivo: pedidos e itens vêm do mês e clientes, funcionários e
+produtos do banco principal.
+
+resultados e consultar são a fachada de leitura: rodam a mesma consulta nos
+meses arquivados que cruzam [inicio, fim), do mais antigo ao mais novo, e por
+fim no banco principal; quem soma junta as partes (Caixa.conciliar, o
+histórico dos clientes, vendas.reconstruir_resumos). Os relatórios de vendas e
+a reposição leem os resumos, que já contêm os pedidos arquivados.
+
+Cada lote é gravado primeiro no banco do mês (INSERT OR REPLACE, com
+synchronous=FULL) e só depois apagado do banco principal, na mesma transação
+que atualiza o catálogo. Uma queda entre os dois commits deixa o lote nos dois
+lugares, e a fachada o conta duas vezes, até a próxima execução, que o grava de
+novo por cima e o apaga do banco principal.
+
+O backup do banco principal (farmasil.manutencao) não leva o arquivo: os
+bancos dos meses só mudam quando arquivar roda e podem ser copiados como
+arquivos comuns.
+"""
+from sqlalchemy import Column, Index, MetaData, Table, and_, event, func, select
+from collections import namedtuple
+from datetime import date, datetime, time as hora, timedelta
+from itertools import groupby
+import os
+import threading
+import time
+
+from farmasil.banco import criar_engine
+from farmasil.metricas import operacao
+from farmasil.modelos import CheckpointCaixa, ItensPedido, ParticaoArquivo, Pedido, ProcessamentoVendas, RegistroCaixa
+from farmasil import vendas
+
+# Dias que os pedidos e movimentos ficam no banco principal
+HORIZONTE_DIAS = 365
+# Pedidos (ou movimentos de caixa) movidos por transação
+LOTE_ARQUIVAMENTO = 1000
+PERFIL_ARQUIVO = 'relatorio'
+# Os bancos dos meses ficam sem -wal ao lado; a gravação só termina com os dados no disco
+PRAGMAS_ARQUIVO = {'journal_mode': 'DELETE'}
+PRAGMAS_GRAVACAO = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+ResultadoArquivamento = namedtuple('ResultadoArquivamento', ['corte', 'pedidos', 'itens', 'movimentos',
+                                                             'checkpoints', 'meses', 'segundos'])
+
+_metadata_arquivo = MetaData()
+
+def _tabela_do_arquivo(tabela):
+    """Cópia da tabela para os bancos dos meses: mesmas colunas e índices, sem chaves estrangeiras."""
+    copia = Table(tabela.name, _metadata_arquivo,
+                  *[Column(coluna.name, coluna.type, primary_key=coluna.primary_key, nullable=coluna.nullable)
+                    for coluna in tabela.columns])
+    for indice in tabela.indexes:
+        Index(indice.name, *[copia.c[coluna.name] for coluna in indice.columns])
+    return copia
+
+TABELAS_ARQUIVO = {tabela.name: _tabela_do_arquivo(tabela) for tabela in
+                   (Pedido.__table__, ItensPedido.__table__, RegistroCaixa.__table__, CheckpointCaixa.__table__)}
+
+# Engines de leitura dos meses, por (arquivo do mês, bancos anexados)
+_engines = {}
+_trava = threading.Lock()
+
+def _bancos(session):
+    """[(nome, arquivo)] do banco principal (primeiro) e dos bancos que ele anexa."""
+    conexao = session.connection()
+    if conexao.dialect.name != 'sqlite':
+        raise ValueError("O arquivo de pedidos só está disponível no SQLite.")
+    bancos = [(nome, arquivo) for _, nome, arquivo in conexao.exec_driver_sql("PRAGMA database_list")
+              if nome != 'temp']
+    if not bancos[0][1]:
+        raise ValueError("Um banco SQLite em memória não tem diretório para o arquivo.")
+    return bancos
+
+def diretorio_padrao(session):
+    """<banco>-arquivo, ao lado do banco principal (ex.: farmasil-arquivo para farmasil.db)."""
+    return f'{os.path.splitext(_bancos(session)[0][1])[0]}-arquivo'
+
+def _engine_do_mes(caminho, bancos):
+    chave = (caminho, tuple(bancos))
+    engine = _engines.get(chave)
+    if engine is not None:
+        return engine
+    with _trava:
+        if chave not in _engines:
+            engine = criar_engine(f"sqlite:///{caminho}", perfil=PERFIL_ARQUIVO, pragmas=PRAGMAS_ARQUIVO)
+
+            @event.listens_for(engine, 'connect')
+            def _anexar_banco_principal(conexao_dbapi, registro):
+                for nome, arquivo in bancos:
+                    conexao_dbapi.execute(f"ATTACH DATABASE ? AS {'quente' if nome == 'main' else nome}", (arquivo,))
+            _engines[chave] = engine
+        return _engines[chave]
+
+def fechar():
+    """Fecha as conexões abertas com os bancos dos meses."""
+    with _trava:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+def _data_e_hora(valor):
+    if valor is None or isinstance(valor, datetime):
+        return valor
+    return datetime.combine(valor, hora())
+
+def particoes(session, inicio=None, fim=None):
+    """Meses arquivados (ParticaoArquivo) que cruzam [inicio, fim), do mais antigo ao mais novo."""
+    consulta = select(ParticaoArquivo).order_by(ParticaoArquivo.mes)
+    inicio, fim = _data_e_hora(inicio), _data_e_hora(fim)
+    if inicio is not None:
+        consulta = consulta.where(ParticaoArquivo.mes >= inicio.strftime('%Y-%m'))
+    if fim is not None:
+        consulta = consulta.where(ParticaoArquivo.mes <= (fim - timedelta(microseconds=1)).strftime('%Y-%m'))
+    return list(session.scalars(consulta))
+
+def resultados(session, consulta, inicio=None, fim=None, quente=True):
+    """Executa `consulta` em cada mês arquivado que cruza [inicio, fim) e por fim no banco principal.
+
+    Gera um Result por parte: leia cada um antes de pedir o próximo, que fecha
+    a conexão do mês anterior. `inicio` e `fim` só escolhem os meses; o filtro
+    de data continua na consulta. Com quente=False, só os meses arquivados.
+    """
+    meses = particoes(session, inicio, fim)
+    if meses:
+        bancos = _bancos(session)
+        diretorio = os.path.dirname(bancos[0][1])
+        for particao in meses:
+            caminho = os.path.join(diretorio, particao.caminho)
+            # O SQLite criaria um banco vazio no lugar e a consulta falharia por falta das tabelas
+            if not os.path.exists(caminho):
+                raise FileNotFoundError(f"O banco do mês arquivado {particao.mes} não está em {caminho}.")
+            with _engine_do_mes(caminho, bancos).connect() as conexao:
+                yield conexao.execute(consulta)
+    if quente:
+        yield session.connection().execute(consulta)
+
+def consultar(session, consulta, inicio=None, fim=None, quente=True):
+    """Linhas de `consulta` nos meses arquivados que cruzam [inicio, fim) e depois no banco principal."""
+    for resultado in resultados(session, consulta, inicio, fim, quente):
+        yield from resultado
+
+def historico_arquivado(session):
+    """{cliente_id: (pedidos finalizados, centavos, última compra)} somados nos meses arquivados."""
+    consulta = (
+        select(Pedido.cliente_id, func.count(func.distinct(Pedido.id)),
+               func.coalesce(func.sum(ItensPedido.quantidade * ItensPedido.preco_centavos), 0),
+               func.max(Pedido.data_hora))
+        .outerjoin(ItensPedido, ItensPedido.pedido_id == Pedido.id)
+        .where(Pedido.status == "Finalizado", Pedido.cliente_id.isnot(None))
+        .group_by(Pedido.cliente_id)
+    )
+    historico = {}
+    for cliente_id, pedidos, centavos, ultima in consultar(session, consulta, quente=False):
+        anterior = historico.get(cliente_id)
+        if anterior:
+            pedidos += anterior[0]
+            centavos += anterior[1]
+            ultima = max(filter(None, (ultima, anterior[2])), default=None)
+        historico[cliente_id] = (pedidos, centavos, ultima)
+    return historico
+
+class _Arquivo:
+    """Bancos dos meses abertos para gravação durante um arquivar."""
+
+    def __init__(self, diretorio, principal):
+        self.diretorio = diretorio
+        self.principal = principal
+        self._engines = {}
+
+    def _caminho(self, mes):
+        return os.path.join(self.diretorio, f'{mes}.db')
+
+    def _engine(self, mes):
+        engine = self._engines.get(mes)
+        if engine is None:
+            engine = criar_engine(f"sqlite:///{self._caminho(mes)}", perfil='interativo', pragmas=PRAGMAS_GRAVACAO)
+            _metadata_arquivo.create_all(engine)
+            self._engines[mes] = engine
+        return engine
+
+    def mover(self, session, mes, partes):
+        """Grava as linhas de cada (tabela, condição) no banco do mês e só então as apaga do principal.
+
+        `partes` vem na ordem de remoção (filhas antes das mães). Retorna {tabela: linhas movidas}.
+        """
+        linhas = [(tabela, [dict(linha._mapping) for linha in session.execute(select(tabela).where(condicao))])
+                  for tabela, condicao in partes]
+        with self._engine(mes).begin() as conexao:
+            for tabela, valores in linhas:
+                if valores:
+                    conexao.execute(TABELAS_ARQUIVO[tabela.name].insert().prefix_with('OR REPLACE'), valores)
+        # Pelo Core: o livro-caixa recusa remoções pelo ORM, e estes movimentos só mudam de banco
+        for tabela, condicao in partes:
+            session.execute(tabela.delete().where(condicao))
+        movidas = {tabela.name: len(valores) for tabela, valores in linhas}
+        particao = session.get(ParticaoArquivo, mes)
+        if particao is None:
+            particao = ParticaoArquivo(mes=mes, caminho=os.path.relpath(self._caminho(mes), self.principal),
+                                       pedidos=0, itens=0, movimentos=0)
+            session.add(particao)
+        particao.pedidos += movidas.get('pedidos', 0)
+        particao.itens += movidas.get('itens_pedido', 0)
+        particao.movimentos += movidas.get('registros_caixa', 0)
+        particao.atualizado_em = datetime.now()
+        session.commit()
+        return movidas
+
+    def fechar(self):
+        for engine in self._engines.values():
+            engine.dispose()
+
+def _por_mes(linhas):
+    """[(id, 'AAAA-MM')] -> [(mês, [ids])]."""
+    return [(mes, [linha[0] for linha in grupo])
+            for mes, grupo in groupby(sorted(linhas, key=lambda linha: linha[1]), key=lambda linha: linha[1])]
+
+def _arquivar_pedidos(session, arquivo, corte, lote):
+    pedidos, itens = Pedido.__table__, ItensPedido.__table__
+    # A marca dos resumos vale como "tudo até aqui já foi somado" porque o arquivo é só do SQLite,
+    # onde os pedidos são confirmados na ordem dos ids (ver farmasil.vendas)
+    marca = session.scalar(select(func.max(ProcessamentoVendas.ultimo_pedido_id))) or 0
+    # Sem AUTOINCREMENT o SQLite reusa ids acima do maior que sobrar: o último pedido e o
+    # dono do último item ficam no banco principal, e os ids novos nunca repetem os arquivados
+    maior = session.scalar(select(func.max(pedidos.c.id))) or 0
+    dono_do_ultimo_item = session.scalar(
+        select(itens.c.pedido_id).where(itens.c.id == select(func.max(itens.c.id)).scalar_subquery()))
+    teto = min(marca, maior - 1)
+    mes = func.strftime('%Y-%m', pedidos.c.data_hora)
+    condicoes = [pedidos.c.id <= teto, pedidos.c.status != "Pendente", pedidos.c.data_hora < corte]
+    # Sem itens não há dono a poupar
+    if dono_do_ultimo_item is not None:
+        condicoes.append(pedidos.c.id != dono_do_ultimo_item)
+    movidos = {}
+    apos = 0
+    while True:
+        linhas = session.execute(
+            select(pedidos.c.id, mes)
+            .where(pedidos.c.id > apos, *condicoes)
+            .order_by(pedidos.c.id).limit(lote)
+        ).all()
+        if not linhas:
+            return movidos
+        apos = linhas[-1][0]
+        for nome_mes, ids in _por_mes(linhas):
+            for tabela, quantidade in arquivo.mover(session, nome_mes, [
+                (itens, itens.c.pedido_id.in_(ids)),
+                (pedidos, pedidos.c.id.in_(ids)),
+            ]).items():
+                movidos[tabela] = movidos.get(tabela, 0) + quantidade
+            movidos.setdefault('meses', set()).add(nome_mes)
+
+def _arquivar_caixa(session, arquivo, corte, lote):
+    registros, checkpoints = RegistroCaixa.__table__, CheckpointCaixa.__table__
+    # Por caixa, o último checkpoint antes do corte: ele e o que vem depois ficam
+    limites = session.execute(
+        select(checkpoints.c.caixa_id, func.max(checkpoints.c.registro_id))
+        .join(registros, registros.c.id == checkpoints.c.registro_id)
+        .where(registros.c.data_hora < corte)
+        .group_by(checkpoints.c.caixa_id)
+    ).all()
+    mes = func.strftime('%Y-%m', registros.c.data_hora)
+    movidos = {}
+    for caixa_id, limite in limites:
+        apos = 0
+        while True:
+            linhas = session.execute(
+                select(registros.c.id, mes)
+                .where(registros.c.caixa_id == caixa_id, registros.c.id > apos, registros.c.id < limite,
+                       registros.c.data_hora < corte)
+                .order_by(registros.c.id).limit(lote)
+            ).all()
+            if not linhas:
+                break
+            apos = linhas[-1][0]
+            for nome_mes, ids in _por_mes(linhas):
+                for tabela, quantidade in arquivo.mover(session, nome_mes, [
+                    (checkpoints, and_(checkpoints.c.caixa_id == caixa_id, checkpoints.c.registro_id.in_(ids))),
+                    (registros, registros.c.id.in_(ids)),
+                ]).items():
+                    movidos[tabela] = movidos.get(tabela, 0) + quantidade
+                movidos.setdefault('meses', set()).add(nome_mes)
+    return movidos
+
+@operacao('arquivamento.arquivar')
+def arquivar(session, diretorio=None, horizonte=HORIZONTE_DIAS, hoje=None, lote=LOTE_ARQUIVAMENTO):
+    """Move para os bancos mensais os pedidos e movimentos de caixa anteriores a `horizonte` dias.
+
+    `diretorio` guarda os bancos dos meses (padrão: diretorio_padrao). Os
+    resumos de vendas são atualizados antes: só sai do banco principal o pedido
+    que já está neles. Pode rodar de novo a qualquer momento. Retorna um
+    ResultadoArquivamento.
+    """
+    inicio = time.perf_counter()
+    principal = os.path.dirname(_bancos(session)[0][1])
+    diretorio = os.path.abspath(diretorio or diretorio_padrao(session))
+    corte = datetime.combine(hoje or date.today(), hora()) - timedelta(days=horizonte)
+    vendas.atualizar_resumos(session)
+    os.makedirs(diretorio, exist_ok=True)
+    arquivo = _Arquivo(diretorio, principal)
+    try:
+        pedidos = _arquivar_pedidos(session, arquivo, corte, lote)
+        caixa = _arquivar_caixa(session, arquivo, corte, lote)
+    finally:
+        arquivo.fechar()
+    return ResultadoArquivamento(corte, pedidos.get('pedidos', 0), pedidos.get('itens_pedido', 0),
+                                 caixa.get('registros_caixa', 0), caixa.get('checkpoints_caixa', 0),
+                                 sorted(pedidos.get('meses', set()) | caixa.get('meses', set())),
+                                 time.perf_counter() - inicio)
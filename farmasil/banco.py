@@ -0,0 +1,239 @@
+"""Engine, sessão e configuração do banco de dados.
+
+Nada aqui conecta ao banco na importação: a engine padrão só é criada no
+primeiro uso da sessão (ou de obter_engine()).
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from contextlib import contextmanager
+import configparser
+import os
+
+from farmasil.metricas import herdar_instrumentacao
+
+URL_PADRAO = 'sqlite:///farmasil.db'
+PERFIL_PADRAO = 'interativo'
+
+# Drivers de criar_engine_assincrona para as URLs sem driver explícito (ex.: sqlite:///farmasil.db)
+DRIVERS_ASSINCRONOS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+# Perfis de uso do banco. Os pragmas só se aplicam ao SQLite; as opções de pool
+# valem para qualquer URL (ex.: postgresql+psycopg2://...).
+PERFIS = {
+    # Menu de terminal: um usuário, leituras rápidas e espera curta por travas
+    'interativo': {
+        'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'cache_size': -16000,
+                    'mmap_size': 64 * 1024 * 1024, 'temp_store': 'MEMORY', 'busy_timeout': 5000},
+        'pool': {'pool_size': 2, 'max_overflow': 2},
+    },
+    # Servidor de PDV: muitos terminais escrevendo ao mesmo tempo
+    'pdv': {
+        'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'cache_size': -65536,
+                    'mmap_size': 256 * 1024 * 1024, 'temp_store': 'MEMORY', 'busy_timeout': 10000},
+        'pool': {'pool_size': 16, 'max_overflow': 16, 'pool_timeout': 30, 'pool_pre_ping': True},
+    },
+    # Carga em lote: durabilidade relaxada durante a importação, cache grande
+    'importacao': {
+        'pragmas': {'journal_mode': 'WAL', 'synchronous': 'OFF', 'cache_size': -262144,
+                    'temp_store': 'MEMORY', 'busy_timeout': 30000},
+        'pool': {'pool_size': 2, 'max_overflow': 0},
+    },
+    # Relatórios: somente leitura, mapeamento em memória grande
+    'relatorio': {
+        'pragmas': {'journal_mode': 'WAL', 'query_only': 'ON', 'cache_size': -131072,
+                    'mmap_size': 1024 * 1024 * 1024, 'temp_store': 'MEMORY', 'busy_timeout': 30000},
+        'pool': {'pool_size': 8, 'max_overflow': 8},
+    },
+}
+
+def _valor_config(texto):
+    """Converte um valor lido do ambiente/arquivo INI para bool, int ou str."""
+    if texto.lower() in ('true', 'sim', 'on', 'yes'):
+        return True
+    if texto.lower() in ('false', 'nao', 'não', 'off', 'no'):
+        return False
+    try:
+        return int(texto)
+    except ValueError:
+        return texto
+
+def carregar_configuracao(caminho=None):
+    """Lê a configuração do banco do arquivo INI e das variáveis de ambiente.
+
+    O arquivo vem de `caminho`, de FARMASIL_CONFIG ou de ./farmasil.ini, nessa
+    ordem; as seções [banco] (url, perfil, echo e opções de pool) e [pragmas]
+    são opcionais. FARMASIL_DB_URL, FARMASIL_PERFIL e FARMASIL_ECHO têm
+    precedência sobre o arquivo.
+    """
+    config = {'pool': {}, 'pragmas': {}}
+    caminho = caminho or os.environ.get('FARMASIL_CONFIG') or 'farmasil.ini'
+    parser = configparser.ConfigParser()
+    if parser.read(caminho, encoding='utf-8'):
+        if parser.has_section('banco'):
+            for chave, texto in parser.items('banco'):
+                if chave in ('url', 'perfil'):
+                    config[chave] = texto
+                elif chave == 'echo':
+                    config['echo'] = _valor_config(texto)
+                else:
+                    config['pool'][chave] = _valor_config(texto)
+        if parser.has_section('pragmas'):
+            config['pragmas'] = {chave: _valor_config(texto) for chave, texto in parser.items('pragmas')}
+
+    for variavel, chave in (('FARMASIL_DB_URL', 'url'), ('FARMASIL_PERFIL', 'perfil')):
+        if os.environ.get(variavel):
+            config[chave] = os.environ[variavel]
+    if os.environ.get('FARMASIL_ECHO'):
+        config['echo'] = _valor_config(os.environ['FARMASIL_ECHO'])
+    return config
+
+def _argumentos_engine(url, perfil, echo, pragmas, config, opcoes_pool, assincrona=False):
+    """(url, argumentos de create_engine, pragmas) do perfil, da configuração externa e dos argumentos."""
+    config = carregar_configuracao() if config is None else config
+    perfil = perfil or config.get('perfil') or PERFIL_PADRAO
+    if perfil not in PERFIS:
+        raise ValueError(f"Perfil de banco desconhecido: {perfil}. Use um de {', '.join(PERFIS)}.")
+    url = make_url(url or config.get('url') or URL_PADRAO)
+    echo = config.get('echo', False) if echo is None else echo
+    if assincrona and url.drivername in DRIVERS_ASSINCRONOS:
+        url = url.set(drivername=DRIVERS_ASSINCRONOS[url.drivername])
+
+    opcoes = {**PERFIS[perfil]['pool'], **config['pool'], **opcoes_pool}
+    argumentos = {'echo': echo}
+    if url.get_backend_name() == 'sqlite':
+        memoria = url.database in (None, '', ':memory:')
+        ajustes = {**PERFIS[perfil]['pragmas'], **config['pragmas'], **(pragmas or {})}
+        if memoria:
+            # Banco em memória não tem journal em disco nem pool de várias conexões
+            ajustes.pop('journal_mode', None)
+            ajustes.pop('mmap_size', None)
+            opcoes = {}
+        else:
+            if not assincrona:
+                argumentos['poolclass'] = QueuePool
+            argumentos['connect_args'] = {'check_same_thread': False,
+                                          'timeout': ajustes.get('busy_timeout', 5000) / 1000}
+    else:
+        ajustes = {}
+    argumentos.update(opcoes)
+    if assincrona and url.get_backend_name() == 'sqlite' and 'pool_pre_ping' not in opcoes_pool:
+        # Arquivo local: a conexão não cai, e no driver assíncrono o ping custa idas e voltas à thread dela
+        argumentos.pop('pool_pre_ping', None)
+    return url, argumentos, ajustes
+
+def _ligar_pragmas(engine, ajustes):
+    if not ajustes:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _aplicar_pragmas(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        for pragma, valor in ajustes.items():
+            cursor.execute(f"PRAGMA {pragma}={valor}")
+        cursor.close()
+
+def criar_engine(url=None, perfil=None, echo=None, pragmas=None, config=None, **opcoes_pool):
+    """Cria a engine a partir de um perfil, da configuração externa e dos argumentos.
+
+    Precedência: argumentos > ambiente > arquivo INI > perfil. O log de SQL fica
+    desligado, salvo com echo=True ou FARMASIL_ECHO=1.
+    """
+    url, argumentos, ajustes = _argumentos_engine(url, perfil, echo, pragmas, config, opcoes_pool)
+    engine = create_engine(url, **argumentos)
+    _ligar_pragmas(engine, ajustes)
+    return engine
+
+def criar_engine_assincrona(url=None, perfil=None, echo=None, pragmas=None, config=None, **opcoes_pool):
+    """Como criar_engine, mas retorna uma AsyncEngine (aiosqlite no SQLite, asyncpg no PostgreSQL).
+
+    A mesma URL da configuração serve: sem driver explícito, usa o assíncrono
+    de DRIVERS_ASSINCRONOS. O pool é limitado pelas opções do perfil (pool_size + max_overflow).
+    Requer o extra `servico` (sqlalchemy[asyncio] e o driver).
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+    url, argumentos, ajustes = _argumentos_engine(url, perfil, echo, pragmas, config, opcoes_pool, assincrona=True)
+    engine = create_async_engine(url, **argumentos)
+    _ligar_pragmas(engine.sync_engine, ajustes)
+    return engine
+
+def banco_ocupado(erro):
+    """Indica se o erro é uma disputa de trava que vale a pena repetir."""
+    mensagem = str(getattr(erro, 'orig', erro)).lower()
+    if 'database is locked' in mensagem or 'database is busy' in mensagem or 'database table is locked' in mensagem:
+        return True
+    # Falha de serialização / deadlock no PostgreSQL
+    return getattr(getattr(erro, 'orig', None), 'pgcode', None) in ('40001', '40P01')
+
+def confirmar(session):
+    """Confirma a operação corrente.
+
+    Fora de um group commit é um commit comum; dentro dele (session.info
+    ['grupo_commit']) só envia as alterações com flush, e o commit do lote inteiro
+    fica com o GrupoCommit (farmasil.lote).
+    """
+    if session.info.get('grupo_commit'):
+        session.flush()
+    else:
+        session.commit()
+
+def desfazer(session):
+    """Desfaz a operação corrente: rollback comum ou, em group commit, marca a
+    operação para o lote ser gravado sem ela."""
+    if session.info.get('grupo_commit'):
+        session.info['desfeita'] = True
+    else:
+        session.rollback()
+
+def criar_fabrica_sessao(engine=None, **opcoes):
+    """Retorna um sessionmaker ligado à engine informada (ou a uma nova, da configuração)."""
+    return sessionmaker(bind=engine if engine is not None else criar_engine(**opcoes))
+
+_engine = None
+Session = sessionmaker()
+
+def obter_engine():
+    """Retorna a engine padrão, criando-a a partir da configuração no primeiro uso."""
+    if _engine is None:
+        usar_engine(criar_engine())
+    return _engine
+
+def usar_engine(engine):
+    """Troca a engine padrão (ex.: outro banco ou perfil escolhido na linha de comando).
+
+    A nova engine continua com os coletores de métricas ligados na anterior
+    (farmasil.metricas.instrumentar).
+    """
+    global _engine
+    if _engine is not None and _engine is not engine:
+        herdar_instrumentacao(_engine, engine)
+    _engine = engine
+    Session.configure(bind=engine)
+    session.remove()
+
+def nova_sessao():
+    """Abre uma sessão avulsa ligada à engine padrão (o chamador a fecha)."""
+    return Session(bind=obter_engine())
+
+@contextmanager
+def unidade_de_trabalho(fabrica=None):
+    """Sessão de uma unidade de trabalho: commit no fim, rollback se der erro e sempre fechada.
+
+    `fabrica` é um sessionmaker (ex.: criar_fabrica_sessao(engine)); sem ela, a
+    sessão é ligada à engine padrão. Cada thread ou processo abre a sua: uma
+    sessão não deve ser compartilhada entre threads.
+    """
+    sessao = fabrica() if fabrica is not None else nova_sessao()
+    try:
+        yield sessao
+        sessao.commit()
+    except BaseException:
+        sessao.rollback()
+        raise
+    finally:
+        sessao.close()
+
+# Sessão do menu interativo: uma por thread, ligada à engine padrão somente
+# quando usada pela primeira vez. Os modelos recebem a sessão como argumento.
+session = scoped_session(nova_sessao)
@@ -0,0 +1,225 @@
+"""Busca de produtos por nome para o checkout: prefixo, sem acentos e tolerante a erros de digitação.
+
+No SQLite os nomes ficam num índice FTS5 (busca_produtos) de conteúdo
+externo: o texto é o da própria tabela `produtos` e os triggers
+trg_busca_produtos_* mantêm o índice na mesma transação de cada cadastro,
+remoção ou troca de nome. Baixas de estoque e mudanças de preço não tocam no
+índice. A importação em lote pausa o trigger de inclusão (uma linha em
+busca_produtos_pausa, só dentro da transação de cada lote) e reconstrói o
+índice uma vez no fim, em vez de indexar produto a produto. O tokenizador
+unicode61 com remove_diacritics ignora maiúsculas e acentos, então
+"dipirona sodica" encontra "Dipirona Sódica 500mg".
+
+buscar_produtos procura cada palavra digitada como prefixo ("dip sod 500").
+Uma palavra que não é prefixo de nenhum termo do índice é trocada pelos
+termos a até DISTANCIA_MAXIMA edições dela ("dipirna" -> "dipirona"). Os
+candidatos saem de um índice de deleções (as variantes de cada termo com uma
+letra a menos), montado em memória a partir do vocabulário do FTS5
+(busca_produtos_termos) e guardado por VALIDADE_VOCABULARIO segundos.
+Produtos cadastrados por outro processo aparecem na hora para prefixos; para
+a correção, quando o vocabulário é renovado.
+
+Em outros bancos buscar_produtos faz um LIKE simples, sem correção.
+"""
+from sqlalchemy import DDL, column, event, func, inspect, literal_column, select, table, text
+from collections import namedtuple
+import bisect
+import re
+import unicodedata
+
+from farmasil.cache import CacheLRU
+from farmasil.metricas import operacao
+from farmasil.modelos import Produto
+
+LIMITE_RESULTADOS = 10
+# Edições aceitas numa palavra de até 5 letras e nas mais longas
+DISTANCIA_MAXIMA = (1, 2)
+VALIDADE_VOCABULARIO = 600.0
+
+class ResultadoBusca(namedtuple('ResultadoBusca', ['id', 'nome', 'preco_centavos', 'estoque', 'loja_id', 'pontuacao'])):
+    __slots__ = ()
+
+    @property
+    def preco(self):
+        return self.preco_centavos / 100
+
+_PALAVRA = re.compile(r'\w+')
+
+# A tabela FTS5 não é um modelo: só o que as consultas usam
+busca_produtos = table('busca_produtos', column('rowid'), column('nome'))
+
+DDL_BUSCA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS busca_produtos USING fts5(
+        nome, content='produtos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS busca_produtos_termos USING fts5vocab(busca_produtos, 'row')",
+    # Com uma linha aqui o trigger de inclusão não indexa (importação em lote)
+    "CREATE TABLE IF NOT EXISTS busca_produtos_pausa (id INTEGER PRIMARY KEY)",
+    """CREATE TRIGGER IF NOT EXISTS trg_busca_produtos_insert AFTER INSERT ON produtos
+    WHEN NOT EXISTS (SELECT 1 FROM busca_produtos_pausa) BEGIN
+        INSERT INTO busca_produtos (rowid, nome) VALUES (NEW.id, NEW.nome);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busca_produtos_delete AFTER DELETE ON produtos BEGIN
+        INSERT INTO busca_produtos (busca_produtos, rowid, nome) VALUES ('delete', OLD.id, OLD.nome);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_busca_produtos_update AFTER UPDATE OF nome ON produtos BEGIN
+        INSERT INTO busca_produtos (busca_produtos, rowid, nome) VALUES ('delete', OLD.id, OLD.nome);
+        INSERT INTO busca_produtos (rowid, nome) VALUES (NEW.id, NEW.nome);
+    END""",
+]
+
+def criar_indice_busca(conexao):
+    """Cria o índice e os triggers (SQLite) e o preenche com os produtos já cadastrados."""
+    if conexao.dialect.name != 'sqlite':
+        return
+    for comando in DDL_BUSCA:
+        conexao.execute(text(comando))
+    conexao.execute(text("INSERT INTO busca_produtos (busca_produtos) VALUES ('rebuild')"))
+
+def indexacao_pausavel(session):
+    """Se o banco tem o índice com a pausa do trigger de inclusão (SQLite migrado)."""
+    if session.get_bind().dialect.name != 'sqlite':
+        return False
+    return session.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                                "AND name = 'busca_produtos_pausa'")).first() is not None
+
+def pausar_indexacao(session):
+    """Desliga o trigger de inclusão na transação atual; retomar_indexacao antes do commit.
+
+    A linha de pausa é gravada e apagada na mesma transação: as outras conexões
+    nunca a veem, e um erro no meio a desfaz junto com o lote.
+    """
+    session.execute(text("INSERT INTO busca_produtos_pausa (id) VALUES (1)").execution_options(por_lote=True))
+
+def retomar_indexacao(session):
+    session.execute(text("DELETE FROM busca_produtos_pausa").execution_options(por_lote=True))
+
+def reconstruir_indice(session):
+    """Reindexa todos os produtos (depois de inclusões com a indexação pausada)."""
+    session.execute(text("INSERT INTO busca_produtos (busca_produtos) VALUES ('rebuild')"))
+    vocabularios.limpar()
+
+# Banco novo: o índice nasce junto com a tabela de produtos (create_all)
+for _comando in DDL_BUSCA:
+    event.listen(Produto.__table__, 'after_create', DDL(_comando).execute_if(dialect='sqlite'))
+
+def normalizar_termo(texto):
+    """Minúsculas e sem acentos, como o tokenizador do índice guarda os termos."""
+    decomposto = unicodedata.normalize('NFKD', texto.casefold())
+    return ''.join(letra for letra in decomposto if not unicodedata.combining(letra))
+
+def palavras(texto):
+    return _PALAVRA.findall(normalizar_termo(texto))
+
+def _delecoes(termo):
+    return {termo[:i] + termo[i + 1:] for i in range(len(termo))}
+
+def distancia(a, b, limite):
+    """Distância de edição (com transposição de vizinhas) entre a e b, ou limite + 1 se passar do limite."""
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+    anterior2, anterior = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        atual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            custo = a[i - 1] != b[j - 1]
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + custo)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                atual[j] = min(atual[j], anterior2[j - 2] + 1)
+        if min(atual) > limite:
+            return limite + 1
+        anterior2, anterior = anterior, atual
+    return anterior[-1] if anterior[-1] <= limite else limite + 1
+
+class Vocabulario:
+    """Termos do índice, ordenados (para prefixos) e por deleção (para a correção)."""
+
+    def __init__(self, termos):
+        self.termos = sorted(termos)
+        self.por_delecao = {}
+        for termo in self.termos:
+            for variante in _delecoes(termo) | {termo}:
+                self.por_delecao.setdefault(variante, []).append(termo)
+
+    def tem_prefixo(self, prefixo):
+        posicao = bisect.bisect_left(self.termos, prefixo)
+        return posicao < len(self.termos) and self.termos[posicao].startswith(prefixo)
+
+    def corrigir(self, palavra):
+        """Termos a até DISTANCIA_MAXIMA edições da palavra, dos mais próximos para os mais distantes."""
+        limite = DISTANCIA_MAXIMA[len(palavra) > 5]
+        variantes = {palavra} | _delecoes(palavra)
+        if limite > 1:
+            variantes |= {menor for variante in list(variantes) for menor in _delecoes(variante)}
+        candidatos = {termo for variante in variantes for termo in self.por_delecao.get(variante, ())}
+        distancias = ((distancia(palavra, termo, limite), termo) for termo in candidatos)
+        return [termo for d, termo in sorted(distancias) if d <= limite]
+
+# Vocabulário de cada banco (a chave é a engine)
+vocabularios = CacheLRU(capacidade=16, ttl=VALIDADE_VOCABULARIO)
+
+def vocabulario(session):
+    banco = session.get_bind().engine
+    vocabulario = vocabularios.obter(banco)
+    if vocabulario is None:
+        versao = vocabularios.versao
+        vocabulario = Vocabulario(session.execute(text("SELECT term FROM busca_produtos_termos")).scalars())
+        vocabularios.guardar(banco, vocabulario, versao)
+    return vocabulario
+
+@event.listens_for(Produto, 'after_insert')
+@event.listens_for(Produto, 'after_update')
+def _nome_alterado(mapper, connection, produto):
+    # Termos novos entram na correção já na próxima busca deste processo
+    if inspect(produto).attrs.nome.history.has_changes():
+        vocabularios.remover(connection.engine)
+
+def consulta_fts(session, texto):
+    """Expressão MATCH do texto digitado, com as palavras desconhecidas corrigidas (None se não sobrar nada)."""
+    grupos = []
+    termos = None
+    for palavra in palavras(texto):
+        if len(palavra) < 3:
+            grupos.append(f'"{palavra}"*')
+            continue
+        termos = termos or vocabulario(session)
+        if termos.tem_prefixo(palavra):
+            grupos.append(f'"{palavra}"*')
+            continue
+        correcoes = termos.corrigir(palavra)
+        if correcoes:
+            grupos.append('(' + ' OR '.join(f'"{termo}"' for termo in correcoes) + ')')
+        # Sem prefixo nem correção, a palavra é ignorada
+    return ' AND '.join(grupos) or None
+
+@operacao('busca.buscar_produtos')
+def buscar_produtos(session, texto, loja_id=None, limite=LIMITE_RESULTADOS):
+    """Produtos cujo nome combina com o texto, dos mais relevantes para os menos (ResultadoBusca)."""
+    if session.get_bind().dialect.name != 'sqlite':
+        return _buscar_com_like(session, texto, loja_id, limite)
+    expressao = consulta_fts(session, texto)
+    if expressao is None:
+        return []
+    tabela = literal_column('busca_produtos')
+    pontuacao = func.bm25(tabela)
+    consulta = (
+        select(Produto.id, Produto.nome, Produto.preco_centavos, Produto.estoque, Produto.loja_id, pontuacao)
+        .select_from(busca_produtos)
+        .join(Produto, Produto.id == busca_produtos.c.rowid)
+        .where(tabela.op('MATCH')(expressao))
+    )
+    if loja_id is not None:
+        consulta = consulta.where(Produto.loja_id == loja_id)
+    # Com empate na relevância, os nomes mais curtos (mais próximos do digitado) primeiro
+    consulta = consulta.order_by(pontuacao, func.length(Produto.nome), Produto.id).limit(limite)
+    return [ResultadoBusca(*linha) for linha in session.execute(consulta)]
+
+def _buscar_com_like(session, texto, loja_id, limite):
+    consulta = select(Produto.id, Produto.nome, Produto.preco_centavos, Produto.estoque, Produto.loja_id,
+                      func.length(Produto.nome))
+    for palavra in texto.split():
+        consulta = consulta.where(Produto.nome.ilike(f'%{palavra}%'))
+    if loja_id is not None:
+        consulta = consulta.where(Produto.loja_id == loja_id)
+    consulta = consulta.order_by(func.length(Produto.nome), Produto.id).limit(limite)
+    return [ResultadoBusca(*linha) for linha in session.execute(consulta)]
@@ -0,0 +1,80 @@
+"""Cache LRU em memória, com limite de tamanho, validade (TTL) e contadores.
+
+Usado para os produtos (farmasil.modelos.cache_produtos): os valores guardados
+são cópias imutáveis, nunca objetos ORM presos a uma sessão. A invalidação é
+feita por quem conhece as alterações (os eventos do SQLAlchemy em modelos).
+"""
+from collections import OrderedDict
+import threading
+import time
+
+CAPACIDADE = 10000
+TTL = 60.0
+
+def normalizar_nome(nome):
+    """Chave de busca por nome: sem espaços nas pontas e com espaços internos únicos."""
+    return ' '.join(str(nome).split())
+
+class CacheLRU:
+    """Mapa chave -> valor com no máximo `capacidade` itens, cada um válido por `ttl` segundos.
+
+    `versao` muda a cada invalidação. Quem busca no banco anota a versão antes
+    da consulta e a passa para guardar(): se algo foi invalidado no meio do
+    caminho, o valor (possivelmente antigo) não é guardado.
+    """
+
+    def __init__(self, capacidade=CAPACIDADE, ttl=TTL, relogio=time.monotonic):
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self.relogio = relogio
+        self.acertos = 0
+        self.falhas = 0
+        self.versao = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave):
+        """Retorna o valor guardado ou None (ausente ou vencido)."""
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is not None and item[1] > self.relogio():
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return item[0]
+            if item is not None:
+                del self._itens[chave]
+            self.falhas += 1
+            return None
+
+    def guardar(self, chave, valor, versao=None):
+        with self._trava:
+            if versao is not None and versao != self.versao:
+                return
+            self._itens[chave] = (valor, self.relogio() + self.ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+    def remover(self, *chaves):
+        with self._trava:
+            self.versao += 1
+            for chave in chaves:
+                self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._trava:
+            self.versao += 1
+            self._itens.clear()
+
+    def estatisticas(self):
+        """Acertos, falhas, taxa de acerto e ocupação do cache."""
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+                'itens': len(self._itens),
+                'capacidade': self.capacidade,
+                'ttl': self.ttl,
+            }
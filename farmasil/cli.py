@@ -0,0 +1,395 @@
+"""Ponto de entrada de linha de comando: `python -m farmasil` ou `farmasil`."""
+import argparse
+import sys
+import time
+
+from farmasil.banco import PERFIS, criar_engine, obter_engine, usar_engine
+
+def _perfil_do_comando(args, perfil):
+    """Usa o perfil próprio do subcomando, com o --url informado, a menos que --perfil escolha outro."""
+    if not args.perfil:
+        usar_engine(criar_engine(url=args.url, perfil=perfil, echo=args.echo))
+
+def _init(args):
+    from farmasil.migracoes import migrar
+    aplicadas = migrar(obter_engine(), progresso=lambda migracao: print(
+        f"Aplicando migração {migracao.versao}: {migracao.descricao}..."))
+    if aplicadas:
+        print(f"Esquema de {obter_engine().url} atualizado ({len(aplicadas)} migrações).")
+    else:
+        print(f"Banco inicializado em {obter_engine().url}.")
+    return 0
+
+def _importar(args):
+    from farmasil.banco import unidade_de_trabalho
+    from farmasil.importacao import importar
+    _perfil_do_comando(args, 'importacao')
+
+    def mostrar_progresso(relatorio):
+        print(f"\r{relatorio.lidas} lidas, {relatorio.inseridas} inseridas, {relatorio.rejeitadas} rejeitadas "
+              f"({relatorio.linhas_por_segundo:.0f} linhas/s)", end='', flush=True)
+
+    with unidade_de_trabalho() as session:
+        relatorio = importar(session, args.entidade, args.arquivo, formato=args.formato, tamanho_lote=args.lote,
+                             rejeitados=args.rejeitados, progresso=mostrar_progresso)
+    print()
+    for numero, erro in relatorio.amostra_erros:
+        print(f"Linha {numero}: {erro}")
+    return 0 if not relatorio.rejeitadas else 2
+
+def _exportar(args):
+    from farmasil.banco import unidade_de_trabalho
+    from farmasil.listagens import exportar
+    _perfil_do_comando(args, 'relatorio')
+    filtros = {'loja_id': args.loja, 'categoria': args.categoria}
+    filtros = {nome: valor for nome, valor in filtros.items() if valor is not None}
+    with unidade_de_trabalho() as session:
+        exportar(session, args.entidade, None if args.destino == '-' else args.destino, args.formato, **filtros)
+    return 0
+
+def _painel(args):
+    from farmasil.banco import unidade_de_trabalho
+    from farmasil import painel
+    with unidade_de_trabalho() as session:
+        if args.resumo == 'ativar':
+            painel.ativar_resumo_estoque(session)
+        elif args.resumo == 'desativar':
+            painel.desativar_resumo_estoque(session)
+        elif args.resumo == 'reconstruir':
+            painel.reconstruir_resumo_estoque(session)
+        painel.imprimir_painel(painel.painel_estoque(session, usar_resumo=painel.resumo_ativo(session)))
+    return 0
+
+def _notas(args):
+    from datetime import datetime
+    from farmasil.banco import unidade_de_trabalho
+    from farmasil.notas import emitir_notas
+    _perfil_do_comando(args, 'relatorio')
+    filtros = {'pedido_ids': args.pedido, 'de_id': args.de, 'ate_id': args.ate,
+               'inicio': datetime.fromisoformat(args.inicio) if args.inicio else None,
+               'fim': datetime.fromisoformat(args.fim) if args.fim else None}
+    with unidade_de_trabalho() as session:
+        total = emitir_notas(session, args.destino, trabalhadores=args.trabalhadores,
+                             progresso=lambda total: print(f"\r{total} notas emitidas", end='', flush=True),
+                             **{nome: valor for nome, valor in filtros.items() if valor is not None})
+    print(f"\r{total} notas emitidas em {args.destino}.")
+    return 0
+
+def _vendas(args):
+    from datetime import date
+    from farmasil.banco import unidade_de_trabalho
+    from farmasil import vendas
+    inicio = date.fromisoformat(args.inicio) if args.inicio else None
+    fim = date.fromisoformat(args.fim) if args.fim else None
+    destino = None if args.destino == '-' else args.destino
+    with unidade_de_trabalho() as session:
+        if args.itens:
+            itens = vendas.extrair_itens(session, inicio, fim)
+            filtros = {'loja_id': args.loja} if args.loja is not None else {}
+            vendas.exportar_relatorio(vendas.fatiar(itens, args.por.split(','), **filtros), destino, args.formato)
+        else:
+            if not args.sem_atualizar:
+                vendas.atualizar_resumos(session)
+            linhas = vendas.relatorio(session, args.por, inicio, fim, loja_id=args.loja)
+            vendas.exportar_relatorio(linhas, destino, args.formato)
+    return 0
+
+def _folha(args):
+    from datetime import date
+    from farmasil.banco import unidade_de_trabalho
+    from farmasil.folha import LinhaFolha, TotalLoja, calcular_folha
+    from farmasil.vendas import exportar_relatorio
+    ano, mes = (int(parte) for parte in args.mes.split('-')) if args.mes else (date.today().year, date.today().month)
+    destino = None if args.destino == '-' else args.destino
+    with unidade_de_trabalho() as session:
+        folha = calcular_folha(session, ano, mes)
+    if args.por == 'loja':
+        exportar_relatorio(folha.lojas, destino, args.formato, campos=TotalLoja._fields)
+    else:
+        exportar_relatorio(folha.funcionarios, destino, args.formato, campos=LinhaFolha._fields)
+    return 0
+
+def _reposicao(args):
+    from datetime import date
+    from farmasil.banco import unidade_de_trabalho
+    from farmasil import reposicao
+    from farmasil.vendas import exportar_relatorio
+    hoje = date.fromisoformat(args.hoje) if args.hoje else None
+    destino = None if args.destino == '-' else args.destino
+    with unidade_de_trabalho() as session:
+        if not args.sem_atualizar:
+            reposicao.atualizar_velocidade(session, hoje)
+        if args.por == 'produto':
+            exportar_relatorio(reposicao.sugestoes(session, args.loja, args.fornecedor), destino, args.formato,
+                               campos=reposicao.LinhaReposicao._fields)
+        else:
+            compras = reposicao.compras_por_fornecedor(session, args.loja, por_loja=args.por == 'fornecedor-loja')
+            exportar_relatorio(compras, destino, args.formato, campos=reposicao.CompraFornecedor._fields)
+    return 0
+
+def _rede(args):
+    from datetime import date
+    from farmasil import fragmentos
+    from farmasil.vendas import LinhaVendas, exportar_relatorio
+    roteador = fragmentos.RoteadorLojas(args.diretorio, perfil=args.perfil or 'pdv')
+    destino = None if args.destino == '-' else args.destino
+    try:
+        if args.acao == 'criar':
+            roteador.criar()
+            print(f"Catálogo e {len(roteador.lojas())} banco(s) de loja prontos em {args.diretorio}.")
+        elif args.acao == 'estoque':
+            exportar_relatorio(fragmentos.estoque_da_rede(roteador), destino, args.formato,
+                               campos=fragmentos.LinhaEstoqueRede._fields)
+        elif args.acao == 'vendas':
+            inicio = date.fromisoformat(args.inicio) if args.inicio else None
+            fim = date.fromisoformat(args.fim) if args.fim else None
+            exportar_relatorio(fragmentos.vendas_da_rede(roteador, args.por, inicio, fim), destino, args.formato,
+                               campos=LinhaVendas._fields)
+        elif args.acao == 'reposicao':
+            from farmasil.reposicao import CompraFornecedor
+            exportar_relatorio(fragmentos.compras_da_rede(roteador), destino, args.formato,
+                               campos=CompraFornecedor._fields)
+        else:
+            clientes = fragmentos.reconstruir_historico_clientes(roteador)
+            print(f"Histórico de compras recalculado ({clientes} clientes com compras).")
+    finally:
+        roteador.fechar()
+    return 0
+
+def _servir(args):
+    from farmasil.banco import criar_engine_assincrona
+    from farmasil.migracoes import pendentes
+    from farmasil.servico import servir
+    if pendentes(obter_engine()):
+        print("O esquema do banco está desatualizado. Rode 'python -m farmasil init' antes de servir.")
+        return 1
+    engine = criar_engine_assincrona(url=args.url, perfil=args.perfil or 'pdv', echo=args.echo)
+    if args.metricas:
+        from farmasil.metricas import instrumentar
+        instrumentar(engine.sync_engine)
+    servir(engine, args.host, args.porta, diretorio_notas=args.notas,
+           pronto=lambda host, porta: print(f"Servindo os PDVs em http://{host}:{porta} (Ctrl+C para parar)."))
+    return 0
+
+def _relatorios(args):
+    from datetime import date
+    from farmasil.banco import unidade_de_trabalho
+    from farmasil import relatorios
+    mes = tuple(int(parte) for parte in args.mes.split('-')) if args.mes else None
+    inicio = date.fromisoformat(args.inicio) if args.inicio else None
+    fim = date.fromisoformat(args.fim) if args.fim else None
+    if not args.sem_atualizar:
+        with unidade_de_trabalho() as session:
+            relatorios.preparar(session)
+    resultados = relatorios.executar_relatorios(relatorios.relatorios_padrao(inicio, fim, mes),
+                                                url=obter_engine().url, processos=args.processos)
+    escritas = relatorios.exportar(resultados, args.diretorio, args.formato)
+    for resultado in resultados:
+        print(f"{resultado.nome}: {escritas[resultado.nome]} linhas em {resultado.segundos:.2f} s")
+    return 0
+
+def _manutencao(args):
+    from datetime import datetime
+    from farmasil import manutencao
+    engine = obter_engine()
+    if args.acao == 'backup':
+        destino = args.destino or f'backup-{datetime.now():%Y%m%d-%H%M%S}.db'
+        resultado = manutencao.backup_online(destino, engine, paginas=args.paginas, pausa=args.pausa)
+        print(f"Backup em {resultado.caminho}: {resultado.bytes / 2 ** 20:.1f} MiB, {resultado.passos} passos "
+              f"({resultado.reinicios} recomeços) em {resultado.segundos:.1f} s.")
+    elif args.acao == 'instantaneo':
+        destino = args.destino or f'instantaneo-{datetime.now():%Y%m%d-%H%M%S}.db'
+        resultado = manutencao.instantaneo(destino, engine)
+        print(f"Instantâneo em {resultado.caminho}: {resultado.bytes / 2 ** 20:.1f} MiB "
+              f"em {resultado.segundos:.1f} s.")
+    elif args.acao == 'otimizar':
+        manutencao.otimizar(engine, analisar=args.analisar)
+        print("Estatísticas do planejador atualizadas.")
+    elif args.acao == 'compactar':
+        liberadas = manutencao.compactar(engine, paginas=args.paginas, pausa=args.pausa)
+        print(f"{liberadas} páginas devolvidas ao sistema.")
+    elif args.acao == 'verificar':
+        if not args.destino:
+            print("Informe a cópia a verificar.")
+            return 1
+        verificacao = manutencao.testar_restauracao(args.destino)
+        for problema in verificacao.problemas:
+            print(problema)
+        print(f"{args.destino}: {'íntegro' if verificacao.integro else 'NÃO íntegro'}, "
+              f"versão {verificacao.versao}, {verificacao.orfaos} chaves órfãs, "
+              f"{sum(verificacao.linhas.values())} linhas.")
+        return 0 if verificacao.integro else 2
+    else:
+        rotina = manutencao.Manutencao(args.destino or 'backups', engine, intervalo_backup=args.intervalo,
+                                       hora_diaria=args.hora, manter=args.manter)
+        print(f"Manutenção em {rotina.diretorio}: backup a cada {args.intervalo} s, instantâneo e ANALYZE "
+              f"às {args.hora} h (Ctrl+C para parar).")
+        rotina.iniciar()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            rotina.encerrar()
+    return 0
+
+def _historico_clientes(args):
+    from farmasil.banco import unidade_de_trabalho
+    from farmasil.modelos import Cliente
+    with unidade_de_trabalho() as session:
+        Cliente.reconstruir_historico(session)
+    print("Histórico de compras dos clientes recalculado.")
+    return 0
+
+def _arquivar(args):
+    from datetime import date
+    from farmasil.banco import unidade_de_trabalho
+    from farmasil import arquivamento
+    hoje = date.fromisoformat(args.hoje) if args.hoje else None
+    with unidade_de_trabalho() as session:
+        resultado = arquivamento.arquivar(session, args.diretorio, horizonte=args.horizonte, hoje=hoje,
+                                          lote=args.lote)
+        print(f"Arquivados até {resultado.corte:%d/%m/%Y}: {resultado.pedidos} pedidos ({resultado.itens} itens) e "
+              f"{resultado.movimentos} movimentos de caixa em {resultado.segundos:.1f} s.")
+        for particao in arquivamento.particoes(session):
+            print(f"{particao.mes}: {particao.pedidos} pedidos, {particao.itens} itens, "
+                  f"{particao.movimentos} movimentos ({particao.caminho})")
+    return 0
+
+def _menu(args):
+    from sqlalchemy import inspect
+    if not inspect(obter_engine()).has_table('lojas'):
+        print("Banco não inicializado. Rode 'python -m farmasil init' antes de abrir o menu.")
+        return 1
+    from farmasil.migracoes import pendentes
+    if pendentes(obter_engine()):
+        print("O esquema do banco está desatualizado. Rode 'python -m farmasil init' para aplicar as migrações.")
+        return 1
+    from farmasil.menus import menu_principal
+    menu_principal()
+    return 0
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog='farmasil', description='Sistema Farmasil')
+    parser.add_argument('--url', help='URL SQLAlchemy do banco (padrão: configuração/FARMASIL_DB_URL)')
+    parser.add_argument('--perfil', choices=sorted(PERFIS), help='perfil de desempenho do banco')
+    parser.add_argument('--echo', action='store_true', default=None, help='mostra o SQL executado')
+    parser.add_argument('--metricas', help='grava as métricas de SQL por operação no fim (.prom ou JSON)')
+    comandos = parser.add_subparsers(dest='comando')
+    comandos.add_parser('menu', help='abre o menu interativo (padrão)').set_defaults(funcao=_menu)
+    comandos.add_parser('init', help='cria as tabelas do banco ou aplica as migrações pendentes').set_defaults(funcao=_init)
+    importacao = comandos.add_parser('importar', help='importa lojas, produtos, clientes ou fornecedores em lote')
+    importacao.add_argument('entidade', choices=['lojas', 'produtos', 'clientes', 'fornecedores'])
+    importacao.add_argument('arquivo', help='arquivo CSV (com cabeçalho) ou JSONL')
+    importacao.add_argument('--formato', choices=['csv', 'jsonl'], help='padrão: deduzido da extensão')
+    importacao.add_argument('--lote', type=int, default=5000, help='linhas por transação')
+    importacao.add_argument('--rejeitados', help='CSV para as linhas rejeitadas')
+    importacao.set_defaults(funcao=_importar)
+    exportacao = comandos.add_parser('exportar', help='exporta uma listagem inteira em CSV ou JSONL')
+    exportacao.add_argument('entidade', choices=['lojas', 'produtos', 'clientes', 'funcionarios', 'fornecedores'])
+    exportacao.add_argument('destino', nargs='?', default='-', help="arquivo de saída ('-' para a saída padrão)")
+    exportacao.add_argument('--formato', choices=['csv', 'jsonl'], default='csv')
+    exportacao.add_argument('--loja', type=int, help='filtra produtos/funcionários pela loja')
+    exportacao.add_argument('--categoria', help='filtra produtos pela categoria')
+    exportacao.set_defaults(funcao=_exportar)
+    notas = comandos.add_parser('notas', help='emite (ou reemite) notas fiscais em lote')
+    notas.add_argument('destino', nargs='?', default='.', help="diretório das notas ou arquivo .zip (padrão: '.')")
+    notas.add_argument('--pedido', type=int, action='append', help='id do pedido (pode repetir)')
+    notas.add_argument('--de', type=int, help='primeiro id da faixa de pedidos')
+    notas.add_argument('--ate', type=int, help='último id da faixa de pedidos')
+    notas.add_argument('--inicio', help='pedidos a partir desta data/hora (AAAA-MM-DD[ HH:MM])')
+    notas.add_argument('--fim', help='pedidos antes desta data/hora (exclusivo)')
+    notas.add_argument('--trabalhadores', type=int, default=4, help='threads de renderização e gravação')
+    notas.set_defaults(funcao=_notas)
+    vendas = comandos.add_parser('vendas', help='relatório de vendas a partir dos resumos diários')
+    vendas.add_argument('destino', nargs='?', default='-', help="arquivo de saída ('-' para a saída padrão)")
+    vendas.add_argument('--por', default='loja',
+                        help='loja, funcionario, dia, produto ou categoria (com --itens, colunas separadas por vírgula)')
+    vendas.add_argument('--inicio', help='primeiro dia (AAAA-MM-DD)')
+    vendas.add_argument('--fim', help='dia seguinte ao último (exclusivo)')
+    vendas.add_argument('--loja', type=int, help='só uma loja')
+    vendas.add_argument('--formato', choices=['csv', 'json'], default='csv')
+    vendas.add_argument('--sem-atualizar', action='store_true', help='não agrega os pedidos novos antes do relatório')
+    vendas.add_argument('--itens', action='store_true', help='agrega direto dos itens com pandas (fatias ad hoc)')
+    vendas.set_defaults(funcao=_vendas)
+    folha = comandos.add_parser('folha', help='folha de pagamento do mês a partir do ponto')
+    folha.add_argument('destino', nargs='?', default='-', help="arquivo de saída ('-' para a saída padrão)")
+    folha.add_argument('--mes', help='mês da folha (AAAA-MM, padrão: o atual)')
+    folha.add_argument('--por', choices=['funcionario', 'loja'], default='funcionario')
+    folha.add_argument('--formato', choices=['csv', 'json'], default='csv')
+    folha.set_defaults(funcao=_folha)
+    reposicao = comandos.add_parser('reposicao', help='sugestões de compra pela velocidade de vendas')
+    reposicao.add_argument('destino', nargs='?', default='-', help="arquivo de saída ('-' para a saída padrão)")
+    reposicao.add_argument('--por', choices=['fornecedor', 'fornecedor-loja', 'produto'], default='fornecedor')
+    reposicao.add_argument('--loja', type=int, help='só uma loja')
+    reposicao.add_argument('--fornecedor', type=int, help='--por produto: só um fornecedor')
+    reposicao.add_argument('--hoje', help='data de referência (AAAA-MM-DD, padrão: hoje)')
+    reposicao.add_argument('--formato', choices=['csv', 'json'], default='csv')
+    reposicao.add_argument('--sem-atualizar', action='store_true', help='usa a velocidade já calculada')
+    reposicao.set_defaults(funcao=_reposicao)
+    relatorios = comandos.add_parser('relatorios', help='gera os relatórios do fechamento em paralelo (um processo '
+                                     'por relatório)')
+    relatorios.add_argument('diretorio', help='diretório dos arquivos (um por relatório)')
+    relatorios.add_argument('--processos', type=int, help='processos em paralelo (padrão: um por CPU)')
+    relatorios.add_argument('--mes', help='mês da folha (AAAA-MM, padrão: o atual)')
+    relatorios.add_argument('--inicio', help='vendas: primeiro dia (AAAA-MM-DD)')
+    relatorios.add_argument('--fim', help='vendas: dia seguinte ao último (exclusivo)')
+    relatorios.add_argument('--formato', choices=['csv', 'json'], default='csv')
+    relatorios.add_argument('--sem-atualizar', action='store_true',
+                            help='não agrega os pedidos novos nem atualiza a velocidade de reposição antes')
+    relatorios.set_defaults(funcao=_relatorios)
+    comandos.add_parser('historico-clientes', help='recalcula os contadores de compras de todos os clientes'
+                        ).set_defaults(funcao=_historico_clientes)
+    arquivo = comandos.add_parser('arquivar', help='move pedidos e movimentos de caixa antigos para bancos mensais')
+    arquivo.add_argument('diretorio', nargs='?', help='diretório dos bancos dos meses (padrão: <banco>-arquivo)')
+    arquivo.add_argument('--horizonte', type=int, default=365, help='dias que ficam no banco principal')
+    arquivo.add_argument('--hoje', help='data de referência (AAAA-MM-DD, padrão: hoje)')
+    arquivo.add_argument('--lote', type=int, default=1000, help='pedidos (ou movimentos) por transação')
+    arquivo.set_defaults(funcao=_arquivar)
+    manutencao = comandos.add_parser('manutencao',
+                                     help='backup online, instantâneo, otimização e compactação (SQLite)')
+    manutencao.add_argument('acao', choices=['backup', 'instantaneo', 'otimizar', 'compactar', 'verificar', 'agendar'])
+    manutencao.add_argument('destino', nargs='?',
+                            help='arquivo da cópia (backup, instantaneo, verificar) ou diretório (agendar)')
+    manutencao.add_argument('--paginas', type=int, default=256, help='páginas por passo do backup e da compactação')
+    manutencao.add_argument('--pausa', type=float, default=0.01, help='segundos de pausa entre os passos')
+    manutencao.add_argument('--analisar', action='store_true', help='otimizar: ANALYZE completo além do optimize')
+    manutencao.add_argument('--intervalo', type=int, default=3600, help='agendar: segundos entre os backups')
+    manutencao.add_argument('--hora', type=int, default=3, help='agendar: hora do instantâneo e do ANALYZE diários')
+    manutencao.add_argument('--manter', type=int, default=24, help='agendar: backups mantidos no diretório')
+    manutencao.set_defaults(funcao=_manutencao)
+    rede = comandos.add_parser('rede', help='modo fragmentado: um banco por loja e um catálogo global')
+    rede.add_argument('acao', choices=['criar', 'estoque', 'vendas', 'reposicao', 'historico-clientes'])
+    rede.add_argument('diretorio', help='diretório com catalogo.db e os bancos das lojas')
+    rede.add_argument('destino', nargs='?', default='-', help="arquivo de saída ('-' para a saída padrão)")
+    rede.add_argument('--por', default='loja', help='vendas: loja, funcionario, dia, produto ou categoria')
+    rede.add_argument('--inicio', help='vendas: primeiro dia (AAAA-MM-DD)')
+    rede.add_argument('--fim', help='vendas: dia seguinte ao último (exclusivo)')
+    rede.add_argument('--formato', choices=['csv', 'json'], default='csv')
+    rede.set_defaults(funcao=_rede)
+    servico = comandos.add_parser('servir', help='serviço HTTP/JSON local para os terminais de PDV')
+    servico.add_argument('--host', default='127.0.0.1')
+    servico.add_argument('--porta', type=int, default=8080)
+    servico.add_argument('--notas', default='.', help="diretório das notas pedidas no checkout (padrão: '.')")
+    servico.set_defaults(funcao=_servir)
+    painel = comandos.add_parser('painel', help='mostra o painel de estoque de todas as lojas')
+    painel.add_argument('--resumo', choices=['ativar', 'desativar', 'reconstruir'],
+                        help='gerencia a tabela de resumo mantida por triggers (SQLite)')
+    painel.set_defaults(funcao=_painel)
+    return parser
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.url or args.perfil or args.echo:
+        usar_engine(criar_engine(url=args.url, perfil=args.perfil, echo=args.echo))
+    funcao = getattr(args, 'funcao', _menu)
+    if not args.metricas:
+        return funcao(args)
+    from farmasil.metricas import instrumentar
+    coletor = instrumentar(obter_engine())
+    try:
+        return funcao(args)
+    finally:
+        coletor.exportar(args.metricas)
+        for nome, formatos in coletor.suspeitas_n_mais_1().items():
+            print(f"Provável N+1 em {nome}: {len(formatos)} comando(s) repetido(s); veja {args.metricas}",
+                  file=sys.stderr)
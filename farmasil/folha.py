@@ -0,0 +1,95 @@
+"""Folha de pagamento mensal calculada a partir do ponto (registros_ponto).
+
+calcular_folha lê, em duas consultas, o cadastro dos funcionários e a soma das
+horas de cada um no mês (pelo índice de data do ponto) e calcula a folha
+inteira de uma vez com numpy, sem laço por funcionário:
+
+- salário: o `salario` cadastrado é o mensal, pago inteiro;
+- horas extras: as que passam de HORAS_MENSAIS no mês, pagas sobre o valor
+  da hora (salário / HORAS_MENSAIS) com ADICIONAL_HORA_EXTRA;
+- adicional noturno: ADICIONAL_NOTURNO sobre salário e horas extras de quem
+  tem um dos TURNOS_NOTURNOS.
+
+Os valores são calculados em centavos (int64), cada parcela arredondada uma
+vez, e só convertidos para reais nas linhas retornadas: os totais por loja
+batem centavo a centavo com a soma das linhas. Os totais por loja usam a loja
+atual do funcionário. Precisa de numpy (pip install farmasil[analise]).
+"""
+from sqlalchemy import func, select
+from collections import namedtuple
+from datetime import date
+
+from farmasil.modelos import Funcionario, RegistroPonto
+from farmasil.metricas import operacao
+
+# Jornada mensal contratada (44 h semanais)
+HORAS_MENSAIS = 220.0
+ADICIONAL_HORA_EXTRA = 0.5
+ADICIONAL_NOTURNO = 0.2
+# Valores de `turno` (em minúsculas) que recebem o adicional noturno
+TURNOS_NOTURNOS = ('noite', 'noturno', 'madrugada')
+
+LinhaFolha = namedtuple('LinhaFolha', ['funcionario_id', 'nome', 'loja_id', 'turno', 'horas', 'horas_extras', 'salario',
+                                       'valor_horas_extras', 'adicional_noturno', 'bruto'])
+TotalLoja = namedtuple('TotalLoja', ['loja_id', 'funcionarios', 'horas', 'horas_extras', 'valor_horas_extras',
+                                     'adicional_noturno', 'bruto'])
+Folha = namedtuple('Folha', ['inicio', 'fim', 'funcionarios', 'lojas'])
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("A folha de pagamento precisa de numpy: pip install farmasil[analise].") from None
+    return numpy
+
+def periodo_do_mes(ano, mes):
+    """(primeiro dia do mês, primeiro dia do mês seguinte)."""
+    return date(ano, mes, 1), date(ano + mes // 12, mes % 12 + 1, 1)
+
+@operacao('folha.calcular_folha')
+def calcular_folha(session, ano, mes):
+    """Folha do mês: uma LinhaFolha por funcionário (por id) e um TotalLoja por loja (0 = sem loja)."""
+    numpy = _numpy()
+    inicio, fim = periodo_do_mes(ano, mes)
+    cadastro = session.execute(
+        select(Funcionario.id, Funcionario.nome, func.coalesce(Funcionario.loja_id, 0), Funcionario.turno,
+               Funcionario.salario_centavos).order_by(Funcionario.id)
+    ).all()
+    if not cadastro:
+        return Folha(inicio, fim, [], [])
+    ids, nomes, lojas, turnos, salarios = zip(*cadastro)
+    ids = numpy.array(ids, dtype=numpy.int64)
+    lojas = numpy.array(lojas, dtype=numpy.int64)
+    salarios = numpy.array(salarios, dtype=numpy.int64)  # centavos
+
+    horas = numpy.zeros(len(ids))
+    lancadas = session.execute(
+        select(RegistroPonto.funcionario_id, func.sum(RegistroPonto.horas))
+        .where(RegistroPonto.data >= inicio, RegistroPonto.data < fim)
+        .group_by(RegistroPonto.funcionario_id)
+    ).all()
+    if lancadas:
+        com_ponto, somas = (numpy.array(coluna) for coluna in zip(*lancadas))
+        posicoes = numpy.minimum(numpy.searchsorted(ids, com_ponto), len(ids) - 1)
+        # O ponto de um funcionário já removido do cadastro não entra na folha
+        cadastrados = ids[posicoes] == com_ponto
+        horas[posicoes[cadastrados]] = somas[cadastrados].astype(numpy.float64)
+
+    extras = numpy.maximum(horas - HORAS_MENSAIS, 0.0)
+    # Valores em centavos inteiros: cada parcela é arredondada uma vez e as somas são exatas
+    valor_extras = numpy.rint(extras * salarios / HORAS_MENSAIS * (1 + ADICIONAL_HORA_EXTRA)).astype(numpy.int64)
+    noturnos = numpy.isin(numpy.char.lower(numpy.array(turnos, dtype=str)), TURNOS_NOTURNOS)
+    adicional = numpy.where(noturnos, numpy.rint((salarios + valor_extras) * ADICIONAL_NOTURNO), 0).astype(numpy.int64)
+    bruto = salarios + valor_extras + adicional
+
+    codigos, grupo = numpy.unique(lojas, return_inverse=True)
+    por_loja = [numpy.round(numpy.bincount(grupo, weights=valores), 2).tolist() for valores in (horas, extras)]
+    for centavos in (valor_extras, adicional, bruto):
+        soma = numpy.zeros(len(codigos), dtype=numpy.int64)
+        numpy.add.at(soma, grupo, centavos)
+        por_loja.append((soma / 100).tolist())
+    totais = [TotalLoja(*linha) for linha in zip(codigos.tolist(), numpy.bincount(grupo).tolist(), *por_loja)]
+    linhas = [LinhaFolha(*linha) for linha in zip(
+        ids.tolist(), nomes, lojas.tolist(), turnos, horas.tolist(), extras.tolist(), (salarios / 100).tolist(),
+        (valor_extras / 100).tolist(), (adicional / 100).tolist(), (bruto / 100).tolist())]
+    return Folha(inicio, fim, linhas, totais)
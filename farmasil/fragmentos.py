@@ -0,0 +1,219 @@
+"""Modo fragmentado: um banco SQLite por loja e um catálogo global.
+
+O catálogo (catalogo.db) guarda lojas, clientes e fornecedores; cada loja tem
+o seu banco (loja_0001.db, ...) com produtos, funcionários, pedidos, caixa,
+ponto e resumos. Como cada loja escreve no seu arquivo, os PDVs de lojas
+diferentes não disputam a mesma trava de escrita do SQLite.
+
+O banco da loja anexa o catálogo (ATTACH ... AS catalogo). As tabelas do
+catálogo não existem no banco da loja, então o SQLite resolve `clientes`,
+`lojas` e `fornecedores` no catálogo e os modelos funcionam sem mudança.
+Numa sessão de loja (session.info['loja_id']) o checkout não atualiza os
+contadores de compras do cliente: eles ficam no catálogo, que voltaria a ser
+uma trava comum a todas as lojas. reconstruir_historico_clientes os recalcula
+somando a rede.
+
+Os relatórios da rede (estoque_da_rede, vendas_da_rede, compras_da_rede)
+rodam em todas as lojas em paralelo e juntam os resultados. Ids de produtos,
+funcionários e pedidos são por loja; nos relatórios por produto ou
+funcionário a chave vira (loja_id, id).
+"""
+from sqlalchemy import bindparam, event, func, select
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+
+from farmasil.banco import Session, criar_engine
+from farmasil.metricas import operacao
+from farmasil.migracoes import migrar
+from farmasil.modelos import Base, Cliente, ItensPedido, Loja, Pedido
+from farmasil import arquivamento, reposicao, vendas
+
+TABELAS_CATALOGO = ('lojas', 'clientes', 'fornecedores')
+# Relatórios da rede: lojas consultadas ao mesmo tempo
+TRABALHADORES = 8
+
+LinhaEstoqueRede = namedtuple('LinhaEstoqueRede', ['loja_id', 'categoria', 'unidades', 'skus'])
+
+def tabelas_do_catalogo():
+    return [Base.metadata.tables[nome] for nome in TABELAS_CATALOGO]
+
+def tabelas_da_loja():
+    return [tabela for tabela in Base.metadata.sorted_tables if tabela.name not in TABELAS_CATALOGO]
+
+class RoteadorLojas:
+    """Abre as sessões do catálogo e de cada loja de um diretório fragmentado."""
+
+    def __init__(self, diretorio, perfil='pdv', **opcoes):
+        self.diretorio = diretorio
+        self.perfil = perfil
+        self.opcoes = opcoes
+        self.caminho_catalogo = os.path.join(diretorio, 'catalogo.db')
+        self.catalogo = criar_engine(f"sqlite:///{self.caminho_catalogo}", perfil=perfil, **opcoes)
+        self._engines = {}
+        self._trava = threading.Lock()
+
+    def caminho_loja(self, loja_id):
+        return os.path.join(self.diretorio, f'loja_{loja_id:04d}.db')
+
+    def criar(self):
+        """Cria (ou migra) o catálogo e o banco de cada loja cadastrada nele."""
+        os.makedirs(self.diretorio, exist_ok=True)
+        migrar(self.catalogo, tabelas=tabelas_do_catalogo())
+        for loja_id in self.lojas():
+            self._criar_banco_da_loja(loja_id)
+
+    def _criar_banco_da_loja(self, loja_id):
+        # Sem o catálogo anexado: o inspetor do SQLite também enxerga as tabelas anexadas
+        engine = criar_engine(f"sqlite:///{self.caminho_loja(loja_id)}", perfil=self.perfil, **self.opcoes)
+        try:
+            migrar(engine, tabelas=tabelas_da_loja())
+        finally:
+            engine.dispose()
+
+    def adicionar_loja(self, nome, endereco, horario_funcionamento):
+        """Cadastra a loja no catálogo, cria o banco dela e retorna o id."""
+        with self.catalogo.begin() as conexao:
+            loja_id = conexao.execute(Loja.__table__.insert().values(
+                nome=nome, endereco=endereco, horario_funcionamento=horario_funcionamento
+            )).inserted_primary_key[0]
+        self._criar_banco_da_loja(loja_id)
+        return loja_id
+
+    def lojas(self):
+        """Ids das lojas do catálogo, em ordem."""
+        with self.catalogo.connect() as conexao:
+            return list(conexao.execute(select(Loja.id).order_by(Loja.id)).scalars())
+
+    def engine(self, loja_id):
+        """Engine do banco da loja (criada no primeiro uso, com o catálogo anexado)."""
+        engine = self._engines.get(loja_id)
+        if engine is not None:
+            return engine
+        with self._trava:
+            if loja_id not in self._engines:
+                caminho = self.caminho_loja(loja_id)
+                if not os.path.exists(caminho):
+                    raise ValueError(f"A loja {loja_id} não tem banco em {self.diretorio}; rode criar() antes.")
+                engine = criar_engine(f"sqlite:///{caminho}", perfil=self.perfil, **self.opcoes)
+
+                @event.listens_for(engine, 'connect')
+                def _anexar_catalogo(conexao_dbapi, registro):
+                    conexao_dbapi.execute("ATTACH DATABASE ? AS catalogo", (self.caminho_catalogo,))
+                self._engines[loja_id] = engine
+            return self._engines[loja_id]
+
+    def sessao(self, loja_id):
+        """Sessão no banco da loja (o chamador a fecha)."""
+        sessao = Session(bind=self.engine(loja_id))
+        sessao.info['loja_id'] = loja_id
+        return sessao
+
+    def sessao_catalogo(self):
+        return Session(bind=self.catalogo)
+
+    def em_paralelo(self, funcao, lojas=None, trabalhadores=TRABALHADORES):
+        """Roda funcao(sessão, loja_id) em cada loja, `trabalhadores` lojas por vez: {loja_id: resultado}."""
+        lojas = self.lojas() if lojas is None else list(lojas)
+
+        def na_loja(loja_id):
+            sessao = self.sessao(loja_id)
+            try:
+                return funcao(sessao, loja_id)
+            finally:
+                sessao.close()
+        with ThreadPoolExecutor(max_workers=max(1, min(trabalhadores, len(lojas)))) as executor:
+            return dict(zip(lojas, executor.map(na_loja, lojas)))
+
+    def fechar(self):
+        with self._trava:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+        self.catalogo.dispose()
+
+@operacao('fragmentos.estoque_da_rede')
+def estoque_da_rede(roteador, trabalhadores=TRABALHADORES):
+    """Unidades e SKUs por loja e categoria de toda a rede, uma loja por thread."""
+    por_loja = roteador.em_paralelo(lambda sessao, loja_id: Loja.estoque_por_categoria(sessao),
+                                    trabalhadores=trabalhadores)
+    return [LinhaEstoqueRede(linha.loja_id, linha.categoria, linha.unidades, linha.skus)
+            for loja_id in sorted(por_loja) for linha in por_loja[loja_id]]
+
+@operacao('fragmentos.vendas_da_rede')
+def vendas_da_rede(roteador, por='loja', inicio=None, fim=None, atualizar=True, trabalhadores=TRABALHADORES):
+    """vendas.relatorio de toda a rede: cada loja atualiza e lê os próprios resumos e as linhas são somadas.
+
+    Por produto ou funcionário a chave é (loja_id, id), já que os ids são de cada loja.
+    """
+    def na_loja(sessao, loja_id):
+        if atualizar:
+            vendas.atualizar_resumos(sessao)
+        return vendas._somas(sessao, por, inicio, fim)
+
+    # As receitas das lojas são somadas em centavos, sem erro de arredondamento
+    somas = {}
+    for loja_id, linhas in roteador.em_paralelo(na_loja, trabalhadores=trabalhadores).items():
+        for chave, pedidos_loja, unidades_loja, receita_loja in linhas:
+            chave = (loja_id, chave) if por in ('produto', 'funcionario') else chave
+            pedidos, unidades, receita = somas.get(chave, (None, 0, 0))
+            if pedidos_loja is not None:
+                pedidos = (pedidos or 0) + pedidos_loja
+            somas[chave] = (pedidos, unidades + unidades_loja, receita + receita_loja)
+    return [vendas.linha_vendas(chave, pedidos, unidades, receita)
+            for chave, (pedidos, unidades, receita) in sorted(somas.items())]
+
+@operacao('fragmentos.compras_da_rede')
+def compras_da_rede(roteador, trabalhadores=TRABALHADORES):
+    """Sugestões de compra por fornecedor e loja: cada loja atualiza a própria velocidade de vendas."""
+    def na_loja(sessao, loja_id):
+        reposicao.atualizar_velocidade(sessao)
+        return reposicao.compras_por_fornecedor(sessao, por_loja=True)
+
+    por_loja = roteador.em_paralelo(na_loja, trabalhadores=trabalhadores)
+    return sorted((compra for compras in por_loja.values() for compra in compras),
+                  key=lambda compra: (compra.fornecedor_id or 0, compra.loja_id or 0))
+
+@operacao('fragmentos.reconstruir_historico_clientes')
+def reconstruir_historico_clientes(roteador, trabalhadores=TRABALHADORES):
+    """Recalcula no catálogo os contadores de compras de todos os clientes, somando os pedidos de cada loja."""
+    def na_loja(sessao, loja_id):
+        finalizados = Pedido.status == "Finalizado"
+        pedidos = sessao.execute(
+            select(Pedido.cliente_id, func.count(Pedido.id), func.max(Pedido.data_hora))
+            .where(finalizados, Pedido.cliente_id.isnot(None)).group_by(Pedido.cliente_id)
+        ).all()
+        totais = dict(sessao.execute(
+            select(Pedido.cliente_id, func.sum(ItensPedido.quantidade * ItensPedido.preco_centavos))
+            .join(ItensPedido, ItensPedido.pedido_id == Pedido.id)
+            .where(finalizados, Pedido.cliente_id.isnot(None)).group_by(Pedido.cliente_id)
+        ).all())
+        # Os pedidos arquivados da loja entram como mais uma linha do cliente
+        return [(cliente_id, quantidade, totais.get(cliente_id) or 0, ultima)
+                for cliente_id, quantidade, ultima in pedidos] + [
+            (cliente_id, quantidade, total, ultima)
+            for cliente_id, (quantidade, total, ultima) in arquivamento.historico_arquivado(sessao).items()]
+
+    contadores = {}
+    for linhas in roteador.em_paralelo(na_loja, trabalhadores=trabalhadores).values():
+        for cliente_id, quantidade, total, ultima in linhas:
+            anterior = contadores.get(cliente_id)
+            if anterior:
+                quantidade += anterior[0]
+                total += anterior[1]
+                ultima = max(filter(None, (ultima, anterior[2])), default=None)
+            contadores[cliente_id] = (quantidade, total, ultima)
+
+    with roteador.catalogo.begin() as conexao:
+        conexao.execute(Cliente.__table__.update().values(historico_compras=0, total_gasto_centavos=0,
+                                                          ultima_compra=None))
+        if contadores:
+            tabela = Cliente.__table__
+            conexao.execute(
+                tabela.update().where(tabela.c.id == bindparam('_id')).values(
+                    historico_compras=bindparam('_quantidade'), total_gasto_centavos=bindparam('_total'),
+                    ultima_compra=bindparam('_ultima')),
+                [{'_id': cliente_id, '_quantidade': quantidade, '_total': total, '_ultima': ultima}
+                 for cliente_id, (quantidade, total, ultima) in contadores.items()])
+    return len(contadores)
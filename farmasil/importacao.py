@@ -0,0 +1,287 @@
+"""Importação em lote (CSV ou JSONL) de lojas, produtos, clientes e fornecedores.
+
+O arquivo é lido em fluxo, em lotes de tamanho fixo: cada lote é validado
+(campos obrigatórios, tipos, chaves estrangeiras e unicidade de CPF/CNPJ) e
+gravado com bulk_insert_mappings em uma única transação. A memória usada não
+depende do tamanho do arquivo. Na importação de produtos (SQLite), o índice da
+busca não é atualizado linha a linha: o trigger fica pausado em cada lote e o
+índice é reconstruído uma vez no fim.
+"""
+from sqlalchemy.exc import IntegrityError
+from dataclasses import dataclass, field
+from itertools import islice
+import csv
+import json
+import time
+
+from farmasil import busca
+from farmasil.modelos import Cliente, Fornecedor, Loja, Produto, para_centavos
+from farmasil.metricas import operacao
+
+TAMANHO_LOTE = 5000
+MAXIMO_AMOSTRA_ERROS = 20
+
+@dataclass
+class Especificacao:
+    """Como validar e gravar as linhas de uma entidade."""
+    modelo: type
+    campos: dict
+    obrigatorios: tuple
+    unicos: tuple = ()
+    chaves_estrangeiras: dict = field(default_factory=dict)
+    nao_negativos: tuple = ()
+    # Valores em reais no arquivo, gravados na coluna <campo>_centavos
+    centavos: tuple = ()
+
+ENTIDADES = {
+    'lojas': Especificacao(
+        modelo=Loja,
+        campos={'nome': str, 'endereco': str, 'horario_funcionamento': str},
+        obrigatorios=('nome', 'endereco', 'horario_funcionamento'),
+    ),
+    'fornecedores': Especificacao(
+        modelo=Fornecedor,
+        campos={'nome': str, 'cnpj': str, 'telefone': str, 'endereco': str, 'prazo_entrega': int},
+        obrigatorios=('nome', 'cnpj', 'telefone', 'endereco'),
+        unicos=('cnpj',),
+        nao_negativos=('prazo_entrega',),
+    ),
+    'clientes': Especificacao(
+        modelo=Cliente,
+        campos={'nome': str, 'cpf': str, 'telefone': str, 'email': str, 'endereco': str},
+        obrigatorios=('nome', 'cpf', 'telefone', 'email'),
+        unicos=('cpf',),
+    ),
+    'produtos': Especificacao(
+        modelo=Produto,
+        campos={'nome': str, 'preco': float, 'categoria': str, 'estoque': int,
+                'loja_id': int, 'fornecedor_id': int},
+        obrigatorios=('nome', 'preco', 'categoria'),
+        chaves_estrangeiras={'loja_id': Loja, 'fornecedor_id': Fornecedor},
+        nao_negativos=('preco', 'estoque'),
+        centavos=('preco',),
+    ),
+}
+
+@dataclass
+class RelatorioImportacao:
+    """Totais de uma importação, atualizados a cada lote."""
+    entidade: str
+    lidas: int = 0
+    inseridas: int = 0
+    rejeitadas: int = 0
+    segundos: float = 0.0
+    amostra_erros: list = field(default_factory=list)
+
+    @property
+    def linhas_por_segundo(self):
+        return self.lidas / self.segundos if self.segundos else 0.0
+
+def _ler_csv(arquivo):
+    # Linha 1 é o cabeçalho
+    for numero, registro in enumerate(csv.DictReader(arquivo), start=2):
+        yield numero, registro
+
+def _ler_jsonl(arquivo):
+    for numero, linha in enumerate(arquivo, start=1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except ValueError as erro:
+            yield numero, erro
+            continue
+        yield numero, registro if isinstance(registro, dict) else ValueError("a linha não é um objeto JSON")
+
+def _converter(especificacao, registro):
+    """Normaliza e converte um registro bruto. Retorna (linha, erro)."""
+    linha = {}
+    for campo, tipo in especificacao.campos.items():
+        valor = registro.get(campo)
+        if isinstance(valor, str):
+            valor = valor.strip()
+        if valor in (None, ''):
+            if campo in especificacao.obrigatorios:
+                return None, f"campo obrigatório ausente: {campo}"
+            continue
+        try:
+            valor = tipo(valor)
+        except (TypeError, ValueError):
+            return None, f"valor inválido para {campo}: {valor!r}"
+        if campo in especificacao.nao_negativos and valor < 0:
+            return None, f"{campo} não pode ser negativo"
+        if campo in especificacao.centavos:
+            linha[f'{campo}_centavos'] = para_centavos(valor)
+        else:
+            linha[campo] = valor
+    return linha, None
+
+class _Validador:
+    """Validações que dependem do banco, feitas uma vez por lote."""
+
+    def __init__(self, session, especificacao):
+        self.session = session
+        self.especificacao = especificacao
+        # Ids já confirmados de lojas/fornecedores: crescem só até o tamanho dessas tabelas
+        self.ids_validos = {campo: set() for campo in especificacao.chaves_estrangeiras}
+
+    def chaves_ausentes(self, linhas):
+        """Retorna {campo: ids que não existem} para as chaves estrangeiras do lote."""
+        ausentes = {}
+        for campo, modelo in self.especificacao.chaves_estrangeiras.items():
+            conhecidos = self.ids_validos[campo]
+            pendentes = {linha[campo] for linha in linhas if campo in linha} - conhecidos
+            if pendentes:
+                encontrados = {id_ for (id_,) in self.session.query(modelo.id).filter(modelo.id.in_(pendentes))
+                               .execution_options(por_lote=True)}
+                conhecidos.update(encontrados)
+                ausentes[campo] = pendentes - encontrados
+        return ausentes
+
+    def valores_existentes(self, linhas):
+        """Retorna {campo: valores únicos do lote que já estão gravados}."""
+        modelo = self.especificacao.modelo
+        existentes = {}
+        for campo in self.especificacao.unicos:
+            valores = {linha[campo] for linha in linhas}
+            coluna = getattr(modelo, campo)
+            existentes[campo] = {valor for (valor,) in self.session.query(coluna).filter(coluna.in_(valores))
+                                 .execution_options(por_lote=True)}
+        return existentes
+
+def _validar_lote(validador, lote):
+    """Separa o lote em linhas válidas e rejeitadas [(numero, erro, registro)]."""
+    especificacao = validador.especificacao
+    convertidas, rejeitadas = [], []
+    for numero, registro in lote:
+        if isinstance(registro, Exception):
+            rejeitadas.append((numero, f"linha ilegível: {registro}", None))
+            continue
+        linha, erro = _converter(especificacao, registro)
+        if erro:
+            rejeitadas.append((numero, erro, registro))
+        else:
+            convertidas.append((numero, linha, registro))
+
+    linhas = [linha for _, linha, _ in convertidas]
+    ausentes = validador.chaves_ausentes(linhas)
+    existentes = validador.valores_existentes(linhas)
+    vistos = {campo: set() for campo in especificacao.unicos}
+
+    validas = []
+    for numero, linha, registro in convertidas:
+        erro = None
+        for campo, ids in ausentes.items():
+            if linha.get(campo) in ids:
+                erro = f"{campo} {linha[campo]} não existe"
+                break
+        for campo in especificacao.unicos:
+            if erro:
+                break
+            if linha[campo] in existentes[campo]:
+                erro = f"{campo} {linha[campo]} já cadastrado"
+            elif linha[campo] in vistos[campo]:
+                erro = f"{campo} {linha[campo]} repetido no arquivo"
+            vistos[campo].add(linha[campo])
+        if erro:
+            rejeitadas.append((numero, erro, registro))
+        else:
+            validas.append((numero, linha, registro))
+    return validas, rejeitadas
+
+def _inserir(session, especificacao, linhas, pausar_busca):
+    if pausar_busca:
+        busca.pausar_indexacao(session)
+    session.bulk_insert_mappings(especificacao.modelo, linhas)
+    if pausar_busca:
+        busca.retomar_indexacao(session)
+
+def _gravar(session, especificacao, validas, pausar_busca=False):
+    """Grava o lote em uma transação; se o banco recusar, isola as linhas ruins uma a uma.
+
+    O lote chega validado, então a recusa é rara. Sem savepoints (o pysqlite
+    não os suporta de forma confiável): cada linha do lote recusado vai em sua
+    própria transação.
+    """
+    try:
+        _inserir(session, especificacao, [linha for _, linha, _ in validas], pausar_busca)
+        session.commit()
+        return len(validas), []
+    except IntegrityError:
+        session.rollback()
+
+    inseridas, rejeitadas = 0, []
+    for numero, linha, registro in validas:
+        try:
+            _inserir(session, especificacao, [linha], pausar_busca)
+            session.commit()
+            inseridas += 1
+        except IntegrityError as erro:
+            session.rollback()
+            rejeitadas.append((numero, f"recusado pelo banco: {erro.orig}", registro))
+    return inseridas, rejeitadas
+
+@operacao('importacao.importar')
+def importar(session, entidade, arquivo, formato=None, tamanho_lote=TAMANHO_LOTE, rejeitados=None, progresso=None):
+    """Importa um arquivo CSV ou JSONL para a entidade informada.
+
+    `arquivo` pode ser um caminho ou um arquivo texto aberto; o formato é
+    deduzido da extensão quando não informado. Linhas rejeitadas vão para o
+    CSV `rejeitados` (caminho ou arquivo) com o número da linha e o motivo.
+    `progresso`, se informado, é chamado com o RelatorioImportacao após cada lote.
+    """
+    if entidade not in ENTIDADES:
+        raise ValueError(f"Entidade desconhecida: {entidade}. Use uma de {', '.join(ENTIDADES)}.")
+    especificacao = ENTIDADES[entidade]
+    caminho = arquivo if isinstance(arquivo, str) else getattr(arquivo, 'name', '')
+    formato = formato or ('jsonl' if str(caminho).lower().endswith(('.jsonl', '.ndjson')) else 'csv')
+    if formato not in ('csv', 'jsonl'):
+        raise ValueError(f"Formato desconhecido: {formato}. Use csv ou jsonl.")
+
+    abertos = []
+    if isinstance(arquivo, str):
+        arquivo = open(arquivo, newline='', encoding='utf-8')
+        abertos.append(arquivo)
+    saida_rejeitados = None
+    if rejeitados is not None:
+        if isinstance(rejeitados, str):
+            rejeitados = open(rejeitados, 'w', newline='', encoding='utf-8')
+            abertos.append(rejeitados)
+        saida_rejeitados = csv.writer(rejeitados)
+        saida_rejeitados.writerow(['linha', 'erro', 'registro'])
+
+    relatorio = RelatorioImportacao(entidade)
+    validador = _Validador(session, especificacao)
+    pausar_busca = especificacao.modelo is Produto and busca.indexacao_pausavel(session)
+    registros = _ler_jsonl(arquivo) if formato == 'jsonl' else _ler_csv(arquivo)
+    inicio = time.perf_counter()
+    try:
+        while True:
+            lote = list(islice(registros, tamanho_lote))
+            if not lote:
+                break
+            validas, rejeitadas = _validar_lote(validador, lote)
+            inseridas, recusadas = _gravar(session, especificacao, validas, pausar_busca) if validas else (0, [])
+            rejeitadas.extend(recusadas)
+
+            relatorio.lidas += len(lote)
+            relatorio.inseridas += inseridas
+            relatorio.rejeitadas += len(rejeitadas)
+            for numero, erro, registro in rejeitadas:
+                if len(relatorio.amostra_erros) < MAXIMO_AMOSTRA_ERROS:
+                    relatorio.amostra_erros.append((numero, erro))
+                if saida_rejeitados:
+                    saida_rejeitados.writerow([numero, erro, json.dumps(registro, ensure_ascii=False, default=str)])
+            relatorio.segundos = time.perf_counter() - inicio
+            if progresso:
+                progresso(relatorio)
+    finally:
+        for aberto in abertos:
+            aberto.close()
+        if pausar_busca and relatorio.inseridas:
+            # Também depois de um erro: os lotes já confirmados entram na busca
+            session.rollback()
+            busca.reconstruir_indice(session)
+            session.commit()
+            relatorio.segundos = time.perf_counter() - inicio
+    return relatorio
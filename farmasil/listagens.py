@@ -0,0 +1,104 @@
+"""Listagens paginadas por cursor e exportação em fluxo para CSV ou JSONL.
+
+A paginação usa o último id visto como cursor (`WHERE id > :cursor ORDER BY id
+LIMIT n`), então a página 1.000 custa o mesmo que a primeira. A exportação lê
+linhas do Core com yield_per e as grava direto no arquivo, sem criar objetos ORM.
+"""
+from sqlalchemy import select
+import csv
+import json
+import sys
+
+from farmasil.modelos import LOTE_LISTAGEM, Cliente, Fornecedor, Funcionario, Loja, Produto
+from farmasil.metricas import operacao
+
+TAMANHO_PAGINA = 50
+
+def _reais(coluna):
+    """Coluna em centavos listada em reais, com o nome sem o sufixo (preco_centavos -> preco)."""
+    return (coluna / 100.0).label(coluna.key[:-len('_centavos')])
+
+# Colunas de cada listagem/exportação; a primeira é sempre o id (cursor)
+COLUNAS = {
+    'lojas': (Loja.id, Loja.nome, Loja.endereco, Loja.horario_funcionamento),
+    'clientes': (Cliente.id, Cliente.nome, Cliente.cpf, Cliente.telefone, Cliente.email, Cliente.endereco,
+                 Cliente.historico_compras, _reais(Cliente.total_gasto_centavos), Cliente.ultima_compra),
+    'funcionarios': (Funcionario.id, Funcionario.nome, Funcionario.cargo, _reais(Funcionario.salario_centavos),
+                     Funcionario.turno, Funcionario.data_admissao, Funcionario.loja_id, Funcionario.horas_trab),
+    'fornecedores': (Fornecedor.id, Fornecedor.nome, Fornecedor.cnpj, Fornecedor.telefone, Fornecedor.endereco),
+    'produtos': (Produto.id, Produto.nome, _reais(Produto.preco_centavos), Produto.categoria, Produto.estoque,
+                 Produto.loja_id, Produto.fornecedor_id),
+}
+
+# Filtros aceitos por entidade: nome do filtro -> coluna
+FILTROS = {
+    'funcionarios': {'loja_id': Funcionario.loja_id},
+    'produtos': {'loja_id': Produto.loja_id, 'categoria': Produto.categoria},
+}
+
+def _consulta(entidade, filtros=None):
+    if entidade not in COLUNAS:
+        raise ValueError(f"Entidade desconhecida: {entidade}. Use uma de {', '.join(COLUNAS)}.")
+    colunas = COLUNAS[entidade]
+    consulta = select(*colunas)
+    for nome, valor in (filtros or {}).items():
+        if valor is None:
+            continue
+        if nome not in FILTROS.get(entidade, {}):
+            raise ValueError(f"Filtro {nome} não disponível para {entidade}.")
+        consulta = consulta.where(FILTROS[entidade][nome] == valor)
+    return consulta, colunas[0]
+
+@operacao('listagens.paginar')
+def paginar(session, entidade, apos_id=None, tamanho=TAMANHO_PAGINA, **filtros):
+    """Retorna (linhas, próximo_cursor) de uma página da listagem.
+
+    `apos_id` é o cursor devolvido pela página anterior (None na primeira); o
+    próximo cursor é None quando não há mais páginas.
+    """
+    consulta, coluna_id = _consulta(entidade, filtros)
+    if apos_id is not None:
+        consulta = consulta.where(coluna_id > apos_id)
+    linhas = session.execute(consulta.order_by(coluna_id).limit(tamanho)).all()
+    proximo = linhas[-1][0] if len(linhas) == tamanho else None
+    return linhas, proximo
+
+def percorrer(session, entidade, lote=LOTE_LISTAGEM, **filtros):
+    """Itera por todas as linhas da listagem em fluxo, `lote` linhas por vez."""
+    consulta, coluna_id = _consulta(entidade, filtros)
+    resultado = session.execute(consulta.order_by(coluna_id).execution_options(yield_per=lote))
+    for linha in resultado:
+        yield linha
+
+@operacao('listagens.exportar')
+def exportar(session, entidade, destino=None, formato='csv', lote=LOTE_LISTAGEM, **filtros):
+    """Grava a listagem inteira em CSV ou JSONL e retorna quantas linhas foram escritas.
+
+    `destino` pode ser um caminho, um arquivo texto aberto ou None (saída padrão).
+    """
+    if formato not in ('csv', 'jsonl'):
+        raise ValueError(f"Formato desconhecido: {formato}. Use csv ou jsonl.")
+    consulta, _ = _consulta(entidade, filtros)
+    nomes = [coluna.name for coluna in consulta.selected_columns]
+
+    if destino is None:
+        arquivo = sys.stdout
+    elif isinstance(destino, str):
+        arquivo = open(destino, 'w', newline='', encoding='utf-8')
+    else:
+        arquivo = destino
+    try:
+        escritor = csv.writer(arquivo) if formato == 'csv' else None
+        if escritor:
+            escritor.writerow(nomes)
+        total = 0
+        for linha in percorrer(session, entidade, lote=lote, **filtros):
+            if escritor:
+                escritor.writerow(linha)
+            else:
+                arquivo.write(json.dumps(dict(zip(nomes, linha)), ensure_ascii=False, default=str) + '\n')
+            total += 1
+        return total
+    finally:
+        if isinstance(destino, str):
+            arquivo.close()
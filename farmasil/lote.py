@@ -0,0 +1,205 @@
+"""Group commit: várias operações de escrita confirmadas em uma única transação.
+
+No SQLite cada commit custa um fsync; com muitos terminais lançando no caixa e
+ajustando estoque, o gargalo passa a ser o disco. O GrupoCommit recebe as
+operações de vários chamadores em uma fila, executa todas as que chegarem dentro
+de uma janela de tempo (ou até o tamanho máximo do lote) em uma sessão só e faz
+um único commit. Cada chamador recebe um Future que só é resolvido depois desse
+commit, ou seja, quando a operação já está gravada.
+
+As operações são funções `operacao(session, *args)` que usam confirmar/desfazer
+(farmasil.banco) em vez de commit/rollback, como os métodos dos modelos. Se uma
+delas falhar ou se desfizer, o lote é refeito sem ela e o erro (ou o retorno)
+vai só para o seu chamador. Fora do GrupoCommit os mesmos métodos continuam
+fazendo um commit por chamada, como no menu.
+"""
+from sqlalchemy.exc import DBAPIError
+from concurrent.futures import Future
+from collections import namedtuple
+import queue
+import random
+import threading
+import time
+
+from farmasil.banco import banco_ocupado
+from farmasil.modelos import Caixa, Produto
+
+TAMANHO_MAXIMO = 256
+JANELA = 0.002
+
+_Operacao = namedtuple('_Operacao', ['funcao', 'args', 'kwargs', 'futuro'])
+
+class GrupoCommit:
+    """Agrupa operações de escrita de várias threads em commits coletivos.
+
+    Uso:
+        grupo = GrupoCommit(criar_fabrica_sessao(engine))
+        futuro = grupo.submeter(entrada_caixa, caixa_id, 10.0)
+        futuro.result()    # retorna depois do commit que gravou a entrada
+        grupo.encerrar()
+
+    `janela` é quanto o gravador espera por mais operações depois da primeira
+    (em segundos); `tamanho_maximo` fecha o lote antes disso.
+    """
+
+    def __init__(self, fabrica_sessao, tamanho_maximo=TAMANHO_MAXIMO, janela=JANELA,
+                 tentativas=10, espera_inicial=0.002, espera_maxima=0.25):
+        self.fabrica_sessao = fabrica_sessao
+        self.tamanho_maximo = tamanho_maximo
+        self.janela = janela
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.commits = 0
+        self.operacoes = 0
+        self._fila = queue.Queue()
+        self._encerrado = False
+        self._trava = threading.Lock()
+        self._gravador = threading.Thread(target=self._gravar_continuamente, name='farmasil-group-commit',
+                                          daemon=True)
+        self._gravador.start()
+
+    def submeter(self, funcao, *args, **kwargs):
+        """Enfileira `funcao(session, *args, **kwargs)` e retorna um Future com o seu retorno."""
+        futuro = Future()
+        with self._trava:
+            if self._encerrado:
+                raise RuntimeError("O group commit já foi encerrado.")
+            self._fila.put(_Operacao(funcao, args, kwargs, futuro))
+        return futuro
+
+    def executar(self, funcao, *args, **kwargs):
+        """Como submeter, mas espera o commit e retorna o resultado (ou levanta o erro)."""
+        return self.submeter(funcao, *args, **kwargs).result()
+
+    def encerrar(self):
+        """Grava o que ainda estiver na fila e para o gravador."""
+        with self._trava:
+            if self._encerrado:
+                return
+            self._encerrado = True
+            self._fila.put(None)
+        self._gravador.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.encerrar()
+
+    def _proximo_lote(self):
+        """Bloqueia até a primeira operação e junta as que chegarem dentro da janela."""
+        primeira = self._fila.get()
+        if primeira is None:
+            return None
+        lote = [primeira]
+        limite = time.monotonic() + self.janela
+        while len(lote) < self.tamanho_maximo:
+            restante = limite - time.monotonic()
+            try:
+                operacao = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if operacao is None:
+                # Encerramento: grava este lote e depois para
+                self._fila.put(None)
+                break
+            lote.append(operacao)
+        return lote
+
+    def _gravar_continuamente(self):
+        while True:
+            lote = self._proximo_lote()
+            if lote is None:
+                return
+            pendentes = [operacao for operacao in lote if operacao.futuro.set_running_or_notify_cancel()]
+            try:
+                self._gravar_lote(pendentes)
+            except Exception as erro:
+                for operacao in pendentes:
+                    if not operacao.futuro.done():
+                        operacao.futuro.set_exception(erro)
+
+    def _gravar_lote(self, pendentes):
+        """Executa as operações em uma transação e resolve os Futures após o commit."""
+        tentativa = 0
+        while pendentes:
+            session = self.fabrica_sessao()
+            session.info['grupo_commit'] = True
+            # Os retornos são entregues já desligados da sessão: não expirar no commit
+            session.expire_on_commit = False
+            concluidas = []
+            excluida = None
+            try:
+                for operacao in pendentes:
+                    session.info.pop('desfeita', None)
+                    try:
+                        retorno = operacao.funcao(session, *operacao.args, **operacao.kwargs)
+                    except DBAPIError as erro:
+                        if banco_ocupado(erro):
+                            raise
+                        excluida = (operacao, None, erro)
+                        break
+                    except Exception as erro:
+                        excluida = (operacao, None, erro)
+                        break
+                    if session.info.pop('desfeita', False):
+                        excluida = (operacao, retorno, None)
+                        break
+                    concluidas.append((operacao, retorno))
+
+                if excluida:
+                    # Descarta o trabalho do lote e refaz sem a operação que falhou ou se desfez
+                    session.rollback()
+                    operacao, retorno, erro = excluida
+                    if erro is None:
+                        operacao.futuro.set_result(retorno)
+                    else:
+                        operacao.futuro.set_exception(erro)
+                    pendentes = [outra for outra in pendentes if outra is not operacao]
+                    continue
+
+                session.commit()
+            except DBAPIError as erro:
+                session.rollback()
+                tentativa += 1
+                if not banco_ocupado(erro) or tentativa >= self.tentativas:
+                    raise
+                espera = min(self.espera_maxima, self.espera_inicial * 2 ** tentativa)
+                time.sleep(random.uniform(0, espera))
+                continue
+            finally:
+                session.close()
+
+            self.commits += 1
+            self.operacoes += len(concluidas)
+            for operacao, retorno in concluidas:
+                operacao.futuro.set_result(retorno)
+            return
+
+# Operações prontas para o GrupoCommit (também servem com uma sessão comum)
+
+def entrada_caixa(session, caixa_id, valor):
+    """Lança uma entrada no caixa; retorna o RegistroCaixa ou None."""
+    caixa = session.get(Caixa, caixa_id)
+    if caixa is None:
+        raise ValueError(f"Caixa {caixa_id} não encontrado.")
+    return caixa.registrar_entrada(session, valor)
+
+def saida_caixa(session, caixa_id, valor):
+    """Lança uma saída no caixa; retorna o RegistroCaixa ou None (saldo insuficiente)."""
+    caixa = session.get(Caixa, caixa_id)
+    if caixa is None:
+        raise ValueError(f"Caixa {caixa_id} não encontrado.")
+    return caixa.registrar_saida(session, valor)
+
+def ajuste_estoque(session, produto_id, quantidade):
+    """Soma `quantidade` (pode ser negativa) ao estoque; retorna se o ajuste foi aplicado."""
+    produto = session.get(Produto, produto_id)
+    if produto is None:
+        raise ValueError(f"Produto {produto_id} não encontrado.")
+    return produto.ajustar_estoque(session, quantidade)
+
+def novo_preco(session, produto_id, preco):
+    """Altera o preço do produto; retorna se ele foi encontrado."""
+    return Produto.alterar_preco(session, produto_id, preco)
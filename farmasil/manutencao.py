@@ -0,0 +1,332 @@
+"""Backup online, instantâneos, otimização e compactação do banco SQLite.
+
+Copiar farmasil.db com o menu ou o PDV gravando dá uma cópia corrompida (o
+arquivo muda no meio da cópia e o que está no -wal fica de fora). Aqui tudo
+passa pelo próprio SQLite:
+
+- backup_online usa a API de backup em passos de `paginas` páginas, com uma
+  pausa entre eles: cada passo segura a trava de leitura só enquanto copia o
+  seu pedaço, e as escritas seguem entre um passo e outro. Uma escrita de outra
+  conexão faz a cópia recomeçar; depois de `reinicios_maximos` recomeços a
+  cópia é feita de uma vez, num instantâneo de leitura (no modo WAL, o dos
+  perfis, leitores não bloqueiam escritores);
+- instantaneo grava um VACUUM INTO: cópia consistente e já compactada;
+- otimizar roda PRAGMA optimize (e ANALYZE, se pedido) com analysis_limit,
+  para as estatísticas do planejador acompanharem o crescimento das tabelas;
+- compactar devolve ao sistema as páginas livres deixadas pelas remoções. Na
+  primeira vez é um VACUUM completo, que passa o banco para auto_vacuum
+  incremental; daí em diante a compactação vai em passos curtos;
+- testar_restauracao restaura uma cópia num diretório temporário e confere a
+  integridade, a versão do esquema e as linhas de cada tabela.
+
+Manutencao agenda tudo numa thread: backup e PRAGMA optimize a cada
+`intervalo_backup` segundos, também no horário de vendas, e uma vez por dia, em
+`hora_diaria`, o instantâneo, o teste de restauração dele e o ANALYZE.
+"""
+from sqlalchemy import func, inspect, select
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from farmasil.banco import criar_engine, obter_engine
+from farmasil.migracoes import VERSAO_ATUAL, versao_atual
+from farmasil.modelos import Base
+
+logger = logging.getLogger(__name__)
+
+# 256 páginas de 4 KiB: 1 MiB por passo do backup
+PAGINAS_POR_PASSO = 256
+PAUSA_ENTRE_PASSOS = 0.01
+REINICIOS_MAXIMOS = 5
+# Linhas examinadas por índice no ANALYZE do PRAGMA optimize
+LIMITE_ANALISE = 1000
+INTERVALO_BACKUP = 3600
+HORA_DIARIA = 3
+BACKUPS_MANTIDOS = 24
+INSTANTANEOS_MANTIDOS = 7
+
+ResultadoCopia = namedtuple('ResultadoCopia', ['caminho', 'paginas', 'passos', 'reinicios', 'bytes', 'segundos'])
+ResultadoVerificacao = namedtuple('ResultadoVerificacao', ['caminho', 'integro', 'problemas', 'orfaos', 'versao',
+                                                           'linhas', 'segundos'])
+
+class _MuitosReinicios(Exception):
+    """Interrompe o backup em passos que não consegue terminar entre as escritas."""
+
+def _exigir_sqlite(engine):
+    url = engine.url
+    if url.get_backend_name() != 'sqlite':
+        raise ValueError("A manutenção só está disponível no SQLite; "
+                         "em outros bancos use as ferramentas de backup do servidor.")
+    if url.database in (None, '', ':memory:'):
+        raise ValueError("Um banco SQLite em memória não tem arquivo para copiar.")
+
+@contextmanager
+def _conexao_sqlite(engine):
+    """Conexão sqlite3 do pool da engine (com os pragmas do perfil), devolvida no fim."""
+    bruta = engine.raw_connection()
+    try:
+        yield bruta.driver_connection
+    finally:
+        bruta.close()
+
+def _tamanho_pagina(engine):
+    with _conexao_sqlite(engine) as conexao:
+        return conexao.execute("PRAGMA page_size").fetchone()[0]
+
+def _gravar_no_lugar(destino, gravar):
+    """Chama gravar(caminho_parcial) e só então renomeia para `destino`: nunca sobra uma cópia pela metade."""
+    parcial = f'{destino}.parcial'
+    if os.path.exists(parcial):
+        os.remove(parcial)
+    try:
+        gravar(parcial)
+    except BaseException:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+        raise
+    os.replace(parcial, destino)
+
+def backup_online(destino, engine=None, paginas=PAGINAS_POR_PASSO, pausa=PAUSA_ENTRE_PASSOS,
+                  reinicios_maximos=REINICIOS_MAXIMOS, progresso=None):
+    """Copia o banco para `destino` com a API de backup, `paginas` por passo; retorna um ResultadoCopia.
+
+    `progresso`, se informado, é chamado com (páginas copiadas, total) a cada passo.
+    """
+    engine = engine if engine is not None else obter_engine()
+    _exigir_sqlite(engine)
+    estado = {'anterior': None, 'passos': 0, 'reinicios': 0, 'total': 0}
+
+    def acompanhar(status, restantes, total):
+        estado['passos'] += 1
+        estado['total'] = total
+        # Faltar mais do que no passo anterior: outra conexão escreveu e a cópia recomeçou
+        if estado['anterior'] is not None and restantes > estado['anterior']:
+            estado['reinicios'] += 1
+            if estado['reinicios'] > reinicios_maximos:
+                raise _MuitosReinicios()
+        estado['anterior'] = restantes
+        if progresso:
+            progresso(total - restantes, total)
+        if restantes and pausa:
+            time.sleep(pausa)
+
+    def copiar(parcial):
+        copia = sqlite3.connect(parcial)
+        try:
+            with _conexao_sqlite(engine) as origem:
+                try:
+                    origem.backup(copia, pages=paginas, progress=acompanhar)
+                except _MuitosReinicios:
+                    logger.info("Backup recomeçou %d vezes; copiando de uma vez só.", estado['reinicios'])
+                    origem.backup(copia)
+                    estado['passos'] += 1
+                estado['total'] = copia.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            copia.close()
+
+    inicio = time.perf_counter()
+    _gravar_no_lugar(destino, copiar)
+    return ResultadoCopia(destino, estado['total'], estado['passos'], estado['reinicios'],
+                          os.path.getsize(destino), time.perf_counter() - inicio)
+
+def instantaneo(destino, engine=None):
+    """Grava em `destino` uma cópia compactada do banco com VACUUM INTO; retorna um ResultadoCopia."""
+    engine = engine if engine is not None else obter_engine()
+    _exigir_sqlite(engine)
+
+    def copiar(parcial):
+        with _conexao_sqlite(engine) as origem:
+            origem.execute("VACUUM INTO ?", (parcial,))
+
+    inicio = time.perf_counter()
+    _gravar_no_lugar(destino, copiar)
+    tamanho = os.path.getsize(destino)
+    return ResultadoCopia(destino, tamanho // _tamanho_pagina(engine), 1, 0, tamanho, time.perf_counter() - inicio)
+
+def otimizar(engine=None, analisar=False, limite=LIMITE_ANALISE):
+    """Atualiza as estatísticas do planejador: PRAGMA optimize e, com `analisar`, um ANALYZE de todas as tabelas.
+
+    `limite` (PRAGMA analysis_limit) limita as linhas lidas por índice, para o
+    ANALYZE de tabelas grandes não segurar a trava de escrita por muito tempo.
+    """
+    engine = engine if engine is not None else obter_engine()
+    _exigir_sqlite(engine)
+    with _conexao_sqlite(engine) as conexao:
+        conexao.execute(f"PRAGMA analysis_limit={int(limite)}")
+        try:
+            if analisar:
+                conexao.execute("ANALYZE")
+            conexao.execute("PRAGMA optimize").fetchall()
+            conexao.commit()
+        finally:
+            conexao.execute("PRAGMA analysis_limit=0")
+
+def compactar(engine=None, paginas=PAGINAS_POR_PASSO, pausa=PAUSA_ENTRE_PASSOS):
+    """Libera as páginas vazias do arquivo e retorna quantas foram liberadas.
+
+    Com auto_vacuum incremental libera `paginas` por vez, com uma pausa entre
+    os passos. Sem ele faz um VACUUM completo, que reescreve o arquivo com as
+    escritas bloqueadas (rode fora do horário de vendas) e liga o auto_vacuum
+    incremental para as próximas vezes.
+    """
+    engine = engine if engine is not None else obter_engine()
+    _exigir_sqlite(engine)
+    with _conexao_sqlite(engine) as conexao:
+        antes = conexao.execute("PRAGMA page_count").fetchone()[0]
+        if conexao.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conexao.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conexao.execute("VACUUM")
+        else:
+            livres = conexao.execute("PRAGMA freelist_count").fetchone()[0]
+            while livres > 0:
+                conexao.execute(f"PRAGMA incremental_vacuum({int(paginas)})").fetchall()
+                livres -= paginas
+                if livres > 0 and pausa:
+                    time.sleep(pausa)
+        # No modo WAL o arquivo só encolhe quando as páginas voltam do -wal
+        conexao.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+        return antes - conexao.execute("PRAGMA page_count").fetchone()[0]
+
+def verificar(caminho, completo=True):
+    """(problemas, chaves órfãs) de um arquivo de banco, aberto só para leitura.
+
+    `problemas` lista o que PRAGMA integrity_check (ou quick_check, sem
+    `completo`) encontrou: vazia se o arquivo está íntegro.
+    """
+    conexao = sqlite3.connect(f'file:{caminho}?mode=ro', uri=True)
+    try:
+        linhas = conexao.execute("PRAGMA integrity_check" if completo else "PRAGMA quick_check").fetchall()
+        orfaos = len(conexao.execute("PRAGMA foreign_key_check").fetchall())
+    finally:
+        conexao.close()
+    return [linha[0] for linha in linhas if linha[0] != 'ok'], orfaos
+
+def testar_restauracao(caminho, diretorio=None):
+    """Restaura a cópia `caminho` num diretório temporário e confere se ela serve; retorna um ResultadoVerificacao.
+
+    A cópia restaurada é aberta pela aplicação (criar_engine): além da
+    integridade, confere a versão do esquema e conta as linhas de cada tabela
+    dos modelos. `integro` só é True com o arquivo íntegro e o esquema atual.
+    """
+    inicio = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=diretorio) as temporario:
+        restaurado = os.path.join(temporario, 'farmasil.db')
+        shutil.copyfile(caminho, restaurado)
+        problemas, orfaos = verificar(restaurado)
+        versao, linhas = None, {}
+        if not problemas:
+            engine = criar_engine(f'sqlite:///{restaurado}', perfil='relatorio')
+            try:
+                with engine.connect() as conexao:
+                    versao = versao_atual(conexao)
+                    existentes = set(inspect(conexao).get_table_names())
+                    for tabela in Base.metadata.sorted_tables:
+                        if tabela.name in existentes:
+                            linhas[tabela.name] = conexao.execute(select(func.count()).select_from(tabela)).scalar()
+            finally:
+                engine.dispose()
+    return ResultadoVerificacao(caminho, not problemas and versao == VERSAO_ATUAL, problemas, orfaos, versao,
+                                linhas, time.perf_counter() - inicio)
+
+def remover_antigos(diretorio, prefixo, manter):
+    """Apaga as cópias `prefixo`*.db mais antigas de `diretorio`, deixando as `manter` mais novas."""
+    copias = sorted(nome for nome in os.listdir(diretorio) if nome.startswith(prefixo) and nome.endswith('.db'))
+    antigas = copias[:-manter] if manter else copias
+    for nome in antigas:
+        os.remove(os.path.join(diretorio, nome))
+    return len(antigas)
+
+class Manutencao:
+    """Rotina de manutenção em segundo plano para o banco da engine.
+
+    A cada `intervalo_backup` segundos grava backup-AAAAMMDD-HHMMSS.db em
+    `diretorio` (mantendo os `manter` mais novos) e roda PRAGMA optimize. Uma
+    vez por dia, a partir de `hora_diaria`, grava instantaneo-AAAAMMDD.db,
+    testa a restauração dele e roda o ANALYZE. Uma tarefa que falha é
+    registrada no logger e tentada de novo na próxima volta.
+    """
+
+    def __init__(self, diretorio, engine=None, intervalo_backup=INTERVALO_BACKUP, hora_diaria=HORA_DIARIA,
+                 manter=BACKUPS_MANTIDOS, manter_instantaneos=INSTANTANEOS_MANTIDOS, relogio=datetime.now):
+        self.diretorio = diretorio
+        self.engine = engine if engine is not None else obter_engine()
+        _exigir_sqlite(self.engine)
+        self.intervalo_backup = intervalo_backup
+        self.hora_diaria = hora_diaria
+        self.manter = manter
+        self.manter_instantaneos = manter_instantaneos
+        self.relogio = relogio
+        self.ultimo_backup = None
+        self.ultimo_dia = None
+        self.ultima_verificacao = None
+        self._parar = threading.Event()
+        self._thread = None
+        os.makedirs(diretorio, exist_ok=True)
+
+    def executar_pendentes(self):
+        """Roda as tarefas que venceram e retorna os nomes das que rodaram."""
+        agora = self.relogio()
+        feitas = []
+        if self.ultimo_backup is None or (agora - self.ultimo_backup).total_seconds() >= self.intervalo_backup:
+            if self._tentar('backup', self._backup, agora):
+                self.ultimo_backup = agora
+                feitas.append('backup')
+        if agora.hour >= self.hora_diaria and self.ultimo_dia != agora.date():
+            if self._tentar('diaria', self._diaria, agora):
+                self.ultimo_dia = agora.date()
+                feitas.append('diaria')
+        return feitas
+
+    def _tentar(self, nome, tarefa, agora):
+        try:
+            tarefa(agora)
+            return True
+        except Exception:
+            logger.exception("Manutenção %s falhou.", nome)
+            return False
+
+    def _backup(self, agora):
+        resultado = backup_online(os.path.join(self.diretorio, f'backup-{agora:%Y%m%d-%H%M%S}.db'), self.engine)
+        remover_antigos(self.diretorio, 'backup-', self.manter)
+        otimizar(self.engine)
+        logger.info("Backup %s: %d páginas em %d passos (%d recomeços), %.1f s.", resultado.caminho,
+                    resultado.paginas, resultado.passos, resultado.reinicios, resultado.segundos)
+
+    def _diaria(self, agora):
+        copia = instantaneo(os.path.join(self.diretorio, f'instantaneo-{agora:%Y%m%d}.db'), self.engine)
+        self.ultima_verificacao = testar_restauracao(copia.caminho, self.diretorio)
+        if not self.ultima_verificacao.integro:
+            logger.error("Instantâneo %s não passou no teste de restauração: %s (versão %s).", copia.caminho,
+                         self.ultima_verificacao.problemas[:5], self.ultima_verificacao.versao)
+        remover_antigos(self.diretorio, 'instantaneo-', self.manter_instantaneos)
+        otimizar(self.engine, analisar=True)
+
+    def iniciar(self, verificar_a_cada=60):
+        """Roda executar_pendentes numa thread a cada `verificar_a_cada` segundos, até encerrar()."""
+        def rodar():
+            while not self._parar.is_set():
+                self.executar_pendentes()
+                self._parar.wait(verificar_a_cada)
+        self._parar.clear()
+        self._thread = threading.Thread(target=rodar, name='farmasil-manutencao', daemon=True)
+        self._thread.start()
+        return self
+
+    def encerrar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *erro):
+        self.encerrar()
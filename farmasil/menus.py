@@ -0,0 +1,584 @@
+"""Menus interativos de terminal."""
+from datetime import date, datetime, time, timedelta
+
+from farmasil.banco import session
+from farmasil.busca import buscar_produtos
+from farmasil.folha import calcular_folha, periodo_do_mes
+from farmasil.listagens import paginar
+from farmasil.modelos import (PRAZO_ENTREGA_PADRAO, Caixa, Cliente, Fornecedor, Funcionario, Loja, Pedido, Produto,
+                              cache_produtos)
+from farmasil.notas import emitir_notas
+from farmasil.painel import imprimir_painel, painel_estoque, resumo_ativo
+from farmasil.reposicao import atualizar_velocidade, compras_por_fornecedor
+
+def _listar_em_paginas(entidade, formatar, vazio):
+    """Mostra uma listagem página a página, buscando a próxima só quando pedida."""
+    apos_id = None
+    total = 0
+    while True:
+        linhas, apos_id = paginar(session, entidade, apos_id)
+        for linha in linhas:
+            print(formatar(linha))
+        total += len(linhas)
+        if apos_id is None:
+            break
+        if input("Enter para a próxima página ou 'q' para parar: ").strip().lower() == 'q':
+            break
+    if not total:
+        print(vazio)
+
+def menu_principal():
+    while True:
+        print("\n--- Sistema Farmasil ---")
+        print("1. Gerenciar Lojas")
+        print("2. Gerenciar Clientes")
+        print("3. Gerenciar Funcionários")
+        print("4. Gerenciar Pedidos")
+        print("5. Gerenciar Caixa")
+        print("6. Gerenciar Produtos")
+        print("7. Gerenciar Fornecedores")  # Nova opção para Fornecedores
+        print("0. Sair")
+        
+        opcao = input("Escolha uma opção: ")
+        
+        if opcao == "1":
+            menu_loja()
+        elif opcao == "2":
+            menu_cliente()
+        elif opcao == "3":
+            menu_funcionario()
+        elif opcao == "4":
+            menu_pedidos()
+        elif opcao == "5":
+            menu_caixa()
+        elif opcao == "6":
+            menu_produtos()
+        elif opcao == "7":
+            menu_fornecedor()  # Chama o submenu de fornecedores
+        elif opcao == "0":
+            print("Saindo do sistema...")
+            break
+        else:
+            print("Opção inválida. Tente novamente.")
+
+# Funções de menu para cada categoria
+def menu_loja():
+    while True:
+        print("\n--- Gerenciamento de Lojas ---")
+        print("1. Adicionar Loja")
+        print("2. Atualizar Dados da Loja")
+        print("3. Consultar Dados da Loja")
+        print("4. Listar Todas as Lojas")
+        print("5. Consultar Funcionários da Loja")
+        print("6. Verificar Estoque da Loja")
+        print("7. Remover Loja")
+        print("8. Painel de Estoque da Rede")
+        print("0. Voltar")
+        
+        opcao = input("Escolha uma opção: ")
+        
+        if opcao == "1":
+            nome = input("Nome da loja: ")
+            endereco = input("Endereço da loja: ")
+            horario_funcionamento = input("Horário de funcionamento: ")
+            Loja.adicionar_loja(session, nome, endereco, horario_funcionamento)
+        
+        elif opcao == "2":
+            loja_id = int(input("ID da loja a ser atualizada: "))
+            nome = input("Novo nome (ou Enter para manter): ")
+            endereco = input("Novo endereço (ou Enter para manter): ")
+            horario_funcionamento = input("Novo horário (ou Enter para manter): ")
+            Loja.atualizar_dados_loja(session, loja_id, nome, endereco, horario_funcionamento)
+        
+        elif opcao == "3":
+            loja_id = int(input("ID da loja: "))
+            Loja.consultar_dados_loja(session, loja_id)
+        
+        elif opcao == "4":
+            Loja.listar_lojas(session)
+        
+        elif opcao == "5":
+            loja_id = int(input("ID da loja: "))
+            Loja.consultar_funcionarios_loja(session, loja_id)
+        
+        elif opcao == "6":
+            loja_id = int(input("ID da loja: "))
+            Loja.verificar_estoque_loja(session, loja_id)
+        
+        elif opcao == "7":
+            loja_id = int(input("ID da loja a ser removida: "))
+            Loja.remover_loja(session, loja_id)
+        
+        elif opcao == "8":
+            usar_resumo = resumo_ativo(session)
+            imprimir_painel(painel_estoque(session, usar_resumo=usar_resumo))
+        
+        elif opcao == "0":
+            break
+        
+        else:
+            print("Opção inválida. Tente novamente.")
+
+def menu_caixa():
+    # Verifica se o caixa já existe no banco
+    caixa = session.query(Caixa).first()
+    if not caixa:
+        # Se não existir, cria um novo e adiciona à sessão
+        caixa = Caixa()
+        session.add(caixa)
+        session.commit()
+
+    while True:
+        print("\n--- Gerenciamento de Caixa ---")
+        print("1. Registrar Entrada")
+        print("2. Registrar Saída")
+        print("3. Consultar Saldo")
+        print("4. Fechar Caixa")
+        print("5. Abrir Caixa")
+        print("6. Conciliação do Dia")
+        print("0. Voltar")
+        opcao = input("Escolha uma opção: ")
+
+        if opcao == "1":
+            try:
+                valor = float(input("Informe o valor da entrada: R$ "))
+                caixa.registrar_entrada(session, valor)
+            except ValueError:
+                print("Valor inválido. Tente novamente.")
+
+        elif opcao == "2":
+            try:
+                valor = float(input("Informe o valor da saída: R$ "))
+                caixa.registrar_saida(session, valor)
+            except ValueError:
+                print("Valor inválido. Tente novamente.")
+
+        elif opcao == "3":
+            caixa.consultar_saldo(session)
+
+        elif opcao == "4":
+            caixa.fechar_caixa(session)
+            break
+
+        elif opcao == "5":
+            caixa.abrir_caixa(session)
+
+        elif opcao == "6":
+            try:
+                texto = input("Data (AAAA-MM-DD, Enter para hoje): ").strip()
+                dia = date.fromisoformat(texto) if texto else date.today()
+            except ValueError:
+                print("Data inválida. Tente novamente.")
+                continue
+            inicio = datetime.combine(dia, time.min)
+            totais = caixa.conciliar(session, inicio, inicio + timedelta(days=1))
+            entradas = totais.get("Entrada", (0, 0))
+            saidas = totais.get("Saída", (0, 0))
+            print(f"Conciliação de {dia}:")
+            print(f"- Entradas: {entradas[0]} movimentos, R${entradas[1] / 100:.2f}")
+            print(f"- Saídas: {saidas[0]} movimentos, R${-saidas[1] / 100:.2f}")
+            print(f"- Resultado do dia: R${(entradas[1] + saidas[1]) / 100:.2f}")
+
+        elif opcao == "0":
+            break
+
+        else:
+            print("Opção inválida. Tente novamente.")
+
+def menu_cliente():
+    while True:
+        print("\n--- Gerenciamento de Clientes ---")
+        print("1. Adicionar Cliente")
+        print("2. Atualizar Dados do Cliente")
+        print("3. Consultar Dados do Cliente")
+        print("4. Listar Todos os Clientes")
+        print("5. Remover Cliente")
+        print("0. Voltar")
+        
+        opcao = input("Escolha uma opção: ")
+        
+        if opcao == "1":
+            nome = input("Nome do cliente: ")
+            cpf = input("CPF do cliente: ")
+            telefone = input("Telefone do cliente: ")
+            email = input("Email do cliente: ")
+            endereco = input("Endereço do cliente (opcional): ")
+            cliente = Cliente(nome, cpf, telefone, email, endereco)
+            cliente.adicionar_cliente(session)
+        
+        elif opcao == "2":
+            cliente_id = int(input("ID do cliente a ser atualizado: "))
+            cliente = session.query(Cliente).filter_by(id=cliente_id).first()
+            if cliente:
+                nome = input("Novo nome (ou Enter para manter): ")
+                telefone = input("Novo telefone (ou Enter para manter): ")
+                email = input("Novo email (ou Enter para manter): ")
+                endereco = input("Novo endereço (ou Enter para manter): ")
+                cliente.atualizar_dados_cliente(session, nome, telefone, email, endereco)
+            else:
+                print("Cliente não encontrado.")
+        
+        elif opcao == "3":
+            cliente_id = int(input("ID do cliente: "))
+            cliente = session.query(Cliente).filter_by(id=cliente_id).first()
+            if cliente:
+                print(f"ID: {cliente.id}, Nome: {cliente.nome}, CPF: {cliente.cpf}, "
+                      f"Telefone: {cliente.telefone}, Email: {cliente.email}, "
+                      f"Endereço: {cliente.endereco}")
+                print(f"Histórico de Compras: {cliente.resumo_compras()}")
+            else:
+                print("Cliente não encontrado.")
+        
+        elif opcao == "4":
+            _listar_em_paginas(
+                'clientes',
+                lambda cliente: (f"ID: {cliente.id}, Nome: {cliente.nome}, CPF: {cliente.cpf}, "
+                                 f"Telefone: {cliente.telefone}, Email: {cliente.email}, "
+                                 f"Pedidos: {cliente.historico_compras or 0}, "
+                                 f"Nível: {Cliente.nivel_para(cliente.total_gasto)}"),
+                "Nenhum cliente cadastrado."
+            )
+        
+        elif opcao == "5":
+            cliente_id = int(input("ID do cliente a ser removido: "))
+            cliente = session.query(Cliente).filter_by(id=cliente_id).first()
+            if cliente:
+                cliente.remover_cliente(session)
+            else:
+                print("Cliente não encontrado.")
+        
+        elif opcao == "0":
+            break
+        
+        else:
+            print("Opção inválida. Tente novamente.")
+
+def menu_funcionario():
+    while True:
+        print("\n--- Gerenciamento de Funcionários ---")
+        print("1. Adicionar Funcionário")
+        print("2. Atualizar Dados do Funcionário")
+        print("3. Consultar Dados do Funcionário")
+        print("4. Listar Todos os Funcionários")
+        print("5. Registrar Horas Trabalhadas")
+        print("6. Gerar Relatório do Funcionário")
+        print("7. Remover Funcionário")
+        print("8. Folha de Pagamento do Mês")
+        print("0. Voltar")
+        
+        opcao = input("Escolha uma opção: ")
+        
+        if opcao == "1":
+            nome = input("Nome do funcionário: ")
+            cargo = input("Cargo do funcionário: ")
+            salario = float(input("Salário do funcionário: "))
+            turno = input("Turno do funcionário: ")
+            loja_id = int(input("ID da loja onde o funcionário trabalha: "))
+            funcionario = Funcionario(nome=nome, cargo=cargo, salario=salario, turno=turno, loja_id=loja_id)
+            funcionario.adicionar_funcionario(session)
+        
+        elif opcao == "2":
+            funcionario_id = int(input("ID do funcionário a ser atualizado: "))
+            funcionario = session.query(Funcionario).filter_by(id=funcionario_id).first()
+            if funcionario:
+                nome = input("Novo nome (ou Enter para manter): ")
+                cargo = input("Novo cargo (ou Enter para manter): ")
+                salario = input("Novo salário (ou Enter para manter): ")
+                turno = input("Novo turno (ou Enter para manter): ")
+                kwargs = {}
+                if nome: kwargs['nome'] = nome
+                if cargo: kwargs['cargo'] = cargo
+                if salario: kwargs['salario'] = float(salario)
+                if turno: kwargs['turno'] = turno
+                funcionario.atualizar_dados(session, **kwargs)
+            else:
+                print("Funcionário não encontrado.")
+        
+        elif opcao == "3":
+            funcionario_id = int(input("ID do funcionário: "))
+            funcionario = session.query(Funcionario).filter_by(id=funcionario_id).first()
+            if funcionario:
+                print(f"ID: {funcionario.id}, Nome: {funcionario.nome}, Cargo: {funcionario.cargo}, "
+                      f"Salário: R${funcionario.salario:.2f}, Turno: {funcionario.turno}, "
+                      f"Data de Admissão: {funcionario.data_admissao}, Loja ID: {funcionario.loja_id}, "
+                      f"Horas Trabalhadas: {funcionario.horas_trab}")
+            else:
+                print("Funcionário não encontrado.")
+        
+        elif opcao == "4":
+            _listar_em_paginas(
+                'funcionarios',
+                lambda funcionario: (f"ID: {funcionario.id}, Nome: {funcionario.nome}, Cargo: {funcionario.cargo}, "
+                                     f"Salário: R${funcionario.salario:.2f}, Turno: {funcionario.turno}, "
+                                     f"Data de Admissão: {funcionario.data_admissao}, "
+                                     f"Horas Trabalhadas: {funcionario.horas_trab}"),
+                "Nenhum funcionário cadastrado."
+            )
+        
+        elif opcao == "5":
+            funcionario_id = int(input("ID do funcionário: "))
+            funcionario = session.query(Funcionario).filter_by(id=funcionario_id).first()
+            if funcionario:
+                horas = float(input("Quantidade de horas trabalhadas (negativa para corrigir): "))
+                data = input("Data (AAAA-MM-DD, Enter para hoje): ").strip()
+                funcionario.registrar_horas(session, horas, date.fromisoformat(data) if data else None)
+            else:
+                print("Funcionário não encontrado.")
+        
+        elif opcao == "6":
+            funcionario_id = int(input("ID do funcionário: "))
+            funcionario = session.query(Funcionario).filter_by(id=funcionario_id).first()
+            if funcionario:
+                mes = input("Mês (AAAA-MM, Enter para o mês atual): ").strip()
+                if mes:
+                    ano, mes = (int(parte) for parte in mes.split('-'))
+                    funcionario.gerar_relatorio_funcionario(session, *periodo_do_mes(ano, mes))
+                else:
+                    funcionario.gerar_relatorio_funcionario(session)
+            else:
+                print("Funcionário não encontrado.")
+        
+        elif opcao == "7":
+            funcionario_id = int(input("ID do funcionário a ser removido: "))
+            funcionario = session.query(Funcionario).filter_by(id=funcionario_id).first()
+            if funcionario:
+                funcionario.remover_funcionario(session)
+            else:
+                print("Funcionário não encontrado.")
+        
+        elif opcao == "8":
+            mes = input("Mês (AAAA-MM, Enter para o mês atual): ").strip()
+            ano, mes = (int(parte) for parte in mes.split('-')) if mes else (date.today().year, date.today().month)
+            folha = calcular_folha(session, ano, mes)
+            if not folha.funcionarios:
+                print("Nenhum funcionário cadastrado.")
+            for total in folha.lojas:
+                print(f"Loja ID: {total.loja_id or '-'}, Funcionários: {total.funcionarios}, "
+                      f"Horas: {total.horas:.2f}, Horas Extras: {total.horas_extras:.2f}, "
+                      f"Adicional Noturno: R${total.adicional_noturno:.2f}, Bruto: R${total.bruto:.2f}")
+            if folha.lojas:
+                print(f"Total da folha de {ano}-{mes:02d}: R${sum(total.bruto for total in folha.lojas):.2f}")
+        
+        elif opcao == "0":
+            break
+        
+        else:
+            print("Opção inválida. Tente novamente.")
+
+def _escolher_produto(texto):
+    """Mostra os produtos parecidos com o texto digitado e retorna o escolhido (ou None)."""
+    encontrados = buscar_produtos(session, texto)
+    if not encontrados:
+        print(f"Produto '{texto}' não encontrado. Tente novamente.")
+        return None
+    print(f"Produtos para '{texto}':")
+    for numero, encontrado in enumerate(encontrados, 1):
+        print(f"{numero}. {encontrado.nome} (ID {encontrado.id}, R${encontrado.preco:.2f}, "
+              f"Estoque: {encontrado.estoque})")
+    escolha = input("Número do produto (Enter para digitar de novo): ").strip()
+    if not escolha.isdigit() or not 1 <= int(escolha) <= len(encontrados):
+        return None
+    return Produto.por_id(session, encontrados[int(escolha) - 1].id)
+
+def menu_pedidos():
+    while True:
+        print("\n--- Gerenciamento de Pedidos ---")
+        print("1. Realizar Pedido")
+        print("2. Consultar Pedidos de um Cliente")
+        print("3. Emitir Notas Fiscais (faixa de pedidos ou período)")
+        print("0. Voltar")
+        
+        opcao = input("Escolha uma opção: ")
+        
+        if opcao == "1":
+            cliente_id = int(input("ID do Cliente: "))
+            cliente = session.get(Cliente, cliente_id)
+            if cliente:
+                print(f"Cliente {cliente.nome}: {cliente.resumo_compras()}")
+            funcionario_id = int(input("ID do Funcionário: "))
+            
+            itens = []
+            while True:
+                nome_produto = input("Digite o nome do produto (ou 'fim' para finalizar): ")
+                if nome_produto.lower() == 'fim':
+                    break
+
+                # Verificar se o produto existe (cache de produtos, depois o banco)
+                produto = Produto.por_nome(session, nome_produto)
+                if not produto:
+                    produto = _escolher_produto(nome_produto)
+                    if not produto:
+                        continue
+                    nome_produto = produto.nome
+                
+                quantidade = int(input(f"Digite a quantidade de '{nome_produto}': "))
+                if quantidade <= 0:
+                    print("A quantidade deve ser positiva.")
+                    continue
+                # O produto já carregado segue no carrinho para não ser consultado de novo no checkout
+                itens.append({'nome': nome_produto, 'quantidade': quantidade, 'produto': produto})
+
+            if itens:
+                Pedido.realizar_pedido(session, cliente_id, funcionario_id, itens)
+            else:
+                print("Nenhum item foi adicionado ao pedido.")
+        
+        elif opcao == "2":
+            cliente_id = int(input("ID do Cliente: "))
+            Pedido.consultar_pedidos_cliente(session, cliente_id)
+
+        elif opcao == "3":
+            try:
+                texto = input("Data dos pedidos (AAAA-MM-DD) ou faixa de ids (ex.: 10-250): ").strip()
+                if '-' in texto and len(texto.split('-')) == 2:
+                    de_id, ate_id = (int(parte) for parte in texto.split('-'))
+                    filtros = {'de_id': de_id, 'ate_id': ate_id}
+                else:
+                    inicio = datetime.combine(date.fromisoformat(texto), time.min)
+                    filtros = {'inicio': inicio, 'fim': inicio + timedelta(days=1)}
+            except ValueError:
+                print("Entrada inválida. Tente novamente.")
+                continue
+            destino = input("Diretório ou arquivo .zip de destino (Enter para o diretório atual): ").strip() or '.'
+            total = emitir_notas(session, destino, **filtros)
+            print(f"{total} notas fiscais emitidas em {destino}.")
+        
+        elif opcao == "0":
+            break  # Volta ao menu principal
+        
+        else:
+            print("Opção inválida. Tente novamente.")
+def menu_fornecedor():
+    while True:
+        print("\n--- Gerenciar Fornecedores ---")
+        print("1. Adicionar Fornecedor")
+        print("2. Remover Fornecedor")
+        print("3. Atualizar Dados de Fornecedor")
+        print("4. Consultar Fornecedor")
+        print("5. Sugestões de Compra (reposição)")
+        print("0. Voltar ao Menu Principal")
+        
+        opcao = input("Escolha uma opção: ")
+        
+        if opcao == "1":
+            nome = input("Nome do fornecedor: ")
+            cnpj = input("CNPJ do fornecedor: ")
+            telefone = input("Telefone do fornecedor: ")
+            endereco = input("Endereço do fornecedor (opcional): ")
+            prazo = input(f"Prazo de entrega em dias (Enter para {PRAZO_ENTREGA_PADRAO}): ").strip()
+            fornecedor = Fornecedor(nome=nome, cnpj=cnpj, telefone=telefone, endereco=endereco,
+                                    prazo_entrega=int(prazo) if prazo else PRAZO_ENTREGA_PADRAO)
+            fornecedor.adicionar_fornecedor(session)
+        elif opcao == "2":
+            fornecedor_id = int(input("ID do fornecedor para remover: "))
+            fornecedor = session.query(Fornecedor).get(fornecedor_id)
+            if fornecedor:
+                fornecedor.remover_fornecedor(session)
+            else:
+                print("Fornecedor não encontrado.")
+        elif opcao == "3":
+            fornecedor_id = int(input("ID do fornecedor para atualizar: "))
+            fornecedor = session.query(Fornecedor).get(fornecedor_id)
+            if fornecedor:
+                novo_nome = input("Novo nome (deixe em branco para não alterar): ")
+                novo_telefone = input("Novo telefone (deixe em branco para não alterar): ")
+                novo_endereco = input("Novo endereço (deixe em branco para não alterar): ")
+                novo_prazo = input("Novo prazo de entrega em dias (deixe em branco para não alterar): ").strip()
+                fornecedor.atualizar_dados_fornecedor(session, novo_nome, novo_telefone, novo_endereco,
+                                                      int(novo_prazo) if novo_prazo else None)
+            else:
+                print("Fornecedor não encontrado.")
+        elif opcao == "4":
+            fornecedor_id = int(input("ID do fornecedor para consultar: "))
+            fornecedor = session.query(Fornecedor).get(fornecedor_id)
+            if fornecedor:
+                fornecedor.consultar_dados_fornecedor(session)  # Altere para o nome correto do método
+            else:
+                print("Fornecedor não encontrado.")
+        elif opcao == "5":
+            loja = input("ID da loja (Enter para a rede inteira): ").strip()
+            atualizar_velocidade(session)
+            compras = compras_por_fornecedor(session, int(loja) if loja else None)
+            if not compras:
+                print("Nenhum produto no ponto de pedido.")
+            for compra in compras:
+                print(f"Fornecedor ID {compra.fornecedor_id or '-'}: {compra.fornecedor or 'sem fornecedor'}, "
+                      f"Prazo: {compra.prazo_entrega or PRAZO_ENTREGA_PADRAO} dias, SKUs: {compra.skus}, "
+                      f"Unidades: {compra.unidades}, Valor: R${compra.valor:.2f}")
+        elif opcao == "0":
+            break
+        else:
+            print("Opção inválida. Tente novamente.")
+
+def menu_produtos():
+    while True:
+        print("\n--- Gerenciamento de Produtos ---")
+        print("1. Adicionar Produto")
+        print("2. Remover Produto")
+        print("3. Consultar Produto")
+        print("4. Buscar Produtos por Categoria")
+        print("5. Verificar Estoque de Produto")
+        print("6. Listar Produtos de uma Loja")
+        print("7. Ajustar Estoque de Produto")
+        print("8. Alterar Preço de Produto")
+        print("9. Estatísticas do Cache de Produtos")
+        print("0. Voltar")
+        
+        opcao = input("Escolha uma opção: ")
+        
+        if opcao == "1":
+            nome = input("Digite o nome do produto: ")
+            preco = float(input("Digite o preço do produto: "))
+            estoque = int(input("Digite a quantidade em estoque: "))
+            categoria = input("Digite a categoria do produto: ")
+            loja_id = int(input("Digite o ID da loja: "))
+            fornecedor_id = int(input("Digite o ID do fornecedor: "))  # Agora solicitando o fornecedor_id
+            novo_produto = Produto(nome, preco, estoque, categoria, loja_id, fornecedor_id)
+            novo_produto.adicionar_produto(session)
+        
+        elif opcao == "2":
+            produto_id = int(input("Digite o ID do produto para remover: "))
+            Produto.remover_produto(session, produto_id)
+        
+        elif opcao == "3":
+            produto_id = int(input("Digite o ID do produto para consultar: "))
+            Produto.consultar_produto(session, produto_id)
+        
+        elif opcao == "4":
+            categoria = input("Digite a categoria dos produtos a serem buscados: ")
+            Produto.buscar_produtos_por_categoria(session, categoria)
+        
+        elif opcao == "5":
+            produto_id = int(input("Digite o ID do produto para verificar o estoque: "))
+            quantidade = int(input("Digite a quantidade a ser verificada: "))
+            Produto.verificar_estoque(session, produto_id, quantidade)
+        
+        elif opcao == "6":
+            loja_id = int(input("Digite o ID da loja para listar os produtos: "))
+            Produto.listar_produtos_loja(session, loja_id)
+        
+        elif opcao == "7":
+            produto_id = int(input("Digite o ID do produto para ajustar o estoque: "))
+            quantidade = int(input("Digite a quantidade a ser ajustada (positiva para aumentar, negativa para diminuir): "))
+            produto = session.query(Produto).get(produto_id)
+            if produto:
+                produto.ajustar_estoque(session, quantidade)
+            else:
+                print(f"Produto ID {produto_id} não encontrado.")
+        
+        elif opcao == "8":
+            produto_id = int(input("Digite o ID do produto para alterar o preço: "))
+            novo_preco = float(input("Digite o novo preço do produto: "))
+            Produto.alterar_preco(session, produto_id, novo_preco)
+
+        elif opcao == "9":
+            estatisticas = cache_produtos.estatisticas()
+            print(f"Acertos: {estatisticas['acertos']}, falhas: {estatisticas['falhas']} "
+                  f"(taxa de acerto: {estatisticas['taxa_acerto']:.1%})")
+            print(f"Itens: {estatisticas['itens']}/{estatisticas['capacidade']}, validade: {estatisticas['ttl']:.0f}s")
+        
+        elif opcao == "0":
+            break  # Volta ao menu principal
+        
+        else:
+            print("Opção inválida. Tente novamente.")
@@ -0,0 +1,306 @@
+"""Métricas de SQL por operação de negócio e detecção de N+1.
+
+instrumentar(engine) liga os eventos de cursor da engine. Cada comando é
+atribuído à operação em andamento: o método marcado com @operacao (ou o trecho
+em `with em_operacao(...)`) mais externo na pilha, ex.: Pedido.realizar_pedido.
+Comandos fora de qualquer operação ficam em SEM_OPERACAO. Por operação são
+contadas as chamadas, os comandos, as linhas (lidas num SELECT, afetadas nos
+demais) e um histograma da latência de cada comando.
+
+Uma chamada que repete o mesmo formato de comando (o SQL com as listas de
+parâmetros colapsadas) LIMIAR_N_MAIS_1 vezes ou mais é registrada como
+provável N+1 (os executemany e os comandos com execution_options(por_lote=True)
+não contam), com aviso no logger deste módulo. Os números saem em JSON
+(exportar_json) ou no formato texto do Prometheus para o textfile collector do
+node_exporter (exportar_prometheus).
+
+Sem instrumentar(), @operacao só marca e desmarca um contextvar: os eventos
+não existem e o fim da chamada não passa pela trava de nenhum coletor.
+"""
+from sqlalchemy import event
+from contextvars import ContextVar
+from functools import wraps
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+SEM_OPERACAO = '-'
+LIMIAR_N_MAIS_1 = 5
+# Limites (segundos) dos baldes do histograma de latência; o último balde é +Inf
+BALDES = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Listas "(?, ?, ?)" e blocos de VALUES de tamanhos diferentes têm o mesmo formato
+_LISTA_PARAMETROS = re.compile(r'\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*,?)+\)')
+_ESPACOS = re.compile(r'\s+')
+
+_chamada = ContextVar('farmasil_operacao', default=None)
+
+def formato(sql):
+    """SQL normalizado usado para reconhecer o mesmo comando repetido."""
+    return _ESPACOS.sub(' ', _LISTA_PARAMETROS.sub('(?)', sql)).strip()
+
+class _Chamada:
+    """Uma execução de uma operação: conta os formatos de comando para o N+1 e guarda os coletores que os viram."""
+    __slots__ = ('nome', 'formatos', 'coletores')
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.formatos = {}
+        self.coletores = []
+
+class EstatisticaOperacao:
+    """Totais de uma operação (acumulados sob a trava de Metricas)."""
+
+    def __init__(self):
+        self.chamadas = 0
+        self.comandos = 0
+        self.linhas = 0
+        self.segundos = 0.0
+        self.baldes = [0] * (len(BALDES) + 1)
+        self.chamadas_n_mais_1 = 0
+        self.n_mais_1 = {}  # formato -> maior número de repetições em uma chamada
+
+    def como_dict(self):
+        return {
+            'chamadas': self.chamadas,
+            'comandos': self.comandos,
+            'linhas': self.linhas,
+            'segundos': round(self.segundos, 6),
+            'histograma': dict(zip([str(limite) for limite in BALDES] + ['+Inf'], self.baldes)),
+            'chamadas_n_mais_1': self.chamadas_n_mais_1,
+            'n_mais_1': self.n_mais_1,
+        }
+
+class _CursorContado:
+    """Repassa o cursor DBAPI contando as linhas buscadas para a operação."""
+
+    def __init__(self, cursor, metricas, nome):
+        self._cursor = cursor
+        self._metricas = metricas
+        self._nome = nome
+
+    def __getattr__(self, atributo):
+        return getattr(self._cursor, atributo)
+
+    def _contar(self, linhas):
+        self._metricas._somar_linhas(self._nome, linhas)
+
+    def fetchone(self):
+        linha = self._cursor.fetchone()
+        if linha is not None:
+            self._contar(1)
+        return linha
+
+    def fetchmany(self, *args):
+        linhas = self._cursor.fetchmany(*args)
+        self._contar(len(linhas))
+        return linhas
+
+    def fetchall(self):
+        linhas = self._cursor.fetchall()
+        self._contar(len(linhas))
+        return linhas
+
+class Metricas:
+    """Coletor ligado a uma ou mais engines por instrumentar()."""
+
+    def __init__(self, limiar_n_mais_1=LIMIAR_N_MAIS_1):
+        self.limiar_n_mais_1 = limiar_n_mais_1
+        self.operacoes = {}
+        self._trava = threading.Lock()
+        # Engines ligadas por instrumentar(); sem nenhuma, o fim das chamadas não passa pela trava
+        self._engines = 0
+
+    def _estatistica(self, nome):
+        estatistica = self.operacoes.get(nome)
+        if estatistica is None:
+            estatistica = self.operacoes.setdefault(nome, EstatisticaOperacao())
+        return estatistica
+
+    def _somar_linhas(self, nome, linhas):
+        with self._trava:
+            self._estatistica(nome).linhas += linhas
+
+    def _antes(self, conexao, cursor, sql, parametros, contexto, executemany):
+        conexao.info.setdefault('farmasil_inicio', []).append(time.perf_counter())
+
+    def _depois(self, conexao, cursor, sql, parametros, contexto, executemany):
+        duracao = time.perf_counter() - conexao.info['farmasil_inicio'].pop()
+        chamada = _chamada.get()
+        nome = chamada.nome if chamada else SEM_OPERACAO
+        # Um executemany em partes e os comandos marcados com execution_options(por_lote=True), que
+        # rodam uma vez por lote de propósito (ex.: importação), não são N+1
+        if chamada is not None and not executemany and not (
+                contexto is not None and contexto.execution_options.get('por_lote')):
+            chave = formato(sql)
+            chamada.formatos[chave] = chamada.formatos.get(chave, 0) + 1
+        if chamada is not None and self not in chamada.coletores:
+            chamada.coletores.append(self)
+        with self._trava:
+            estatistica = self._estatistica(nome)
+            estatistica.comandos += 1
+            estatistica.segundos += duracao
+            estatistica.baldes[bisect.bisect_left(BALDES, duracao)] += 1
+            if cursor.description is None and cursor.rowcount > 0:
+                estatistica.linhas += cursor.rowcount
+        if cursor.description is not None and contexto is not None and not executemany:
+            contexto.cursor = _CursorContado(cursor, self, nome)
+
+    def _fim_da_chamada(self, chamada):
+        repetidos = {chave: vezes for chave, vezes in chamada.formatos.items() if vezes >= self.limiar_n_mais_1}
+        with self._trava:
+            estatistica = self._estatistica(chamada.nome)
+            estatistica.chamadas += 1
+            if repetidos:
+                estatistica.chamadas_n_mais_1 += 1
+                for chave, vezes in repetidos.items():
+                    estatistica.n_mais_1[chave] = max(vezes, estatistica.n_mais_1.get(chave, 0))
+        for chave, vezes in repetidos.items():
+            logger.warning("Provável N+1 em %s: %d execuções de %s", chamada.nome, vezes, chave)
+
+    def suspeitas_n_mais_1(self):
+        """{operação: {formato: repetições}} das operações com provável N+1."""
+        with self._trava:
+            return {nome: dict(estatistica.n_mais_1) for nome, estatistica in self.operacoes.items()
+                    if estatistica.n_mais_1}
+
+    def como_dict(self):
+        with self._trava:
+            return {nome: estatistica.como_dict() for nome, estatistica in sorted(self.operacoes.items())}
+
+    def limpar(self):
+        with self._trava:
+            self.operacoes.clear()
+
+    def exportar_json(self, destino):
+        with open(destino, 'w', encoding='utf-8') as arquivo:
+            json.dump({'baldes': list(BALDES), 'operacoes': self.como_dict()}, arquivo, ensure_ascii=False, indent=2)
+            arquivo.write('\n')
+
+    def texto_prometheus(self):
+        """As métricas no formato de exposição em texto do Prometheus."""
+        operacoes = self.como_dict()
+        linhas = []
+
+        def metrica(nome, tipo, ajuda, valores):
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for operacao, valor in valores:
+                linhas.append(f'{nome}{{operacao="{_rotulo(operacao)}"}} {valor}')
+
+        metrica('farmasil_operacoes_total', 'counter', 'Chamadas de cada operação instrumentada.',
+                [(nome, valores['chamadas']) for nome, valores in operacoes.items()])
+        metrica('farmasil_sql_comandos_total', 'counter', 'Comandos SQL executados pela operação.',
+                [(nome, valores['comandos']) for nome, valores in operacoes.items()])
+        metrica('farmasil_sql_linhas_total', 'counter', 'Linhas lidas (SELECT) ou afetadas pela operação.',
+                [(nome, valores['linhas']) for nome, valores in operacoes.items()])
+        metrica('farmasil_sql_n_mais_1_total', 'counter', 'Chamadas com comando repetido (provável N+1).',
+                [(nome, valores['chamadas_n_mais_1']) for nome, valores in operacoes.items()])
+        linhas.append("# HELP farmasil_sql_duracao_segundos Latência de cada comando SQL da operação.")
+        linhas.append("# TYPE farmasil_sql_duracao_segundos histogram")
+        for nome, valores in operacoes.items():
+            acumulado = 0
+            for limite, quantidade in valores['histograma'].items():
+                acumulado += quantidade
+                linhas.append(f'farmasil_sql_duracao_segundos_bucket{{operacao="{_rotulo(nome)}",le="{limite}"}} '
+                              f'{acumulado}')
+            linhas.append(f'farmasil_sql_duracao_segundos_sum{{operacao="{_rotulo(nome)}"}} {valores["segundos"]}')
+            linhas.append(f'farmasil_sql_duracao_segundos_count{{operacao="{_rotulo(nome)}"}} {valores["comandos"]}')
+        return '\n'.join(linhas) + '\n'
+
+    def exportar_prometheus(self, destino):
+        """Grava o arquivo .prom de uma vez (arquivo temporário + rename), como pede o textfile collector."""
+        temporario = f"{destino}.{os.getpid()}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(self.texto_prometheus())
+        os.replace(temporario, destino)
+
+    def exportar(self, destino):
+        """Exporta em Prometheus se `destino` terminar em .prom, senão em JSON."""
+        if destino.endswith('.prom'):
+            self.exportar_prometheus(destino)
+        else:
+            self.exportar_json(destino)
+
+def _rotulo(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Coletor usado pela linha de comando e por quem não precisa de um próprio
+metricas = Metricas()
+# Coletores ligados a cada engine por instrumentar()
+_instrumentadas = weakref.WeakKeyDictionary()
+
+def instrumentar(engine, coletor=None):
+    """Liga a coleta de métricas na engine e retorna o coletor."""
+    coletor = coletor or metricas
+    coletores = _instrumentadas.setdefault(engine, [])
+    if coletor not in coletores:
+        event.listen(engine, 'before_cursor_execute', coletor._antes)
+        event.listen(engine, 'after_cursor_execute', coletor._depois)
+        coletores.append(coletor)
+        coletor._engines += 1
+    return coletor
+
+def desinstrumentar(engine, coletor=None):
+    coletor = coletor or metricas
+    event.remove(engine, 'before_cursor_execute', coletor._antes)
+    event.remove(engine, 'after_cursor_execute', coletor._depois)
+    _instrumentadas[engine].remove(coletor)
+    coletor._engines -= 1
+
+def herdar_instrumentacao(anterior, engine):
+    """Liga na `engine` os coletores da `anterior` (usar_engine, ao trocar a engine padrão)."""
+    for coletor in list(_instrumentadas.get(anterior, ())):
+        instrumentar(engine, coletor)
+
+class em_operacao:
+    """`with em_operacao('nome'):` marca um trecho como operação; dentro de outra operação não abre uma nova.
+
+    A chamada é fechada nos coletores das engines que executaram os comandos
+    dela; sem nenhum comando, no `coletor` informado ou no global, se ele estiver
+    ligado a alguma engine.
+    """
+
+    def __init__(self, nome, coletor=None):
+        self.nome = nome
+        self.coletor = coletor
+        self._token = None
+
+    def __enter__(self):
+        if _chamada.get() is None:
+            self._chamada = _Chamada(self.nome)
+            self._token = _chamada.set(self._chamada)
+        return self
+
+    def __exit__(self, *excecao):
+        if self._token is not None:
+            _chamada.reset(self._token)
+            self._token = None
+            coletores = self._chamada.coletores
+            if not coletores:
+                coletor = self.coletor or metricas
+                coletores = [coletor] if coletor._engines else ()
+            for coletor in coletores:
+                coletor._fim_da_chamada(self._chamada)
+
+def operacao(nome=None):
+    """Decorador de operação de negócio: `@operacao` (nome Classe.metodo) ou `@operacao('nome')`."""
+    if callable(nome):
+        return operacao()(nome)
+
+    def decorar(funcao):
+        rotulo = nome or funcao.__qualname__
+
+        @wraps(funcao)
+        def medida(*args, **kwargs):
+            with em_operacao(rotulo):
+                return funcao(*args, **kwargs)
+        return medida
+    return decorar
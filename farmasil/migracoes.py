@@ -0,0 +1,282 @@
+"""Migrações versionadas do esquema.
+
+A versão aplicada fica na tabela `versao_esquema`. Um banco novo é criado
+direto dos modelos (create_all) e já marcado com a última versão; um banco
+existente recebe, em ordem, as migrações que ainda não rodaram, cada uma em sua
+transação. Tabelas novas, que não alteram nada do que já existe, são criadas
+pelo create_all no fim de migrar(); as migrações cuidam do resto (colunas,
+índices e conversões de dados em tabelas que já existem).
+
+Para alterar o esquema: mude o modelo e acrescente uma Migracao no fim de
+MIGRACOES com a próxima versão. As migrações devem poder rodar de novo sem
+erro (conferem o que já existe antes de criar).
+"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, literal, select, text
+from collections import namedtuple
+from datetime import datetime
+
+from farmasil.banco import obter_engine
+from farmasil.busca import criar_indice_busca
+from farmasil.painel import TRIGGERS
+from farmasil.modelos import (PRAZO_ENTREGA_PADRAO, Base, Caixa, CheckpointCaixa, Cliente, Funcionario,
+                              ParticaoArquivo, ProcessamentoVendas, RegistroCaixa, RegistroPonto, SessaoCaixa,
+                              VendaDiaria, VendaDiariaProduto)
+
+Migracao = namedtuple('Migracao', ['versao', 'descricao', 'aplicar'])
+
+versao_esquema = Table(
+    'versao_esquema', MetaData(),
+    Column('versao', Integer, primary_key=True),
+    Column('descricao', String, nullable=False),
+    Column('aplicada_em', DateTime, nullable=False, default=datetime.now),
+)
+
+def _colunas(conexao, tabela):
+    return {coluna['name'] for coluna in inspect(conexao).get_columns(tabela)}
+
+def _criar_indices_do_modelo(conexao):
+    """Cria os índices declarados nos modelos que ainda não existem no banco."""
+    inspetor = inspect(conexao)
+    existentes = set(inspetor.get_table_names())
+    for tabela in Base.metadata.sorted_tables:
+        if tabela.name not in existentes:
+            continue
+        presentes = {indice['name'] for indice in inspetor.get_indexes(tabela.name)}
+        colunas = {coluna['name'] for coluna in inspetor.get_columns(tabela.name)}
+        for indice in tabela.indexes:
+            # Índices de colunas criadas por migrações posteriores ficam para elas
+            if indice.name not in presentes and {coluna.name for coluna in indice.columns} <= colunas:
+                indice.create(conexao)
+
+def _livro_caixa(conexao):
+    """Converte registros_caixa do formato antigo (valor Float, data em texto) para o livro-caixa.
+
+    O saldo da coluna caixas.saldo vira um checkpoint no último movimento de
+    cada caixa (ou um movimento de 'Saldo anterior', se o caixa não tinha
+    nenhum), para o saldo calculado continuar igual ao de antes.
+    """
+    SessaoCaixa.__table__.create(conexao, checkfirst=True)
+    CheckpointCaixa.__table__.create(conexao, checkfirst=True)
+    if 'valor_centavos' in _colunas(conexao, 'registros_caixa'):
+        return
+
+    # Procedimento recomendado pelo SQLite para mudar colunas: cria, copia, apaga e renomeia
+    # A cópia leva junto as tabelas referenciadas pelas chaves estrangeiras
+    destino = MetaData()
+    for tabela in (Caixa.__table__, SessaoCaixa.__table__):
+        tabela.to_metadata(destino)
+    nova = RegistroCaixa.__table__.to_metadata(destino, name='registros_caixa_nova')
+    for indice in list(nova.indexes):
+        nova.indexes.discard(indice)
+    nova.create(conexao)
+    agora = datetime.now()
+    antigos = conexao.execute(text("SELECT id, tipo, valor, caixa_id, data_hora FROM registros_caixa ORDER BY id"))
+    for registro in antigos:
+        centavos = int(round((registro.valor or 0) * 100))
+        try:
+            data_hora = datetime.fromisoformat(str(registro.data_hora))
+        except ValueError:
+            # O modelo antigo gravava o texto literal 'CURRENT_TIMESTAMP'
+            data_hora = agora
+        conexao.execute(nova.insert().values(
+            id=registro.id, tipo=registro.tipo, caixa_id=registro.caixa_id, data_hora=data_hora,
+            valor_centavos=-abs(centavos) if registro.tipo == 'Saída' else abs(centavos),
+        ))
+    conexao.execute(text("DROP TABLE registros_caixa"))
+    conexao.execute(text("ALTER TABLE registros_caixa_nova RENAME TO registros_caixa"))
+    for indice in RegistroCaixa.__table__.indexes:
+        indice.create(conexao)
+
+    if 'saldo' not in _colunas(conexao, 'caixas'):
+        return
+    for caixa_id, saldo in conexao.execute(text("SELECT id, saldo FROM caixas")):
+        saldo_centavos = int(round((saldo or 0) * 100))
+        ultimo = conexao.execute(
+            select(func.max(RegistroCaixa.id)).where(RegistroCaixa.caixa_id == caixa_id)
+        ).scalar()
+        if ultimo is None:
+            if not saldo_centavos:
+                continue
+            ultimo = conexao.execute(RegistroCaixa.__table__.insert().values(
+                tipo='Saldo anterior', valor_centavos=saldo_centavos, caixa_id=caixa_id, data_hora=agora
+            )).inserted_primary_key[0]
+        conexao.execute(CheckpointCaixa.__table__.insert().values(
+            caixa_id=caixa_id, registro_id=ultimo, saldo_centavos=saldo_centavos, criado_em=agora
+        ))
+
+def _data_do_pedido(conexao):
+    """Data e hora dos pedidos, para reemitir notas por período.
+
+    Os pedidos anteriores a esta migração ficam sem data: não há de onde tirá-la,
+    e uma data inventada os poria num dia de vendas que não é o deles. Por isso
+    eles ficam fora dos resumos de vendas (farmasil.vendas) e nunca são
+    arquivados (farmasil.arquivamento); entram só no histórico dos clientes e
+    nas notas pedidas por id.
+    """
+    if 'data_hora' not in _colunas(conexao, 'pedidos'):
+        conexao.execute(text("ALTER TABLE pedidos ADD COLUMN data_hora DATETIME"))
+    _criar_indices_do_modelo(conexao)
+
+def _resumos_de_vendas(conexao):
+    for modelo in (VendaDiaria, VendaDiariaProduto, ProcessamentoVendas):
+        modelo.__table__.create(conexao, checkfirst=True)
+
+def _historico_do_cliente(conexao):
+    """Contadores de compras do cliente; o recálculo a partir dos pedidos fica para _valores_em_centavos."""
+    colunas = _colunas(conexao, 'clientes')
+    if 'total_gasto' not in colunas and 'total_gasto_centavos' not in colunas:
+        conexao.execute(text("ALTER TABLE clientes ADD COLUMN total_gasto FLOAT DEFAULT 0"))
+    if 'ultima_compra' not in colunas:
+        conexao.execute(text("ALTER TABLE clientes ADD COLUMN ultima_compra DATETIME"))
+
+def _ponto_dos_funcionarios(conexao):
+    """Ponto por dia; as horas acumuladas até aqui viram um lançamento na data de admissão."""
+    RegistroPonto.__table__.create(conexao, checkfirst=True)
+    if conexao.execute(select(func.count()).select_from(RegistroPonto.__table__)).scalar():
+        return
+    agora = datetime.now()
+    conexao.execute(RegistroPonto.__table__.insert().from_select(
+        ['funcionario_id', 'loja_id', 'data', 'horas', 'registrado_em'],
+        select(Funcionario.id, Funcionario.loja_id, func.coalesce(Funcionario.data_admissao, agora.date()),
+               Funcionario.horas_trab, literal(agora))
+        .where(Funcionario.horas_trab.isnot(None), Funcionario.horas_trab != 0)
+    ))
+
+def _prazo_do_fornecedor(conexao):
+    """Prazo de entrega do fornecedor, usado pela reposição; os já cadastrados ficam com o padrão."""
+    # Os bancos de loja do modo fragmentado não têm fornecedores (ficam no catálogo)
+    if inspect(conexao).has_table('fornecedores') and 'prazo_entrega' not in _colunas(conexao, 'fornecedores'):
+        conexao.execute(text(
+            f"ALTER TABLE fornecedores ADD COLUMN prazo_entrega INTEGER NOT NULL DEFAULT {PRAZO_ENTREGA_PADRAO}"))
+
+def _busca_de_produtos(conexao):
+    """Índice FTS5 dos nomes de produtos (SQLite), preenchido com o catálogo atual."""
+    # O catálogo do modo fragmentado não tem produtos
+    if inspect(conexao).has_table('produtos'):
+        criar_indice_busca(conexao)
+
+def _pausa_da_busca(conexao):
+    """Trigger de inclusão da busca com a pausa usada pela importação em lote (SQLite)."""
+    if conexao.dialect.name == 'sqlite' and inspect(conexao).has_table('produtos'):
+        conexao.execute(text("DROP TRIGGER IF EXISTS trg_busca_produtos_insert"))
+        criar_indice_busca(conexao)
+
+def _sem_saldo_antigo_do_caixa(conexao):
+    """Remove caixas.saldo (Float), que o livro-caixa trocou por um checkpoint e ficou parado.
+
+    Roda depois de _livro_caixa, que ainda lê a coluna para gravar o checkpoint.
+    """
+    if inspect(conexao).has_table('caixas') and 'saldo' in _colunas(conexao, 'caixas'):
+        conexao.execute(text("ALTER TABLE caixas DROP COLUMN saldo"))
+
+def _particoes_do_arquivo(conexao):
+    """Catálogo dos meses arquivados; só nos bancos que têm pedidos."""
+    if inspect(conexao).has_table('pedidos'):
+        ParticaoArquivo.__table__.create(conexao, checkfirst=True)
+
+# (tabela, coluna em reais, coluna em centavos, pode ser nula)
+_VALORES_EM_CENTAVOS = (
+    ('produtos', 'preco', 'preco_centavos', False),
+    ('itens_pedido', 'preco', 'preco_centavos', False),
+    ('funcionarios', 'salario', 'salario_centavos', False),
+    ('clientes', 'total_gasto', 'total_gasto_centavos', True),
+    ('resumo_estoque', 'valor', 'valor_centavos', False),
+    ('vendas_diarias', 'receita', 'receita_centavos', False),
+    ('vendas_diarias_produto', 'receita', 'receita_centavos', False),
+)
+
+def _valores_em_centavos(conexao):
+    """Preços, salários, total gasto e resumos de Float em reais para Integer em centavos.
+
+    Cada coluna ganha a par em centavos, preenchida com o valor arredondado, e a
+    antiga é removida (DROP COLUMN, SQLite 3.35+). Os triggers do painel citam
+    produtos.preco: saem antes e voltam, já com preco_centavos, se estavam instalados.
+    No fim o histórico dos clientes é recalculado dos itens, já em centavos exatos.
+    """
+    inspetor = inspect(conexao)
+    triggers = []
+    if conexao.dialect.name == 'sqlite':
+        triggers = [nome for (nome,) in conexao.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_resumo_estoque_%'"))]
+        for nome in triggers:
+            conexao.execute(text(f"DROP TRIGGER {nome}"))
+    for tabela, antiga, nova, nula in _VALORES_EM_CENTAVOS:
+        # No modo fragmentado cada banco tem só parte das tabelas
+        if not inspetor.has_table(tabela) or antiga not in _colunas(conexao, tabela):
+            continue
+        if nova not in _colunas(conexao, tabela):
+            restricao = 'DEFAULT 0' if nula else 'NOT NULL DEFAULT 0'
+            conexao.execute(text(f"ALTER TABLE {tabela} ADD COLUMN {nova} INTEGER {restricao}"))
+        conexao.execute(text(f"UPDATE {tabela} SET {nova} = CAST(ROUND({antiga} * 100) AS INTEGER) "
+                             f"WHERE {antiga} IS NOT NULL"))
+        conexao.execute(text(f"ALTER TABLE {tabela} DROP COLUMN {antiga}"))
+    if triggers:
+        for ddl in TRIGGERS.values():
+            conexao.execute(text(ddl))
+    if all(inspetor.has_table(tabela) for tabela in ('clientes', 'pedidos', 'itens_pedido')):
+        conexao.execute(Cliente.recalculo_historico())
+
+MIGRACOES = [
+    Migracao(1, 'Livro-caixa somente de inclusão (centavos, sessões e checkpoints)', _livro_caixa),
+    Migracao(2, 'Índices das colunas de filtro (produtos, pedidos, itens, funcionários)', _criar_indices_do_modelo),
+    Migracao(3, 'Data e hora do pedido', _data_do_pedido),
+    Migracao(4, 'Resumos diários de vendas', _resumos_de_vendas),
+    Migracao(5, 'Histórico de compras e nível de fidelidade do cliente', _historico_do_cliente),
+    Migracao(6, 'Ponto diário dos funcionários', _ponto_dos_funcionarios),
+    Migracao(7, 'Prazo de entrega do fornecedor e velocidade de vendas para a reposição', _prazo_do_fornecedor),
+    Migracao(8, 'Busca de produtos por nome (FTS5)', _busca_de_produtos),
+    Migracao(9, 'Valores em centavos inteiros (preços, salários, totais e resumos)', _valores_em_centavos),
+    Migracao(10, 'Arquivo mensal de pedidos e movimentos de caixa antigos', _particoes_do_arquivo),
+    Migracao(11, 'Pausa da indexação da busca durante a importação em lote', _pausa_da_busca),
+    Migracao(12, 'Remoção do saldo antigo dos caixas, já convertido em checkpoint', _sem_saldo_antigo_do_caixa),
+]
+
+VERSAO_ATUAL = MIGRACOES[-1].versao
+
+def versao_atual(conexao):
+    """Versão do esquema gravada no banco (0 se nunca foi migrado)."""
+    if not inspect(conexao).has_table('versao_esquema'):
+        return 0
+    return conexao.execute(select(func.coalesce(func.max(versao_esquema.c.versao), 0))).scalar()
+
+def pendentes(engine=None):
+    """Migrações ainda não aplicadas ao banco."""
+    engine = engine if engine is not None else obter_engine()
+    with engine.connect() as conexao:
+        if not inspect(conexao).has_table('lojas'):
+            return []
+        versao = versao_atual(conexao)
+    return [migracao for migracao in MIGRACOES if migracao.versao > versao]
+
+def migrar(engine=None, progresso=None, tabelas=None):
+    """Leva o banco à versão atual e retorna as migrações aplicadas.
+
+    `progresso`, se informado, é chamado com cada Migracao antes de aplicá-la.
+    `tabelas` restringe o banco a essas tabelas (bancos do catálogo e das lojas
+    no modo fragmentado, ver farmasil.fragmentos).
+    """
+    engine = engine if engine is not None else obter_engine()
+    with engine.begin() as conexao:
+        versao_esquema.create(conexao, checkfirst=True)
+        existentes = set(inspect(conexao).get_table_names())
+        if ('lojas' not in existentes if tabelas is None else not existentes & {tabela.name for tabela in tabelas}):
+            # Banco novo: os modelos já estão na versão atual
+            Base.metadata.create_all(conexao, tables=tabelas)
+            conexao.execute(versao_esquema.insert(), [
+                {'versao': migracao.versao, 'descricao': migracao.descricao} for migracao in MIGRACOES
+            ])
+            return []
+        versao = versao_atual(conexao)
+
+    aplicadas = []
+    for migracao in MIGRACOES:
+        if migracao.versao <= versao:
+            continue
+        if progresso:
+            progresso(migracao)
+        with engine.begin() as conexao:
+            migracao.aplicar(conexao)
+            conexao.execute(versao_esquema.insert().values(versao=migracao.versao, descricao=migracao.descricao))
+        aplicadas.append(migracao)
+    Base.metadata.create_all(engine, tables=tabelas)
+    return aplicadas
@@ -0,0 +1,1266 @@
+"""Modelos ORM do Farmasil e as operações de cada entidade."""
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, Index, Table, and_, bindparam, case, event, func, select, update
+from sqlalchemy.orm import Session as SessaoORM, object_session, relationship
+from sqlalchemy.ext.declarative import declarative_base
+from collections import namedtuple
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from farmasil.banco import confirmar, desfazer, obter_engine
+from farmasil.cache import CacheLRU, normalizar_nome
+from farmasil.metricas import operacao
+
+Base = declarative_base()
+
+# Linhas buscadas por vez nas listagens: o resultado é impresso em fluxo, sem
+# montar a tabela inteira na memória
+LOTE_LISTAGEM = 1000
+
+# Produtos parecidos sugeridos para um nome não encontrado no checkout
+LIMITE_SUGESTOES = 3
+
+# Movimentos de caixa entre dois checkpoints de saldo
+INTERVALO_CHECKPOINT = 256
+
+# Dias entre o pedido de compra e a entrega, quando o fornecedor não informa
+PRAZO_ENTREGA_PADRAO = 7
+
+# Níveis de fidelidade pelo total gasto (R$), do maior para o menor
+NIVEIS_FIDELIDADE = ((5000.0, 'Ouro'), (1000.0, 'Prata'), (0.0, 'Bronze'))
+
+# Cópia de um produto guardada no cache de consultas por id e por nome
+class ProdutoEmCache(namedtuple('ProdutoEmCache', ['id', 'nome', 'preco_centavos', 'categoria', 'estoque', 'loja_id',
+                                                   'fornecedor_id'])):
+    __slots__ = ()
+
+    @property
+    def preco(self):
+        return self.preco_centavos / 100
+
+# Produtos consultados pelo PDV e pelo menu. É invalidado pelos eventos no fim
+# deste módulo quando preço, estoque ou nome mudam neste processo; o TTL limita
+# por quanto tempo uma alteração feita por outro processo pode passar despercebida.
+cache_produtos = CacheLRU()
+
+def para_centavos(valor):
+    """Converte um valor em reais (float, str ou Decimal) para centavos inteiros."""
+    return int((Decimal(str(valor)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+class Loja(Base):
+    __tablename__ = 'lojas'
+    id = Column(Integer, primary_key=True)
+    nome = Column(String, nullable=False)
+    endereco = Column(String, nullable=False)
+    horario_funcionamento = Column(String, nullable=False)
+    produtos = relationship("Produto", back_populates="loja")
+    funcionarios = relationship("Funcionario", back_populates="loja")
+
+    @staticmethod
+    @operacao
+    def adicionar_loja(session, nome, endereco, horario_funcionamento):
+        # Criação de uma instância de Loja com os dados fornecidos
+        loja = Loja(nome=nome, endereco=endereco, horario_funcionamento=horario_funcionamento)
+        
+        # Adiciona a nova loja ao banco de dados
+        session.add(loja)
+        confirmar(session)
+        
+        print("Loja adicionada com sucesso!")
+        return loja
+
+    @staticmethod
+    @operacao
+    def atualizar_dados_loja(session, loja_id, nome=None, endereco=None, horario_funcionamento=None):
+        loja = session.query(Loja).filter_by(id=loja_id).first()
+        if loja:
+            if nome:
+                loja.nome = nome
+            if endereco:
+                loja.endereco = endereco
+            if horario_funcionamento:
+                loja.horario_funcionamento = horario_funcionamento
+            confirmar(session)
+            print("Dados da loja atualizados com sucesso!")
+        else:
+            print("Loja não encontrada.")
+
+    @staticmethod
+    @operacao
+    def consultar_dados_loja(session, loja_id):
+        loja = session.query(Loja).filter_by(id=loja_id).first()
+        if loja:
+            print(f"ID: {loja.id}, Nome: {loja.nome}, Endereço: {loja.endereco}, Horário: {loja.horario_funcionamento}")
+        else:
+            print("Loja não encontrada.")
+
+    @staticmethod
+    @operacao
+    def listar_lojas(session):
+        lojas = (session.query(Loja.id, Loja.nome, Loja.endereco, Loja.horario_funcionamento)
+                 .order_by(Loja.id).yield_per(LOTE_LISTAGEM))
+        encontrou = False
+        for loja in lojas:
+            encontrou = True
+            print(f"ID: {loja.id}, Nome: {loja.nome}, Endereço: {loja.endereco}, Horário: {loja.horario_funcionamento}")
+        if not encontrou:
+            print("Nenhuma loja cadastrada.")
+
+    @staticmethod
+    @operacao
+    def consultar_funcionarios_loja(session, loja_id):
+        loja = session.query(Loja).filter_by(id=loja_id).first()
+        if loja:
+            if loja.funcionarios:
+                print(f"Funcionários da loja {loja.nome}:")
+                for funcionario in loja.funcionarios:
+                    print(f"ID: {funcionario.id}, Nome: {funcionario.nome}, Cargo: {funcionario.cargo}, "
+                          f"Salário: R${funcionario.salario:.2f}, Turno: {funcionario.turno}, "
+                          f"Data de Admissão: {funcionario.data_admissao}, Horas Trabalhadas: {funcionario.horas_trab}")
+            else:
+                print(f"Nenhum funcionário cadastrado na loja {loja.nome}.")
+        else:
+            print("Loja não encontrada.")
+
+    @staticmethod
+    @operacao
+    def estoque_por_categoria(session, loja_id=None):
+        """Unidades e SKUs por loja e categoria, somados pelo banco (uma loja ou todas)."""
+        consulta = session.query(
+            Produto.loja_id,
+            Produto.categoria,
+            func.coalesce(func.sum(Produto.estoque), 0).label('unidades'),
+            func.count(Produto.id).label('skus')
+        )
+        if loja_id is not None:
+            consulta = consulta.filter(Produto.loja_id == loja_id)
+        return consulta.group_by(Produto.loja_id, Produto.categoria).order_by(Produto.loja_id, Produto.categoria).all()
+
+    @staticmethod
+    @operacao
+    def verificar_estoque_loja(session, loja_id):
+        nome = session.query(Loja.nome).filter_by(id=loja_id).scalar()
+        if nome is not None:
+            categorias = Loja.estoque_por_categoria(session, loja_id)
+            total_estoque = sum(linha.unidades for linha in categorias)  # Uma linha por categoria, já somada no banco
+            print(f"Estoque total da loja {nome}: {total_estoque if total_estoque > 0 else 'Estoque vazio.'}")
+            for linha in categorias:
+                print(f"- {linha.categoria}: {linha.unidades} unidades em {linha.skus} produtos")
+        else:
+            print("Loja não encontrada.")
+
+    @staticmethod
+    @operacao
+    def remover_loja(session, loja_id):
+        loja = session.query(Loja).filter_by(id=loja_id).first()
+        if loja:
+            session.delete(loja)
+            confirmar(session)
+            print("Loja removida com sucesso!")
+        else:
+            print("Loja não encontrada.")
+
+class Cliente(Base):
+    __tablename__ = 'clientes'
+    id = Column(Integer, primary_key=True)
+    nome = Column(String, nullable=False)
+    cpf = Column(String, unique=True, nullable=False)
+    telefone = Column(String, nullable=False)
+    email = Column(String, nullable=False)
+    endereco = Column(String)
+    # Contadores mantidos pelo checkout (Pedido.finalizar_pedido), na mesma transação do pedido
+    historico_compras = Column(Integer, default=0)  # pedidos finalizados
+    total_gasto_centavos = Column(Integer, default=0)
+    ultima_compra = Column(DateTime)
+    pedidos = relationship('Pedido', back_populates='cliente')  # Adicionando o relacionamento com Pedido
+
+    def __init__(self, nome, cpf, telefone, email, endereco=None):
+        self.nome = nome
+        self.cpf = cpf
+        self.telefone = telefone
+        self.email = email
+        self.endereco = endereco
+
+    @staticmethod
+    def nivel_para(total_gasto):
+        for minimo, nivel in NIVEIS_FIDELIDADE:
+            if (total_gasto or 0) >= minimo:
+                return nivel
+        return NIVEIS_FIDELIDADE[-1][1]
+
+    @property
+    def total_gasto(self):
+        """Total gasto em reais."""
+        return (self.total_gasto_centavos or 0) / 100
+
+    @property
+    def nivel_fidelidade(self):
+        return Cliente.nivel_para(self.total_gasto)
+
+    def resumo_compras(self):
+        """Histórico do cliente em uma linha, a partir dos contadores (sem ler os pedidos)."""
+        ultima = self.ultima_compra.strftime('%d/%m/%Y') if self.ultima_compra else 'nunca'
+        return (f"{self.historico_compras or 0} pedidos, R${self.total_gasto or 0:.2f} em compras, "
+                f"última compra: {ultima}, nível {self.nivel_fidelidade}")
+
+    @staticmethod
+    @operacao
+    def registrar_compra(session, cliente_id, total_centavos, data_hora):
+        """Soma um pedido aos contadores do cliente, com um UPDATE atômico na transação corrente."""
+        session.execute(
+            Cliente.__table__.update()
+            .where(Cliente.id == cliente_id)
+            .values(historico_compras=func.coalesce(Cliente.historico_compras, 0) + 1,
+                    total_gasto_centavos=func.coalesce(Cliente.total_gasto_centavos, 0) + total_centavos,
+                    ultima_compra=case((Cliente.ultima_compra > data_hora, Cliente.ultima_compra), else_=data_hora))
+        )
+
+    @staticmethod
+    @operacao
+    def reconstruir_historico(session):
+        """Recalcula os contadores de todos os clientes a partir dos pedidos finalizados, inclusive os arquivados."""
+        from farmasil.arquivamento import historico_arquivado
+        session.execute(Cliente.recalculo_historico())
+        arquivado = historico_arquivado(session)
+        if arquivado:
+            clientes = Cliente.__table__
+            ultima = bindparam('_ultima', type_=DateTime)
+            session.execute(
+                clientes.update().where(clientes.c.id == bindparam('_id')).values(
+                    historico_compras=clientes.c.historico_compras + bindparam('_quantidade'),
+                    total_gasto_centavos=clientes.c.total_gasto_centavos + bindparam('_total'),
+                    ultima_compra=case((clientes.c.ultima_compra > ultima, clientes.c.ultima_compra), else_=ultima)),
+                [{'_id': cliente_id, '_quantidade': quantidade, '_total': total, '_ultima': ultima_compra}
+                 for cliente_id, (quantidade, total, ultima_compra) in arquivado.items()])
+        confirmar(session)
+
+    @staticmethod
+    def recalculo_historico():
+        """UPDATE que recalcula os contadores com subconsultas correlacionadas (pelo índice de cliente_id)."""
+        finalizados = Pedido.__table__.alias('p')
+        itens = ItensPedido.__table__.alias('i')
+        de_cliente = and_(finalizados.c.cliente_id == Cliente.id, finalizados.c.status == "Finalizado")
+        return Cliente.__table__.update().values(
+            historico_compras=select(func.count(finalizados.c.id)).where(de_cliente).scalar_subquery(),
+            total_gasto_centavos=select(func.coalesce(func.sum(itens.c.quantidade * itens.c.preco_centavos), 0))
+            .select_from(finalizados.join(itens, itens.c.pedido_id == finalizados.c.id))
+            .where(de_cliente).scalar_subquery(),
+            ultima_compra=select(func.max(finalizados.c.data_hora)).where(de_cliente).scalar_subquery(),
+        )
+
+    @operacao
+    def adicionar_cliente(self, session):
+        """Adiciona um cliente ao banco de dados."""
+        session.add(self)
+        confirmar(session)
+        print(f"Cliente {self.nome} adicionado com sucesso!")
+
+    @operacao
+    def remover_cliente(self, session):
+        """Remove um cliente do banco de dados."""
+        session.delete(self)
+        confirmar(session)
+        print(f"Cliente {self.nome} removido com sucesso!")
+
+    @operacao
+    def atualizar_dados_cliente(self, session, nome=None, telefone=None, email=None, endereco=None):
+        """Atualiza os dados do cliente."""
+        if nome:
+            self.nome = nome
+        if telefone:
+            self.telefone = telefone
+        if email:
+            self.email = email
+        if endereco:
+            self.endereco = endereco
+        confirmar(session)
+        print(f"Dados do cliente {self.nome} atualizados com sucesso!")
+
+class Funcionario(Base):
+    __tablename__ = 'funcionarios'
+    
+    id = Column(Integer, primary_key=True)
+    nome = Column(String, nullable=False)
+    cargo = Column(String, nullable=False)
+    salario_centavos = Column(Integer, nullable=False)  # mensal
+    turno = Column(String, nullable=False)
+    data_admissao = Column(Date, nullable=False, default=date.today)
+    loja_id = Column(Integer, ForeignKey('lojas.id'), index=True)
+    horas_trab = Column(Float, default=0)
+
+    loja = relationship("Loja", back_populates="funcionarios")
+
+    @property
+    def salario(self):
+        """Salário mensal em reais."""
+        return self.salario_centavos / 100
+
+    @salario.setter
+    def salario(self, valor):
+        self.salario_centavos = para_centavos(valor)
+
+    @operacao
+    def adicionar_funcionario(self, session):
+        """Adiciona o funcionário no banco de dados."""
+        session.add(self)
+        confirmar(session)
+        print(f"Funcionário {self.nome} adicionado com sucesso!")
+
+    @operacao
+    def remover_funcionario(self, session):
+        """Remove o funcionário do banco de dados."""
+        session.delete(self)
+        confirmar(session)
+        print(f"Funcionário {self.nome} removido com sucesso.")
+
+    @operacao
+    def atualizar_dados(self, session, **kwargs):
+        """Atualiza os dados do funcionário."""
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        confirmar(session)
+        print(f"Dados do funcionário {self.nome} atualizados com sucesso.")
+
+    @operacao
+    def registrar_horas(self, session, horas, data=None):
+        """Lança horas trabalhadas no ponto (na loja atual do funcionário) e soma ao total acumulado.
+
+        O ponto só recebe inclusões: para corrigir um lançamento, registre horas negativas.
+        """
+        data = data or date.today()
+        session.add(RegistroPonto(funcionario_id=self.id, loja_id=self.loja_id, data=data, horas=horas))
+        session.execute(
+            Funcionario.__table__.update()
+            .where(Funcionario.id == self.id)
+            .values(horas_trab=func.coalesce(Funcionario.horas_trab, 0) + horas)
+        )
+        confirmar(session)
+        session.expire(self, ['horas_trab'])
+        print(f"{horas} horas registradas para {self.nome} em {data}. Total de horas: {self.horas_trab}.")
+
+    @operacao
+    def horas_no_periodo(self, session, inicio, fim):
+        """Horas lançadas no ponto de `inicio` até `fim` (exclusivo)."""
+        return session.query(func.coalesce(func.sum(RegistroPonto.horas), 0.0)).filter(
+            RegistroPonto.funcionario_id == self.id, RegistroPonto.data >= inicio, RegistroPonto.data < fim
+        ).scalar()
+
+    @operacao
+    def gerar_relatorio_funcionario(self, session, inicio=None, fim=None):
+        """Gera um relatório detalhado do funcionário, com as horas do período lidas do ponto.
+
+        Sem período, usa o mês corrente.
+        """
+        from farmasil.folha import HORAS_MENSAIS, periodo_do_mes
+        if inicio is None:
+            hoje = date.today()
+            inicio, fim = periodo_do_mes(hoje.year, hoje.month)
+        horas = self.horas_no_periodo(session, inicio, fim)
+        dias = session.query(func.count(func.distinct(RegistroPonto.data))).filter(
+            RegistroPonto.funcionario_id == self.id, RegistroPonto.data >= inicio, RegistroPonto.data < fim
+        ).scalar()
+        relatorio = f"""
+        Relatório do Funcionário:
+        Nome: {self.nome}
+        Cargo: {self.cargo}
+        Salário: R${self.salario:.2f}
+        Turno: {self.turno}
+        Data de Admissão: {self.data_admissao}
+        Loja ID: {self.loja_id}
+        Período: {inicio} a {fim - timedelta(days=1)}
+        Dias com Ponto: {dias}
+        Horas Trabalhadas no Período: {horas:.2f}
+        Horas Extras no Período: {max(horas - HORAS_MENSAIS, 0.0):.2f}
+        Horas Trabalhadas (total): {self.horas_trab}
+        """
+        print(relatorio)
+        return relatorio
+
+class RegistroPonto(Base):
+    """Lançamento de horas no ponto. Nunca é alterado nem removido depois de gravado."""
+    __tablename__ = 'registros_ponto'
+    __table_args__ = (
+        # Folha do período (todas as lojas) e relatório de um funcionário
+        Index('ix_registros_ponto_data_funcionario', 'data', 'funcionario_id'),
+        Index('ix_registros_ponto_funcionario_data', 'funcionario_id', 'data'),
+    )
+    id = Column(Integer, primary_key=True)
+    funcionario_id = Column(Integer, ForeignKey('funcionarios.id'), nullable=False)
+    loja_id = Column(Integer, ForeignKey('lojas.id'))  # loja em que as horas foram trabalhadas
+    data = Column(Date, nullable=False)
+    horas = Column(Float, nullable=False)  # negativo num lançamento de correção
+    registrado_em = Column(DateTime, nullable=False, default=datetime.now)
+
+@event.listens_for(RegistroPonto, 'before_update')
+@event.listens_for(RegistroPonto, 'before_delete')
+def _ponto_somente_inclusao(mapper, connection, registro):
+    raise ValueError("Lançamentos de ponto não podem ser alterados nem removidos; lance horas negativas para corrigir.")
+
+class EstoqueInsuficiente(Exception):
+    """Um ou mais produtos não têm estoque para a reserva pedida."""
+
+    def __init__(self, produto_ids):
+        super().__init__(f"Estoque insuficiente para os produtos {produto_ids}.")
+        self.produto_ids = produto_ids
+
+# Linha de um pedido já gravado, desacoplada da sessão
+class ItemResultado(namedtuple('ItemResultado', ['produto_id', 'nome', 'quantidade', 'preco_centavos'])):
+    __slots__ = ()
+
+    @property
+    def preco(self):
+        return self.preco_centavos / 100
+
+@dataclass
+class ResultadoPedido:
+    """Resultado estruturado de um checkout."""
+    pedido_id: int = None
+    cliente_nome: str = None
+    data_hora: datetime = None
+    total_centavos: int = 0
+    itens: list = field(default_factory=list)
+    nao_encontrados: list = field(default_factory=list)
+    sem_estoque: list = field(default_factory=list)
+    # Nome não encontrado -> produtos com nome parecido (farmasil.busca), para o terminal oferecer
+    sugestoes: dict = field(default_factory=dict)
+    erro: str = None
+
+    @property
+    def total(self):
+        """Total do pedido em reais."""
+        return self.total_centavos / 100
+
+    @property
+    def sucesso(self):
+        return self.pedido_id is not None
+
+class Pedido(Base):
+    __tablename__ = 'pedidos'
+    id = Column(Integer, primary_key=True)
+    cliente_id = Column(Integer, ForeignKey('clientes.id'), index=True)
+    funcionario_id = Column(Integer, nullable=False)
+    status = Column(String, default="Pendente")
+    data_hora = Column(DateTime, default=datetime.now, index=True)  # janela de reemissão das notas
+    cliente = relationship('Cliente', back_populates='pedidos')
+    itens = relationship("ItensPedido", back_populates="pedido")
+
+    @staticmethod
+    @operacao
+    def finalizar_pedido(session, cliente_id, funcionario_id, itens):
+        """Realiza o checkout de um carrinho em uma única transação.
+
+        Cada item é um dict com 'nome' e 'quantidade' e, opcionalmente, o 'produto'
+        já carregado pelo menu. Os nomes ainda não resolvidos vêm do cache de
+        produtos ou de uma única consulta, e o pedido, seus itens e a baixa de estoque são gravados
+        juntos. O cache só resolve nomes em ids: o saldo é decidido pela baixa
+        (reservar_estoque) e o preço cobrado é o que ela devolve. Retorna um
+        ResultadoPedido em vez de imprimir; um carrinho com quantidade zero ou
+        negativa, ou com algum produto sem saldo, é recusado inteiro, sem gravar nada.
+        """
+        resultado = ResultadoPedido()
+        invalidos = [item['nome'] for item in itens if item['quantidade'] <= 0]
+        if invalidos:
+            resultado.erro = f"Quantidade inválida (deve ser positiva) para: {', '.join(invalidos)}."
+            return resultado
+        cliente = session.get(Cliente, cliente_id)
+        if not cliente:
+            resultado.erro = "Cliente não encontrado."
+            return resultado
+        resultado.cliente_nome = cliente.nome
+
+        # Consolida linhas repetidas e aproveita os produtos que o menu já carregou
+        quantidades = {}
+        produtos = {}
+        for item in itens:
+            nome = item['nome']
+            quantidades[nome] = quantidades.get(nome, 0) + item['quantidade']
+            if item.get('produto') is not None:
+                produtos.setdefault(nome, item['produto'])
+
+        faltantes = [nome for nome in quantidades if nome not in produtos]
+        if faltantes:
+            for nome, produto in Produto.por_nomes(session, faltantes).items():
+                produtos.setdefault(nome, produto)
+
+        # O estoque e o preço vêm da baixa, não do cache (que pode estar até um TTL atrasado)
+        carrinho = []
+        baixas = {}
+        nomes = {}
+        for nome, quantidade in quantidades.items():
+            produto = produtos.get(nome)
+            if not produto:
+                resultado.nao_encontrados.append(nome)
+                continue
+            carrinho.append((produto, quantidade))
+            baixas[produto.id] = baixas.get(produto.id, 0) + quantidade
+            nomes[produto.id] = nome
+
+        if resultado.nao_encontrados:
+            from farmasil.busca import buscar_produtos
+            for nome in resultado.nao_encontrados:
+                resultado.sugestoes[nome] = buscar_produtos(session, nome, limite=LIMITE_SUGESTOES)
+
+        if not carrinho:
+            resultado.erro = "Nenhum produto válido foi adicionado ao pedido."
+            return resultado
+
+        pedido = Pedido(
+            cliente_id=cliente_id,
+            funcionario_id=funcionario_id,
+            status="Finalizado"
+        )
+        try:
+            session.add(pedido)
+            session.flush()
+            precos = Produto.reservar_estoque(session, baixas)
+            # Itens vão em um executemany, sem ida e volta por linha
+            itens_pedido = [{'pedido_id': pedido.id, 'produto_id': produto.id, 'quantidade': quantidade,
+                             'preco_centavos': precos[produto.id]} for produto, quantidade in carrinho]
+            session.execute(ItensPedido.__table__.insert(), itens_pedido)
+            total_centavos = sum(item['quantidade'] * item['preco_centavos'] for item in itens_pedido)
+            # No banco de uma loja (modo fragmentado) os contadores ficam para o recálculo da rede
+            if session.info.get('loja_id') is None:
+                Cliente.registrar_compra(session, cliente_id, total_centavos, pedido.data_hora)
+            confirmar(session)
+            # Em group commit não há commit para expirar o cliente
+            session.expire(cliente, ['historico_compras', 'total_gasto_centavos', 'ultima_compra'])
+        except EstoqueInsuficiente as erro:
+            # Sem saldo (ou outro terminal levou o estoque): nada do carrinho fica gravado
+            desfazer(session)
+            resultado.sem_estoque = [nomes[produto_id] for produto_id in erro.produto_ids if produto_id in nomes]
+            resultado.erro = "Estoque insuficiente. O pedido foi cancelado."
+            return resultado
+        except Exception:
+            desfazer(session)
+            raise
+        resultado.total_centavos = total_centavos
+        resultado.itens = [ItemResultado(produto.id, produto.nome, quantidade, precos[produto.id])
+                           for produto, quantidade in carrinho]
+        resultado.pedido_id = pedido.id
+        resultado.data_hora = pedido.data_hora
+        return resultado
+
+    @staticmethod
+    @operacao
+    def realizar_pedido(session, cliente_id, funcionario_id, itens):
+        resultado = Pedido.finalizar_pedido(session, cliente_id, funcionario_id, itens)
+
+        for nome_produto in resultado.nao_encontrados:
+            print(f"Produto '{nome_produto}' não encontrado. O pedido não poderá ser realizado.")
+            parecidos = resultado.sugestoes.get(nome_produto)
+            if parecidos:
+                print(f"  Você quis dizer: {', '.join(produto.nome for produto in parecidos)}?")
+        for nome_produto in resultado.sem_estoque:
+            print(f"Estoque insuficiente para o produto '{nome_produto}'.")
+
+        if not resultado.sucesso:
+            print(resultado.erro)
+            return resultado
+
+        print(f"Pedido realizado com sucesso! Total: R${resultado.total:.2f}")
+
+        # Gerar nota fiscal
+        opcao = input("Deseja gerar nota fiscal? (S/N): ").strip().upper()
+        if opcao == 'S':
+            Pedido.gerar_nota_fiscal(session, resultado.pedido_id, resultado.cliente_nome, resultado.total,
+                                     resultado.itens, resultado.data_hora)
+        return resultado
+
+    @staticmethod
+    @operacao
+    def gerar_nota_fiscal(session, pedido_id, cliente_nome, total, itens, data_hora=None):
+        """Grava a nota do pedido em segundo plano; o checkout não espera pelo disco.
+
+        O arquivo gravado (ou o erro da gravação) é informado quando a gravação termina.
+        """
+        from farmasil.notas import DadosNota, emitir_em_segundo_plano
+        # ItemResultado já traz o nome; outros itens são resolvidos pelo cache
+        itens = [ItemResultado(item.produto_id, getattr(item, 'nome', None) or Produto.por_id(session, item.produto_id).nome,
+                               item.quantidade, item.preco_centavos) for item in itens]
+
+        def avisar(caminho, erro):
+            if erro is None:
+                print(f"Nota fiscal gerada: {caminho}")
+            else:
+                print(f"Não foi possível gravar a nota fiscal do pedido {pedido_id}: {erro}")
+        return emitir_em_segundo_plano(DadosNota(pedido_id, cliente_nome, data_hora or datetime.now(), total, itens),
+                                       avisar=avisar)
+
+    @staticmethod
+    @operacao
+    def consultar_pedidos_cliente(session, cliente_id):
+        """Consultar todos os pedidos de um cliente específico, inclusive os arquivados."""
+        from farmasil.arquivamento import consultar
+        pedidos = list(consultar(session, select(Pedido.id, Pedido.status)
+                                 .where(Pedido.cliente_id == cliente_id).order_by(Pedido.id)))
+        if pedidos:
+            print(f"Pedidos do cliente com ID {cliente_id}:")
+            for pedido in pedidos:
+                print(f"- Pedido ID: {pedido.id}, Status: {pedido.status}")
+        else:
+            print(f"Nenhum pedido encontrado para o cliente com ID {cliente_id}.")
+        return pedidos
+
+class ItensPedido(Base):
+    __tablename__ = 'itens_pedido'
+    id = Column(Integer, primary_key=True)
+    pedido_id = Column(Integer, ForeignKey('pedidos.id'), index=True)
+    produto_id = Column(Integer, ForeignKey('produtos.id'), index=True)
+    quantidade = Column(Integer, nullable=False)
+    preco_centavos = Column(Integer, nullable=False)  # preço unitário na hora da venda
+
+    pedido = relationship("Pedido", back_populates="itens")
+    produto = relationship("Produto", back_populates="itens_pedido")
+
+    @property
+    def preco(self):
+        return self.preco_centavos / 100
+
+class Caixa(Base):
+    """Caixa de uma loja, com livro-caixa somente de inclusão.
+
+    O saldo não é guardado em uma coluna mutável: é o último checkpoint mais a
+    soma dos movimentos lançados depois dele. Um checkpoint é gravado a cada
+    INTERVALO_CHECKPOINT movimentos e em todo fechamento, então consultar o
+    saldo lê no máximo esse número de linhas, por maior que seja o histórico.
+    """
+    __tablename__ = 'caixas'
+    id = Column(Integer, primary_key=True)
+    registros = relationship("RegistroCaixa", backref="caixa")
+    sessoes = relationship("SessaoCaixa", back_populates="caixa")
+
+    def sessao_aberta(self, session):
+        """Retorna a sessão de caixa em aberto, ou None se o caixa estiver fechado."""
+        return (session.query(SessaoCaixa)
+                .filter(SessaoCaixa.caixa_id == self.id, SessaoCaixa.fechada_em.is_(None))
+                .order_by(SessaoCaixa.id.desc()).first())
+
+    def _saldo_e_pendentes(self, session):
+        """(saldo, movimentos após o último checkpoint, id do último movimento), em centavos."""
+        checkpoint = (session.query(CheckpointCaixa.registro_id, CheckpointCaixa.saldo_centavos)
+                      .filter(CheckpointCaixa.caixa_id == self.id)
+                      .order_by(CheckpointCaixa.registro_id.desc()).first())
+        registro_id, saldo = checkpoint if checkpoint else (0, 0)
+        delta, pendentes, ultimo = session.query(
+            func.coalesce(func.sum(RegistroCaixa.valor_centavos), 0),
+            func.count(RegistroCaixa.id),
+            func.max(RegistroCaixa.id)
+        ).filter(RegistroCaixa.caixa_id == self.id, RegistroCaixa.id > registro_id).one()
+        return saldo + delta, pendentes, ultimo or registro_id
+
+    def saldo_centavos(self, session):
+        """Saldo atual em centavos: último checkpoint + movimentos posteriores."""
+        return self._saldo_e_pendentes(session)[0]
+
+    def _gravar_checkpoint(self, session, forcar=False):
+        saldo, pendentes, ultimo = self._saldo_e_pendentes(session)
+        if pendentes and (forcar or pendentes >= INTERVALO_CHECKPOINT):
+            session.add(CheckpointCaixa(caixa_id=self.id, registro_id=ultimo, saldo_centavos=saldo))
+        return saldo
+
+    def _lancar(self, session, tipo, centavos):
+        sessao = self.sessao_aberta(session)
+        if sessao is None:
+            print("Caixa fechado. Abra o caixa antes de registrar movimentos.")
+            return None
+        registro = RegistroCaixa(tipo=tipo, valor_centavos=centavos, caixa_id=self.id, sessao_id=sessao.id)
+        session.add(registro)
+        session.flush()
+        self._gravar_checkpoint(session)
+        confirmar(session)
+        return registro
+
+    @operacao
+    def abrir_caixa(self, session):
+        """Abre uma nova sessão de caixa partindo do saldo atual."""
+        if self.sessao_aberta(session) is not None:
+            print("O caixa já está aberto.")
+            return None
+        saldo = self.saldo_centavos(session)
+        sessao = SessaoCaixa(caixa_id=self.id, saldo_abertura_centavos=saldo)
+        session.add(sessao)
+        confirmar(session)
+        print(f"Caixa aberto. Saldo inicial: R${saldo / 100:.2f}")
+        return sessao
+
+    @operacao
+    def registrar_entrada(self, session, valor):
+        centavos = para_centavos(valor)
+        if centavos <= 0:
+            print("Valor de entrada inválido.")
+            return
+        registro = self._lancar(session, "Entrada", centavos)
+        if registro:
+            print(f"Entrada de R${centavos / 100:.2f} registrada com sucesso.")
+        return registro
+
+    @operacao
+    def registrar_saida(self, session, valor):
+        centavos = para_centavos(valor)
+        if centavos <= 0:
+            print("Valor de saída inválido.")
+            return
+        if self.saldo_centavos(session) < centavos:
+            print("Saldo insuficiente para realizar a saída.")
+            return
+        registro = self._lancar(session, "Saída", -centavos)
+        if registro:
+            print(f"Saída de R${centavos / 100:.2f} registrada com sucesso.")
+        return registro
+
+    @operacao
+    def consultar_saldo(self, session):
+        saldo = self.saldo_centavos(session)
+        print(f"Saldo atual do caixa: R${saldo / 100:.2f}")
+        return saldo
+
+    @operacao
+    def fechar_caixa(self, session):
+        """Encerra a sessão aberta registrando o saldo final; o histórico é mantido."""
+        sessao = self.sessao_aberta(session)
+        if sessao is None:
+            print("O caixa já está fechado.")
+            return None
+        saldo = self._gravar_checkpoint(session, forcar=True)
+        sessao.fechada_em = datetime.now()
+        sessao.saldo_fechamento_centavos = saldo
+        confirmar(session)
+        print(f"Caixa fechado. Saldo final: R${saldo / 100:.2f}")
+        return sessao
+
+    @operacao
+    def conciliar(self, session, inicio, fim):
+        """Totais de entradas e saídas em [inicio, fim), com uma varredura pelo índice de data.
+
+        Retorna {tipo: (quantidade, centavos)}, somando os meses arquivados do período.
+        """
+        from farmasil.arquivamento import consultar
+        consulta = select(
+            RegistroCaixa.tipo,
+            func.count(RegistroCaixa.id),
+            func.coalesce(func.sum(RegistroCaixa.valor_centavos), 0)
+        ).where(
+            RegistroCaixa.caixa_id == self.id,
+            RegistroCaixa.data_hora >= inicio,
+            RegistroCaixa.data_hora < fim
+        ).group_by(RegistroCaixa.tipo)
+        totais = {}
+        for tipo, quantidade, centavos in consultar(session, consulta, inicio, fim):
+            anterior_quantidade, anterior_centavos = totais.get(tipo, (0, 0))
+            totais[tipo] = (anterior_quantidade + quantidade, anterior_centavos + centavos)
+        return totais
+
+class SessaoCaixa(Base):
+    """Período entre a abertura e o fechamento de um caixa."""
+    __tablename__ = 'sessoes_caixa'
+    __table_args__ = (Index('ix_sessoes_caixa_caixa_aberta', 'caixa_id', 'fechada_em'),)
+    id = Column(Integer, primary_key=True)
+    caixa_id = Column(Integer, ForeignKey('caixas.id'), nullable=False)
+    aberta_em = Column(DateTime, nullable=False, default=datetime.now)
+    fechada_em = Column(DateTime)
+    saldo_abertura_centavos = Column(Integer, nullable=False, default=0)
+    saldo_fechamento_centavos = Column(Integer)
+    caixa = relationship("Caixa", back_populates="sessoes")
+
+class RegistroCaixa(Base):
+    """Movimento do livro-caixa. Nunca é alterado nem removido depois de gravado."""
+    __tablename__ = 'registros_caixa'
+    __table_args__ = (
+        Index('ix_registros_caixa_caixa_data', 'caixa_id', 'data_hora'),
+        Index('ix_registros_caixa_caixa_id', 'caixa_id', 'id'),
+    )
+    id = Column(Integer, primary_key=True)
+    tipo = Column(String, nullable=False)  # "Entrada" ou "Saída"
+    valor_centavos = Column(Integer, nullable=False)  # positivo na entrada, negativo na saída
+    caixa_id = Column(Integer, ForeignKey('caixas.id'), nullable=False)
+    sessao_id = Column(Integer, ForeignKey('sessoes_caixa.id'))
+    data_hora = Column(DateTime, nullable=False, default=datetime.now)  # Registrar a data e hora da operação
+
+    @property
+    def valor(self):
+        """Valor do movimento em reais, sem sinal."""
+        return abs(self.valor_centavos) / 100
+
+class CheckpointCaixa(Base):
+    """Saldo do caixa conferido até um movimento (inclusive)."""
+    __tablename__ = 'checkpoints_caixa'
+    __table_args__ = (Index('ix_checkpoints_caixa_caixa_registro', 'caixa_id', 'registro_id'),)
+    id = Column(Integer, primary_key=True)
+    caixa_id = Column(Integer, ForeignKey('caixas.id'), nullable=False)
+    registro_id = Column(Integer, ForeignKey('registros_caixa.id'), nullable=False)
+    saldo_centavos = Column(Integer, nullable=False)
+    criado_em = Column(DateTime, nullable=False, default=datetime.now)
+
+@event.listens_for(RegistroCaixa, 'before_update')
+@event.listens_for(RegistroCaixa, 'before_delete')
+def _livro_caixa_somente_inclusao(mapper, connection, registro):
+    raise ValueError("Movimentos de caixa não podem ser alterados nem removidos; lance um movimento de estorno.")
+
+class Fornecedor(Base):
+    __tablename__ = 'fornecedores'
+    
+    id = Column(Integer, primary_key=True)
+    nome = Column(String, nullable=False)
+    cnpj = Column(String, unique=True, nullable=False)
+    telefone = Column(String, nullable=False)
+    endereco = Column(String, nullable=False)
+    prazo_entrega = Column(Integer, nullable=False, default=PRAZO_ENTREGA_PADRAO)  # dias (ver farmasil.reposicao)
+    produtos = relationship("Produto", back_populates="fornecedor_relacionado")  
+
+    def __init__(self, nome, cnpj, telefone, endereco, prazo_entrega=PRAZO_ENTREGA_PADRAO):
+        self.nome = nome
+        self.cnpj = cnpj
+        self.telefone = telefone
+        self.endereco = endereco
+        self.prazo_entrega = prazo_entrega
+
+    @operacao
+    def adicionar_fornecedor(self, session):
+        """Adiciona um novo fornecedor ao banco de dados."""
+        session.add(self)
+        confirmar(session)
+        print(f"Fornecedor {self.nome} adicionado com sucesso!")
+
+    @operacao
+    def remover_fornecedor(self, session):
+        """Remove o fornecedor; os produtos dele ficam sem fornecedor."""
+        session.delete(self)
+        confirmar(session)
+        print(f"Fornecedor {self.nome} removido com sucesso!")
+
+    @operacao
+    def atualizar_dados_fornecedor(self, session, nome=None, telefone=None, endereco=None, prazo_entrega=None):
+        """Atualiza os dados de um fornecedor."""
+        if nome:
+            self.nome = nome
+        if telefone:
+            self.telefone = telefone
+        if endereco:
+            self.endereco = endereco
+        if prazo_entrega is not None:
+            self.prazo_entrega = prazo_entrega
+        confirmar(session)
+        print(f"Dados do fornecedor {self.nome} atualizados com sucesso!")
+
+    @operacao
+    def consultar_dados_fornecedor(self, session):
+        """Consulta os dados de um fornecedor específico."""
+        print(f"Fornecedor ID {self.id}: {self.nome}, CNPJ: {self.cnpj}, Telefone: {self.telefone}, Endereço: {self.endereco}, "
+              f"Prazo de entrega: {self.prazo_entrega} dias")
+
+    @staticmethod
+    @operacao
+    def listar_fornecedores(session):
+        """Lista todos os fornecedores cadastrados."""
+        fornecedores = (session.query(Fornecedor.id, Fornecedor.nome, Fornecedor.cnpj, Fornecedor.telefone)
+                        .order_by(Fornecedor.id).yield_per(LOTE_LISTAGEM))
+        encontrou = False
+        for fornecedor in fornecedores:
+            encontrou = True
+            print(f"Fornecedor ID {fornecedor.id}: {fornecedor.nome}, CNPJ: {fornecedor.cnpj}, Telefone: {fornecedor.telefone}")
+        if not encontrou:
+            print("Nenhum fornecedor encontrado.")
+
+
+class Produto(Base):
+    __tablename__ = 'produtos'
+    # loja_id sozinho é atendido pelo índice composto (listagem da loja, estoque por categoria)
+    __table_args__ = (Index('ix_produtos_loja_categoria', 'loja_id', 'categoria'),)
+
+    id = Column(Integer, primary_key=True)
+    nome = Column(String, nullable=False, index=True)  # busca do checkout
+    preco_centavos = Column(Integer, nullable=False)
+    categoria = Column(String, nullable=False, index=True)
+    estoque = Column(Integer, default=0)
+    loja_id = Column(Integer, ForeignKey('lojas.id'))  # Relacionamento com Loja
+    fornecedor_id = Column(Integer, ForeignKey('fornecedores.id'), index=True)
+    loja = relationship("Loja", back_populates="produtos")
+    fornecedor_relacionado = relationship("Fornecedor", back_populates="produtos")
+    itens_pedido = relationship("ItensPedido", back_populates="produto")
+
+    def __init__(self, nome, preco, estoque, categoria, loja_id, fornecedor_id):
+        self.nome = nome
+        self.preco = preco
+        self.categoria = categoria
+        self.estoque = estoque
+        self.loja_id = loja_id
+        self.fornecedor_id = fornecedor_id
+
+    @property
+    def preco(self):
+        """Preço em reais."""
+        return self.preco_centavos / 100
+
+    @preco.setter
+    def preco(self, valor):
+        self.preco_centavos = para_centavos(valor)
+
+    @operacao
+    def adicionar_produto(self, session):
+        """Adiciona um novo produto ao banco de dados."""
+        session.add(self)
+        confirmar(session)
+        print(f"Produto {self.nome} adicionado com sucesso!")
+
+    @operacao
+    def ajustar_estoque(self, session, quantidade):
+        """Ajusta o estoque do produto atual."""
+        # Soma feita pelo banco, para não sobrescrever baixas de outros terminais
+        alterados = session.execute(
+            Produto.__table__.update()
+            .where(Produto.id == self.id, Produto.estoque + quantidade >= 0)
+            .values(estoque=Produto.estoque + quantidade)
+            .execution_options(produtos_alterados=(self.id,))
+        ).rowcount
+        confirmar(session)
+        # Em group commit não há commit para expirar o objeto: relê o estoque atual
+        session.expire(self, ['estoque'])
+        if alterados:
+            print(f"Estoque do produto {self.nome} ajustado para {self.estoque} unidades.")
+        else:
+            print(f"Estoque insuficiente para o produto {self.nome}. Disponível: {self.estoque}.")
+        return bool(alterados)
+
+    @staticmethod
+    @operacao
+    def reservar_estoque(session, quantidades):
+        """Baixa o estoque de vários produtos de forma atômica e retorna {produto_id: preco_centavos}.
+
+        `quantidades` mapeia produto_id -> quantidade. A verificação `estoque >= q`
+        e a baixa são um único UPDATE condicional; se algum produto não tiver
+        saldo, levanta EstoqueInsuficiente e nada deve ser confirmado (o chamador
+        faz o rollback da transação). Quantidades devem ser positivas: uma baixa
+        negativa aumentaria o estoque. O preço vem do mesmo UPDATE (RETURNING),
+        não do cache: é o preço da linha no momento da baixa.
+        """
+        if not quantidades:
+            return {}
+        if any(quantidade <= 0 for quantidade in quantidades.values()):
+            raise ValueError("As quantidades reservadas devem ser positivas.")
+        pedida = case(quantidades, value=Produto.id)
+        baixa = (
+            Produto.__table__.update()
+            .where(Produto.id.in_(list(quantidades)), Produto.estoque >= pedida)
+            .values(estoque=Produto.estoque - pedida)
+            .execution_options(produtos_alterados=tuple(quantidades))
+        )
+        if session.get_bind().dialect.update_returning:
+            precos = dict(session.execute(baixa.returning(Produto.id, Produto.preco_centavos)).all())
+            alterados = len(precos)
+        else:
+            alterados = session.execute(baixa).rowcount
+            precos = dict(session.execute(
+                select(Produto.id, Produto.preco_centavos).where(Produto.id.in_(list(quantidades)))).all())
+        if alterados != len(quantidades):
+            # Nova leitura dentro da mesma transação, só para apontar quem faltou
+            disponiveis = dict(
+                session.query(Produto.id, Produto.estoque).filter(Produto.id.in_(list(quantidades)))
+            )
+            faltando = [produto_id for produto_id, quantidade in quantidades.items()
+                        if (disponiveis.get(produto_id) or 0) < quantidade]
+            raise EstoqueInsuficiente(faltando or list(quantidades))
+        return precos
+
+    @staticmethod
+    @operacao
+    def liberar_estoque(session, quantidades):
+        """Devolve ao estoque quantidades reservadas (ex.: pedido cancelado)."""
+        if not quantidades:
+            return
+        devolvida = case(quantidades, value=Produto.id)
+        session.execute(
+            Produto.__table__.update()
+            .where(Produto.id.in_(list(quantidades)))
+            .values(estoque=Produto.estoque + devolvida)
+            .execution_options(produtos_alterados=tuple(quantidades))
+        )
+
+    @staticmethod
+    @operacao
+    def por_id(session, produto_id):
+        """Retorna o ProdutoEmCache do id informado (ou None), consultando o banco só na falta."""
+        banco = session.get_bind().engine
+        produto = cache_produtos.obter((banco, 'id', produto_id))
+        if produto is None:
+            versao = cache_produtos.versao
+            linha = session.query(*Produto._colunas_cache()).filter(Produto.id == produto_id).first()
+            if linha is None:
+                return None
+            produto = _guardar_no_cache(banco, linha, versao)
+        return produto
+
+    @staticmethod
+    @operacao
+    def por_ids(session, produto_ids):
+        """Resolve vários ids de uma vez: {id: ProdutoEmCache} só dos encontrados, com uma consulta para os que
+        não estão no cache."""
+        banco = session.get_bind().engine
+        encontrados = {}
+        faltantes = set()
+        for produto_id in produto_ids:
+            produto = cache_produtos.obter((banco, 'id', produto_id))
+            if produto is None:
+                faltantes.add(produto_id)
+            else:
+                encontrados[produto_id] = produto
+        if faltantes:
+            versao = cache_produtos.versao
+            for linha in session.query(*Produto._colunas_cache()).filter(Produto.id.in_(faltantes)):
+                encontrados[linha.id] = _guardar_no_cache(banco, linha, versao)
+        return encontrados
+
+    @staticmethod
+    @operacao
+    def por_nome(session, nome):
+        """Retorna o ProdutoEmCache com o nome informado (o de menor id, se houver repetidos) ou None."""
+        return Produto.por_nomes(session, [nome]).get(nome)
+
+    @staticmethod
+    @operacao
+    def por_nomes(session, nomes):
+        """Resolve vários nomes de uma vez: {nome: ProdutoEmCache} só dos encontrados.
+
+        Os nomes que não estão no cache são buscados com uma única consulta.
+        """
+        banco = session.get_bind().engine
+        encontrados = {}
+        faltantes = {}
+        for nome in nomes:
+            chave = normalizar_nome(nome)
+            produto_id = cache_produtos.obter((banco, 'nome', chave))
+            produto = cache_produtos.obter((banco, 'id', produto_id)) if produto_id is not None else None
+            # O nome pode ter mudado depois de entrar no cache
+            if produto is not None and normalizar_nome(produto.nome) == chave:
+                encontrados[nome] = produto
+            else:
+                faltantes.setdefault(chave, []).append(nome)
+        if faltantes:
+            versao = cache_produtos.versao
+            consulta = (session.query(*Produto._colunas_cache())
+                        .filter(Produto.nome.in_(list(faltantes))).order_by(Produto.id))
+            for linha in consulta:
+                for nome in faltantes.pop(normalizar_nome(linha.nome), ()):
+                    encontrados[nome] = _guardar_no_cache(banco, linha, versao, por_nome=True)
+        return encontrados
+
+    @staticmethod
+    def _colunas_cache():
+        return (Produto.id, Produto.nome, Produto.preco_centavos, Produto.categoria, Produto.estoque,
+                Produto.loja_id, Produto.fornecedor_id)
+
+    @staticmethod
+    @operacao
+    def alterar_preco(session, produto_id, novo_preco):
+        """Altera o preço de um produto específico, sem carregá-lo antes."""
+        alterados = session.execute(
+            update(Produto)
+            .where(Produto.id == produto_id)
+            .values(preco_centavos=para_centavos(novo_preco))
+            .execution_options(produtos_alterados=(produto_id,))
+        ).rowcount
+        confirmar(session)
+        if alterados:
+            print(f"Preço do produto ID {produto_id} atualizado para R${novo_preco:.2f}.")
+        else:
+            print(f"Produto ID {produto_id} não encontrado.")
+        return bool(alterados)
+
+    @staticmethod
+    @operacao
+    def remover_produto(session, produto_id):
+        """Remove um produto do cadastro."""
+        produto = session.get(Produto, produto_id)
+        if produto is None:
+            print(f"Produto ID {produto_id} não encontrado.")
+            return False
+        session.delete(produto)
+        confirmar(session)
+        print(f"Produto ID {produto_id} removido com sucesso!")
+        return True
+
+    @staticmethod
+    @operacao
+    def consultar_produto(session, produto_id):
+        """Consulta os detalhes de um produto específico."""
+        produto = Produto.por_id(session, produto_id)
+        if produto:
+            print(f"Detalhes do Produto ID {produto_id}:")
+            print(f"Nome: {produto.nome}")
+            print(f"Preço: R${produto.preco:.2f}")
+            print(f"Estoque: {produto.estoque}")
+            print(f"Loja ID: {produto.loja_id}")
+        else:
+            print(f"Produto ID {produto_id} não encontrado.")
+
+    @staticmethod
+    @operacao
+    def buscar_produtos_por_categoria(session, categoria):
+        """Busca todos os produtos de uma determinada categoria."""
+        produtos = (session.query(Produto.id, Produto.nome, Produto.preco_centavos, Produto.estoque)
+                    .filter_by(categoria=categoria).order_by(Produto.id).yield_per(LOTE_LISTAGEM))
+        encontrou = False
+        for produto in produtos:
+            if not encontrou:
+                encontrou = True
+                print(f"Produtos na categoria {categoria}:")
+            print(f"- Produto ID {produto.id}: {produto.nome}, R${produto.preco_centavos / 100:.2f}, "
+                  f"Estoque: {produto.estoque}")
+        if not encontrou:
+            print(f"Nenhum produto encontrado na categoria {categoria}.")
+
+    @staticmethod
+    @operacao
+    def verificar_estoque(session, produto_id, quantidade):
+        """Verifica se o estoque de um produto é suficiente."""
+        produto = Produto.por_id(session, produto_id)
+        if produto:
+            if produto.estoque >= quantidade:
+                print(f"Estoque suficiente para o produto ID {produto_id}.")
+                return True
+            else:
+                print(f"Estoque insuficiente para o produto ID {produto_id}. Disponível: {produto.estoque}.")
+                return False
+        else:
+            print(f"Produto ID {produto_id} não encontrado.")
+            return False
+
+    @staticmethod
+    @operacao
+    def listar_produtos_loja(session, loja_id):
+        """Lista todos os produtos disponíveis em uma loja específica."""
+        produtos = (session.query(Produto.id, Produto.nome, Produto.preco_centavos, Produto.estoque)
+                    .filter_by(loja_id=loja_id).order_by(Produto.id).yield_per(LOTE_LISTAGEM))
+        encontrou = False
+        for produto in produtos:
+            if not encontrou:
+                encontrou = True
+                print(f"Produtos na Loja ID {loja_id}:")
+            print(f"- Produto ID {produto.id}: {produto.nome}, R${produto.preco_centavos / 100:.2f}, "
+                  f"Estoque: {produto.estoque}")
+        if not encontrou:
+            print(f"Nenhum produto encontrado na Loja ID {loja_id}.")
+
+class ResumoEstoque(Base):
+    """Totais de estoque por loja e categoria, mantidos por triggers (ver farmasil.painel)."""
+    __tablename__ = 'resumo_estoque'
+    loja_id = Column(Integer, primary_key=True)  # 0 para produtos sem loja
+    categoria = Column(String, primary_key=True)
+    unidades = Column(Integer, nullable=False, default=0)
+    skus = Column(Integer, nullable=False, default=0)
+    sem_estoque = Column(Integer, nullable=False, default=0)
+    valor_centavos = Column(Integer, nullable=False, default=0)  # soma de preco_centavos * estoque
+
+class VendaDiaria(Base):
+    """Pedidos, unidades e receita por dia, loja e funcionário (ver farmasil.vendas)."""
+    __tablename__ = 'vendas_diarias'
+    dia = Column(Date, primary_key=True)
+    loja_id = Column(Integer, primary_key=True)  # loja do funcionário; 0 se não houver
+    funcionario_id = Column(Integer, primary_key=True)
+    pedidos = Column(Integer, nullable=False, default=0)
+    unidades = Column(Integer, nullable=False, default=0)
+    receita_centavos = Column(Integer, nullable=False, default=0)
+
+class VendaDiariaProduto(Base):
+    """Unidades e receita por dia, loja e produto; `pedidos` conta os pedidos que levaram o produto."""
+    __tablename__ = 'vendas_diarias_produto'
+    dia = Column(Date, primary_key=True)
+    loja_id = Column(Integer, primary_key=True)
+    produto_id = Column(Integer, primary_key=True)
+    categoria = Column(String, nullable=False)  # categoria do produto quando foi agregado
+    pedidos = Column(Integer, nullable=False, default=0)
+    unidades = Column(Integer, nullable=False, default=0)
+    receita_centavos = Column(Integer, nullable=False, default=0)
+
+class VelocidadeVendas(Base):
+    """Unidades vendidas de cada produto na janela móvel de reposição (ver farmasil.reposicao)."""
+    __tablename__ = 'velocidade_vendas'
+    produto_id = Column(Integer, primary_key=True)
+    unidades = Column(Integer, nullable=False, default=0)
+
+class ProcessamentoReposicao(Base):
+    """Cada atualização da janela de velocidade; a última diz quais dias [inicio, fim) estão somados."""
+    __tablename__ = 'processamentos_reposicao'
+    id = Column(Integer, primary_key=True)
+    inicio = Column(Date, nullable=False)
+    fim = Column(Date, nullable=False)
+    processado_em = Column(DateTime, nullable=False, default=datetime.now)
+
+class ProcessamentoVendas(Base):
+    """Cada atualização dos resumos de vendas; o maior ultimo_pedido_id é a marca d'água."""
+    __tablename__ = 'processamentos_vendas'
+    id = Column(Integer, primary_key=True)
+    ultimo_pedido_id = Column(Integer, nullable=False)
+    pedidos = Column(Integer, nullable=False, default=0)
+    processado_em = Column(DateTime, nullable=False, default=datetime.now)
+
+class ParticaoArquivo(Base):
+    """Mês de pedidos e movimentos de caixa movido para um banco próprio (ver farmasil.arquivamento)."""
+    __tablename__ = 'particoes_arquivo'
+    mes = Column(String, primary_key=True)  # AAAA-MM
+    caminho = Column(String, nullable=False)  # relativo ao diretório do banco principal
+    pedidos = Column(Integer, nullable=False, default=0)
+    itens = Column(Integer, nullable=False, default=0)
+    movimentos = Column(Integer, nullable=False, default=0)
+    atualizado_em = Column(DateTime, nullable=False, default=datetime.now)
+
+# As chaves do cache levam a engine, para bancos diferentes no mesmo processo
+# (outro arquivo, outra loja) não compartilharem produtos com o mesmo id.
+
+def _guardar_no_cache(banco, linha, versao, por_nome=False):
+    produto = ProdutoEmCache(*linha)
+    cache_produtos.guardar((banco, 'id', produto.id), produto, versao)
+    if por_nome:
+        # Só a busca por nome sabe qual é o menor id entre nomes repetidos
+        cache_produtos.guardar((banco, 'nome', normalizar_nome(produto.nome)), produto.id, versao)
+    return produto
+
+def _invalidar_produtos(session, produto_ids):
+    """Tira os produtos do cache agora e de novo no commit/rollback da sessão.
+
+    A segunda invalidação descarta o que outra consulta tenha guardado entre a
+    alteração e o fim da transação (inclusive valores que acabaram desfeitos).
+    """
+    if produto_ids is None:
+        cache_produtos.limpar()
+        session.info['cache_produtos_limpar'] = True
+        return
+    banco = session.get_bind().engine
+    chaves = [(banco, 'id', produto_id) for produto_id in produto_ids]
+    cache_produtos.remover(*chaves)
+    session.info.setdefault('cache_produtos_alterados', set()).update(chaves)
+
+@event.listens_for(Produto, 'after_update')
+@event.listens_for(Produto, 'after_delete')
+def _produto_alterado(mapper, connection, produto):
+    sessao = object_session(produto)
+    if sessao is not None:
+        _invalidar_produtos(sessao, (produto.id,))
+    else:
+        cache_produtos.remover((connection.engine, 'id', produto.id))
+
+@event.listens_for(SessaoORM, 'do_orm_execute')
+def _update_em_produtos(estado):
+    """UPDATE/DELETE direto em `produtos` (ex.: baixas de estoque) não passa pelos eventos do mapper."""
+    if not (estado.is_update or estado.is_delete):
+        return
+    if getattr(getattr(estado.statement, 'table', None), 'name', None) != Produto.__tablename__:
+        return
+    # Sem a opção produtos_alterados não dá para saber quais linhas mudaram: limpa tudo
+    _invalidar_produtos(estado.session, estado.execution_options.get('produtos_alterados'))
+
+@event.listens_for(SessaoORM, 'after_commit')
+@event.listens_for(SessaoORM, 'after_rollback')
+def _fim_da_transacao(sessao):
+    if sessao.info.pop('cache_produtos_limpar', False):
+        cache_produtos.limpar()
+    alterados = sessao.info.pop('cache_produtos_alterados', None)
+    if alterados:
+        cache_produtos.remover(*alterados)
+
+def criar_esquema(engine=None):
+    """Cria o banco ou o leva à versão atual do esquema (etapa explícita de inicialização).
+
+    Retorna as migrações aplicadas; ver farmasil.migracoes.
+    """
+    from farmasil.migracoes import migrar
+    return migrar(engine)
@@ -0,0 +1,155 @@
+"""Emissão de notas fiscais, avulsa ou em lote.
+
+Os dados das notas vêm de uma única consulta (pedidos, clientes, itens e
+produtos juntos), lida em fluxo e agrupada por pedido; o texto é montado a
+partir dos modelos abaixo, sem concatenar string a string. No lote, a
+renderização e a gravação rodam em um pool de threads, e a saída pode ser um
+arquivo por pedido em um diretório ou um único .zip gravado em fluxo.
+
+No checkout a nota vai para emitir_em_segundo_plano, que grava em uma thread
+separada: o pedido não espera pelo disco, e uma falha na gravação é avisada a
+quem pediu a nota (ou vai para o logger deste módulo).
+"""
+from sqlalchemy import select
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby, islice
+import logging
+import os
+import threading
+import zipfile
+
+from farmasil.arquivamento import consultar
+from farmasil.modelos import LOTE_LISTAGEM, Cliente, ItemResultado, ItensPedido, Pedido, Produto
+from farmasil.metricas import operacao
+
+logger = logging.getLogger(__name__)
+
+TRABALHADORES = 4
+
+# Notas renderizadas por rodada do pool: limita o que fica na memória no lote
+LOTE_NOTAS = 500
+
+DadosNota = namedtuple('DadosNota', ['pedido_id', 'cliente', 'data_hora', 'total', 'itens'])
+
+# Modelos da nota: o método format de cada um é resolvido uma vez, na importação
+_CABECALHO = """
+        Nota Fiscal - Pedido #{0}
+        Cliente: {1}
+        Data: {2}
+        Total: R${3:.2f}
+        Itens:
+        """.format
+_LINHA = "{0} - {1} x R${2:.2f}\n".format
+
+_gravador = None
+_trava_gravador = threading.Lock()
+
+def nome_arquivo(pedido_id):
+    return f"nota_fiscal_pedido_{pedido_id}.txt"
+
+def renderizar(nota):
+    """Texto da nota fiscal de um pedido."""
+    data = nota.data_hora.strftime('%d/%m/%Y %H:%M') if nota.data_hora else '-'
+    partes = [_CABECALHO(nota.pedido_id, nota.cliente or '-', data, nota.total)]
+    partes.extend(_LINHA(item.nome, item.quantidade, item.preco) for item in nota.itens)
+    return ''.join(partes)
+
+def carregar_notas(session, pedido_ids=None, de_id=None, ate_id=None, inicio=None, fim=None, lote=LOTE_LISTAGEM):
+    """Itera pelos DadosNota dos pedidos escolhidos, em ordem de id em cada mês arquivado e no banco principal.
+
+    Filtros (combináveis): `pedido_ids`, a faixa de ids [de_id, ate_id] e a
+    janela de data [inicio, fim). Uma consulta só, lida `lote` linhas por vez,
+    repetida nos meses arquivados (farmasil.arquivamento) da janela: sem
+    janela, em todos eles.
+    """
+    consulta = (
+        select(Pedido.id, Pedido.data_hora, Cliente.nome, ItensPedido.produto_id, Produto.nome,
+               ItensPedido.quantidade, ItensPedido.preco_centavos)
+        .join(ItensPedido, ItensPedido.pedido_id == Pedido.id)
+        .outerjoin(Cliente, Cliente.id == Pedido.cliente_id)
+        .outerjoin(Produto, Produto.id == ItensPedido.produto_id)
+    )
+    if pedido_ids is not None:
+        consulta = consulta.where(Pedido.id.in_(list(pedido_ids)))
+    if de_id is not None:
+        consulta = consulta.where(Pedido.id >= de_id)
+    if ate_id is not None:
+        consulta = consulta.where(Pedido.id <= ate_id)
+    if inicio is not None:
+        consulta = consulta.where(Pedido.data_hora >= inicio)
+    if fim is not None:
+        consulta = consulta.where(Pedido.data_hora < fim)
+    # Os meses arquivados da janela vêm antes do banco principal; cada pedido fica inteiro num lugar só
+    linhas = consultar(session, consulta.order_by(Pedido.id, ItensPedido.id).execution_options(yield_per=lote),
+                       inicio, fim)
+    for pedido_id, grupo in groupby(linhas, key=lambda linha: linha[0]):
+        grupo = list(grupo)
+        itens = [ItemResultado(produto_id, nome or f'Produto {produto_id}', quantidade, centavos)
+                 for _, _, _, produto_id, nome, quantidade, centavos in grupo]
+        yield DadosNota(pedido_id, grupo[0][2], grupo[0][1],
+                        sum(item.quantidade * item.preco_centavos for item in itens) / 100, itens)
+
+def gravar_nota(nota, diretorio='.'):
+    """Renderiza e grava a nota em `diretorio`; retorna o caminho do arquivo."""
+    caminho = os.path.join(diretorio, nome_arquivo(nota.pedido_id))
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(renderizar(nota))
+    return caminho
+
+@operacao('notas.emitir_notas')
+def emitir_notas(session, destino, trabalhadores=TRABALHADORES, progresso=None, **filtros):
+    """Emite as notas dos pedidos escolhidos (ver carregar_notas) e retorna quantas foram geradas.
+
+    Se `destino` termina em .zip, as notas vão todas para esse arquivo, na
+    ordem dos pedidos; senão é o diretório onde cada nota vira um .txt.
+    `progresso`, se informado, é chamado com o total emitido a cada rodada.
+    """
+    notas = carregar_notas(session, **filtros)
+    total = 0
+    with ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='farmasil-notas') as executor:
+        if destino.lower().endswith('.zip'):
+            with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED) as arquivo:
+                while True:
+                    rodada = list(islice(notas, LOTE_NOTAS))
+                    if not rodada:
+                        break
+                    for nota, texto in zip(rodada, executor.map(renderizar, rodada)):
+                        arquivo.writestr(nome_arquivo(nota.pedido_id), texto)
+                    total += len(rodada)
+                    if progresso:
+                        progresso(total)
+        else:
+            os.makedirs(destino, exist_ok=True)
+            while True:
+                rodada = list(islice(notas, LOTE_NOTAS))
+                if not rodada:
+                    break
+                list(executor.map(gravar_nota, rodada, [destino] * len(rodada)))
+                total += len(rodada)
+                if progresso:
+                    progresso(total)
+    return total
+
+def emitir_em_segundo_plano(nota, diretorio='.', avisar=None):
+    """Agenda a gravação da nota em uma thread separada e retorna o Future.
+
+    `avisar`, se informado, é chamado na thread da gravação com (caminho, None)
+    quando a nota é gravada ou com (None, erro) se a gravação falhar; sem ele,
+    a falha vai para o logger deste módulo. As notas pendentes são gravadas
+    antes de o interpretador encerrar.
+    """
+    global _gravador
+    with _trava_gravador:
+        if _gravador is None:
+            _gravador = ThreadPoolExecutor(max_workers=1, thread_name_prefix='farmasil-nota-checkout')
+    futuro = _gravador.submit(gravar_nota, nota, diretorio)
+
+    def conferir(futuro):
+        erro = futuro.exception()
+        if avisar is not None:
+            avisar(None if erro else futuro.result(), erro)
+        elif erro is not None:
+            logger.error("Falha ao gravar a nota fiscal do pedido %s em %s: %s", nota.pedido_id, diretorio, erro)
+    futuro.add_done_callback(conferir)
+    return futuro
@@ -0,0 +1,130 @@
+"""Painel de estoque da rede: totais por loja em uma única consulta.
+
+O painel pode ser calculado direto de `produtos` ou lido da tabela
+`resumo_estoque`, que guarda os totais por loja e categoria. No SQLite o resumo
+é mantido por triggers em `produtos` (ativar_resumo_estoque), dentro da mesma
+transação de cada baixa, ajuste, cadastro ou remoção; em outros bancos ele pode
+ser recalculado periodicamente com reconstruir_resumo_estoque.
+"""
+from sqlalchemy import case, func, text
+from collections import namedtuple
+
+from farmasil.modelos import Loja, Produto, ResumoEstoque
+from farmasil.metricas import operacao
+
+LinhaPainel = namedtuple('LinhaPainel', ['loja_id', 'loja', 'unidades', 'skus', 'sem_estoque', 'valor_centavos'])
+
+def _contribuicao(linha, sinal):
+    """Upsert que soma (sinal='+') ou retira (sinal='-') um produto do resumo."""
+    return f"""
+    INSERT INTO resumo_estoque (loja_id, categoria, unidades, skus, sem_estoque, valor_centavos)
+    VALUES (COALESCE({linha}.loja_id, 0), {linha}.categoria, {sinal}COALESCE({linha}.estoque, 0), {sinal}1,
+            {sinal}(COALESCE({linha}.estoque, 0) <= 0), {sinal}({linha}.preco_centavos * COALESCE({linha}.estoque, 0)))
+    ON CONFLICT (loja_id, categoria) DO UPDATE SET
+        unidades = unidades + excluded.unidades,
+        skus = skus + excluded.skus,
+        sem_estoque = sem_estoque + excluded.sem_estoque,
+        valor_centavos = valor_centavos + excluded.valor_centavos;"""
+
+TRIGGERS = {
+    'trg_resumo_estoque_insert': f"""
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_estoque_insert AFTER INSERT ON produtos
+    BEGIN {_contribuicao('NEW', '+')}
+    END""",
+    'trg_resumo_estoque_update': f"""
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_estoque_update
+    AFTER UPDATE OF estoque, preco_centavos, loja_id, categoria ON produtos
+    BEGIN {_contribuicao('OLD', '-')} {_contribuicao('NEW', '+')}
+    END""",
+    'trg_resumo_estoque_delete': f"""
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_estoque_delete AFTER DELETE ON produtos
+    BEGIN {_contribuicao('OLD', '-')}
+    END""",
+}
+
+def _exigir_sqlite(session):
+    if session.get_bind().dialect.name != 'sqlite':
+        raise ValueError("O resumo mantido por triggers só está disponível no SQLite; "
+                         "em outros bancos use reconstruir_resumo_estoque periodicamente.")
+
+@operacao('painel.reconstruir_resumo_estoque')
+def reconstruir_resumo_estoque(session):
+    """Recalcula todo o resumo a partir de `produtos`, em uma transação."""
+    session.query(ResumoEstoque).delete(synchronize_session=False)
+    estoque = func.coalesce(Produto.estoque, 0)
+    agregado = session.query(
+        func.coalesce(Produto.loja_id, 0),
+        Produto.categoria,
+        func.sum(estoque),
+        func.count(Produto.id),
+        func.sum(case((estoque <= 0, 1), else_=0)),
+        func.sum(Produto.preco_centavos * estoque)
+    ).group_by(func.coalesce(Produto.loja_id, 0), Produto.categoria)
+    session.execute(
+        ResumoEstoque.__table__.insert().from_select(
+            ['loja_id', 'categoria', 'unidades', 'skus', 'sem_estoque', 'valor_centavos'], agregado.statement
+        )
+    )
+    session.commit()
+
+def resumo_ativo(session):
+    """Indica se os triggers do resumo estão instalados."""
+    if session.get_bind().dialect.name != 'sqlite':
+        return False
+    instalados = session.execute(
+        text("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_resumo_estoque_%'")
+    ).scalar()
+    return instalados == len(TRIGGERS)
+
+def ativar_resumo_estoque(session):
+    """Instala os triggers e preenche o resumo com o estoque atual."""
+    _exigir_sqlite(session)
+    for ddl in TRIGGERS.values():
+        session.execute(text(ddl))
+    reconstruir_resumo_estoque(session)
+
+def desativar_resumo_estoque(session):
+    """Remove os triggers; o resumo deixa de acompanhar as alterações de estoque."""
+    _exigir_sqlite(session)
+    for nome in TRIGGERS:
+        session.execute(text(f"DROP TRIGGER IF EXISTS {nome}"))
+    session.commit()
+
+@operacao('painel.painel_estoque')
+def painel_estoque(session, usar_resumo=False):
+    """Unidades, SKUs, produtos sem estoque e valor do estoque (em centavos) de todas as lojas.
+
+    Uma única consulta agrupada por loja; com usar_resumo=True lê da tabela
+    resumo_estoque (poucas linhas por loja) em vez de percorrer `produtos`.
+    """
+    if usar_resumo:
+        consulta = session.query(
+            Loja.id,
+            Loja.nome,
+            func.coalesce(func.sum(ResumoEstoque.unidades), 0),
+            func.coalesce(func.sum(ResumoEstoque.skus), 0),
+            func.coalesce(func.sum(ResumoEstoque.sem_estoque), 0),
+            func.coalesce(func.sum(ResumoEstoque.valor_centavos), 0)
+        ).outerjoin(ResumoEstoque, ResumoEstoque.loja_id == Loja.id)
+    else:
+        estoque = func.coalesce(Produto.estoque, 0)
+        consulta = session.query(
+            Loja.id,
+            Loja.nome,
+            func.coalesce(func.sum(estoque), 0),
+            func.count(Produto.id),
+            func.coalesce(func.sum(case((Produto.id.isnot(None) & (estoque <= 0), 1), else_=0)), 0),
+            func.coalesce(func.sum(Produto.preco_centavos * estoque), 0)
+        ).outerjoin(Produto, Produto.loja_id == Loja.id)
+    return [LinhaPainel(*linha) for linha in consulta.group_by(Loja.id, Loja.nome).order_by(Loja.id)]
+
+def imprimir_painel(linhas):
+    if not linhas:
+        print("Nenhuma loja cadastrada.")
+        return
+    print(f"{'ID':>5}  {'Loja':<30} {'Unidades':>10} {'SKUs':>8} {'Sem estoque':>12} {'Valor (R$)':>15}")
+    for linha in linhas:
+        print(f"{linha.loja_id:>5}  {linha.loja[:30]:<30} {linha.unidades:>10} {linha.skus:>8} "
+              f"{linha.sem_estoque:>12} {linha.valor_centavos / 100:>15.2f}")
+    totais = [sum(coluna) for coluna in list(zip(*linhas))[2:]]
+    print(f"{'':>5}  {'Total da rede':<30} {totais[0]:>10} {totais[1]:>8} {totais[2]:>12} {totais[3] / 100:>15.2f}")
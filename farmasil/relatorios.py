@@ -0,0 +1,116 @@
+"""Relatórios somente leitura em paralelo, um processo por relatório.
+
+Uma sessão não pode ser compartilhada entre threads nem entre processos, e uma
+engine não sobrevive ao fork (as conexões abertas do pool iriam junto). Por
+isso executar_relatorios passa aos processos só a URL do banco: cada processo
+do pool cria a sua engine (perfil 'relatorio': somente leitura e cache grande)
+ao iniciar e abre uma sessão por relatório com unidade_de_trabalho. Assim os
+relatórios pesados (folha com numpy, vendas do período inteiro, sugestões de
+compra da rede) não disputam o GIL nem uma CPU só.
+
+Cada Tarefa aponta para uma função de módulo funcao(sessão, *args, **kwargs)
+que retorna uma lista de tuplas com as colunas `campos`; função, argumentos e
+linhas passam entre os processos por pickle. O que grava no banco (resumos de
+vendas e velocidade de reposição) roda antes, no processo principal, com
+preparar: as tarefas só leem.
+
+Um banco SQLite em memória não é visível em outro processo e é recusado.
+"""
+from sqlalchemy.engine import make_url
+from concurrent.futures import ProcessPoolExecutor
+from collections import namedtuple
+from datetime import date
+import os
+import time
+
+from farmasil.banco import criar_engine, criar_fabrica_sessao, obter_engine, unidade_de_trabalho
+from farmasil.fragmentos import LinhaEstoqueRede
+from farmasil.modelos import Loja
+from farmasil import folha, reposicao, vendas
+
+PERFIL_RELATORIOS = 'relatorio'
+
+Tarefa = namedtuple('Tarefa', ['nome', 'funcao', 'args', 'kwargs', 'campos'])
+ResultadoRelatorio = namedtuple('ResultadoRelatorio', ['nome', 'campos', 'linhas', 'segundos'])
+
+# Sessões do processo do pool (criada em _iniciar_processo)
+_fabrica = None
+
+def tarefa(nome, funcao, *args, campos=vendas.LinhaVendas._fields, **kwargs):
+    """Tarefa que chama funcao(sessão, *args, **kwargs); `campos` nomeia as colunas das linhas."""
+    return Tarefa(nome, funcao, args, kwargs, tuple(campos))
+
+def estoque_por_categoria(session):
+    return [LinhaEstoqueRede(*linha) for linha in Loja.estoque_por_categoria(session)]
+
+def folha_por_funcionario(session, ano, mes):
+    return folha.calcular_folha(session, ano, mes).funcionarios
+
+def folha_por_loja(session, ano, mes):
+    return folha.calcular_folha(session, ano, mes).lojas
+
+def relatorios_padrao(inicio=None, fim=None, mes=None):
+    """Tarefas dos relatórios do fechamento: vendas por dimensão, estoque, folha de `mes` e reposição.
+
+    [inicio, fim) filtra os dias das vendas; `mes` é (ano, mês), por padrão o atual.
+    """
+    ano, mes = mes or (date.today().year, date.today().month)
+    tarefas = [tarefa(f'vendas_por_{por}', vendas.relatorio, por, inicio, fim) for por in vendas.DIMENSOES]
+    return tarefas + [
+        tarefa('estoque_por_categoria', estoque_por_categoria, campos=LinhaEstoqueRede._fields),
+        tarefa('folha_por_funcionario', folha_por_funcionario, ano, mes, campos=folha.LinhaFolha._fields),
+        tarefa('folha_por_loja', folha_por_loja, ano, mes, campos=folha.TotalLoja._fields),
+        tarefa('reposicao_por_produto', reposicao.sugestoes, campos=reposicao.LinhaReposicao._fields),
+        tarefa('reposicao_por_fornecedor', reposicao.compras_por_fornecedor, por_loja=True,
+               campos=reposicao.CompraFornecedor._fields),
+    ]
+
+def preparar(session, hoje=None):
+    """Leva os resumos de vendas e a velocidade de reposição até hoje, antes dos relatórios."""
+    vendas.atualizar_resumos(session)
+    reposicao.atualizar_velocidade(session, hoje, atualizar=False)
+
+def _url_para_processos(url):
+    url = make_url(url) if url is not None else obter_engine().url
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        raise ValueError("Um banco SQLite em memória não é visível nos processos do pool.")
+    # A senha vai junto: cada processo conecta por conta própria
+    return url.render_as_string(hide_password=False)
+
+def _iniciar_processo(url, perfil):
+    global _fabrica
+    _fabrica = criar_fabrica_sessao(criar_engine(url, perfil=perfil))
+
+def _rodar(tarefa, fabrica=None):
+    inicio = time.perf_counter()
+    with unidade_de_trabalho(fabrica or _fabrica) as sessao:
+        linhas = [tuple(linha) for linha in tarefa.funcao(sessao, *tarefa.args, **tarefa.kwargs)]
+    return ResultadoRelatorio(tarefa.nome, tarefa.campos, linhas, time.perf_counter() - inicio)
+
+def executar_relatorios(tarefas, url=None, processos=None, perfil=PERFIL_RELATORIOS):
+    """Roda as tarefas em `processos` processos (padrão: uma por CPU) e retorna um ResultadoRelatorio por tarefa.
+
+    `url` é a do banco (padrão: a da engine padrão). Com um processo só roda
+    tudo neste processo, em série, com uma engine própria.
+    """
+    tarefas = list(tarefas)
+    url = _url_para_processos(url)
+    processos = min(processos or os.cpu_count() or 1, len(tarefas))
+    if processos <= 1:
+        engine = criar_engine(url, perfil=perfil)
+        try:
+            fabrica = criar_fabrica_sessao(engine)
+            return [_rodar(tarefa, fabrica) for tarefa in tarefas]
+        finally:
+            engine.dispose()
+    with ProcessPoolExecutor(max_workers=processos,
+                             initializer=_iniciar_processo, initargs=(url, perfil)) as executor:
+        return list(executor.map(_rodar, tarefas))
+
+def exportar(resultados, diretorio, formato='csv'):
+    """Grava cada resultado em diretorio/<nome>.<formato>; retorna {nome: linhas escritas}."""
+    os.makedirs(diretorio, exist_ok=True)
+    return {resultado.nome: vendas.exportar_relatorio(resultado.linhas,
+                                                      os.path.join(diretorio, f'{resultado.nome}.{formato}'),
+                                                      formato, campos=resultado.campos)
+            for resultado in resultados}
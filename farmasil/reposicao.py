@@ -0,0 +1,138 @@
+"""Reposição de estoque: velocidade de vendas, ponto de pedido e sugestões de compra por fornecedor.
+
+A velocidade de um produto é o total de unidades vendidas nos JANELA_DIAS
+dias completos anteriores a hoje, guardado em velocidade_vendas.
+atualizar_velocidade move essa janela de forma incremental a partir dos
+resumos diários de vendas (farmasil.vendas): soma os dias que entraram e
+subtrai os que saíram, cada um com um INSERT ... SELECT agrupado. Rodando
+todo dia, só dois dias de vendas_diarias_produto são lidos.
+
+Com a velocidade (v unidades/dia) e o prazo de entrega do fornecedor:
+
+- dias de cobertura: estoque / v;
+- ponto de pedido: v * (prazo + DIAS_SEGURANCA) unidades;
+- sugestão: quem está no ponto de pedido ou abaixo compra até cobrir
+  prazo + DIAS_SEGURANCA + DIAS_COMPRA dias de venda.
+
+Tudo é calculado pelo banco numa consulta sobre a rede inteira (ou uma loja);
+compras_por_fornecedor consolida as sugestões por fornecedor (e loja). Os
+valores são somados em centavos e convertidos para reais só no resultado.
+Produtos sem venda na janela não têm velocidade e não entram nas sugestões.
+"""
+from sqlalchemy import func, null, select
+from collections import namedtuple
+from datetime import date, timedelta
+
+from farmasil.metricas import operacao
+from farmasil.modelos import (PRAZO_ENTREGA_PADRAO, Fornecedor, ProcessamentoReposicao, Produto, VelocidadeVendas,
+                              VendaDiariaProduto)
+from farmasil import vendas
+
+JANELA_DIAS = 28
+# Estoque de segurança, em dias de venda, para atrasos e picos de demanda
+DIAS_SEGURANCA = 3
+# Dias de venda comprados além do ponto de pedido (intervalo até a próxima compra)
+DIAS_COMPRA = 14
+
+LinhaReposicao = namedtuple('LinhaReposicao', ['loja_id', 'produto_id', 'nome', 'fornecedor_id', 'estoque',
+                                               'venda_diaria', 'dias_cobertura', 'ponto_pedido', 'sugerida',
+                                               'valor'])
+CompraFornecedor = namedtuple('CompraFornecedor', ['fornecedor_id', 'fornecedor', 'prazo_entrega', 'loja_id', 'skus',
+                                                   'unidades', 'valor'])
+
+def _somar_dias(session, inicio, fim, sinal):
+    """Soma (sinal=1) ou subtrai (sinal=-1) à janela as vendas dos dias [inicio, fim)."""
+    if inicio >= fim:
+        return
+    vendas._insert_com_soma(session, VelocidadeVendas.__table__, select(
+        VendaDiariaProduto.produto_id,
+        (sinal * func.sum(VendaDiariaProduto.unidades)).label('unidades'),
+    ).where(VendaDiariaProduto.dia >= inicio, VendaDiariaProduto.dia < fim)
+        .group_by(VendaDiariaProduto.produto_id),
+        ['produto_id'])
+
+@operacao('reposicao.atualizar_velocidade')
+def atualizar_velocidade(session, hoje=None, atualizar=True):
+    """Leva a janela de velocidade até ontem e retorna quantos dias entraram nela.
+
+    Com `atualizar`, agrega antes os pedidos novos aos resumos de vendas.
+    """
+    if atualizar:
+        vendas.atualizar_resumos(session)
+    fim = hoje or date.today()
+    inicio = fim - timedelta(days=JANELA_DIAS)
+    anterior = session.query(ProcessamentoReposicao).filter(
+        ProcessamentoReposicao.id == select(func.max(ProcessamentoReposicao.id)).scalar_subquery()).first()
+    if anterior is not None and anterior.fim == fim:
+        return 0
+    if anterior is None or anterior.fim < inicio or fim < anterior.fim:
+        # Primeira execução, muito tempo sem rodar ou data anterior à última: soma a janela inteira
+        session.query(VelocidadeVendas).delete(synchronize_session=False)
+        _somar_dias(session, inicio, fim, 1)
+        entraram = JANELA_DIAS
+    else:
+        _somar_dias(session, anterior.fim, fim, 1)
+        _somar_dias(session, anterior.inicio, inicio, -1)
+        session.query(VelocidadeVendas).filter(VelocidadeVendas.unidades <= 0).delete(synchronize_session=False)
+        entraram = (fim - anterior.fim).days
+    session.add(ProcessamentoReposicao(inicio=inicio, fim=fim))
+    session.commit()
+    return entraram
+
+@operacao('reposicao.reconstruir_velocidade')
+def reconstruir_velocidade(session, hoje=None):
+    """Soma a janela inteira de novo (ex.: depois de reconstruir os resumos de vendas)."""
+    session.query(ProcessamentoReposicao).delete(synchronize_session=False)
+    session.flush()
+    return atualizar_velocidade(session, hoje, atualizar=False)
+
+def _sugestoes(loja_id=None, fornecedor_id=None):
+    """SELECT das sugestões (uma linha por produto no ponto de pedido), com as colunas de LinhaReposicao."""
+    unidades = VelocidadeVendas.unidades
+    estoque = func.coalesce(Produto.estoque, 0)
+    prazo = func.coalesce(Fornecedor.prazo_entrega, PRAZO_ENTREGA_PADRAO)
+    # Divisão inteira: (x + JANELA_DIAS - 1) // JANELA_DIAS arredonda para cima sem passar por float
+    ponto_pedido = (unidades * (prazo + DIAS_SEGURANCA) + JANELA_DIAS - 1) // JANELA_DIAS
+    alvo = unidades * (prazo + DIAS_SEGURANCA + DIAS_COMPRA)
+    sugerida = (alvo - estoque * JANELA_DIAS + JANELA_DIAS - 1) // JANELA_DIAS
+    consulta = (
+        select(Produto.loja_id, Produto.id.label('produto_id'), Produto.nome, Produto.fornecedor_id,
+               estoque.label('estoque'), func.round(unidades / float(JANELA_DIAS), 2).label('venda_diaria'),
+               func.round(estoque * float(JANELA_DIAS) / unidades, 1).label('dias_cobertura'),
+               ponto_pedido.label('ponto_pedido'), sugerida.label('sugerida'),
+               (sugerida * Produto.preco_centavos).label('valor_centavos'))
+        .select_from(VelocidadeVendas)
+        .join(Produto, Produto.id == VelocidadeVendas.produto_id)
+        .outerjoin(Fornecedor, Fornecedor.id == Produto.fornecedor_id)
+        .where(unidades > 0, estoque * JANELA_DIAS <= unidades * (prazo + DIAS_SEGURANCA))
+    )
+    if loja_id is not None:
+        consulta = consulta.where(Produto.loja_id == loja_id)
+    if fornecedor_id is not None:
+        consulta = consulta.where(Produto.fornecedor_id == fornecedor_id)
+    return consulta
+
+@operacao('reposicao.sugestoes')
+def sugestoes(session, loja_id=None, fornecedor_id=None):
+    """Produtos no ponto de pedido ou abaixo, com a quantidade sugerida (LinhaReposicao), por fornecedor e loja."""
+    # Ordenar pela expressão (e não pela coluna) faz o SQLite partir de velocidade_vendas,
+    # em vez de percorrer todos os produtos pelo índice de fornecedor
+    consulta = _sugestoes(loja_id, fornecedor_id).order_by(func.coalesce(Produto.fornecedor_id, 0), Produto.loja_id,
+                                                           Produto.id)
+    return [LinhaReposicao(*linha[:-1], linha.valor_centavos / 100) for linha in session.execute(consulta)]
+
+@operacao('reposicao.compras_por_fornecedor')
+def compras_por_fornecedor(session, loja_id=None, por_loja=False):
+    """Sugestões consolidadas: SKUs, unidades e valor por fornecedor (e por loja de entrega, com `por_loja`)."""
+    itens = _sugestoes(loja_id).subquery()
+    # coalesce: ver sugestoes
+    agrupamento = [func.coalesce(itens.c.fornecedor_id, 0)] + ([itens.c.loja_id] if por_loja else [])
+    consulta = (
+        select(func.max(itens.c.fornecedor_id), func.max(Fornecedor.nome), func.max(Fornecedor.prazo_entrega),
+               itens.c.loja_id if por_loja else null(), func.count(), func.sum(itens.c.sugerida),
+               func.sum(itens.c.valor_centavos))
+        .select_from(itens)
+        .outerjoin(Fornecedor, Fornecedor.id == itens.c.fornecedor_id)
+        .group_by(*agrupamento).order_by(*agrupamento)
+    )
+    return [CompraFornecedor(*linha[:-1], linha[-1] / 100) for linha in session.execute(consulta)]
@@ -0,0 +1,52 @@
+"""Reserva de estoque concorrente para vários terminais (PDV)."""
+from sqlalchemy.exc import DBAPIError
+from concurrent.futures import ThreadPoolExecutor
+import random
+import time
+
+from farmasil.banco import banco_ocupado
+from farmasil.modelos import Pedido, ResultadoPedido
+
+class ServicoReserva:
+    """Processa pedidos de vários terminais (PDV) em paralelo.
+
+    Cada pedido roda em sua própria sessão e transação; a baixa de estoque é
+    atômica (Produto.reservar_estoque) e as disputas de trava do SQLite são
+    repetidas com espera exponencial e jitter.
+    """
+
+    def __init__(self, fabrica_sessao, tentativas=10, espera_inicial=0.002, espera_maxima=0.25):
+        self.fabrica_sessao = fabrica_sessao
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+
+    def processar_pedido(self, cliente_id, funcionario_id, itens):
+        """Finaliza um pedido, repetindo a transação inteira se o banco estiver ocupado."""
+        for tentativa in range(self.tentativas):
+            session = self.fabrica_sessao()
+            try:
+                return Pedido.finalizar_pedido(session, cliente_id, funcionario_id, itens)
+            except DBAPIError as erro:
+                if not banco_ocupado(erro) or tentativa == self.tentativas - 1:
+                    raise
+            finally:
+                session.close()
+            espera = min(self.espera_maxima, self.espera_inicial * 2 ** tentativa)
+            time.sleep(random.uniform(0, espera))
+
+    def processar_lote(self, pedidos, terminais=4):
+        """Processa vários pedidos com `terminais` threads simultâneas.
+
+        `pedidos` é uma sequência de dicts com cliente_id, funcionario_id e itens.
+        Retorna os ResultadoPedido na mesma ordem; um pedido que falha por erro
+        do banco volta com `erro` preenchido em vez de interromper o lote.
+        """
+        def processar(pedido):
+            try:
+                return self.processar_pedido(pedido['cliente_id'], pedido['funcionario_id'], pedido['itens'])
+            except DBAPIError as erro:
+                return ResultadoPedido(erro=str(erro.orig))
+
+        with ThreadPoolExecutor(max_workers=terminais) as executor:
+            return list(executor.map(processar, pedidos))
@@ -0,0 +1,454 @@
+"""Serviço HTTP/JSON local para os terminais de PDV de uma loja.
+
+Um processo asyncio atende todos os terminais: cada conexão HTTP/1.1 (com
+keep-alive) é uma corrotina, e o banco é acessado por uma AsyncEngine
+(farmasil.banco.criar_engine_assincrona: aiosqlite ou asyncpg) com o pool
+limitado do perfil 'pdv'. As operações são as mesmas dos modelos: cada
+requisição abre uma AsyncSession e roda a função síncrona com run_sync, então
+Pedido.finalizar_pedido, o cache de produtos, a busca e o livro-caixa valem
+aqui sem cópia. As disputas de trava são repetidas com espera exponencial e
+jitter, como no ServicoReserva.
+
+No SQLite só uma transação escreve por vez; as escritas (checkout e caixa)
+passam por um semáforo de ESCRITAS_SQLITE vagas em vez de disputarem a trava
+do arquivo, e as consultas seguem em paralelo.
+
+Rotas (corpo e respostas em JSON; erros como {"erro": ...}):
+
+    GET  /saude
+    GET  /lojas?apos=&tamanho=
+    GET  /lojas/<id>/produtos?apos=&tamanho=
+    GET  /produtos?q=<texto>&loja=&limite=       busca por nome (farmasil.busca)
+    GET  /produtos/<id>
+    GET  /produtos/<id>/estoque?quantidade=
+    GET  /clientes?cpf=<cpf>
+    GET  /clientes/<id>
+    POST /pedidos                                {"cliente_id", "funcionario_id", "itens": [...], "nota"}
+    GET  /caixas/<id>/saldo
+    POST /caixas/<id>/entradas                   {"valor"}
+    POST /caixas/<id>/saidas                     {"valor"}
+
+Cada item do pedido traz "nome" ou "produto_id" e "quantidade".
+
+Uso: python -m farmasil servir [--host 127.0.0.1] [--porta 8080]
+"""
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolEsgotado
+from datetime import date, datetime
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+import asyncio
+import json
+import logging
+import random
+import re
+
+from farmasil.banco import banco_ocupado
+from farmasil.busca import buscar_produtos, vocabulario
+from farmasil.listagens import TAMANHO_PAGINA, paginar
+from farmasil.metricas import operacao
+from farmasil.modelos import Caixa, Cliente, Pedido, Produto, para_centavos
+
+logger = logging.getLogger(__name__)
+
+HOST = '127.0.0.1'
+PORTA = 8080
+# Transações de escrita simultâneas no SQLite (uma: o arquivo tem uma trava de escrita só)
+ESCRITAS_SQLITE = 1
+TAMANHO_MAXIMO_CORPO = 1024 * 1024
+TAMANHO_MAXIMO_PAGINA = 1000
+# Segundos sem requisição antes de fechar uma conexão keep-alive
+OCIOSIDADE = 60
+
+class ErroRequisicao(Exception):
+    """Requisição que não pode ser atendida; vira uma resposta {"erro": mensagem} com o status."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+def _json_padrao(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f"{type(valor).__name__} não é serializável em JSON")
+
+def _em_reais(linha):
+    """Linha (namedtuple) como dicionário, com os campos em centavos trocados pelo valor em reais."""
+    return dict((campo[:-len('_centavos')], valor / 100) if campo.endswith('_centavos') else (campo, valor)
+                for campo, valor in linha._asdict().items())
+
+def _inteiro(parametros, nome, padrao=None, minimo=None):
+    texto = parametros.get(nome)
+    if texto is None or texto == '':
+        return padrao
+    try:
+        valor = int(texto)
+    except (TypeError, ValueError):
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"'{nome}' deve ser um número inteiro.") from None
+    if minimo is not None and valor < minimo:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, f"'{nome}' deve ser pelo menos {minimo}.")
+    return valor
+
+# Operações do serviço: funções síncronas (session, ...) -> (status, corpo), rodadas com run_sync
+
+def _pagina(session, entidade, parametros, **filtros):
+    tamanho = min(_inteiro(parametros, 'tamanho', TAMANHO_PAGINA, 1), TAMANHO_MAXIMO_PAGINA)
+    linhas, proximo = paginar(session, entidade, _inteiro(parametros, 'apos'), tamanho, **filtros)
+    return HTTPStatus.OK, {'itens': [linha._asdict() for linha in linhas], 'proximo': proximo}
+
+def _produto(session, produto_id):
+    produto = Produto.por_id(session, produto_id)
+    if produto is None:
+        raise ErroRequisicao(HTTPStatus.NOT_FOUND, f"Produto {produto_id} não encontrado.")
+    return HTTPStatus.OK, _em_reais(produto)
+
+def _estoque(session, produto_id, quantidade):
+    produto = Produto.por_id(session, produto_id)
+    if produto is None:
+        raise ErroRequisicao(HTTPStatus.NOT_FOUND, f"Produto {produto_id} não encontrado.")
+    disponivel = produto.estoque or 0
+    return HTTPStatus.OK, {'produto_id': produto_id, 'estoque': disponivel, 'quantidade': quantidade,
+                           'suficiente': disponivel >= quantidade}
+
+def _dados_cliente(cliente):
+    return {'id': cliente.id, 'nome': cliente.nome, 'cpf': cliente.cpf, 'telefone': cliente.telefone,
+            'email': cliente.email, 'historico_compras': cliente.historico_compras or 0,
+            'total_gasto': cliente.total_gasto or 0.0, 'ultima_compra': cliente.ultima_compra,
+            'nivel_fidelidade': cliente.nivel_fidelidade}
+
+@operacao('servico.cliente')
+def _cliente(session, cliente_id=None, cpf=None):
+    if cliente_id is not None:
+        cliente = session.get(Cliente, cliente_id)
+    else:
+        cliente = session.execute(select(Cliente).where(Cliente.cpf == cpf)).scalar_one_or_none()
+    if cliente is None:
+        raise ErroRequisicao(HTTPStatus.NOT_FOUND, "Cliente não encontrado.")
+    return HTTPStatus.OK, _dados_cliente(cliente)
+
+def _itens_do_pedido(session, itens):
+    """Valida os itens do corpo e resolve os dados por produto_id (de uma vez) para o formato de finalizar_pedido."""
+    if not isinstance(itens, list) or not itens:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "'itens' deve ser uma lista não vazia.")
+    for item in itens:
+        quantidade = item.get('quantidade') if isinstance(item, dict) else None
+        if not isinstance(quantidade, int) or isinstance(quantidade, bool) or quantidade <= 0:
+            raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "Cada item precisa de 'quantidade' inteira e positiva.")
+        produto_id = item.get('produto_id')
+        if produto_id is None:
+            if not isinstance(item.get('nome'), str) or not item['nome'].strip():
+                raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "Cada item precisa de 'nome' ou 'produto_id'.")
+        elif not isinstance(produto_id, int) or isinstance(produto_id, bool):
+            raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "'produto_id' deve ser um número inteiro.")
+    produtos = Produto.por_ids(session, [item['produto_id'] for item in itens if item.get('produto_id') is not None])
+    desconhecidos = [item['produto_id'] for item in itens
+                     if item.get('produto_id') is not None and item['produto_id'] not in produtos]
+    if desconhecidos:
+        raise ErroRequisicao(HTTPStatus.UNPROCESSABLE_ENTITY, f"Produtos não encontrados: {desconhecidos}.")
+    carrinho = []
+    for item in itens:
+        if item.get('produto_id') is not None:
+            produto = produtos[item['produto_id']]
+            carrinho.append({'nome': produto.nome, 'quantidade': item['quantidade'], 'produto': produto})
+        else:
+            carrinho.append({'nome': item['nome'].strip(), 'quantidade': item['quantidade']})
+    return carrinho
+
+@operacao('servico.pedido')
+def _pedido(session, corpo, diretorio_notas):
+    cliente_id = corpo.get('cliente_id')
+    funcionario_id = corpo.get('funcionario_id')
+    if not isinstance(cliente_id, int) or not isinstance(funcionario_id, int):
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "'cliente_id' e 'funcionario_id' são obrigatórios.")
+    resultado = Pedido.finalizar_pedido(session, cliente_id, funcionario_id,
+                                        _itens_do_pedido(session, corpo.get('itens')))
+    resposta = {
+        'pedido_id': resultado.pedido_id, 'cliente': resultado.cliente_nome, 'data_hora': resultado.data_hora,
+        'total': round(resultado.total, 2), 'itens': [_em_reais(item) for item in resultado.itens],
+        'nao_encontrados': resultado.nao_encontrados, 'sem_estoque': resultado.sem_estoque,
+        'sugestoes': {nome: [_em_reais(produto) for produto in parecidos]
+                      for nome, parecidos in resultado.sugestoes.items()},
+        'erro': resultado.erro,
+    }
+    if not resultado.sucesso:
+        return (HTTPStatus.CONFLICT if resultado.sem_estoque else HTTPStatus.UNPROCESSABLE_ENTITY), resposta
+    if corpo.get('nota'):
+        from farmasil.notas import DadosNota, emitir_em_segundo_plano
+        emitir_em_segundo_plano(DadosNota(resultado.pedido_id, resultado.cliente_nome, resultado.data_hora,
+                                          resultado.total, resultado.itens), diretorio_notas)
+    return HTTPStatus.CREATED, resposta
+
+def _caixa(session, caixa_id):
+    caixa = session.get(Caixa, caixa_id)
+    if caixa is None:
+        raise ErroRequisicao(HTTPStatus.NOT_FOUND, f"Caixa {caixa_id} não encontrado.")
+    return caixa
+
+@operacao('servico.saldo')
+def _saldo(session, caixa_id):
+    caixa = _caixa(session, caixa_id)
+    return HTTPStatus.OK, {'caixa_id': caixa_id, 'saldo': caixa.saldo_centavos(session) / 100,
+                           'aberto': caixa.sessao_aberta(session) is not None}
+
+@operacao('servico.lancamento')
+def _lancamento(session, caixa_id, tipo, corpo):
+    """Entrada ou saída no livro-caixa, com os motivos de recusa na resposta em vez de impressos."""
+    caixa = _caixa(session, caixa_id)
+    try:
+        centavos = para_centavos(corpo.get('valor'))
+    except ArithmeticError:
+        centavos = 0
+    if centavos <= 0:
+        raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "'valor' deve ser um número positivo.")
+    if caixa.sessao_aberta(session) is None:
+        raise ErroRequisicao(HTTPStatus.CONFLICT, "Caixa fechado. Abra o caixa antes de registrar movimentos.")
+    if tipo == 'Saída' and caixa.saldo_centavos(session) < centavos:
+        raise ErroRequisicao(HTTPStatus.CONFLICT, "Saldo insuficiente para realizar a saída.")
+    registro = caixa._lancar(session, tipo, centavos if tipo == 'Entrada' else -centavos)
+    return HTTPStatus.CREATED, {'id': registro.id, 'caixa_id': caixa_id, 'tipo': tipo, 'valor': centavos / 100,
+                                'data_hora': registro.data_hora}
+
+class ServidorPDV:
+    """Servidor HTTP/JSON dos terminais sobre uma AsyncEngine.
+
+    Uso:
+        engine = criar_engine_assincrona(perfil='pdv')
+        servidor = ServidorPDV(engine)
+        await servidor.iniciar()     # retorna (host, porta)
+        await servidor.servir()      # até encerrar()
+    """
+
+    def __init__(self, engine, host=HOST, porta=PORTA, escritas_simultaneas=None, diretorio_notas='.',
+                 tentativas=10, espera_inicial=0.002, espera_maxima=0.25):
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        self.engine = engine
+        self.host = host
+        self.porta = porta
+        self.diretorio_notas = diretorio_notas
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        # Os resultados são montados dentro da transação; nada a recarregar depois do commit
+        self.fabrica_sessao = async_sessionmaker(engine, expire_on_commit=False)
+        if escritas_simultaneas is None and engine.dialect.name == 'sqlite':
+            escritas_simultaneas = ESCRITAS_SQLITE
+        self._escritas = asyncio.Semaphore(escritas_simultaneas) if escritas_simultaneas else None
+        self._servidor = None
+        self.requisicoes = 0
+        self.rotas = [
+            ('GET', re.compile(r'/saude'), self._saude),
+            ('GET', re.compile(r'/lojas'), self._lojas),
+            ('GET', re.compile(r'/lojas/(\d+)/produtos'), self._produtos_da_loja),
+            ('GET', re.compile(r'/produtos'), self._buscar),
+            ('GET', re.compile(r'/produtos/(\d+)'), self._produto),
+            ('GET', re.compile(r'/produtos/(\d+)/estoque'), self._estoque),
+            ('GET', re.compile(r'/clientes'), self._cliente_por_cpf),
+            ('GET', re.compile(r'/clientes/(\d+)'), self._cliente),
+            ('POST', re.compile(r'/pedidos'), self._pedido),
+            ('GET', re.compile(r'/caixas/(\d+)/saldo'), self._saldo),
+            ('POST', re.compile(r'/caixas/(\d+)/entradas'), self._entrada),
+            ('POST', re.compile(r'/caixas/(\d+)/saidas'), self._saida),
+        ]
+
+    async def no_banco(self, funcao, *args, escrita=False, **kwargs):
+        """Roda funcao(session, *args, **kwargs) numa sessão nova, repetindo a transação com o banco ocupado."""
+        for tentativa in range(self.tentativas):
+            try:
+                if escrita and self._escritas is not None:
+                    async with self._escritas:
+                        return await self._executar(funcao, args, kwargs)
+                return await self._executar(funcao, args, kwargs)
+            except DBAPIError as erro:
+                if not banco_ocupado(erro) or tentativa == self.tentativas - 1:
+                    raise
+            espera = min(self.espera_maxima, self.espera_inicial * 2 ** tentativa)
+            await asyncio.sleep(random.uniform(0, espera))
+
+    async def _executar(self, funcao, args, kwargs):
+        async with self.fabrica_sessao() as sessao:
+            return await sessao.run_sync(funcao, *args, **kwargs)
+
+    # Rotas: (parâmetros da URL, corpo, *grupos do caminho) -> (status, corpo)
+
+    async def _saude(self, parametros, corpo):
+        return HTTPStatus.OK, {'status': 'ok', 'requisicoes': self.requisicoes}
+
+    async def _lojas(self, parametros, corpo):
+        return await self.no_banco(_pagina, 'lojas', parametros)
+
+    async def _produtos_da_loja(self, parametros, corpo, loja_id):
+        return await self.no_banco(_pagina, 'produtos', parametros, loja_id=int(loja_id))
+
+    async def _buscar(self, parametros, corpo):
+        texto = parametros.get('q', '').strip()
+        if not texto:
+            raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "Informe o texto da busca em 'q'.")
+        loja_id = _inteiro(parametros, 'loja')
+        limite = min(_inteiro(parametros, 'limite', 10, 1), TAMANHO_MAXIMO_PAGINA)
+        encontrados = await self.no_banco(buscar_produtos, texto, loja_id, limite)
+        return HTTPStatus.OK, {'itens': [_em_reais(produto) for produto in encontrados]}
+
+    async def _produto(self, parametros, corpo, produto_id):
+        return await self.no_banco(_produto, int(produto_id))
+
+    async def _estoque(self, parametros, corpo, produto_id):
+        return await self.no_banco(_estoque, int(produto_id), _inteiro(parametros, 'quantidade', 1, 1))
+
+    async def _cliente_por_cpf(self, parametros, corpo):
+        if not parametros.get('cpf'):
+            raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "Informe o 'cpf' do cliente.")
+        return await self.no_banco(_cliente, None, parametros['cpf'])
+
+    async def _cliente(self, parametros, corpo, cliente_id):
+        return await self.no_banco(_cliente, int(cliente_id))
+
+    async def _pedido(self, parametros, corpo):
+        return await self.no_banco(_pedido, corpo, self.diretorio_notas, escrita=True)
+
+    async def _saldo(self, parametros, corpo, caixa_id):
+        return await self.no_banco(_saldo, int(caixa_id))
+
+    async def _entrada(self, parametros, corpo, caixa_id):
+        return await self.no_banco(_lancamento, int(caixa_id), 'Entrada', corpo, escrita=True)
+
+    async def _saida(self, parametros, corpo, caixa_id):
+        return await self.no_banco(_lancamento, int(caixa_id), 'Saída', corpo, escrita=True)
+
+    # HTTP
+
+    async def responder(self, metodo, alvo, corpo):
+        """Resposta (status, dict) de uma requisição já lida; o corpo é o JSON decodificado ou None."""
+        partes = urlsplit(alvo)
+        parametros = {nome: valores[-1] for nome, valores in parse_qs(partes.query).items()}
+        caminho = partes.path.rstrip('/') or '/'
+        metodos = []
+        for metodo_rota, padrao, tratador in self.rotas:
+            casamento = padrao.fullmatch(caminho)
+            if casamento is None:
+                continue
+            if metodo_rota != metodo:
+                metodos.append(metodo_rota)
+                continue
+            if metodo == 'POST' and not isinstance(corpo, dict):
+                raise ErroRequisicao(HTTPStatus.BAD_REQUEST, "O corpo deve ser um objeto JSON.")
+            return await tratador(parametros, corpo, *casamento.groups())
+        if metodos:
+            raise ErroRequisicao(HTTPStatus.METHOD_NOT_ALLOWED, f"Use {' ou '.join(metodos)} em {caminho}.")
+        raise ErroRequisicao(HTTPStatus.NOT_FOUND, f"Rota {caminho} não existe.")
+
+    async def _atender(self, leitor, escritor):
+        """Atende as requisições de uma conexão até o cliente fechar (ou pedir Connection: close)."""
+        try:
+            while True:
+                try:
+                    cabecalho = await asyncio.wait_for(leitor.readuntil(b'\r\n\r\n'), OCIOSIDADE)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                        ConnectionError):
+                    return
+                linhas = cabecalho.decode('latin-1').split('\r\n')
+                try:
+                    metodo, alvo, versao = linhas[0].split(' ', 2)
+                except ValueError:
+                    await self._enviar(escritor, HTTPStatus.BAD_REQUEST, {'erro': 'Linha de requisição inválida.'},
+                                       manter=False)
+                    return
+                campos = {}
+                for linha in linhas[1:]:
+                    nome, _, valor = linha.partition(':')
+                    if nome:
+                        campos[nome.strip().lower()] = valor.strip()
+                conexao = campos.get('connection', '').lower()
+                manter = conexao != 'close' if versao == 'HTTP/1.1' else conexao == 'keep-alive'
+
+                status, resposta = await self._processar(leitor, metodo, alvo, campos)
+                if status is None:
+                    return
+                await self._enviar(escritor, status, resposta, manter)
+                if not manter:
+                    return
+        finally:
+            escritor.close()
+
+    async def _processar(self, leitor, metodo, alvo, campos):
+        self.requisicoes += 1
+        try:
+            tamanho = int(campos.get('content-length') or 0)
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {'erro': 'Content-Length inválido.'}
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'erro': 'Corpo grande demais.'}
+        try:
+            dados = await leitor.readexactly(tamanho) if tamanho else b''
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None, None
+        try:
+            corpo = json.loads(dados) if dados else None
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {'erro': 'O corpo não é um JSON válido.'}
+        try:
+            return await self.responder(metodo, alvo, corpo)
+        except ErroRequisicao as erro:
+            return erro.status, {'erro': str(erro)}
+        except PoolEsgotado:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'erro': 'Servidor sem conexões livres com o banco.'}
+        except DBAPIError as erro:
+            if banco_ocupado(erro):
+                return HTTPStatus.SERVICE_UNAVAILABLE, {'erro': 'Banco ocupado; tente de novo.'}
+            logger.exception("Erro de banco em %s %s", metodo, alvo)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'erro': 'Erro interno.'}
+        except Exception:
+            logger.exception("Erro em %s %s", metodo, alvo)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'erro': 'Erro interno.'}
+
+    async def _enviar(self, escritor, status, resposta, manter):
+        dados = json.dumps(resposta, ensure_ascii=False, default=_json_padrao).encode('utf-8')
+        escritor.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(dados)}\r\n"
+            f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n".encode('latin-1') + dados)
+        try:
+            await escritor.drain()
+        except ConnectionError:
+            pass
+
+    async def iniciar(self):
+        """Abre a porta e retorna (host, porta); com porta=0 o sistema escolhe uma livre."""
+        if self.engine.dialect.name == 'sqlite':
+            # Monta o vocabulário da busca antes dos terminais: senão as primeiras buscas o montam ao mesmo tempo
+            await self.no_banco(vocabulario)
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.porta)
+        self.host, self.porta = self._servidor.sockets[0].getsockname()[:2]
+        return self.host, self.porta
+
+    async def servir(self):
+        if self._servidor is None:
+            await self.iniciar()
+        try:
+            await self._servidor.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    async def encerrar(self):
+        """Para de aceitar conexões e fecha o pool do banco."""
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        await self.engine.dispose()
+
+def servir(engine, host=HOST, porta=PORTA, pronto=None, **opcoes):
+    """Roda o serviço até Ctrl+C (bloqueia). `pronto(host, porta)` é chamado quando a porta abre."""
+    async def principal():
+        servidor = ServidorPDV(engine, host, porta, **opcoes)
+        endereco = await servidor.iniciar()
+        if pronto is not None:
+            pronto(*endereco)
+        try:
+            await servidor.servir()
+        finally:
+            await servidor.encerrar()
+
+    try:
+        asyncio.run(principal())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,290 @@
+"""Análise de vendas: resumos diários incrementais e fatias ad hoc dos itens.
+
+atualizar_resumos agrega só os pedidos novos desde a última execução (a marca
+d'água é o maior id já processado, em processamentos_vendas) e soma o resultado
+às tabelas vendas_diarias (dia, loja, funcionário) e vendas_diarias_produto
+(dia, loja, produto). A marca só é segura no SQLite, que tem um escritor por
+vez e confirma os pedidos na ordem dos ids; no PostgreSQL um id menor pode ser
+confirmado depois de um maior já processado, então lá atualizar_resumos refaz
+os resumos inteiros. Os relatórios de receita, unidades e ticket médio por
+loja, funcionário, dia, produto ou categoria leem só esses resumos.
+
+Para cortes que os resumos não cobrem, extrair_itens monta um DataFrame colunar
+dos itens vendidos e fatiar agrega com pandas (opcional: pip install
+farmasil[analise]).
+
+Entram nos resumos os pedidos com status "Finalizado" e data (os gravados antes
+da coluna data_hora ficam sem ela, ver farmasil.migracoes); a loja de um
+pedido é a do funcionário que o registrou (0 se não houver).
+"""
+from sqlalchemy import Date, and_, func, null, select, true, type_coerce
+from collections import namedtuple
+import csv
+import json
+import sys
+
+from farmasil.modelos import (LOTE_LISTAGEM, Funcionario, ItensPedido, Pedido, ProcessamentoVendas, Produto,
+                              VendaDiaria, VendaDiariaProduto)
+from farmasil.metricas import operacao
+
+LinhaVendas = namedtuple('LinhaVendas', ['chave', 'pedidos', 'unidades', 'receita', 'ticket_medio'])
+
+# Dimensão do relatório -> (tabela de resumo, coluna agrupada)
+DIMENSOES = {
+    'loja': (VendaDiaria, VendaDiaria.loja_id),
+    'funcionario': (VendaDiaria, VendaDiaria.funcionario_id),
+    'dia': (VendaDiaria, VendaDiaria.dia),
+    'produto': (VendaDiariaProduto, VendaDiariaProduto.produto_id),
+    'categoria': (VendaDiariaProduto, VendaDiariaProduto.categoria),
+}
+
+# Nomes das dimensões aceitos por fatiar, além das próprias colunas
+COLUNA_DIMENSAO = {'loja': 'loja_id', 'funcionario': 'funcionario_id', 'produto': 'produto_id'}
+
+COLUNAS_ITENS = ['pedido_id', 'dia', 'loja_id', 'funcionario_id', 'produto_id', 'categoria', 'quantidade',
+                 'preco_centavos']
+
+def _insert_com_soma(session, tabela, consulta, chaves, linhas=None):
+    """INSERT ... SELECT (ou das `linhas` já agregadas) que soma os valores novos aos antigos nas chaves existentes."""
+    dialeto = session.get_bind().dialect.name
+    if dialeto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialeto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise ValueError(f"Resumos de vendas não disponíveis para o banco {dialeto}.")
+    colunas = [coluna.name for coluna in consulta.selected_columns]
+    if linhas is None:
+        # O WHERE evita a ambiguidade do SQLite entre o ON da junção e o ON CONFLICT
+        instrucao = insert(tabela).from_select(colunas, consulta.where(true()))
+    else:
+        instrucao = insert(tabela)
+    somas = {nome: tabela.c[nome] + instrucao.excluded[nome] for nome in colunas
+             if nome not in chaves and nome != 'categoria'}
+    session.execute(instrucao.on_conflict_do_update(index_elements=chaves, set_=somas), linhas)
+
+def _agregacoes(pedidos):
+    """(tabela de resumo, consulta agregada, chaves) dos pedidos que satisfazem a condição `pedidos`."""
+    # O dia sai do SQL como texto AAAA-MM-DD; o tipo Date o converte quando a linha é lida
+    dia = type_coerce(func.date(Pedido.data_hora), Date)
+    loja = func.coalesce(Funcionario.loja_id, 0)
+    por_pedido = (
+        select(Pedido.id.label('pedido_id'), dia.label('dia'), loja.label('loja_id'), Pedido.funcionario_id,
+               func.sum(ItensPedido.quantidade).label('unidades'),
+               func.sum(ItensPedido.quantidade * ItensPedido.preco_centavos).label('receita_centavos'))
+        .join(ItensPedido, ItensPedido.pedido_id == Pedido.id)
+        .outerjoin(Funcionario, Funcionario.id == Pedido.funcionario_id)
+        .where(pedidos)
+        .group_by(Pedido.id, dia, loja, Pedido.funcionario_id)
+    ).subquery()
+    diaria = select(
+        por_pedido.c.dia, por_pedido.c.loja_id, por_pedido.c.funcionario_id,
+        func.count().label('pedidos'), func.sum(por_pedido.c.unidades).label('unidades'),
+        func.sum(por_pedido.c.receita_centavos).label('receita_centavos')
+    ).group_by(por_pedido.c.dia, por_pedido.c.loja_id, por_pedido.c.funcionario_id)
+    por_produto = (
+        select(dia.label('dia'), loja.label('loja_id'), ItensPedido.produto_id,
+               func.coalesce(func.max(Produto.categoria), '').label('categoria'),
+               func.count(func.distinct(Pedido.id)).label('pedidos'),
+               func.sum(ItensPedido.quantidade).label('unidades'),
+               func.sum(ItensPedido.quantidade * ItensPedido.preco_centavos).label('receita_centavos'))
+        .select_from(Pedido)
+        .join(ItensPedido, ItensPedido.pedido_id == Pedido.id)
+        .outerjoin(Funcionario, Funcionario.id == Pedido.funcionario_id)
+        .outerjoin(Produto, Produto.id == ItensPedido.produto_id)
+        .where(pedidos)
+        .group_by(dia, loja, ItensPedido.produto_id)
+    )
+    return [(VendaDiaria.__table__, diaria, ['dia', 'loja_id', 'funcionario_id']),
+            (VendaDiariaProduto.__table__, por_produto, ['dia', 'loja_id', 'produto_id'])]
+
+def _agregar_novos(session):
+    ultimo = session.query(func.coalesce(func.max(ProcessamentoVendas.ultimo_pedido_id), 0)).scalar()
+    maximo = session.query(func.max(Pedido.id)).scalar()
+    if maximo is None or maximo <= ultimo:
+        return 0
+
+    novos = and_(Pedido.id > ultimo, Pedido.id <= maximo, Pedido.status == "Finalizado", Pedido.data_hora.isnot(None))
+    for tabela, consulta, chaves in _agregacoes(novos):
+        _insert_com_soma(session, tabela, consulta, chaves)
+
+    processados = session.query(func.count(Pedido.id)).filter(novos).scalar()
+    session.add(ProcessamentoVendas(ultimo_pedido_id=maximo, pedidos=processados))
+    return processados
+
+@operacao('vendas.atualizar_resumos')
+def atualizar_resumos(session):
+    """Agrega aos resumos os pedidos criados desde a última atualização e retorna quantos foram.
+
+    Fora do SQLite chama reconstruir_resumos (ver o início do módulo) e
+    retorna quantos pedidos do banco principal foram agregados.
+    """
+    if session.get_bind().dialect.name != 'sqlite':
+        return reconstruir_resumos(session)
+    processados = _agregar_novos(session)
+    session.commit()
+    return processados
+
+@operacao('vendas.reconstruir_resumos')
+def reconstruir_resumos(session):
+    """Apaga os resumos e agrega todos os pedidos de novo (ex.: depois de corrigir dados antigos).
+
+    Os pedidos arquivados (farmasil.arquivamento) são agregados no banco de
+    cada mês e somados aos resumos antes dos pedidos do banco principal.
+    """
+    from farmasil.arquivamento import consultar
+    for modelo in (VendaDiaria, VendaDiariaProduto, ProcessamentoVendas):
+        session.query(modelo).delete(synchronize_session=False)
+    session.flush()
+    arquivados = and_(Pedido.status == "Finalizado", Pedido.data_hora.isnot(None))
+    for tabela, consulta, chaves in _agregacoes(arquivados):
+        linhas = [dict(linha._mapping) for linha in consultar(session, consulta, quente=False)]
+        if linhas:
+            _insert_com_soma(session, tabela, consulta, chaves, linhas)
+    processados = _agregar_novos(session)
+    session.commit()
+    return processados
+
+def linha_vendas(chave, pedidos, unidades, receita_centavos):
+    """LinhaVendas em reais a partir da soma exata em centavos."""
+    return LinhaVendas(chave, pedidos, unidades, receita_centavos / 100,
+                       receita_centavos / pedidos / 100 if pedidos else None)
+
+def _somas(session, por, inicio=None, fim=None, loja_id=None):
+    """(chave, pedidos, unidades, receita em centavos) por dimensão, somados pelo banco."""
+    if por not in DIMENSOES:
+        raise ValueError(f"Dimensão desconhecida: {por}. Use uma de {', '.join(DIMENSOES)}.")
+    modelo, coluna = DIMENSOES[por]
+    pedidos = func.sum(modelo.pedidos) if por != 'categoria' else null()
+    consulta = session.query(coluna, pedidos, func.sum(modelo.unidades), func.sum(modelo.receita_centavos))
+    if inicio is not None:
+        consulta = consulta.filter(modelo.dia >= inicio)
+    if fim is not None:
+        consulta = consulta.filter(modelo.dia < fim)
+    if loja_id is not None:
+        consulta = consulta.filter(modelo.loja_id == loja_id)
+    return consulta.group_by(coluna).order_by(coluna).all()
+
+@operacao('vendas.relatorio')
+def relatorio(session, por='loja', inicio=None, fim=None, loja_id=None):
+    """Pedidos, unidades, receita e ticket médio por dimensão, lidos dos resumos.
+
+    `por` é uma de DIMENSOES; [inicio, fim) filtra os dias. Por categoria o
+    número de pedidos não é somável (um pedido leva várias categorias), então
+    pedidos e ticket_medio vêm como None. A receita é somada em centavos
+    inteiros e só convertida para reais no fim.
+    """
+    return [linha_vendas(*linha) for linha in _somas(session, por, inicio, fim, loja_id)]
+
+def _pandas():
+    try:
+        import numpy
+        import pandas
+    except ImportError:
+        raise RuntimeError("A análise ad hoc precisa de numpy e pandas: pip install farmasil[analise].") from None
+    return numpy, pandas
+
+@operacao('vendas.extrair_itens')
+def extrair_itens(session, inicio=None, fim=None, lote=LOTE_LISTAGEM * 100):
+    """DataFrame colunar dos itens vendidos (COLUNAS_ITENS), lido do banco em blocos de `lote` linhas.
+
+    Inclui os pedidos arquivados dos meses que cruzam [inicio, fim).
+    """
+    from farmasil.arquivamento import resultados
+    numpy, pandas = _pandas()
+    consulta = (
+        # O dia já vem como texto AAAA-MM-DD, sem converter um datetime por linha
+        select(Pedido.id, func.date(Pedido.data_hora), func.coalesce(Funcionario.loja_id, 0), Pedido.funcionario_id,
+               ItensPedido.produto_id, func.coalesce(Produto.categoria, ''), ItensPedido.quantidade,
+               ItensPedido.preco_centavos)
+        .join(ItensPedido, ItensPedido.pedido_id == Pedido.id)
+        .outerjoin(Funcionario, Funcionario.id == Pedido.funcionario_id)
+        .outerjoin(Produto, Produto.id == ItensPedido.produto_id)
+        .where(Pedido.status == "Finalizado", Pedido.data_hora.isnot(None))
+    )
+    if inicio is not None:
+        consulta = consulta.where(Pedido.data_hora >= inicio)
+    if fim is not None:
+        consulta = consulta.where(Pedido.data_hora < fim)
+    blocos = []
+    # Direto pelo Core: as linhas não passam pela camada de carregamento do ORM. Os meses
+    # arquivados que cruzam [inicio, fim) vêm antes do banco principal (farmasil.arquivamento)
+    partes = (parte for resultado in resultados(session, consulta.execution_options(yield_per=lote), inicio, fim)
+              for parte in resultado.partitions())
+    for parte in partes:
+        colunas = list(zip(*parte))
+        blocos.append(pandas.DataFrame({
+            'pedido_id': numpy.array(colunas[0], dtype=numpy.int64),
+            'dia': pandas.to_datetime(numpy.array(colunas[1]), format='%Y-%m-%d'),
+            'loja_id': numpy.array(colunas[2], dtype=numpy.int64),
+            'funcionario_id': numpy.array(colunas[3], dtype=numpy.int64),
+            'produto_id': numpy.array(colunas[4], dtype=numpy.int64),
+            'categoria': pandas.Categorical(colunas[5]),
+            'quantidade': numpy.array(colunas[6], dtype=numpy.int64),
+            'preco_centavos': numpy.array(colunas[7], dtype=numpy.int64),
+        }))
+    if not blocos:
+        return pandas.DataFrame({coluna: [] for coluna in COLUNAS_ITENS})
+    itens = pandas.concat(blocos, ignore_index=True)
+    itens['categoria'] = itens['categoria'].astype('category')
+    return itens
+
+def fatiar(itens, por, **filtros):
+    """Agrega o DataFrame de extrair_itens pelas colunas `por` (ex.: ['loja', 'categoria']).
+
+    `filtros` restringe por igualdade antes de agregar (ex.: loja_id=3).
+    Retorna um DataFrame com pedidos, unidades, receita e ticket_medio. A receita
+    é somada em centavos num int64 e só então convertida para reais.
+    """
+    numpy, pandas = _pandas()
+    por = [COLUNA_DIMENSAO.get(coluna, coluna) for coluna in ([por] if isinstance(por, str) else por)]
+    mascara = numpy.ones(len(itens), dtype=bool)
+    for coluna, valor in filtros.items():
+        mascara &= (itens[coluna] == valor).to_numpy()
+    selecao = itens[mascara]
+    receita = selecao['quantidade'].to_numpy() * selecao['preco_centavos'].to_numpy()
+    agregado = (selecao.assign(receita_centavos=receita)
+                .groupby(por, observed=True, sort=True)
+                .agg(pedidos=('pedido_id', 'nunique'), unidades=('quantidade', 'sum'),
+                     receita_centavos=('receita_centavos', 'sum')))
+    agregado['receita'] = agregado.pop('receita_centavos') / 100
+    agregado['ticket_medio'] = agregado['receita'] / agregado['pedidos']
+    return agregado.reset_index()
+
+def _valor_json(valor):
+    # Escalares do numpy e datas
+    return valor.item() if hasattr(valor, 'item') else str(valor)
+
+def exportar_relatorio(linhas, destino=None, formato='csv', campos=LinhaVendas._fields):
+    """Grava linhas de relatorio (ou um DataFrame de fatiar) em CSV ou JSON.
+
+    `destino` pode ser um caminho, um arquivo texto aberto ou None (saída padrão).
+    `campos` nomeia as colunas das tuplas (ex.: LinhaFolha._fields para a folha).
+    Retorna quantas linhas foram escritas.
+    """
+    if formato not in ('csv', 'json'):
+        raise ValueError(f"Formato desconhecido: {formato}. Use csv ou json.")
+    if hasattr(linhas, 'itertuples'):
+        nomes = list(linhas.columns)
+        linhas = list(linhas.itertuples(index=False, name=None))
+    else:
+        nomes = list(campos)
+    if destino is None:
+        arquivo = sys.stdout
+    elif isinstance(destino, str):
+        arquivo = open(destino, 'w', newline='', encoding='utf-8')
+    else:
+        arquivo = destino
+    try:
+        if formato == 'csv':
+            escritor = csv.writer(arquivo)
+            escritor.writerow(nomes)
+            escritor.writerows(linhas)
+        else:
+            json.dump([dict(zip(nomes, linha)) for linha in linhas], arquivo, ensure_ascii=False, indent=2,
+                      default=_valor_json)
+            arquivo.write('\n')
+        return len(linhas)
+    finally:
+        if isinstance(destino, str):
+            arquivo.close()